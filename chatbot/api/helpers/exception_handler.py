@@ -9,4 +9,6 @@ class ResponseMessage(str, Enum):
     SUCCESS = 'Process successfully !!!'
     NOT_FOUND = 'Resource not found !!!'
     BAD_REQUEST = 'Invalid request !!!'
-    UNPROCESSABLE_ENTITY = 'Input is not allowed !!!'
\ No newline at end of file
+    UNPROCESSABLE_ENTITY = 'Input is not allowed !!!'
+    TOO_MANY_REQUESTS = 'Server is busy. Please try again later !!!'
+    GATEWAY_TIMEOUT = 'Server took too long to respond. Please try again later !!!'
\ No newline at end of file
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import asyncio
+import hmac
+import itertools
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs
+
+from fastapi import FastAPI
+
+from shared.profiling import SamplingProfiler
+from shared.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'x-profile'
+TOKEN_HEADER = 'x-profile-token'
+PROFILE_FORMATS = ('speedscope', 'collapsed')
+
+_UNSAFE = re.compile(r'[^A-Za-z0-9_.-]+')
+
+class ProfilingMiddleware:
+    """Runs selected requests under the sampling profiler.
+
+    A request carrying `X-Profile: speedscope|collapsed` (or `?profile=`)
+    and the admin token in `X-Profile-Token` gets the profile back instead
+    of its response; the original status is in `X-Profile-Status`. With
+    `PROFILING__SAMPLE_EVERY=N`, one request in N is profiled and its
+    profile is written to `PROFILING__DIRECTORY`, keeping the newest
+    `PROFILING__MAX_FILES`. Other requests only pay for a header lookup.
+
+    Args:
+        app: ASGI application to wrap.
+        settings (Settings): Application settings.
+    """
+
+    def __init__(self, app, settings: Settings):
+        self.app = app
+        self.settings = settings.profiling
+        self._counter = itertools.count(1)
+
+    def _requested_format(self, scope: Dict[str, Any]) -> Optional[str]:
+        headers = dict(scope.get('headers') or [])
+        requested = headers.get(PROFILE_HEADER.encode(), b'').decode()
+        if not requested and b'profile=' in scope.get('query_string', b''):
+            requested = parse_qs(scope['query_string'].decode()).get('profile', [''])[0]
+        if not requested:
+            return None
+        token = self.settings.admin_token
+        if not token or not hmac.compare_digest(headers.get(TOKEN_HEADER.encode(), b''), token.encode()):
+            logger.warning(f"Ignoring profile request without a valid token: {scope.get('path')}")
+            return None
+        return requested if requested in PROFILE_FORMATS else PROFILE_FORMATS[0]
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        requested = self._requested_format(scope)
+        every = self.settings.sample_every
+        sampled = requested is None and every > 0 and next(self._counter) % every == 0
+        if requested is None and not sampled:
+            return await self.app(scope, receive, send)
+
+        name = f"{scope['method']} {scope['path']}"
+        profiler = SamplingProfiler(interval=self.settings.interval_ms / 1000).start()
+        if sampled:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                profiler.stop()
+                # Rendering a profile takes a while, keep it off the event loop
+                await asyncio.to_thread(self._store, profiler, name)
+            return
+
+        messages: List[Dict[str, Any]] = []
+
+        async def capture(message):
+            messages.append(message)
+
+        try:
+            await self.app(scope, receive, capture)
+        finally:
+            profiler.stop()
+        status = next((message['status'] for message in messages if message['type'] == 'http.response.start'), 500)
+        if requested == 'collapsed':
+            body, media_type = (await asyncio.to_thread(profiler.collapsed)).encode(), b'text/plain; charset=utf-8'
+        else:
+            body, media_type = json.dumps(await asyncio.to_thread(profiler.speedscope, name)).encode(), b'application/json'
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', media_type),
+                (b'content-length', str(len(body)).encode()),
+                (b'x-profile-status', str(status).encode()),
+                (b'x-profile-duration-ms', f'{profiler.duration * 1000:.1f}'.encode()),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    def _store(self, profiler: SamplingProfiler, name: str) -> None:
+        directory = self.settings.directory
+        try:
+            os.makedirs(directory, exist_ok=True)
+            file_name = (
+                f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}-{int(profiler.duration * 1000)}ms-"
+                f"{_UNSAFE.sub('_', name)[:80]}.speedscope.json"
+            )
+            with open(os.path.join(directory, file_name), 'w', encoding='utf-8') as f:
+                json.dump(profiler.speedscope(name), f)
+            profiles = sorted(
+                (entry for entry in os.scandir(directory) if entry.name.endswith('.speedscope.json')),
+                key=lambda entry: entry.stat().st_mtime,
+            )
+            for entry in profiles[:max(0, len(profiles) - self.settings.max_files)]:
+                os.remove(entry.path)
+        except Exception as e:
+            logger.error(f"Error storing the profile of {name}: {e}")
+
+def add_profiling(app: FastAPI, settings: Settings) -> bool:
+    """Wrap the app with the profiling middleware when it is configured.
+
+    Without `PROFILING__ADMIN_TOKEN` and `PROFILING__SAMPLE_EVERY` the
+    middleware is not installed at all.
+
+    Args:
+        app (FastAPI): Application.
+        settings (Settings): Application settings.
+
+    Returns:
+        bool: Whether the middleware was installed.
+    """
+    if not settings.profiling.admin_token and settings.profiling.sample_every <= 0:
+        return False
+    app.add_middleware(ProfilingMiddleware, settings=settings)
+    return True
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from typing import List, Optional
+
+from shared.base import BaseModel
+
+class APICandidateSearchInput(BaseModel):
+    query: str
+    limit: int = 10
+    offset: int = 0
+    chunks_per_candidate: int = 3
+    generate: bool = False
+
+class APICandidateChunk(BaseModel):
+    content: str
+    score: float
+
+class APICandidateMatch(BaseModel):
+    candidate: str
+    score: float
+    chunks: List[APICandidateChunk]
+
+class APICandidateSearchOutput(BaseModel):
+    candidates: List[APICandidateMatch]
+    response: Optional[str] = None
+    next_offset: Optional[int] = None
+
+class APICandidateSuggestOutput(BaseModel):
+    candidates: List[str]
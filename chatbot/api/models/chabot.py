@@ -1,10 +1,36 @@
 from __future__ import annotations
 
+from typing import Dict, List, Optional
+
 from shared.base import BaseModel
 
 class APIInput(BaseModel):
     query: str
     user_name: str
+    session_id: Optional[str] = None
 
 class APIOutput(BaseModel):
-    response: str
\ No newline at end of file
+    response: str
+    session_id: str
+
+
+class APIBatchInput(BaseModel):
+    queries: List[str]
+    user_name: str
+
+class APIBatchAnswer(BaseModel):
+    query: str
+    response: str
+    timings: Dict[str, float]
+    error: Optional[str] = None
+
+class APIBatchOutput(BaseModel):
+    answers: List[APIBatchAnswer]
+    timings: Dict[str, float]
+
+
+class APIWarmInput(BaseModel):
+    user_name: str
+
+class APIWarmOutput(BaseModel):
+    chunks: int
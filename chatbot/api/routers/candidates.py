@@ -0,0 +1,227 @@
+from __future__ import annotations
+import asyncio
+import logging
+from fastapi import APIRouter
+from fastapi import Query
+from fastapi import status
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+from api.models.candidates import APICandidateSearchInput
+from api.models.candidates import APICandidateSearchOutput
+from api.models.candidates import APICandidateSuggestOutput
+from app.candidates import CandidateSearchService
+from app.candidates import CandidateSearchInput
+from app.candidates import CandidateSuggestInput
+from app.candidates import MAX_OFFSET
+from domain.generation import GenerationTimeoutError
+from shared.admission import AdmissionRejected
+from api.helpers.exception_handler import ResponseMessage
+from shared.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+candidates = APIRouter(prefix="/v1")
+
+MAX_PAGE_SIZE = 50
+MAX_CHUNKS_PER_CANDIDATE = 10
+MAX_SUGGESTIONS = 20
+
+try:
+    logger.info("Init candidates router")
+    candidate_service = CandidateSearchService(settings=Settings())
+    logger.info("Init candidate search service success!")
+except Exception as e:
+    logger.error(f"Error to init candidate search service: {str(e)}")
+    raise e
+
+async def load_candidate_directory() -> None:
+    # Resolve names from the first request instead of loading the directory inside it
+    if not candidate_service.settings.retrieval.name_resolution_enabled:
+        return
+    count = await asyncio.to_thread(candidate_service.load_directory)
+    logger.info(f"Loaded {count} candidate names")
+
+candidates.add_event_handler("startup", load_candidate_directory)
+
+@candidates.post(
+    '/candidates/search',
+    response_model=APICandidateSearchOutput,
+    responses={
+        status.HTTP_200_OK: {
+            'content': {
+                'application/json': {
+                    'example': {
+                        'message': ResponseMessage.SUCCESS,
+                        'info': {
+                            'status': True,
+                            'candidates': [
+                                {
+                                    'candidate': 'Nguyễn Văn A',
+                                    'score': 0.82,
+                                    'chunks': [
+                                        {'content': 'Kỹ năng: Docker, Kubernetes, Helm', 'score': 0.82},
+                                    ],
+                                },
+                            ],
+                            'response': None,
+                            'next_offset': 10,
+                        },
+                    },
+                },
+            },
+        },
+        status.HTTP_400_BAD_REQUEST: {
+            'description': f'Bad Request - limit must be 1-{MAX_PAGE_SIZE}, offset 0-{MAX_OFFSET} '
+                           f'and chunks_per_candidate 1-{MAX_CHUNKS_PER_CANDIDATE}',
+            'content': {
+                'application/json': {
+                    'example': {
+                        'message': ResponseMessage.BAD_REQUEST,
+                    },
+                },
+            },
+        },
+        status.HTTP_429_TOO_MANY_REQUESTS: {
+            'description': 'Too Many Requests - A pipeline stage is saturated, retry after the Retry-After header',
+            'content': {
+                'application/json': {
+                    'example': {
+                        'message': ResponseMessage.TOO_MANY_REQUESTS,
+                    },
+                },
+            },
+        },
+        status.HTTP_504_GATEWAY_TIMEOUT: {
+            'description': 'Gateway Timeout - The language model did not answer within the deadline',
+            'content': {
+                'application/json': {
+                    'example': {
+                        'message': ResponseMessage.GATEWAY_TIMEOUT,
+                    },
+                },
+            },
+        },
+    },
+)
+
+async def search_candidates(inputs: APICandidateSearchInput) -> APICandidateSearchOutput:
+
+    if (
+        not inputs.query.strip()
+        or not 1 <= inputs.limit <= MAX_PAGE_SIZE
+        or not 0 <= inputs.offset <= MAX_OFFSET
+        or not 1 <= inputs.chunks_per_candidate <= MAX_CHUNKS_PER_CANDIDATE
+    ):
+        logger.error(f"Invalid candidate search: {inputs}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ResponseMessage.BAD_REQUEST,
+        )
+
+    try:
+        response = await candidate_service.aprocess(
+            CandidateSearchInput(
+                query=inputs.query,
+                limit=inputs.limit,
+                offset=inputs.offset,
+                chunks_per_candidate=inputs.chunks_per_candidate,
+                generate=inputs.generate,
+            )
+        )
+        logger.info(f"Found {len(response.candidates)} candidates")
+        # A full page means there may be more candidates after it, unless they are past the offset cap
+        next_offset = inputs.offset + inputs.limit
+        if len(response.candidates) < inputs.limit or next_offset > MAX_OFFSET:
+            next_offset = None
+        return JSONResponse(
+            status_code=status.HTTP_200_OK,
+            content={
+                'message': ResponseMessage.SUCCESS,
+                'info': {
+                    'status': True,
+                    'candidates': [match.model_dump() for match in response.candidates],
+                    'response': response.response,
+                    'next_offset': next_offset,
+                }
+            }
+        )
+    except AdmissionRejected as e:
+        logger.warning(f"Request rejected: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=ResponseMessage.TOO_MANY_REQUESTS,
+            headers={'Retry-After': str(e.retry_after)},
+        )
+    except GenerationTimeoutError as e:
+        logger.error(f"Generation deadline exceeded: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=ResponseMessage.GATEWAY_TIMEOUT,
+        )
+    except Exception as e:
+        logger.error(f"Error searching candidates: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=ResponseMessage.INTERNAL_SERVER_ERROR,
+        )
+
+
+@candidates.get(
+    '/candidates',
+    response_model=APICandidateSuggestOutput,
+    responses={
+        status.HTTP_200_OK: {
+            'content': {
+                'application/json': {
+                    'example': {
+                        'message': ResponseMessage.SUCCESS,
+                        'info': {
+                            'status': True,
+                            'candidates': ['Nguyễn Văn A', 'Nguyễn Văn Anh'],
+                        },
+                    },
+                },
+            },
+        },
+        status.HTTP_400_BAD_REQUEST: {
+            'description': f'Bad Request - limit must be 1-{MAX_SUGGESTIONS}',
+            'content': {
+                'application/json': {
+                    'example': {
+                        'message': ResponseMessage.BAD_REQUEST,
+                    },
+                },
+            },
+        },
+    },
+)
+
+async def suggest_candidates(q: str = Query(''), limit: int = Query(10)) -> APICandidateSuggestOutput:
+
+    if not 1 <= limit <= MAX_SUGGESTIONS:
+        logger.error(f"Invalid candidate suggestion limit: {limit}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ResponseMessage.BAD_REQUEST,
+        )
+
+    try:
+        # The first call may load the directory from Qdrant
+        response = await asyncio.to_thread(candidate_service.suggest, CandidateSuggestInput(query=q, limit=limit))
+        return JSONResponse(
+            status_code=status.HTTP_200_OK,
+            content={
+                'message': ResponseMessage.SUCCESS,
+                'info': {
+                    'status': True,
+                    'candidates': response.candidates,
+                }
+            }
+        )
+    except Exception as e:
+        logger.error(f"Error suggesting candidates: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=ResponseMessage.INTERNAL_SERVER_ERROR,
+        )
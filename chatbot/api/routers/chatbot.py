@@ -1,14 +1,23 @@
 from __future__ import annotations
 import logging
+import uuid
 from fastapi import APIRouter
 from fastapi import status
 from fastapi import HTTPException
 from fastapi.responses import JSONResponse
+from fastapi.responses import StreamingResponse
 
 from api.models.chabot import APIInput
 from api.models.chabot import APIOutput
+from api.models.chabot import APIBatchInput
+from api.models.chabot import APIBatchOutput
+from api.models.chabot import APIWarmInput
+from api.models.chabot import APIWarmOutput
 from app.query import ChatbotService
 from app.query import ChatbotInput
+from app.query import ChatbotBatchInput
+from domain.generation import GenerationTimeoutError
+from shared.admission import AdmissionRejected
 from api.helpers.exception_handler import ResponseMessage
 from shared.settings import Settings
 
@@ -23,6 +32,19 @@ logger = logging.getLogger(__name__)
 
 chatbot = APIRouter(prefix="/v1")
 
+MAX_BATCH_QUERIES = 50
+
+# Ends a stream that fails after its first token, when the 200 status is already sent
+STREAM_ERROR_MARKER = '\n\n[ERROR] '
+
+try:
+    logger.info("Init chatbot router")
+    query_service = ChatbotService(settings=Settings())
+    logger.info("Init chatbot service success!")
+except Exception as e:
+    logger.error(f"Error to init chatbot service: {str(e)}")
+    raise e
+
 @chatbot.post(
     '/chatbot',
     response_model=APIOutput,
@@ -79,6 +101,26 @@ chatbot = APIRouter(prefix="/v1")
                 },
             },
         },
+        status.HTTP_429_TOO_MANY_REQUESTS: {
+            'description': 'Too Many Requests - A pipeline stage is saturated, retry after the Retry-After header',
+            'content': {
+                'application/json': {
+                    'example': {
+                        'message': ResponseMessage.TOO_MANY_REQUESTS,
+                    },
+                },
+            },
+        },
+        status.HTTP_504_GATEWAY_TIMEOUT: {
+            'description': 'Gateway Timeout - No model answered before the deadline',
+            'content': {
+                'application/json': {
+                    'example': {
+                        'message': ResponseMessage.GATEWAY_TIMEOUT,
+                    },
+                },
+            },
+        },
     },
 )
 
@@ -91,37 +133,313 @@ async def chatbot_service(inputs: APIInput) -> APIOutput:
             detail=ResponseMessage.BAD_REQUEST,
         )
     
+    session_id = inputs.session_id or str(uuid.uuid4())
     try:
-        chatbot_service = ChatbotService(settings=Settings())
-        logger.info("Init chatbot service success!")
+        response = await query_service.aprocess(
+            ChatbotInput(
+                query=inputs.query,
+                user_name=inputs.user_name,
+                session_id=session_id
+            )
+        )
+        logger.info("Chatbot processed query successfully")
+        return JSONResponse(
+            status_code=status.HTTP_200_OK,
+            content={
+                'message': ResponseMessage.SUCCESS,
+                'info': {
+                    'status': True,
+                    'response': response.response,
+                    'session_id': session_id
+                }
+            }
+        )
+    except AdmissionRejected as e:
+        logger.warning(f"Request rejected: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=ResponseMessage.TOO_MANY_REQUESTS,
+            headers={'Retry-After': str(e.retry_after)},
+        )
+    except GenerationTimeoutError as e:
+        logger.error(f"Generation deadline exceeded: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=ResponseMessage.GATEWAY_TIMEOUT,
+        )
     except Exception as e:
-        logger.error(f"Error to init chatbot service: {str(e)}")
+        logger.error(f"Error processing query: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=ResponseMessage.INTERNAL_SERVER_ERROR,
         )
-    
+
+@chatbot.post(
+    '/chatbot/stream',
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_200_OK: {
+            'description': (
+                'Response tokens as plain text, the session ID is sent in the X-Session-Id header. '
+                f'A stream failing midway ends with {STREAM_ERROR_MARKER.strip()} and the error message'
+            ),
+            'content': {
+                'text/plain': {
+                    'example': 'Ứng viên tốt nghiệp Đại học Bách khoa Hà Nội.',
+                },
+            },
+        },
+        status.HTTP_400_BAD_REQUEST: {
+            'description': 'Bad Request',
+            'content': {
+                'application/json': {
+                    'example': {
+                        'message': ResponseMessage.BAD_REQUEST,
+                    },
+                },
+            },
+        },
+        status.HTTP_429_TOO_MANY_REQUESTS: {
+            'description': 'Too Many Requests - A pipeline stage is saturated, retry after the Retry-After header',
+            'content': {
+                'application/json': {
+                    'example': {
+                        'message': ResponseMessage.TOO_MANY_REQUESTS,
+                    },
+                },
+            },
+        },
+    },
+)
+
+async def chatbot_stream(inputs: APIInput) -> StreamingResponse:
+
+    if inputs.query is None:
+        logger.error("Query is None")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ResponseMessage.BAD_REQUEST,
+        )
+
+    session_id = inputs.session_id or str(uuid.uuid4())
+    tokens = query_service.astream(
+        ChatbotInput(
+            query=inputs.query,
+            user_name=inputs.user_name,
+            session_id=session_id
+        )
+    )
+
+    # Wait for the first token so that rejections and early failures get a proper status code
     try:
-        response = chatbot_service.process(
-            ChatbotInput(
-                query=inputs.query,
-                user_name=inputs.user_name
+        first_token = await anext(tokens, '')
+    except AdmissionRejected as e:
+        logger.warning(f"Request rejected: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=ResponseMessage.TOO_MANY_REQUESTS,
+            headers={'Retry-After': str(e.retry_after)},
+        )
+    except GenerationTimeoutError as e:
+        logger.error(f"Generation deadline exceeded: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=ResponseMessage.GATEWAY_TIMEOUT,
+        )
+    except Exception as e:
+        logger.error(f"Error processing query: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=ResponseMessage.INTERNAL_SERVER_ERROR,
+        )
+
+    async def body():
+        try:
+            yield first_token
+            async for token in tokens:
+                yield token
+            logger.info("Chatbot streamed query successfully")
+        except GenerationTimeoutError as e:
+            logger.error(f"Generation deadline exceeded while streaming: {str(e)}")
+            yield STREAM_ERROR_MARKER + ResponseMessage.GATEWAY_TIMEOUT.value
+        except Exception as e:
+            logger.error(f"Error streaming query: {str(e)}")
+            yield STREAM_ERROR_MARKER + ResponseMessage.INTERNAL_SERVER_ERROR.value
+
+    return StreamingResponse(
+        body(),
+        media_type='text/plain; charset=utf-8',
+        headers={'X-Session-Id': session_id},
+    )
+
+@chatbot.post(
+    '/chatbot/batch',
+    response_model=APIBatchOutput,
+    responses={
+        status.HTTP_200_OK: {
+            'content': {
+                'application/json': {
+                    'example': {
+                        'message': ResponseMessage.SUCCESS,
+                        'info': {
+                            'status': True,
+                            'answers': [
+                                {
+                                    'query': 'Ứng viên học trường nào?',
+                                    'response': 'Ứng viên tốt nghiệp Đại học Bách khoa Hà Nội.',
+                                    'timings': {'generation_ms': 812.4, 'total_ms': 905.1},
+                                    'error': None,
+                                },
+                                {
+                                    'query': 'Ứng viên biết Python không?',
+                                    'response': '',
+                                    'timings': {'generation_ms': 30000.2, 'total_ms': 30012.7},
+                                    'error': 'timeout',
+                                },
+                            ],
+                            'timings': {'profile_ms': 0.4, 'embedding_ms': 41.2, 'retrieval_ms': 12.5, 'total_ms': 1630.8},
+                        },
+                    },
+                },
+            },
+        },
+        status.HTTP_400_BAD_REQUEST: {
+            'description': f'Bad Request - Between 1 and {MAX_BATCH_QUERIES} non-empty queries are required',
+            'content': {
+                'application/json': {
+                    'example': {
+                        'message': ResponseMessage.BAD_REQUEST,
+                    },
+                },
+            },
+        },
+        status.HTTP_429_TOO_MANY_REQUESTS: {
+            'description': 'Too Many Requests - A pipeline stage is saturated, retry after the Retry-After header',
+            'content': {
+                'application/json': {
+                    'example': {
+                        'message': ResponseMessage.TOO_MANY_REQUESTS,
+                    },
+                },
+            },
+        },
+    },
+)
+
+async def chatbot_batch(inputs: APIBatchInput) -> APIBatchOutput:
+
+    if not inputs.queries or len(inputs.queries) > MAX_BATCH_QUERIES or not all(query.strip() for query in inputs.queries):
+        logger.error(f"Invalid batch of {len(inputs.queries)} queries")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ResponseMessage.BAD_REQUEST,
+        )
+
+    try:
+        response = await query_service.abatch(
+            ChatbotBatchInput(
+                queries=inputs.queries,
+                user_name=inputs.user_name,
             )
         )
-        logger.info("Chatbot processed query successfully")
+        logger.info(f"Chatbot processed {len(inputs.queries)} queries successfully")
         return JSONResponse(
             status_code=status.HTTP_200_OK,
             content={
                 'message': ResponseMessage.SUCCESS,
                 'info': {
                     'status': True,
-                    'response': response.response
+                    'answers': [answer.model_dump() for answer in response.answers],
+                    'timings': response.timings,
                 }
             }
         )
+    except AdmissionRejected as e:
+        logger.warning(f"Request rejected: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=ResponseMessage.TOO_MANY_REQUESTS,
+            headers={'Retry-After': str(e.retry_after)},
+        )
     except Exception as e:
-        logger.error(f"Error processing query: {str(e)}")
+        logger.error(f"Error processing batch: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=ResponseMessage.INTERNAL_SERVER_ERROR,
+        )
+
+@chatbot.post(
+    '/chatbot/warm',
+    response_model=APIWarmOutput,
+    responses={
+        status.HTTP_200_OK: {
+            'content': {
+                'application/json': {
+                    'example': {
+                        'message': ResponseMessage.SUCCESS,
+                        'info': {
+                            'status': True,
+                            'chunks': 42,
+                        },
+                    },
+                },
+            },
+        },
+        status.HTTP_400_BAD_REQUEST: {
+            'description': 'Bad Request - user_name is empty',
+            'content': {
+                'application/json': {
+                    'example': {
+                        'message': ResponseMessage.BAD_REQUEST,
+                    },
+                },
+            },
+        },
+        status.HTTP_429_TOO_MANY_REQUESTS: {
+            'description': 'Too Many Requests - A pipeline stage is saturated, retry after the Retry-After header',
+            'content': {
+                'application/json': {
+                    'example': {
+                        'message': ResponseMessage.TOO_MANY_REQUESTS,
+                    },
+                },
+            },
+        },
+    },
+)
+
+async def chatbot_warm(inputs: APIWarmInput) -> APIWarmOutput:
+
+    if not inputs.user_name.strip():
+        logger.error("Empty user_name to warm")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ResponseMessage.BAD_REQUEST,
+        )
+
+    try:
+        chunks = await query_service.awarm(inputs.user_name)
+        logger.info(f"Cached {chunks} chunks of {inputs.user_name}")
+        return JSONResponse(
+            status_code=status.HTTP_200_OK,
+            content={
+                'message': ResponseMessage.SUCCESS,
+                'info': {
+                    'status': True,
+                    'chunks': chunks,
+                }
+            }
+        )
+    except AdmissionRejected as e:
+        logger.warning(f"Request rejected: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=ResponseMessage.TOO_MANY_REQUESTS,
+            headers={'Retry-After': str(e.retry_after)},
+        )
+    except Exception as e:
+        logger.error(f"Error warming cache: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=ResponseMessage.INTERNAL_SERVER_ERROR,
-        )
\ No newline at end of file
+        )
@@ -1,13 +1,17 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
+from typing import Optional
 from fastapi import APIRouter
 from fastapi import status
 from fastapi import HTTPException
 from fastapi import UploadFile
 from fastapi import File
+from fastapi import Form
 from api.helpers.exception_handler import ResponseMessage
+from shared.admission import AdmissionRejected
 from shared.settings import Settings
 from app.indexing import IndexingService
 from app.indexing import IndexingInput
@@ -77,6 +81,16 @@ except Exception as e:
                 },
             },
         },
+        status.HTTP_429_TOO_MANY_REQUESTS: {
+            'description': 'Too Many Requests - A pipeline stage is saturated, retry after the Retry-After header',
+            'content': {
+                'application/json': {
+                    'example': {
+                        'message': ResponseMessage.TOO_MANY_REQUESTS,
+                    },
+                },
+            },
+        },
         status.HTTP_404_NOT_FOUND: {
             'description': 'Destination Not Found',
             'content': {
@@ -90,7 +104,7 @@ except Exception as e:
     },
 )
 
-async def indexing_file(inputs: UploadFile = File(...)):
+async def indexing_file(inputs: UploadFile = File(...), candidate: Optional[str] = Form(None)):
 
     # Check if the file is None
     if inputs is None:
@@ -131,18 +145,28 @@ async def indexing_file(inputs: UploadFile = File(...)):
 
     try:
         logger.info("Starting indexing process...")
-        indexing_output = indexing_service.process(
+        indexing_output = await asyncio.to_thread(
+            indexing_service.process,
             inputs=IndexingInput(
                 raw_path=raw_path,
-                convert_path=convert_path
+                convert_path=convert_path,
+                candidate=candidate.strip() if candidate else None
             )
         )
         return {
             "message": ResponseMessage.SUCCESS,
             "info": {
-                "status": indexing_output.status
+                "status": indexing_output.status,
+                "report": indexing_output.report.model_dump() if indexing_output.report else None
             }
         }
+    except AdmissionRejected as e:
+        logger.warning(f"Request rejected: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=ResponseMessage.TOO_MANY_REQUESTS,
+            headers={'Retry-After': str(e.retry_after)},
+        )
     except FileExistsError as e:
         logger.error(f"File already exists: {e}")
         raise HTTPException(
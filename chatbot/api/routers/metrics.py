@@ -0,0 +1,12 @@
+from __future__ import annotations
+
+from fastapi import APIRouter
+
+from shared.metrics import metrics as registry
+
+metrics = APIRouter(prefix="/v1")
+
+@metrics.get('/metrics')
+async def get_metrics():
+    """Return the process-local counters, gauges and timings."""
+    return registry.snapshot()
@@ -0,0 +1,186 @@
+import asyncio
+import logging
+from functools import cached_property
+from typing import List, Optional
+
+from shared.base import BaseModel
+from shared.base import BaseService
+from shared.admission import get_limiter
+from shared.settings import Settings
+
+from domain.generation import GenerationService
+from domain.generation import GenerationInput
+from domain.indexing import EmbeddingService
+from domain.indexing import EmbeddingInput
+from domain.retrieval import CandidateDirectory
+from domain.retrieval import get_candidate_directory
+from infrastructure.qdrant import Qdrant
+from infrastructure.qdrant import CANDIDATE_KEY
+
+from .embedding import get_embedding_service
+
+logger = logging.getLogger(__name__)
+
+# Candidates a page may skip, every skipped one is still fetched and grouped by Qdrant
+MAX_OFFSET = 200
+
+class CandidateSearchInput(BaseModel):
+    query: str
+    limit: int = 10
+    offset: int = 0
+    chunks_per_candidate: int = 3
+    generate: bool = False
+
+class CandidateChunk(BaseModel):
+    content: str
+    score: float
+
+class CandidateMatch(BaseModel):
+    candidate: str
+    score: float
+    chunks: List[CandidateChunk]
+
+class CandidateSearchOutput(BaseModel):
+    candidates: List[CandidateMatch]
+    response: Optional[str] = None
+
+class CandidateSuggestInput(BaseModel):
+    query: str
+    limit: int = 10
+
+class CandidateSuggestOutput(BaseModel):
+    candidates: List[str]
+
+class CandidateSearchService(BaseService):
+    settings: Settings
+
+    @cached_property
+    def _get_embedding(self) -> EmbeddingService:
+        return get_embedding_service(self.settings)
+
+    @cached_property
+    def _get_qdrant(self) -> Qdrant:
+        return Qdrant(settings=self.settings)
+
+    @cached_property
+    def _get_generation(self) -> GenerationService:
+        return GenerationService(settings=self.settings)
+
+    @cached_property
+    def _get_directory(self) -> CandidateDirectory:
+        return get_candidate_directory(self.settings)
+
+    def load_directory(self) -> int:
+        """Load the candidate directory, so the first question does not wait for it.
+
+        Returns:
+            int: Number of known candidates.
+        """
+        self._get_directory.refresh()
+        return len(self._get_directory)
+
+    def suggest(self, inputs: CandidateSuggestInput) -> CandidateSuggestOutput:
+        """Autocomplete a candidate name from the candidate directory.
+
+        Args:
+            inputs (CandidateSuggestInput): Typed text and number of names.
+
+        Returns:
+            CandidateSuggestOutput: Matching candidate names, best first.
+        """
+        return CandidateSuggestOutput(candidates=self._get_directory.suggest(inputs.query, inputs.limit))
+
+    def _search(self, inputs: CandidateSearchInput) -> List[CandidateMatch]:
+        """Rank candidates with one grouped hybrid query.
+
+        Qdrant cannot skip groups, so the first `offset + limit` candidates are
+        fetched and the page is sliced out of them.
+
+        Args:
+            inputs (CandidateSearchInput): Query and page to return.
+
+        Returns:
+            List[CandidateMatch]: Candidates of the page, best first.
+        """
+        if not 0 <= inputs.offset <= MAX_OFFSET:
+            raise ValueError(f"Offset must be 0-{MAX_OFFSET}, got {inputs.offset}")
+
+        try:
+            with get_limiter(self.settings, "embedding").slot():
+                embedding_query = self._get_embedding.process(EmbeddingInput(query=inputs.query))
+        except Exception as e:
+            logger.error(f"Error generating embeddings: {e}")
+            raise e
+
+        try:
+            with get_limiter(self.settings, "vector_search").slot():
+                groups = self._get_qdrant.query_groups(
+                    dense_query=embedding_query.dense_embeddings[0],
+                    sparse_query=embedding_query.sparse_embeddings[0],
+                    limit=inputs.offset + inputs.limit,
+                    group_size=inputs.chunks_per_candidate,
+                ).groups
+        except Exception as e:
+            logger.error(f"Error searching candidates: {e}")
+            raise e
+
+        page = groups[inputs.offset:]
+        payloads = iter(self._get_qdrant.payloads([hit for group in page for hit in group.hits]))
+        return [
+            CandidateMatch(
+                candidate=str(group.id),
+                score=group.hits[0].score if group.hits else 0.0,
+                chunks=[
+                    CandidateChunk(content=next(payloads).get("content", ""), score=hit.score)
+                    for hit in group.hits
+                ],
+            )
+            for group in page
+        ]
+
+    def process(self, inputs: CandidateSearchInput) -> CandidateSearchOutput:
+        """Find the candidates whose CV best matches the query, without the LLM.
+
+        Args:
+            inputs (CandidateSearchInput): Query and page to return.
+
+        Returns:
+            CandidateSearchOutput: Ranked candidates with their best matching chunks.
+        """
+        return CandidateSearchOutput(candidates=self._search(inputs))
+
+    async def aprocess(self, inputs: CandidateSearchInput) -> CandidateSearchOutput:
+        """Find the matching candidates and, when asked, answer the query over them.
+
+        The search runs in a worker thread. With `generate`, a single LLM call
+        answers the query from the chunks of the returned page.
+
+        Args:
+            inputs (CandidateSearchInput): Query and page to return.
+
+        Returns:
+            CandidateSearchOutput: Ranked candidates, and the generated answer if requested.
+        """
+        candidates = await asyncio.to_thread(self._search, inputs)
+        if not inputs.generate or not candidates:
+            return CandidateSearchOutput(candidates=candidates)
+
+        retrieved_info = [
+            {CANDIDATE_KEY: match.candidate, "content": f"{match.candidate}: {chunk.content}"}
+            for match in candidates
+            for chunk in match.chunks
+        ]
+        try:
+            async with get_limiter(self.settings, "llm").aslot():
+                generation_output = await self._get_generation.aprocess(
+                    GenerationInput(
+                        query=inputs.query,
+                        chat_history=[],
+                        retrieved_info=retrieved_info
+                    )
+                )
+            logger.info("Candidate summary generated successfully.")
+        except Exception as e:
+            logger.error(f"Error generating response: {e}")
+            raise e
+        return CandidateSearchOutput(candidates=candidates, response=generation_output.response)
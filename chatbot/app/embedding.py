@@ -0,0 +1,28 @@
+import threading
+from typing import Optional
+
+from domain.indexing import EmbeddingService
+from infrastructure.embedding_server import RemoteEmbeddingService
+from shared.settings import Settings
+
+_embedding: Optional[EmbeddingService] = None
+_embedding_lock = threading.Lock()
+
+def get_embedding_service(settings: Settings) -> EmbeddingService:
+    """Return the process-wide embedding service, so the models are loaded once per worker.
+
+    Args:
+        settings (Settings): Application settings.
+
+    Returns:
+        EmbeddingService: Local models, or a client of the embedding server when
+            `EMBEDDING__SERVER_SOCKET` is set.
+    """
+    global _embedding
+    with _embedding_lock:
+        if _embedding is None:
+            if settings.embedding.server_socket:
+                _embedding = RemoteEmbeddingService(settings=settings)
+            else:
+                _embedding = EmbeddingService(settings=settings)
+        return _embedding
@@ -1,33 +1,48 @@
 import logging
 import os
 from functools import cached_property
+from typing import Any, Dict, List, Optional
 from domain.indexing import EmbeddingService
 from domain.indexing import EmbeddingInput
 from domain.indexing import Chunker
 from domain.indexing import ChunkInput
 from domain.indexing import DocumentProcessor
+from domain.profile import ProfileService
+from domain.retrieval import get_candidate_cache
+from domain.retrieval import get_candidate_directory
 
 from shared.base import BaseModel
 from shared.base import BaseService
+from shared.admission import get_limiter
 from shared.settings import Settings
+from shared.thread_budget import get_thread_budget
+from shared.token_counter import count_tokens
 from infrastructure.qdrant import Qdrant
 from infrastructure.qdrant import QdrantInput
+from infrastructure.qdrant import CANDIDATE_KEY
+
+from .embedding import get_embedding_service
+from .ingestion_report import IngestionRecorder
+from .ingestion_report import IngestionReport
+from .ingestion_report import store_report
 
 logger = logging.getLogger(__name__)
 
 class IndexingInput(BaseModel):
     raw_path: str
     convert_path: str
+    candidate: Optional[str] = None
 
 class IndexingOutput(BaseModel):
     status: bool
+    report: Optional[IngestionReport] = None
 
 class IndexingService(BaseService):
     settings: Settings
 
     @cached_property
     def _get_convert(self) -> DocumentProcessor:
-        return DocumentProcessor()
+        return DocumentProcessor(num_threads=get_thread_budget(self.settings).ocr_threads)
     
     @property
     def _get_chunker(self) -> Chunker:
@@ -35,14 +50,40 @@ class IndexingService(BaseService):
     
     @cached_property
     def _get_embedding(self) -> EmbeddingService:
-        return EmbeddingService(settings=self.settings)
+        return get_embedding_service(self.settings)
     
     @cached_property
     def _get_qdrant(self) -> Qdrant:
         return Qdrant(settings=self.settings)
+
+    @cached_property
+    def _get_profile(self) -> ProfileService:
+        return ProfileService(settings=self.settings)
     
+    @staticmethod
+    def _get_candidate(chunks: List[Dict[str, Any]]) -> Optional[str]:
+        """Take the first header of the CV as the candidate name.
+
+        Args:
+            chunks (List[Dict[str, Any]]): Chunks in document order.
+
+        Returns:
+            Optional[str]: Candidate name, None when the document has no headers.
+        """
+        for chunk in chunks:
+            for i in range(1, 5):
+                header = chunk["metadata"].get(f"Header_{i}")
+                if header:
+                    return header.strip()
+        return None
+
     def process(self, inputs: IndexingInput) -> IndexingOutput:
         """Process the input file and return the indexing output.
+
+        Time and memory of every stage are measured into an ingestion
+        report, returned with the output and appended to
+        `INDEXING__REPORT_PATH` when `INDEXING__REPORT_ENABLED`, for failed
+        documents too.
         
         Args:
             inputs (IndexingInput): Input file path.
@@ -50,13 +91,33 @@ class IndexingService(BaseService):
         Returns:
             IndexingOutput: Indexing output.
         """
+        recorder = IngestionRecorder(inputs.raw_path, trace_python=self.settings.indexing.report_tracemalloc)
+        try:
+            with recorder:
+                self._index(inputs, recorder)
+        finally:
+            if self.settings.indexing.report_enabled:
+                try:
+                    store_report(self.settings.indexing.report_path, recorder.report)
+                except Exception as e:
+                    logger.error(f"Error storing the ingestion report of {inputs.raw_path}: {e}")
+        return IndexingOutput(status=True, report=recorder.report)
+
+    def _index(self, inputs: IndexingInput, recorder: IngestionRecorder) -> None:
+        report = recorder.report
+        if os.path.exists(inputs.raw_path):
+            report.file_bytes = os.path.getsize(inputs.raw_path)
+
         # Convert the file to text
         try:
-            success, output = self._get_convert.process_file(inputs.raw_path)
+            with get_limiter(self.settings, "conversion").slot(), recorder.stage("convert"):
+                success, output, report.pages = self._get_convert.convert(inputs.raw_path)
             if not success:
                 logger.error("File conversion failed.")
                 raise ValueError("File conversion failed.")
             logger.info("File converted to text successfully.")
+            report.markdown_chars = len(output)
+            report.document_tokens = count_tokens(output)
             
             os.makedirs(os.path.dirname(inputs.convert_path), exist_ok=True)
             with open(inputs.convert_path, 'w', encoding='utf-8') as f:
@@ -68,26 +129,48 @@ class IndexingService(BaseService):
         
         # Chunk the text
         try:
-            chunks_output = self._get_chunker.process(
-                inputs=ChunkInput(
-                    convert_path=inputs.convert_path
+            with recorder.stage("chunk"):
+                chunks_output = self._get_chunker.process(
+                    inputs=ChunkInput(
+                        convert_path=inputs.convert_path
+                    )
                 )
-            )
+            chunk_tokens = [count_tokens(chunk["content"]) for chunk in chunks_output.chunks]
+            report.chunks = len(chunk_tokens)
+            report.chunk_tokens_total = sum(chunk_tokens)
+            report.chunk_tokens_max = max(chunk_tokens, default=0)
             if not chunks_output.chunks:
                 logger.error("Chunk is empty")
             logger.info("Text chunked successfully.")
+
+            candidate = inputs.candidate or self._get_candidate(chunks_output.chunks)
+            report.candidate = candidate
+            if candidate:
+                for chunk in chunks_output.chunks:
+                    chunk["metadata"][CANDIDATE_KEY] = candidate
+            else:
+                logger.warning(f"No candidate name found in {inputs.convert_path}")
         except Exception as e:
             logger.error(f"Error chunking text: {e}")
             raise e
+
+        # Extract the structured profile, the chatbot can still use RAG without it
+        if candidate and self.settings.profile.enabled:
+            try:
+                with recorder.stage("profile"):
+                    self._get_profile.save(output, candidate)
+            except Exception as e:
+                logger.error(f"Error extracting profile of {candidate}: {e}")
         
         # Embed the chunks
         try:
-            embeddings = self._get_embedding.process(
-                EmbeddingInput(
-                    chunks=chunks_output.chunks,
-                    query=""
+            with get_limiter(self.settings, "embedding").slot(), recorder.stage("embed"):
+                embeddings = self._get_embedding.process(
+                    EmbeddingInput(
+                        chunks=chunks_output.chunks,
+                        query=""
+                    )
                 )
-            )
             logger.info("Chunks embedded successfully.")
         except Exception as e:
             logger.error(f"Error embedding chunks: {e}")
@@ -95,15 +178,25 @@ class IndexingService(BaseService):
 
         # Store the embeddings in Qdrant
         try:
-            self._get_qdrant.insert(
-                inputs = QdrantInput(
-                    dense_embeddings=embeddings.dense_embeddings,
-                    sparse_embeddings=embeddings.sparse_embeddings,
-                    payload=embeddings.metadata,
+            with recorder.stage("store"):
+                self._get_qdrant.insert(
+                    inputs = QdrantInput(
+                        dense_embeddings=embeddings.dense_embeddings,
+                        sparse_embeddings=embeddings.sparse_embeddings,
+                        payload=embeddings.metadata,
+                        reduced_embeddings=embeddings.reduced_embeddings,
+                    )
                 )
-            )
             logger.info("Embeddings stored successfully.")
-            return IndexingOutput(status=True)
         except Exception as e:
             logger.error(f"Error storing embeddings: {e}")
-            raise e
\ No newline at end of file
+            raise e
+
+        # Every name the retrieval filter matches these chunks by
+        names = {
+            value for chunk in chunks_output.chunks for key, value in chunk["metadata"].items()
+            if key == CANDIDATE_KEY or key.startswith("Header_")
+        }
+        get_candidate_cache(self.settings).invalidate(names)
+        if candidate:
+            get_candidate_directory(self.settings).add(candidate)
\ No newline at end of file
@@ -0,0 +1,234 @@
+"""Per-document ingestion reports: time, memory and sizes of every indexing stage.
+
+`IndexingService.process` fills one report per document, returns it with
+the indexing output and appends it to `INDEXING__REPORT_PATH`. Summarize
+the reports of a corpus, to find the expensive documents, from the
+`chatbot` directory:
+
+    python -m app.ingestion_report /data/ingestion_reports.jsonl --top 20
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from datetime import timezone
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from shared.base import BaseModel
+from shared.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+# Seconds between two RSS readings while a document is ingested
+RSS_INTERVAL = 0.02
+
+def rss_bytes() -> int:
+    """Resident memory of the process, or its peak so far where /proc is not available."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes on Linux, bytes on macOS
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+class StageReport(BaseModel):
+    name: str
+    wall_ms: float
+    rss_start_mb: float
+    rss_end_mb: float
+    rss_peak_mb: float
+    # Peak of Python allocations, with INDEXING__REPORT_TRACEMALLOC only
+    python_peak_mb: Optional[float] = None
+
+class IngestionReport(BaseModel):
+    document: str
+    candidate: Optional[str] = None
+    status: str = 'ok'
+    error: Optional[str] = None
+    started_at: str
+    file_bytes: int = 0
+    pages: int = 0
+    markdown_chars: int = 0
+    document_tokens: int = 0
+    chunks: int = 0
+    chunk_tokens_total: int = 0
+    chunk_tokens_max: int = 0
+    total_ms: float = 0.0
+    rss_peak_mb: float = 0.0
+    stages: List[StageReport] = []
+
+def _mb(value: int) -> float:
+    return round(value / (1024 * 1024), 1)
+
+class IngestionRecorder:
+    """Measures the stages of one document's ingestion.
+
+    Wall time and RSS are always recorded: RSS is read every
+    `RSS_INTERVAL` seconds by a background thread, so a stage's peak is
+    seen even when memory is released before it ends, including memory of
+    native libraries such as torch and ONNX Runtime. With `trace_python`,
+    tracemalloc also records the peak of Python allocations, which slows
+    ingestion down. Both are process-wide, so documents ingested at the
+    same time in one worker add up.
+
+    Args:
+        document (str): Document path or name.
+        trace_python (bool): Record Python allocations with tracemalloc.
+    """
+
+    def __init__(self, document: str, trace_python: bool = False):
+        self.report = IngestionReport(
+            document=document,
+            started_at=datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        )
+        self.trace_python = trace_python
+        self._peak = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+        self._tracing = False
+
+    def _sample(self) -> None:
+        while not self._stop.wait(RSS_INTERVAL):
+            self._peak = max(self._peak, rss_bytes())
+
+    def __enter__(self) -> IngestionRecorder:
+        self._started = time.perf_counter()
+        self._peak = rss_bytes()
+        if self.trace_python and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        self._thread = threading.Thread(target=self._sample, name='ingestion-rss', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._stop.set()
+        self._thread.join()
+        if self._tracing:
+            tracemalloc.stop()
+        self.report.total_ms = round((time.perf_counter() - self._started) * 1000, 1)
+        self.report.rss_peak_mb = max([self.report.rss_peak_mb] + [stage.rss_peak_mb for stage in self.report.stages])
+        if exc is not None:
+            self.report.status = 'failed'
+            self.report.error = f'{type(exc).__name__}: {exc}'
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Measure one stage; the stage is recorded even when it raises."""
+        start_rss = rss_bytes()
+        self._peak = start_rss
+        if self.trace_python and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            end_rss = rss_bytes()
+            stage = StageReport(
+                name=name,
+                wall_ms=round((time.perf_counter() - started) * 1000, 1),
+                rss_start_mb=_mb(start_rss),
+                rss_end_mb=_mb(end_rss),
+                rss_peak_mb=_mb(max(self._peak, end_rss)),
+                python_peak_mb=_mb(tracemalloc.get_traced_memory()[1]) if self.trace_python and tracemalloc.is_tracing() else None,
+            )
+            self.report.stages.append(stage)
+            # The last line logged before an OOM kill names the stage that finished before it
+            logger.info(
+                f"Ingestion of {self.report.document}: {name} took {stage.wall_ms} ms, "
+                f"RSS {stage.rss_start_mb} -> {stage.rss_end_mb} MB, peak {stage.rss_peak_mb} MB"
+            )
+
+_write_lock = threading.Lock()
+
+def store_report(path: str, report: IngestionReport) -> None:
+    """Append a report to a JSONL file."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with _write_lock, open(path, 'a', encoding='utf-8') as f:
+        f.write(report.model_dump_json() + '\n')
+
+def load_reports(path: str) -> List[IngestionReport]:
+    with open(path, encoding='utf-8') as f:
+        return [IngestionReport.model_validate_json(line) for line in f if line.strip()]
+
+def summarize(reports: List[IngestionReport], top: int = 10) -> Dict:
+    """Aggregate reports per stage and rank the most expensive documents.
+
+    Args:
+        reports (List[IngestionReport]): Reports of a corpus.
+        top (int): Number of documents listed per ranking.
+
+    Returns:
+        Dict: Totals, per-stage time and memory, and the slowest and largest documents.
+    """
+    ok = [report for report in reports if report.status == 'ok']
+    stages: Dict[str, List[StageReport]] = {}
+    for report in reports:
+        for stage in report.stages:
+            stages.setdefault(stage.name, []).append(stage)
+    total_ms = sum(report.total_ms for report in ok) or 1.0
+
+    def document(report: IngestionReport) -> Dict:
+        slowest = max(report.stages, key=lambda stage: stage.wall_ms, default=None)
+        return {
+            'document': report.document,
+            'status': report.status,
+            'total_ms': report.total_ms,
+            'rss_peak_mb': report.rss_peak_mb,
+            'pages': report.pages,
+            'chunks': report.chunks,
+            'slowest_stage': slowest.name if slowest else None,
+        }
+
+    return {
+        'documents': len(reports),
+        'failed': len(reports) - len(ok),
+        'pages': sum(report.pages for report in ok),
+        'chunks': sum(report.chunks for report in ok),
+        'chunk_tokens': sum(report.chunk_tokens_total for report in ok),
+        'total_s': round(sum(report.total_ms for report in ok) / 1000, 1),
+        'ms_per_page': round(total_ms / max(1, sum(report.pages for report in ok)), 1),
+        'stages': {
+            name: {
+                'share_of_time': round(sum(stage.wall_ms for stage in items) / total_ms, 3),
+                'wall_ms_mean': round(float(np.mean([stage.wall_ms for stage in items])), 1),
+                'wall_ms_p95': round(float(np.percentile([stage.wall_ms for stage in items], 95)), 1),
+                'wall_ms_max': max(stage.wall_ms for stage in items),
+                'rss_growth_mb_max': max(round(stage.rss_peak_mb - stage.rss_start_mb, 1) for stage in items),
+                'rss_peak_mb_max': max(stage.rss_peak_mb for stage in items),
+            }
+            for name, items in stages.items()
+        },
+        'slowest': [document(report) for report in sorted(reports, key=lambda report: -report.total_ms)[:top]],
+        'largest_memory': [document(report) for report in sorted(reports, key=lambda report: -report.rss_peak_mb)[:top]],
+        'failures': [{'document': report.document, 'error': report.error} for report in reports if report.status != 'ok'][:top],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', nargs='?', default=None, help='report file, defaults to INDEXING__REPORT_PATH')
+    parser.add_argument('--top', type=int, default=10, help='documents listed per ranking')
+    args = parser.parse_args()
+
+    path = args.path or Settings().indexing.report_path
+    print(json.dumps(summarize(load_reports(path), args.top), indent=2, ensure_ascii=False))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Fit the PCA projection of the reduced dense vectors on the indexed corpus.
+
+Samples dense vectors from the collection, fits the projection and writes
+it next to the dense model, where `EMBEDDING__REDUCED_PATH` points. Only
+collections created after the projection was configured hold the reduced
+vector, so rebuild the index with it, from the `chatbot` directory:
+
+    python -m app.projection fit --dim 128 --output shared/weights/vietnamese-bi-encoder/pca_128.npz
+    EMBEDDING__REDUCED_PATH=shared/weights/vietnamese-bi-encoder/pca_128.npz python -m app.reindex build --switch
+
+Refit after the dense model changes, the projection only fits its vectors.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+
+import numpy as np
+
+from infrastructure.qdrant import Qdrant
+from shared.projection import DenseProjection
+from shared.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+def sample_dense_vectors(qdrant: Qdrant, sample: int) -> np.ndarray:
+    """Read up to `sample` dense vectors from the collection, in storage order.
+
+    Args:
+        qdrant (Qdrant): Collection to read.
+        sample (int): The maximum number of vectors.
+
+    Returns:
+        np.ndarray: Dense vectors, shape (count, dim).
+    """
+    vectors = []
+    offset = None
+    while len(vectors) < sample:
+        points, offset = qdrant.client.scroll(
+            collection_name=qdrant.settings.qdrant.name,
+            with_payload=False,
+            with_vectors=["dense"],
+            limit=min(1024, sample - len(vectors)),
+            offset=offset,
+        )
+        vectors.extend(point.vector["dense"] for point in points)
+        if offset is None:
+            break
+    return np.asarray(vectors, dtype=np.float32)
+
+def fit_projection(settings: Settings, reduced_dim: int, sample: int, output: str) -> dict:
+    """Fit the projection on vectors of the configured collection and save it.
+
+    Args:
+        settings (Settings): Settings of the collection to sample.
+        reduced_dim (int): Dimensions of the reduced vectors.
+        sample (int): The maximum number of vectors fitted on.
+        output (str): Path of the `.npz` file written.
+
+    Returns:
+        dict: Vectors fitted on and share of their variance kept.
+    """
+    vectors = sample_dense_vectors(Qdrant(settings=settings), sample)
+    if len(vectors) < reduced_dim:
+        raise ValueError(f"Only {len(vectors)} vectors indexed, need at least {reduced_dim} to fit the projection")
+    projection = DenseProjection.fit(vectors, reduced_dim)
+    projection.save(output)
+    logger.info(f"Saved {projection.dim} to {reduced_dim} dimension projection to {output}")
+    return {
+        'output': output,
+        'vectors': len(vectors),
+        'dim': projection.dim,
+        'reduced_dim': reduced_dim,
+        'explained_variance': round(projection.explained_variance(vectors), 4),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    fit_parser = commands.add_parser('fit', help='fit the projection on the indexed dense vectors')
+    fit_parser.add_argument('--dim', type=int, default=128, help='dimensions of the reduced vectors')
+    fit_parser.add_argument('--sample', type=int, default=50_000, help='vectors fitted on')
+    fit_parser.add_argument('--output', required=True)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    )
+    print(json.dumps(fit_projection(Settings(), args.dim, args.sample, args.output), indent=2))
+
+if __name__ == '__main__':
+    main()
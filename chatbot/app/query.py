@@ -1,96 +1,556 @@
+import asyncio
+import hashlib
 import logging
+import time
+import unicodedata
 from functools import cached_property
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from langchain_core.messages import BaseMessage
 from shared.base import BaseModel
 from shared.base import BaseService
+from shared.admission import AdmissionRejected
+from shared.admission import get_limiter
+from shared.metrics import metrics
 from shared.settings import Settings
+from shared.single_flight import SingleFlight
 
-from .indexing import IndexingService
+from domain.retrieval import CandidateDirectory
 from domain.retrieval import RetrievalService
+from domain.retrieval import RetrievalBatchInput
 from domain.retrieval import RetrievalInput
+from domain.retrieval import RetrievalOutput
+from domain.retrieval import QueryRouter
+from domain.retrieval import RouteInput
+from domain.retrieval import ROUTE_SPARSE
+from domain.retrieval import get_candidate_directory
 from domain.generation import GenerationService
 from domain.generation import GenerationInput
+from domain.generation import GenerationTimeoutError
+from domain.memory import MemoryService
+from domain.profile import ProfileService
+from domain.profile import ProfileQueryInput
+from domain.memory import MemoryInput
 from domain.indexing import EmbeddingService
 from domain.indexing import EmbeddingInput
+from domain.indexing import EmbeddingOutput
 from infrastructure.qdrant import Qdrant
 
+from .embedding import get_embedding_service
+
 logger = logging.getLogger(__name__)
 
+NO_CONTEXT_RESPONSE = "Không tìm thấy thông tin liên quan. Bạn có muốn hỏi câu khác không?"
+
 class ChatbotInput(BaseModel):
     query: str
     user_name: str
+    session_id: Optional[str] = None
 
 class ChatbotOutput(BaseModel):
     response: str
 
+class ChatbotBatchInput(BaseModel):
+    queries: List[str]
+    user_name: str
+
+class ChatbotBatchAnswer(BaseModel):
+    query: str
+    response: str
+    timings: Dict[str, float]
+    # `timeout`, `busy` or `error` when this question could not be answered, the others still are
+    error: Optional[str] = None
+
+class ChatbotBatchOutput(BaseModel):
+    answers: List[ChatbotBatchAnswer]
+    timings: Dict[str, float]
+
 class ChatbotService(BaseService):
     settings: Settings
 
-    @property
-    def _get_indexing(self) -> IndexingService:
-        return IndexingService(settings=self.settings)
-
-    @property
+    @cached_property
     def _get_retrieval(self) -> RetrievalService:
         return RetrievalService(settings=self.settings)
     
-    @property
+    @cached_property
     def _get_generation(self) -> GenerationService:
         return GenerationService(settings=self.settings)
 
+    @cached_property
+    def _get_memory(self) -> MemoryService:
+        return MemoryService(settings=self.settings)
+
     @cached_property
     def _get_qdrant(self) -> Qdrant:
         return Qdrant(settings=self.settings)
     
     @cached_property
     def _get_embedding(self) -> EmbeddingService:
-        return EmbeddingService(settings=self.settings)
+        return get_embedding_service(self.settings)
     
-    def process(self, inputs: ChatbotInput) -> ChatbotOutput:
-        """ Generate a response based on the input query.
+    @cached_property
+    def _get_profile(self) -> ProfileService:
+        return ProfileService(settings=self.settings)
+
+    def _answer_from_profile(self, inputs: ChatbotInput) -> Optional[str]:
+        """Answer factual questions from the candidate's extracted profile.
 
         Args:
             inputs (ChatbotInput): Input data containing the query.
 
         Returns:
-            ChatbotOutput: Output data containing the generated response.
+            Optional[str]: Answer, None when the question needs retrieval and generation.
+        """
+        if not self.settings.profile.enabled:
+            return None
+        try:
+            output = self._get_profile.process(ProfileQueryInput(query=inputs.query, candidate=inputs.user_name))
+        except Exception as e:
+            logger.error(f"Error reading candidate profile: {e}")
+            return None
+        if output.response is not None:
+            metrics.inc(f"profile_answers_{output.intent}")
+            logger.info(f"Answered {output.intent} question from the candidate profile.")
+        return output.response
+
+    @cached_property
+    def _get_router(self) -> QueryRouter:
+        return QueryRouter(settings=self.settings)
+
+    @cached_property
+    def _get_directory(self) -> CandidateDirectory:
+        return get_candidate_directory(self.settings)
+
+    def _resolve_name(self, user_name: str) -> str:
+        """Map the name typed in the frontend to the candidate name stored with the chunks.
+
+        Args:
+            user_name (str): Candidate name as received.
+
+        Returns:
+            str: Canonical name, or the name unchanged when it cannot be resolved.
         """
+        if not self.settings.retrieval.name_resolution_enabled:
+            return user_name
         try:
-            embedding_query = self._get_embedding.process(
-                EmbeddingInput(
-                    chunk=[],
-                    query=inputs.query
+            resolved = self._get_directory.resolve(user_name)
+        except Exception as e:
+            logger.error(f"Error resolving candidate name: {e}")
+            return user_name
+        if resolved is None:
+            return user_name
+        if resolved != user_name:
+            logger.info(f"Resolved candidate '{user_name}' to '{resolved}'")
+        return resolved
+
+    def _resolve(self, inputs: BaseModel) -> BaseModel:
+        return inputs.model_copy(update={"user_name": self._resolve_name(inputs.user_name)})
+
+    def _embed(self, inputs: ChatbotInput) -> EmbeddingOutput:
+        """Embed the query, skipping the dense model for keyword lookups when routing is enabled.
+
+        Args:
+            inputs (ChatbotInput): Input data containing the query.
+
+        Returns:
+            EmbeddingOutput: Sparse embedding, plus the dense one unless the sparse route was chosen.
+        """
+        try:
+            if not self.settings.retrieval.routing_enabled:
+                return self._get_embedding.process(
+                    EmbeddingInput(
+                        chunk=[],
+                        query=inputs.query
+                    )
+                )
+
+            sparse_output = self._get_embedding.process(EmbeddingInput(query=inputs.query, dense=False))
+            route = self._get_router.process(
+                RouteInput(
+                    query=inputs.query,
+                    sparse_query=sparse_output.sparse_embeddings[0],
+                    user_name=inputs.user_name,
                 )
+            ).route
+            metrics.inc(f"query_route_{route}")
+            if route == ROUTE_SPARSE:
+                return sparse_output
+
+            dense_output = self._get_embedding.process(EmbeddingInput(query=inputs.query, sparse=False))
+            return EmbeddingOutput(
+                dense_embeddings=dense_output.dense_embeddings,
+                sparse_embeddings=sparse_output.sparse_embeddings,
+                metadata=[]
             )
         except Exception as e:
             logger.error(f"Error generating embeddings: {e}")
             raise e
 
+    def _search(self, inputs: ChatbotInput, embedding_query: EmbeddingOutput) -> RetrievalOutput:
         try:
             retrieval_output = self._get_retrieval.process(
                 RetrievalInput(
-                    dense_query=embedding_query.dense_embeddings[0],
+                    dense_query=embedding_query.dense_embeddings[0] if embedding_query.dense_embeddings else None,
                     sparse_query=embedding_query.sparse_embeddings,
                     user_name=inputs.user_name,
+                    query=inputs.query,
                 )
             )
             logger.info("Information retrieved successfully.")
-            if not retrieval_output.context:
-                return ChatbotOutput(response="Không tìm thấy thông tin liên quan. Bạn có muốn hỏi câu khác không?")
+            return retrieval_output
         except Exception as e:
             logger.error(f"Error retrieving information: {e}")
             raise e
-        
+
+    def _retrieve(self, inputs: ChatbotInput) -> RetrievalOutput:
+        """Embed the query and retrieve the candidate's matching chunks.
+
+        Args:
+            inputs (ChatbotInput): Input data containing the query.
+
+        Returns:
+            RetrievalOutput: Retrieved chunks.
+        """
+        with get_limiter(self.settings, "embedding").slot():
+            embedding_query = self._embed(inputs)
+        with get_limiter(self.settings, "vector_search").slot():
+            return self._search(inputs, embedding_query)
+
+    async def _aretrieve(self, inputs: ChatbotInput) -> RetrievalOutput:
+        """Embed the query and retrieve the candidate's matching chunks in worker threads.
+
+        Args:
+            inputs (ChatbotInput): Input data containing the query.
+
+        Returns:
+            RetrievalOutput: Retrieved chunks.
+        """
+        async with get_limiter(self.settings, "embedding").aslot():
+            embedding_query = await asyncio.to_thread(self._embed, inputs)
+        async with get_limiter(self.settings, "vector_search").aslot():
+            return await asyncio.to_thread(self._search, inputs, embedding_query)
+
+    def _load_history(self, inputs: ChatbotInput) -> List[BaseMessage]:
         try:
-            generation_output = self._get_generation.process(
-                GenerationInput(
-                    query=inputs.query,
-                    chat_history=[],
-                    retrieved_info=retrieval_output.context
+            return self._get_memory.process(
+                MemoryInput(session_id=inputs.session_id)
+            ).chat_history
+        except Exception as e:
+            logger.error(f"Error loading chat history: {e}")
+            raise e
+
+    def _remember(self, inputs: ChatbotInput, response: str) -> None:
+        try:
+            self._get_memory.update(inputs.session_id, inputs.query, response)
+        except Exception as e:
+            logger.error(f"Error saving chat history: {e}")
+
+    def _get_flight_key(self, inputs: ChatbotInput, chat_history: List[BaseMessage]) -> Tuple[str, str, str]:
+        """Key identical questions about the same candidate with the same conversation so far.
+
+        Args:
+            inputs (ChatbotInput): Input data containing the query.
+            chat_history (List[BaseMessage]): History the answer depends on.
+
+        Returns:
+            Tuple[str, str, str]: Candidate, normalized query and history digest.
+        """
+        def normalize(text: str) -> str:
+            text = unicodedata.normalize("NFC", text).casefold()
+            return " ".join(text.split()).rstrip(" ?!.")
+
+        history = hashlib.sha1(
+            "\x1e".join(f"{message.type}:{message.content}" for message in chat_history).encode()
+        ).hexdigest() if chat_history else ""
+        return normalize(inputs.user_name), normalize(inputs.query), history
+
+    @cached_property
+    def _get_flights(self) -> SingleFlight:
+        return SingleFlight()
+
+    async def awarm(self, user_name: str) -> int:
+        """Load a candidate's chunks into the retrieval cache, e.g. once the candidate is picked in the UI.
+
+        Args:
+            user_name (str): Candidate name.
+
+        Returns:
+            int: Number of cached chunks, 0 when the cache is disabled.
+        """
+        try:
+            async with get_limiter(self.settings, "vector_search").aslot():
+                return await asyncio.to_thread(lambda: self._get_retrieval.warm(self._resolve_name(user_name)))
+        except Exception as e:
+            logger.error(f"Error warming the cache of {user_name}: {e}")
+            raise e
+
+    def process(self, inputs: ChatbotInput) -> ChatbotOutput:
+        """ Generate a response based on the input query.
+
+        Args:
+            inputs (ChatbotInput): Input data containing the query.
+
+        Returns:
+            ChatbotOutput: Output data containing the generated response.
+        """
+        inputs = self._resolve(inputs)
+        profile_answer = self._answer_from_profile(inputs)
+        if profile_answer is not None:
+            self._remember(inputs, profile_answer)
+            return ChatbotOutput(response=profile_answer)
+
+        retrieval_output = self._retrieve(inputs)
+        if not retrieval_output.context:
+            return ChatbotOutput(response=NO_CONTEXT_RESPONSE)
+
+        try:
+            with get_limiter(self.settings, "llm").slot():
+                generation_output = self._get_generation.process(
+                    GenerationInput(
+                        query=inputs.query,
+                        chat_history=self._load_history(inputs),
+                        retrieved_info=retrieval_output.context
+                    )
                 )
-            )
             logger.info("Response generated successfully.")
         except Exception as e:
             logger.error(f"Error generating response: {e}")
             raise e
-        
-        return ChatbotOutput(response=generation_output.response)
\ No newline at end of file
+
+        self._remember(inputs, generation_output.response)
+        return ChatbotOutput(response=generation_output.response)
+
+    async def _answer(self, inputs: ChatbotInput, chat_history: List[BaseMessage]) -> Tuple[ChatbotOutput, bool]:
+        # Also tells whether the answer was generated, profile and no-context answers are not
+        profile_answer = await asyncio.to_thread(self._answer_from_profile, inputs)
+        if profile_answer is not None:
+            return ChatbotOutput(response=profile_answer), False
+
+        retrieval_output = await self._aretrieve(inputs)
+        if not retrieval_output.context:
+            return ChatbotOutput(response=NO_CONTEXT_RESPONSE), False
+
+        try:
+            async with get_limiter(self.settings, "llm").aslot():
+                generation_output = await self._get_generation.aprocess(
+                    GenerationInput(
+                        query=inputs.query,
+                        chat_history=chat_history,
+                        retrieved_info=retrieval_output.context
+                    )
+                )
+            logger.info("Response generated successfully.")
+        except Exception as e:
+            logger.error(f"Error generating response: {e}")
+            raise e
+        return ChatbotOutput(response=generation_output.response), True
+
+    async def _answer_stream(self, inputs: ChatbotInput, chat_history: List[BaseMessage]) -> AsyncIterator[Tuple[str, bool]]:
+        # Tokens with whether they were generated, profile and no-context answers are not
+        profile_answer = await asyncio.to_thread(self._answer_from_profile, inputs)
+        if profile_answer is not None:
+            yield profile_answer, False
+            return
+
+        retrieval_output = await self._aretrieve(inputs)
+        if not retrieval_output.context:
+            yield NO_CONTEXT_RESPONSE, False
+            return
+
+        try:
+            async with get_limiter(self.settings, "llm").aslot():
+                async for token in self._get_generation.astream(
+                    GenerationInput(
+                        query=inputs.query,
+                        chat_history=chat_history,
+                        retrieved_info=retrieval_output.context
+                    )
+                ):
+                    yield token, True
+            logger.info("Response streamed successfully.")
+        except Exception as e:
+            logger.error(f"Error generating response: {e}")
+            raise e
+
+    async def aprocess(self, inputs: ChatbotInput) -> ChatbotOutput:
+        """ Generate a response without blocking the event loop.
+
+        Embedding, retrieval and session storage run in worker threads, the
+        LLM call goes through the deadline and hedging policy of
+        `GenerationService.aprocess`. Concurrent identical questions share a
+        single pipeline run.
+
+        Args:
+            inputs (ChatbotInput): Input data containing the query.
+
+        Returns:
+            ChatbotOutput: Output data containing the generated response.
+        """
+        inputs = await asyncio.to_thread(self._resolve, inputs)
+        chat_history = await asyncio.to_thread(self._load_history, inputs)
+        (output, generated), shared = await self._get_flights.do(
+            ("answer", *self._get_flight_key(inputs, chat_history)),
+            lambda: self._answer(inputs, chat_history),
+        )
+        if shared:
+            metrics.inc("chatbot_coalesced_requests")
+        if output.response == NO_CONTEXT_RESPONSE:
+            return output
+
+        if shared and generated:
+            metrics.inc("chatbot_llm_calls_saved")
+        await asyncio.to_thread(self._remember, inputs, output.response)
+        return output
+
+    async def astream(self, inputs: ChatbotInput) -> AsyncIterator[str]:
+        """ Stream a response token by token.
+
+        Concurrent identical questions share a single pipeline run, late
+        joiners first receive the tokens already produced.
+
+        Args:
+            inputs (ChatbotInput): Input data containing the query.
+
+        Yields:
+            str: Response tokens.
+        """
+        inputs = await asyncio.to_thread(self._resolve, inputs)
+        chat_history = await asyncio.to_thread(self._load_history, inputs)
+        tokens, shared = self._get_flights.stream(
+            ("stream", *self._get_flight_key(inputs, chat_history)),
+            lambda: self._answer_stream(inputs, chat_history),
+        )
+        if shared:
+            metrics.inc("chatbot_coalesced_requests")
+
+        parts = []
+        generated = False
+        async for token, from_llm in tokens:
+            parts.append(token)
+            generated = generated or from_llm
+            yield token
+
+        response = "".join(parts)
+        if response == NO_CONTEXT_RESPONSE:
+            return
+        if shared and generated:
+            metrics.inc("chatbot_llm_calls_saved")
+        await asyncio.to_thread(self._remember, inputs, response)
+
+    async def _answer_batch_item(self, query: str, retrieval_output: RetrievalOutput, limit: asyncio.Semaphore, started: float) -> ChatbotBatchAnswer:
+        response = NO_CONTEXT_RESPONSE
+        error = None
+        generation_start = time.perf_counter()
+        if retrieval_output.context:
+            try:
+                async with limit, get_limiter(self.settings, "llm").aslot():
+                    generation_start = time.perf_counter()
+                    generation_output = await self._get_generation.aprocess(
+                        GenerationInput(
+                            query=query,
+                            chat_history=[],
+                            retrieved_info=retrieval_output.context
+                        )
+                    )
+                response = generation_output.response
+            except GenerationTimeoutError as e:
+                logger.error(f"Generation deadline exceeded for batch query: {e}")
+                response, error = "", "timeout"
+            except AdmissionRejected as e:
+                logger.warning(f"Batch query rejected: {e}")
+                response, error = "", "busy"
+            except Exception as e:
+                logger.error(f"Error generating batch response: {e}")
+                response, error = "", "error"
+        finished = time.perf_counter()
+        return ChatbotBatchAnswer(
+            query=query,
+            response=response,
+            error=error,
+            timings={
+                "generation_ms": round((finished - generation_start) * 1000, 1),
+                "total_ms": round((finished - started) * 1000, 1),
+            },
+        )
+
+    async def abatch(self, inputs: ChatbotBatchInput) -> ChatbotBatchOutput:
+        """ Answer a list of questions about one candidate.
+
+        Questions the candidate profile answers skip the pipeline. The others
+        are embedded in one pass and retrieved with one Qdrant batch request,
+        then answered concurrently, at most `generation.batch_concurrency` at
+        a time. Batch questions are independent of each other and are not
+        stored in any session.
+
+        Args:
+            inputs (ChatbotBatchInput): Questions and the candidate they are about.
+
+        Returns:
+            ChatbotBatchOutput: Answers in question order, with per-question and shared stage timings.
+                A question whose generation failed has an empty response and its `error`.
+        """
+        started = time.perf_counter()
+        inputs = await asyncio.to_thread(self._resolve, inputs)
+        profile_answers = await asyncio.to_thread(lambda: [
+            self._answer_from_profile(ChatbotInput(query=query, user_name=inputs.user_name))
+            for query in inputs.queries
+        ])
+        pending = [query for query, answer in zip(inputs.queries, profile_answers) if answer is None]
+        profiled = embedded = retrieved = time.perf_counter()
+
+        retrieval_outputs = []
+        if pending:
+            try:
+                async with get_limiter(self.settings, "embedding").aslot():
+                    embedding_output = await asyncio.to_thread(
+                        self._get_embedding.process,
+                        EmbeddingInput(queries=pending)
+                    )
+            except Exception as e:
+                logger.error(f"Error generating embeddings: {e}")
+                raise e
+            embedded = time.perf_counter()
+
+            try:
+                async with get_limiter(self.settings, "vector_search").aslot():
+                    retrieval_outputs = await asyncio.to_thread(
+                        self._get_retrieval.process_batch,
+                        RetrievalBatchInput(
+                            dense_queries=embedding_output.dense_embeddings,
+                            sparse_queries=embedding_output.sparse_embeddings,
+                            user_name=inputs.user_name,
+                            queries=pending,
+                        )
+                    )
+                logger.info(f"Information retrieved successfully for {len(pending)} queries.")
+            except Exception as e:
+                logger.error(f"Error retrieving information: {e}")
+                raise e
+            retrieved = time.perf_counter()
+
+        limit = asyncio.Semaphore(max(1, self.settings.generation.batch_concurrency))
+        # A failed answer is reported in its own entry, the others are still returned
+        generated = iter(await asyncio.gather(*(
+            self._answer_batch_item(query, retrieval_output, limit, started)
+            for query, retrieval_output in zip(pending, retrieval_outputs)
+        )))
+        logger.info("Batch responses generated.")
+
+        profile_ms = round((profiled - started) * 1000, 1)
+        answers = [
+            next(generated) if answer is None else ChatbotBatchAnswer(
+                query=query,
+                response=answer,
+                timings={"generation_ms": 0.0, "total_ms": profile_ms},
+            )
+            for query, answer in zip(inputs.queries, profile_answers)
+        ]
+
+        return ChatbotBatchOutput(
+            answers=answers,
+            timings={
+                "profile_ms": profile_ms,
+                "embedding_ms": round((embedded - profiled) * 1000, 1),
+                "retrieval_ms": round((retrieved - embedded) * 1000, 1),
+                "total_ms": round((time.perf_counter() - started) * 1000, 1),
+            },
+        )
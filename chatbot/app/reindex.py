@@ -0,0 +1,403 @@
+"""Rebuild the index into a new collection version and switch the alias to it.
+
+`QDRANT__NAME` becomes an alias of versioned collections `<name>_v1`,
+`<name>_v2`, ... A build embeds every chunk again with the models and
+chunking configured in the environment of the job, into a new version,
+while searches keep reading the current one. Once the new version is
+verified, the alias moves to it in one atomic operation; `rollback` moves
+it back. From the `chatbot` directory, with the new settings in the
+environment:
+
+    EMBEDDING__DENSE_MODEL_PATH=... python -m app.reindex build --source chunks
+    python -m app.reindex switch your_collection_name_v2 --live-points 1234
+    python -m app.reindex rollback
+
+`switch` refuses a version when the current one gained or lost points
+since the build, which would otherwise be lost with the switch; pass the
+`live_points` the build printed, or `--force`.
+
+Searches embed queries with the models of the API process, so when the
+models change, switch the alias while rolling out the API with the same
+settings. A chunk size change only needs `build --switch`.
+
+New versions are created with the `QDRANT__PROFILE` of the job; `tune`
+applies it to the served collection in place instead:
+
+    QDRANT__PROFILE=low_memory python -m app.reindex tune
+"""
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from functools import cached_property
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from domain.indexing import Chunker
+from domain.indexing import ChunkInput
+from domain.indexing import EmbeddingInput
+from domain.indexing import EmbeddingService
+from infrastructure.qdrant import CANDIDATE_KEY
+from infrastructure.qdrant import Qdrant
+from infrastructure.qdrant import QdrantInput
+from shared.base import BaseModel
+from shared.base import BaseService
+from shared.settings import Settings
+
+from .indexing import IndexingService
+
+logger = logging.getLogger(__name__)
+
+SOURCES = ('chunks', 'markdown')
+
+class ReindexOutput(BaseModel):
+    collection: str
+    source: str
+    points: int
+    candidates: int
+    elapsed_s: float
+    chunks_per_second: float
+    skipped: int = 0
+    # Points the served collection held when the build started, re-checked by `switch`
+    live_points: int = 0
+    previous: Optional[str] = None
+    switched: bool = False
+
+class Throttle:
+    """Keeps a job under a number of items per second, 0 for unthrottled.
+
+    Args:
+        rate (float): Items per second.
+    """
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.started = time.perf_counter()
+        self.done = 0
+
+    def __call__(self, items: int) -> None:
+        self.done += items
+        if self.rate > 0:
+            delay = self.done / self.rate - (time.perf_counter() - self.started)
+            if delay > 0:
+                time.sleep(delay)
+
+class ReindexService(BaseService):
+    settings: Settings
+
+    @cached_property
+    def _get_embedding(self) -> EmbeddingService:
+        # Local models: an embedding server runs the models of the live API
+        return EmbeddingService(settings=self.settings)
+
+    @property
+    def _get_chunker(self) -> Chunker:
+        return Chunker(settings=self.settings)
+
+    @cached_property
+    def _get_qdrant(self) -> Qdrant:
+        return Qdrant(settings=self.settings)
+
+    def _qdrant(self, collection_name: str) -> Qdrant:
+        settings = self.settings.model_copy(deep=True)
+        settings.qdrant.name = collection_name
+        return Qdrant(settings=settings)
+
+    def versions(self) -> List[Tuple[int, str]]:
+        """Versioned collections of the configured name, oldest first.
+
+        Returns:
+            List[Tuple[int, str]]: Version number and collection name.
+        """
+        pattern = re.compile(rf'^{re.escape(self.settings.qdrant.name)}_v(\d+)$')
+        versions = []
+        for collection in self._get_qdrant.client.get_collections().collections:
+            match = pattern.match(collection.name)
+            if match:
+                versions.append((int(match.group(1)), collection.name))
+        return sorted(versions)
+
+    def _live_exists(self) -> bool:
+        qdrant = self._get_qdrant
+        return qdrant.alias_target() is not None or qdrant.client.collection_exists(self.settings.qdrant.name)
+
+    def _chunks_from_collection(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        # Point IDs are kept, so the chunk store entries are shared with the current version
+        for points, payloads in self._get_qdrant.scroll_all(self.settings.reindex.batch_size * 8, with_vectors=False):
+            for point, payload in zip(points, payloads):
+                content = payload.get('content')
+                if not isinstance(content, str):
+                    logger.warning(f"Skipping point {point.id} without content")
+                    continue
+                metadata = {key: value for key, value in payload.items() if key != 'content'}
+                yield str(point.id), {'content': content, 'metadata': metadata}
+
+    def _chunks_from_markdown(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        paths = sorted(glob.glob(os.path.join(self.settings.indexing.convert_path, '*.md')))
+        if not paths:
+            raise ValueError(f"No Markdown files in {self.settings.indexing.convert_path}")
+        for path in paths:
+            chunks = self._get_chunker.process(inputs=ChunkInput(convert_path=path)).chunks
+            # Names passed explicitly at upload are not in the Markdown, the first header is
+            candidate = IndexingService._get_candidate(chunks)
+            if not candidate:
+                logger.warning(f"No candidate name found in {path}")
+            for chunk in chunks:
+                if candidate:
+                    chunk['metadata'][CANDIDATE_KEY] = candidate
+                yield str(uuid.uuid4()), chunk
+
+    def _batches(self, chunks: Iterator[Tuple[str, Dict[str, Any]]], counter: Dict[str, int]) -> Iterator[Tuple[List[str], QdrantInput]]:
+        throttle = Throttle(self.settings.reindex.max_chunks_per_second)
+        batch: List[Tuple[str, Dict[str, Any]]] = []
+
+        def flush():
+            output = self._get_embedding.process(EmbeddingInput(chunks=[chunk for _, chunk in batch], query=''))
+            # Empty chunks and chunks the model failed on are left out of the new version
+            ids = [batch[row][0] for row in output.kept]
+            skipped = sorted(set(id for id, _ in batch) - set(ids))
+            if skipped:
+                logger.error(f"Skipping {len(skipped)} chunks that could not be embedded: {', '.join(skipped)}")
+            counter['points'] += len(ids)
+            counter['skipped'] += len(skipped)
+            throttle(len(batch))
+            return ids, QdrantInput(
+                dense_embeddings=output.dense_embeddings,
+                sparse_embeddings=output.sparse_embeddings,
+                payload=output.metadata,
+                reduced_embeddings=output.reduced_embeddings,
+            )
+
+        for item in chunks:
+            batch.append(item)
+            if len(batch) == self.settings.reindex.batch_size:
+                yield flush()
+                batch = []
+                if (counter['points'] + counter['skipped']) % (self.settings.reindex.batch_size * 32) == 0:
+                    logger.info(f"Re-embedded {counter['points']} chunks")
+        if batch:
+            yield flush()
+
+    def build(self, source: str = 'chunks', allow_missing_candidates: bool = False) -> ReindexOutput:
+        """Embed every chunk again into a new collection version and verify it.
+
+        The new version is throttled to `REINDEX__MAX_CHUNKS_PER_SECOND` so
+        that live queries keep their share of the CPU, and is deleted again
+        when it fails verification.
+
+        Args:
+            source (str): `chunks` re-embeds the chunks of the current
+                version, for model changes; `markdown` chunks the stored
+                Markdown again, for chunking changes.
+            allow_missing_candidates (bool): Accept a version lacking some
+                candidates of the current one.
+
+        Returns:
+            ReindexOutput: The new version, not switched to yet.
+        """
+        if source not in SOURCES:
+            raise ValueError(f"Unsupported re-index source: {source}")
+        live = self._get_qdrant
+        live_exists = self._live_exists()
+        if source == 'chunks' and not live_exists:
+            raise ValueError(f"{self.settings.qdrant.name} does not exist, rebuild from markdown")
+        live_count = live.count() if live_exists else 0
+
+        versions = self.versions()
+        name = f"{self.settings.qdrant.name}_v{(versions[-1][0] if versions else 0) + 1}"
+        target = self._qdrant(name)
+        logger.info(
+            f"Building {name} from {source} with {self.settings.embedding.dense_model_path} and "
+            f"{self.settings.embedding.sparse_model_path}, {self.settings.reindex.max_chunks_per_second} chunks/s"
+        )
+        chunks = self._chunks_from_collection() if source == 'chunks' else self._chunks_from_markdown()
+        counter = {'points': 0, 'skipped': 0}
+        started = time.perf_counter()
+        try:
+            with target.paused_indexing():
+                target.upload(self._batches(chunks, counter), batch_size=self.settings.reindex.batch_size)
+            elapsed = time.perf_counter() - started
+
+            # Verify
+            count = target.count()
+            if count != counter['points']:
+                raise ValueError(f"{name} holds {count} points, {counter['points']} were embedded")
+            if source == 'chunks' and live.count() != live_count:
+                raise ValueError(f"{self.settings.qdrant.name} changed during the rebuild, run it again")
+            candidates = set(target.candidate_names())
+            missing = set(live.candidate_names()) - candidates if live_exists else set()
+            if missing:
+                message = f"{name} lacks {len(missing)} candidates: {', '.join(sorted(missing)[:10])}"
+                if not allow_missing_candidates:
+                    raise ValueError(message)
+                logger.warning(message)
+        except Exception as e:
+            logger.error(f"Error building {name}: {e}")
+            try:
+                self._delete(name)
+            except Exception as cleanup_error:
+                # The build error is the one to report, `status` still lists the version left behind
+                logger.error(f"Error deleting {name}: {cleanup_error}")
+            raise
+        logger.info(f"Built {name} with {count} points in {elapsed:.1f}s, {counter['skipped']} chunks skipped")
+        return ReindexOutput(
+            collection=name,
+            source=source,
+            points=count,
+            candidates=len(candidates),
+            elapsed_s=round(elapsed, 1),
+            chunks_per_second=round(count / elapsed, 1) if elapsed else 0.0,
+            skipped=counter['skipped'],
+            live_points=live_count,
+        )
+
+    def switch(self, collection_name: str, migrate: bool = False, live_points: Optional[int] = None, force: bool = False) -> Optional[str]:
+        """Point the alias at a collection version, then drop old versions.
+
+        CVs indexed into the served collection after the build started are
+        not in the new version, so the switch is refused when the served
+        collection no longer holds the `live_points` of the build.
+
+        Args:
+            collection_name (str): Version to serve.
+            migrate (bool): Replace a plain collection holding the configured
+                name, indexed before aliases were used, with the alias. It is
+                deleted, so there is no version to roll back to.
+            live_points (Optional[int]): `live_points` of the build output.
+            force (bool): Switch without checking `live_points`, e.g. to
+                serve an older version again.
+
+        Returns:
+            Optional[str]: Previously served version.
+        """
+        live = self._get_qdrant
+        alias_name = self.settings.qdrant.name
+        if not live.client.collection_exists(collection_name):
+            raise ValueError(f"{collection_name} does not exist")
+        if not force:
+            if live_points is None:
+                raise ValueError(f"Pass the live_points of the build of {collection_name}, or force the switch")
+            count = live.count() if self._live_exists() else 0
+            if count != live_points:
+                raise ValueError(
+                    f"{alias_name} holds {count} points, {live_points} when {collection_name} was built, "
+                    f"build again or force the switch"
+                )
+        if live.alias_target() is None and live.client.collection_exists(alias_name):
+            if not migrate:
+                raise ValueError(f"{alias_name} is a collection, not an alias, pass migrate to replace it")
+            logger.warning(f"Deleting collection {alias_name} to replace it with an alias of {collection_name}")
+            self._delete(alias_name)
+        previous = live.point_alias(collection_name)
+        logger.info(f"{alias_name} now serves {collection_name}, previously {previous}")
+        self._drop_old_versions(collection_name)
+        return previous
+
+    def rollback(self) -> str:
+        """Point the alias back at the newest version older than the served one.
+
+        Returns:
+            str: Version served after the rollback.
+        """
+        current = self._get_qdrant.alias_target()
+        if current is None:
+            raise ValueError(f"{self.settings.qdrant.name} is not an alias, nothing to roll back")
+        older = [name for number, name in self.versions() if number < self._number(current)]
+        if not older:
+            raise ValueError(f"No version older than {current} is left")
+        self._get_qdrant.point_alias(older[-1])
+        logger.info(f"{self.settings.qdrant.name} rolled back from {current} to {older[-1]}")
+        return older[-1]
+
+    @staticmethod
+    def _number(collection_name: str) -> int:
+        return int(collection_name.rsplit('_v', 1)[1])
+
+    def _drop_old_versions(self, current: str) -> None:
+        # Versions newer than the served one are kept, e.g. the one rolled back from
+        older = [name for number, name in self.versions() if number < self._number(current)]
+        keep = self.settings.reindex.keep_versions
+        for name in older[:max(0, len(older) - keep)]:
+            logger.info(f"Dropping {name}")
+            self._delete(name)
+
+    def _delete(self, collection_name: str) -> None:
+        qdrant = self._get_qdrant
+        others = [collection.name for collection in qdrant.client.get_collections().collections if collection.name != collection_name]
+        self._qdrant(collection_name).delete_collection(shared_with=others)
+
+    def process(self, source: str = 'chunks', migrate: bool = False, allow_missing_candidates: bool = False) -> ReindexOutput:
+        """Build a new version and serve it once it is verified.
+
+        Args:
+            source (str): `chunks` or `markdown`, see `build`.
+            migrate (bool): Replace a plain collection with the alias, see `switch`.
+            allow_missing_candidates (bool): Accept a version lacking some candidates.
+
+        Returns:
+            ReindexOutput: The new version, switched to.
+        """
+        output = self.build(source, allow_missing_candidates=allow_missing_candidates)
+        output.previous = self.switch(output.collection, migrate=migrate, live_points=output.live_points)
+        output.switched = True
+        return output
+
+    def status(self) -> Dict[str, Any]:
+        """Served version and the versions available.
+
+        Returns:
+            Dict[str, Any]: Alias target and point count of every version.
+        """
+        qdrant = self._get_qdrant
+        return {
+            'alias': self.settings.qdrant.name,
+            'serving': qdrant.alias_target(),
+            'versions': {name: self._qdrant(name).count() for _, name in self.versions()},
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    build_parser = commands.add_parser('build', help='embed every chunk into a new collection version')
+    build_parser.add_argument('--source', choices=SOURCES, default='chunks')
+    build_parser.add_argument('--switch', action='store_true', help='serve the new version once it is verified')
+    build_parser.add_argument('--migrate', action='store_true', help='replace a plain collection named QDRANT__NAME with the alias')
+    build_parser.add_argument('--allow-missing-candidates', action='store_true')
+    switch_parser = commands.add_parser('switch', help='serve a collection version')
+    switch_parser.add_argument('collection')
+    switch_parser.add_argument('--migrate', action='store_true', help='replace a plain collection named QDRANT__NAME with the alias')
+    switch_parser.add_argument('--live-points', type=int, help='live_points printed by the build')
+    switch_parser.add_argument('--force', action='store_true', help='switch even if QDRANT__NAME changed since the build')
+    commands.add_parser('rollback', help='serve the previous collection version')
+    commands.add_parser('status', help='show the served version and the versions available')
+    commands.add_parser('tune', help='apply QDRANT__PROFILE to the served collection')
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    )
+    service = ReindexService(settings=Settings())
+    if args.command == 'build':
+        if args.switch:
+            output = service.process(args.source, migrate=args.migrate, allow_missing_candidates=args.allow_missing_candidates)
+        else:
+            output = service.build(args.source, allow_missing_candidates=args.allow_missing_candidates)
+        print(output.model_dump_json(indent=2))
+    elif args.command == 'switch':
+        previous = service.switch(args.collection, migrate=args.migrate, live_points=args.live_points, force=args.force)
+        print(json.dumps({'serving': args.collection, 'previous': previous}, indent=2))
+    elif args.command == 'rollback':
+        print(json.dumps({'serving': service.rollback()}, indent=2))
+    elif args.command == 'tune':
+        print(json.dumps(service._get_qdrant.apply_profile(), indent=2))
+    else:
+        print(json.dumps(service.status(), indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""Measure the Qdrant payload and response size saved by the chunk store.
+
+Indexes the same synthetic CV chunks, with random vectors, into two
+collections: one with full payloads and one with only the filter keys in
+Qdrant and the text in a SQLite chunk store. It then reports the payload
+bytes held by Qdrant, the store size, and the size and latency of candidate
+searches including the text lookup. Uses the Qdrant configured in `.env`,
+or an in-memory one with `--memory`. Run from the `chatbot` directory:
+
+    python -m benchmarks.bench_chunk_store --candidates 200 --chunks 30
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+from qdrant_client import QdrantClient
+
+from benchmarks.utils import make_settings
+from infrastructure.qdrant import CANDIDATE_KEY
+from infrastructure.qdrant import Qdrant
+from infrastructure.qdrant import QdrantInput
+from shared.settings import Settings
+from shared.sparse_embedding import SparseEmbeddingData
+
+WORDS = (
+    'kinh nghiệm phát triển hệ thống backend python java docker kubernetes dự án khách hàng '
+    'đại học bách khoa công ty phần mềm quản lý nhóm thiết kế cơ sở dữ liệu microservice api'
+).split()
+
+
+def _chunks(candidates: int, chunks: int, rng: random.Random) -> List[Dict]:
+    return [
+        {
+            CANDIDATE_KEY: f'Ứng viên {c}',
+            'Header_1': f'Ứng viên {c}',
+            'Header_2': rng.choice(['Kinh nghiệm làm việc', 'Học vấn', 'Kỹ năng', 'Dự án']),
+            'content': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(60, 180))),
+        }
+        for c in range(candidates)
+        for _ in range(chunks)
+    ]
+
+
+def _sparse(rng: random.Random) -> SparseEmbeddingData:
+    indices = sorted(rng.sample(range(30000), 40))
+    return SparseEmbeddingData(indices=indices, values=[rng.random() for _ in indices])
+
+
+def _collection(settings: Settings, client: QdrantClient, payloads: List[Dict], dense: np.ndarray, sparse: List) -> Qdrant:
+    qdrant = Qdrant(settings=settings)
+    if client is not None:
+        qdrant.__dict__['client'] = client
+    if qdrant.client.collection_exists(settings.qdrant.name):
+        qdrant.client.delete_collection(settings.qdrant.name)
+    for start in range(0, len(payloads), 256):
+        qdrant.insert(QdrantInput(
+            dense_embeddings=dense[start:start + 256].tolist(),
+            sparse_embeddings=sparse[start:start + 256],
+            payload=payloads[start:start + 256],
+        ))
+    return qdrant
+
+
+def _payload_bytes(qdrant: Qdrant) -> int:
+    total, offset = 0, None
+    while True:
+        points, offset = qdrant.client.scroll(qdrant.settings.qdrant.name, with_payload=True, limit=1024, offset=offset)
+        total += sum(len(json.dumps(point.payload, ensure_ascii=False).encode()) for point in points)
+        if offset is None:
+            return total
+
+
+def _search(qdrant: Qdrant, queries: List, candidates: int, k: int) -> Dict:
+    sizes, latencies = [], []
+    for i, (dense, sparse) in enumerate(queries):
+        began = time.perf_counter()
+        response = qdrant.query(dense, [sparse], f'Ứng viên {i % candidates}', k)
+        qdrant.payloads(response.points)
+        latencies.append(time.perf_counter() - began)
+        sizes.append(len(response.model_dump_json().encode()))
+    return {
+        'response_bytes_mean': round(float(np.mean(sizes)), 1),
+        'search_mean_ms': round(float(np.mean(latencies)) * 1000, 2),
+        'search_p95_ms': round(float(np.percentile(latencies, 95)) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--candidates', type=int, default=200)
+    parser.add_argument('--chunks', type=int, default=30, help='chunks per candidate')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--memory', action='store_true', help='use an in-memory Qdrant instead of the configured one')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    payloads = _chunks(args.candidates, args.chunks, rng)
+    base = make_settings() if args.memory else Settings()
+    dim = base.qdrant.vector_size
+    dense = np.random.default_rng(0).standard_normal((len(payloads), dim)).astype(np.float32)
+    sparse = [_sparse(rng) for _ in payloads]
+    queries = [(np.random.default_rng(i).standard_normal(dim).tolist(), _sparse(rng)) for i in range(args.queries)]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        store_path = os.path.join(directory, 'chunks.db')
+        for mode, enabled in (('full_payload', False), ('chunk_store', True)):
+            settings = base.model_copy(deep=True)
+            settings.qdrant.name = f'bench_chunk_store_{mode}'
+            settings.chunk_store.enabled = enabled
+            settings.chunk_store.backend = 'sqlite'
+            settings.chunk_store.sqlite_path = store_path
+            qdrant = _collection(settings, QdrantClient(':memory:') if args.memory else None, payloads, dense, sparse)
+            results[mode] = {
+                'qdrant_payload_bytes': _payload_bytes(qdrant),
+                'store_bytes': sum(
+                    os.path.getsize(path) for path in (store_path, store_path + '-wal') if os.path.exists(path)
+                ) if enabled else 0,
+                **_search(qdrant, queries, args.candidates, args.top_k),
+            }
+            if not args.memory:
+                qdrant.client.delete_collection(settings.qdrant.name)
+
+    full, slim = results['full_payload'], results['chunk_store']
+    print(json.dumps({
+        'points': len(payloads),
+        **results,
+        'qdrant_payload_reduction': round(1 - slim['qdrant_payload_bytes'] / full['qdrant_payload_bytes'], 3),
+        'response_size_reduction': round(1 - slim['response_bytes_mean'] / full['response_bytes_mean'], 3),
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
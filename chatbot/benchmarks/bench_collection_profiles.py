@@ -0,0 +1,163 @@
+"""Compare the collection tuning profiles on memory, latency and recall.
+
+Indexes the same synthetic CV chunks into one collection per profile, waits
+for Qdrant to build the HNSW graphs, then runs the same queries against
+each: candidate searches through `Qdrant.query`, as the chatbot does, and
+unfiltered dense searches over the whole collection, whose recall@k is
+measured against an exact search of the same collection. The RAM reported
+is an estimate from the profile: vectors and graph links held in memory,
+whatever is on disk only costs page cache. Uses the Qdrant configured in
+`.env`; the in-memory one of `--memory` ignores every profile parameter.
+Run from the `chatbot` directory:
+
+    python -m benchmarks.bench_collection_profiles --candidates 200 --chunks 30
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+from typing import Dict, List
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from benchmarks.utils import make_settings
+from infrastructure.qdrant import CANDIDATE_KEY
+from infrastructure.qdrant import Qdrant
+from infrastructure.qdrant import QdrantInput
+from shared.settings import COLLECTION_PROFILES
+from shared.settings import Settings
+from shared.sparse_embedding import SparseEmbeddingData
+
+
+def _vectors(points: int, dim: int, rng: np.random.Generator) -> np.ndarray:
+    # Chunks cluster around topics, uniform random vectors would make every graph look equally good
+    centers = rng.standard_normal((max(points // 50, 1), dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), points)] + 0.5 * rng.standard_normal((points, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _sparse(rng: random.Random) -> SparseEmbeddingData:
+    indices = sorted(rng.sample(range(30000), 40))
+    return SparseEmbeddingData(indices=indices, values=[rng.random() for _ in indices])
+
+
+def _collection(settings: Settings, client: QdrantClient, payloads: List[Dict], dense: np.ndarray, sparse: List) -> Qdrant:
+    qdrant = Qdrant(settings=settings)
+    if client is not None:
+        qdrant.__dict__['client'] = client
+    if qdrant.client.collection_exists(settings.qdrant.name):
+        qdrant.client.delete_collection(settings.qdrant.name)
+    for start in range(0, len(payloads), 256):
+        qdrant.insert(QdrantInput(
+            dense_embeddings=dense[start:start + 256].tolist(),
+            sparse_embeddings=sparse[start:start + 256],
+            payload=payloads[start:start + 256],
+        ))
+    return qdrant
+
+
+def _wait_indexed(qdrant: Qdrant, timeout: float = 600.0) -> float:
+    began = time.perf_counter()
+    while time.perf_counter() - began < timeout:
+        if qdrant.client.get_collection(qdrant.settings.qdrant.name).status == models.CollectionStatus.GREEN:
+            break
+        time.sleep(0.5)
+    return time.perf_counter() - began
+
+
+def _estimated_ram_bytes(profile: str, points: int, dim: int) -> int:
+    tuning = COLLECTION_PROFILES[profile]
+    if tuning.vectors_on_disk:
+        return 0
+    # float32 vectors, and 2m links of 4 bytes on layer 0 which dominates the graph
+    return points * dim * 4 + points * 2 * tuning.m * 4
+
+
+def _timed(search, queries: List) -> Dict:
+    latencies, results = [], []
+    for query in queries:
+        began = time.perf_counter()
+        results.append(search(query))
+        latencies.append(time.perf_counter() - began)
+    return {
+        'results': results,
+        'mean_ms': round(float(np.mean(latencies)) * 1000, 2),
+        'p95_ms': round(float(np.percentile(latencies, 95)) * 1000, 2),
+    }
+
+
+def _benchmark(qdrant: Qdrant, queries: List, candidates: int, k: int) -> Dict:
+    name = qdrant.settings.qdrant.name
+    candidate = _timed(lambda i: qdrant.query(queries[i][0], [queries[i][1]], f'Ứng viên {i % candidates}', k), range(len(queries)))
+    dense = _timed(
+        lambda query: {str(point.id) for point in qdrant.client.query_points(
+            name, query=query[0], using='dense', limit=k, search_params=qdrant._search_params,
+        ).points},
+        queries,
+    )
+    exact = [
+        {str(point.id) for point in qdrant.client.query_points(
+            name, query=query[0], using='dense', limit=k, search_params=models.SearchParams(exact=True),
+        ).points}
+        for query in queries
+    ]
+    recall = np.mean([len(found & truth) / max(len(truth), 1) for found, truth in zip(dense['results'], exact)])
+    return {
+        'candidate_search_mean_ms': candidate['mean_ms'],
+        'candidate_search_p95_ms': candidate['p95_ms'],
+        'dense_search_mean_ms': dense['mean_ms'],
+        'dense_search_p95_ms': dense['p95_ms'],
+        f'dense_recall_at_{k}': round(float(recall), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--candidates', type=int, default=200)
+    parser.add_argument('--chunks', type=int, default=30, help='chunks per candidate')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--profiles', nargs='+', choices=sorted(COLLECTION_PROFILES), default=list(COLLECTION_PROFILES))
+    parser.add_argument('--memory', action='store_true', help='use an in-memory Qdrant instead of the configured one')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    payloads = [
+        {CANDIDATE_KEY: f'Ứng viên {c}', 'Header_1': f'Ứng viên {c}', 'content': f'chunk {i} of candidate {c}'}
+        for c in range(args.candidates)
+        for i in range(args.chunks)
+    ]
+    base = make_settings() if args.memory else Settings()
+    dim = base.qdrant.vector_size
+    vectors = _vectors(len(payloads) + args.queries, dim, np.random.default_rng(0))
+    dense, query_vectors = vectors[:len(payloads)], vectors[len(payloads):]
+    sparse = [_sparse(rng) for _ in payloads]
+    queries = [(vector.tolist(), _sparse(rng)) for vector in query_vectors]
+
+    results = {}
+    for profile in args.profiles:
+        settings = base.model_copy(deep=True)
+        settings.qdrant.name = f'bench_profile_{profile}'
+        settings.qdrant.profile = profile
+        began = time.perf_counter()
+        qdrant = _collection(settings, QdrantClient(':memory:') if args.memory else None, payloads, dense, sparse)
+        inserted = time.perf_counter() - began
+        results[profile] = {
+            **COLLECTION_PROFILES[profile].model_dump(),
+            'insert_s': round(inserted, 2),
+            'indexing_s': round(_wait_indexed(qdrant), 2),
+            'estimated_ram_bytes': _estimated_ram_bytes(profile, len(payloads), dim),
+            **_benchmark(qdrant, queries, args.candidates, args.top_k),
+        }
+        if not args.memory:
+            qdrant.client.delete_collection(settings.qdrant.name)
+
+    print(json.dumps({'points': len(payloads), 'dim': dim, **results}, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
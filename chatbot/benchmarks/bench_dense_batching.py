@@ -0,0 +1,124 @@
+"""Compare fixed-size and length-bucketed dense embedding batches on real CVs.
+
+Chunks the Markdown CVs of `INDEXING__CONVERT_PATH` (or `--corpus`) and
+embeds the chunks with the configured dense model twice: in document order,
+`EMBEDDING__MAX_TOKEN_LIMIT` chunks per `encode` call as before, and through
+`EmbeddingService._get_embeddings_batch`, which groups chunks by token
+length into batches of `EMBEDDING__BATCH_TOKENS` padded tokens. Reports
+throughput, the share of padded tokens that are real ones, and the largest
+difference between the vectors of both runs, which only stays at float
+noise if the original order is restored. Run from the `chatbot` directory:
+
+    python -m benchmarks.bench_dense_batching --batch-tokens 4096 8192 16384
+"""
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import os
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from domain.indexing import Chunker
+from domain.indexing import ChunkInput
+from domain.indexing import EmbeddingService
+from domain.indexing.batching import token_budget_batches
+from shared.settings import Settings
+
+# Batch size sentence-transformers splits each `encode` call into by default
+ENCODE_BATCH_SIZE = 32
+
+
+def _texts(corpus: str, settings: Settings, limit: int) -> List[str]:
+    chunker = Chunker(settings=settings)
+    texts = []
+    for path in sorted(glob.glob(os.path.join(corpus, '*.md'))):
+        texts.extend(chunk['content'] for chunk in chunker.process(inputs=ChunkInput(convert_path=path)).chunks if chunk['content'])
+        if len(texts) >= limit:
+            break
+    if not texts:
+        raise SystemExit(f"No Markdown CVs in {corpus}")
+    return texts[:limit]
+
+
+def _padding_efficiency(lengths: List[int], batches: List[List[int]]) -> float:
+    padded = sum(len(batch) * max(lengths[i] for i in batch) for batch in batches)
+    return round(sum(lengths) / padded, 3)
+
+
+def _fixed(service: EmbeddingService, texts: List[str], lengths: List[int]) -> Dict:
+    size = service.settings.embedding.max_token_limit
+    began = time.perf_counter()
+    vectors = []
+    for start in range(0, len(texts), size):
+        vectors.extend(service.load_dense_model.encode(texts[start:start + size], show_progress_bar=False).tolist())
+    elapsed = time.perf_counter() - began
+    # sentence-transformers sorts each call by length and splits it into batches of 32
+    batches = []
+    for start in range(0, len(texts), size):
+        block = sorted(range(start, min(start + size, len(texts))), key=lambda i: lengths[i])
+        batches.extend(block[i:i + ENCODE_BATCH_SIZE] for i in range(0, len(block), ENCODE_BATCH_SIZE))
+    return {'vectors': vectors, 'elapsed': elapsed, 'batches': batches}
+
+
+def _bucketed(service: EmbeddingService, texts: List[str], lengths: List[int]) -> Dict:
+    began = time.perf_counter()
+    vectors = service._get_embeddings_batch(texts)
+    elapsed = time.perf_counter() - began
+    batches = token_budget_batches(lengths, service.settings.embedding.batch_tokens, service.settings.embedding.max_token_limit)
+    return {'vectors': vectors, 'elapsed': elapsed, 'batches': batches}
+
+
+def _summary(run: Dict, lengths: List[int]) -> Dict:
+    return {
+        'seconds': round(run['elapsed'], 2),
+        'chunks_per_second': round(len(lengths) / run['elapsed'], 1),
+        'tokens_per_second': round(sum(lengths) / run['elapsed'], 1),
+        'forward_passes': len(run['batches']),
+        'padding_efficiency': _padding_efficiency(lengths, run['batches']),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', help='directory of Markdown CVs, defaults to INDEXING__CONVERT_PATH')
+    parser.add_argument('--chunks', type=int, default=2000, help='the maximum number of chunks embedded')
+    parser.add_argument('--batch-tokens', type=int, nargs='+', help='EMBEDDING__BATCH_TOKENS values to compare')
+    args = parser.parse_args()
+
+    settings = Settings()
+    texts = _texts(args.corpus or settings.indexing.convert_path, settings, args.chunks)
+    service = EmbeddingService(settings=settings)
+    lengths = service._token_lengths(texts)
+    # Warm up, the first call pays for lazy initialization
+    service.load_dense_model.encode(texts[:ENCODE_BATCH_SIZE], show_progress_bar=False)
+
+    fixed = _fixed(service, texts, lengths)
+    results = {'fixed': _summary(fixed, lengths)}
+    reference = np.asarray(fixed['vectors'], dtype=np.float32)
+    for batch_tokens in args.batch_tokens or [settings.embedding.batch_tokens]:
+        service.settings.embedding.batch_tokens = batch_tokens
+        bucketed = _bucketed(service, texts, lengths)
+        embedded = [i for i, vector in enumerate(bucketed['vectors']) if vector is not None]
+        results[f'bucketed_{batch_tokens}'] = {
+            **_summary(bucketed, lengths),
+            'speedup': round(fixed['elapsed'] / bucketed['elapsed'], 2),
+            'failed': len(texts) - len(embedded),
+            'max_abs_difference': float(np.abs(
+                np.asarray([bucketed['vectors'][i] for i in embedded], dtype=np.float32) - reference[embedded]
+            ).max()) if embedded else None,
+        }
+
+    print(json.dumps({
+        'chunks': len(texts),
+        'tokens_mean': round(float(np.mean(lengths)), 1),
+        'tokens_p95': int(np.percentile(lengths, 95)),
+        **results,
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Compare per-worker embedding models with one shared embedding server.
+
+Uses the real models configured in `.env`. Run from the `chatbot` directory:
+
+    python -m benchmarks.bench_embedding_server --workers 4 --queries 200
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from shared.settings import Settings
+
+QUERIES = [
+    'Ứng viên có kinh nghiệm gì với Python?',
+    'Email của ứng viên là gì?',
+    'Ứng viên học trường nào?',
+    'Ứng viên đã làm việc ở những công ty nào?',
+    'Kỹ năng machine learning của ứng viên?',
+]
+
+
+def rss_mb(pid: int) -> float:
+    with open(f'/proc/{pid}/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _worker(socket_path, queries, ready, start, results):
+    from domain.indexing import EmbeddingInput
+    from domain.indexing import EmbeddingService
+    from infrastructure.embedding_server import RemoteEmbeddingService
+
+    settings = Settings()
+    if socket_path:
+        settings.embedding.server_socket = socket_path
+        service = RemoteEmbeddingService(settings=settings)
+    else:
+        service = EmbeddingService(settings=settings)
+    service.process(EmbeddingInput(query=QUERIES[0]))
+    ready.put(os.getpid())
+    start.wait()
+    for i in range(queries):
+        service.process(EmbeddingInput(query=QUERIES[i % len(QUERIES)]))
+    results.put(rss_mb(os.getpid()))
+
+
+def _run(mode: str, workers: int, queries: int) -> dict:
+    context = multiprocessing.get_context('spawn')
+    ready, results, start = context.Queue(), context.Queue(), context.Event()
+    server = None
+    socket_path = None
+    server_rss = 0.0
+    if mode == 'server':
+        socket_path = os.path.join(tempfile.mkdtemp(), 'embedding.sock')
+        server = subprocess.Popen([sys.executable, '-m', 'infrastructure.embedding_server', '--socket', socket_path])
+        while not os.path.exists(socket_path):
+            time.sleep(0.1)
+
+    processes = [context.Process(target=_worker, args=(socket_path, queries, ready, start, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    for _ in processes:
+        ready.get()
+    began = time.perf_counter()
+    start.set()
+    worker_rss = [results.get() for _ in processes]
+    elapsed = time.perf_counter() - began
+    for process in processes:
+        process.join()
+    if server is not None:
+        server_rss = rss_mb(server.pid)
+        server.terminate()
+        server.wait()
+
+    return {
+        'mode': mode,
+        'workers': workers,
+        'queries_per_worker': queries,
+        'throughput_qps': round(workers * queries / elapsed, 1),
+        'worker_rss_mb': round(sum(worker_rss), 1),
+        'server_rss_mb': round(server_rss, 1),
+        'total_rss_mb': round(sum(worker_rss) + server_rss, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+    print(json.dumps([_run('per_worker', args.workers, args.queries), _run('server', args.workers, args.queries)], indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Measure tail latency with and without hedged fallback requests.
+
+The primary stub answers quickly most of the time and stalls on a fraction
+of requests, the fallback stub is uniformly a bit slower. Run from the
+`chatbot` directory:
+
+    python -m benchmarks.bench_hedging --requests 200 --concurrency 8
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from benchmarks.stub_llm import StubLLMServer
+from benchmarks.utils import make_settings
+from domain.generation import GenerationInput
+from domain.generation import GenerationService
+from shared.metrics import metrics
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def _run(service: GenerationService, requests: int, concurrency: int) -> list:
+    inputs = GenerationInput(query='Ứng viên học trường nào?', chat_history=[], retrieved_info=[])
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await service.aprocess(inputs)
+                latencies.append(time.perf_counter() - start)
+            except Exception:
+                pass
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--stall-rate', type=float, default=0.1)
+    parser.add_argument('--stall-seconds', type=float, default=3.0)
+    parser.add_argument('--hedge-after', type=float, default=0.5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+
+    def primary_delay():
+        return args.stall_seconds if rng.random() < args.stall_rate else rng.uniform(0.05, 0.15)
+
+    results = []
+    with StubLLMServer(first_token_delay=primary_delay) as primary, StubLLMServer(first_token_delay=0.3) as fallback:
+        for hedge_enabled in (False, True):
+            metrics.reset()
+            service = GenerationService(settings=make_settings(generation={
+                'base_url': primary.base_url,
+                'fallback_base_url': fallback.base_url,
+                'hedge_enabled': hedge_enabled,
+                'hedge_after': args.hedge_after,
+                'max_retries': 0,
+            }))
+            latencies = asyncio.run(_run(service, args.requests, args.concurrency))
+            counters = metrics.snapshot()['counters']
+            hedges = counters.get('generation_hedges_started', 0)
+            results.append({
+                'hedge_enabled': hedge_enabled,
+                'completed': len(latencies),
+                'p50_ms': round(_percentile(latencies, 0.50) * 1000, 1),
+                'p95_ms': round(_percentile(latencies, 0.95) * 1000, 1),
+                'p99_ms': round(_percentile(latencies, 0.99) * 1000, 1),
+                'hedges_started': hedges,
+                'hedge_wins': counters.get('generation_hedge_wins', 0),
+                'hedge_win_rate': round(counters.get('generation_hedge_wins', 0) / hedges, 3) if hedges else 0.0,
+            })
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
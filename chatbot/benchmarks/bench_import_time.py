@@ -0,0 +1,91 @@
+"""Measure the import cost of an app entry point with `python -X importtime`.
+
+Fails when the cumulative import time exceeds the budget or when one of the
+forbidden packages is imported. Run from the `chatbot` directory:
+
+    python -m benchmarks.bench_import_time --module main_query --budget-ms 3000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+from benchmarks.utils import settings_env
+
+# fastembed is left out: qdrant_client probes for it on import whenever it is installed
+HEAVY_PACKAGES = ('docling', 'torch', 'sentence_transformers', 'transformers')
+
+
+def parse_importtime(output: str) -> List[Tuple[str, int, int]]:
+    """Parse the `-X importtime` report written to stderr.
+
+    Args:
+        output (str): Captured stderr of the interpreter.
+
+    Returns:
+        List[Tuple[str, int, int]]: Module name, self time and cumulative time in microseconds.
+    """
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def measure(module: str, forbidden: Tuple[str, ...] = HEAVY_PACKAGES) -> Dict:
+    """Import a module in a fresh interpreter and summarise where the time went.
+
+    Args:
+        module (str): Module to import, e.g. `main_query`.
+        forbidden (Tuple[str, ...]): Packages or modules that must not be imported.
+
+    Returns:
+        Dict: Total time, slowest modules and forbidden packages that were imported.
+    """
+    env = {**os.environ, **settings_env()}
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    modules = parse_importtime(result.stderr)
+    total_us = next((cumulative for name, _, cumulative in modules if name == module), 0)
+    imported = {name for name, _, _ in modules} | {name.split('.')[0] for name, _, _ in modules}
+    return {
+        'module': module,
+        'total_ms': round(total_us / 1000, 1),
+        'forbidden_imported': sorted(imported.intersection(forbidden)),
+        'slowest': [
+            {'module': name, 'self_ms': round(self_us / 1000, 1), 'cumulative_ms': round(cumulative_us / 1000, 1)}
+            for name, self_us, cumulative_us in sorted(modules, key=lambda item: item[1], reverse=True)[:15]
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--module', default='main_query')
+    parser.add_argument('--budget-ms', type=float, default=None)
+    parser.add_argument('--runs', type=int, default=3, help='Best of N runs is reported')
+    args = parser.parse_args()
+
+    report = min((measure(args.module) for _ in range(args.runs)), key=lambda item: item['total_ms'])
+    print(json.dumps(report, indent=2))
+    if report['forbidden_imported']:
+        sys.exit(f"{args.module} imports {', '.join(report['forbidden_imported'])}")
+    if args.budget_ms is not None and report['total_ms'] > args.budget_ms:
+        sys.exit(f"{args.module} takes {report['total_ms']}ms to import, budget is {args.budget_ms}ms")
+
+
+if __name__ == '__main__':
+    main()
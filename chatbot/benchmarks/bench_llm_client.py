@@ -0,0 +1,53 @@
+"""Compare a fresh LLM client per answer with the long-lived client.
+
+Run from the `chatbot` directory:
+
+    python -m benchmarks.bench_llm_client --requests 50
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+
+from benchmarks.stub_llm import StubLLMServer
+from benchmarks.utils import make_settings
+from domain.generation import GenerationInput
+from domain.generation import GenerationService
+
+
+def _run(server: StubLLMServer, requests: int, reuse: bool) -> dict:
+    settings = make_settings(generation={'base_url': server.base_url})
+    inputs = GenerationInput(query='Ứng viên học trường nào?', chat_history=[], retrieved_info=[{'content': 'Đại học Bách khoa'}])
+    shared = GenerationService(settings=settings)
+    connections_before = server.connections
+    latencies = []
+    for _ in range(requests):
+        service = shared if reuse else GenerationService(settings=settings)
+        start = time.perf_counter()
+        service.process(inputs)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        'mode': 'shared' if reuse else 'per_call',
+        'requests': requests,
+        'connections_opened': server.connections - connections_before,
+        'mean_ms': round(statistics.mean(latencies), 3),
+        'p50_ms': round(statistics.median(latencies), 3),
+        'max_ms': round(max(latencies), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--first-token-delay', type=float, default=0.0)
+    args = parser.parse_args()
+
+    with StubLLMServer(first_token_delay=args.first_token_delay) as server:
+        results = [_run(server, args.requests, reuse=False), _run(server, args.requests, reuse=True)]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Measure the latency saved by the sparse-only route and its recall impact.
+
+Runs every query of a labelled set through retrieval twice, with routing off
+(always hybrid) and on, against the Qdrant collection and models configured
+in `.env`. The labelled set is a JSONL file, one query per line:
+
+    {"query": "Kubernetes", "candidate": "Nguyễn Văn A", "relevant": ["Kubernetes"]}
+
+`relevant` lists substrings of the chunks that answer the query; recall is
+the share of them found in the retrieved chunks. Run from the `chatbot`
+directory:
+
+    python -m benchmarks.bench_query_routing --labels labels.jsonl
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from app.query import ChatbotInput
+from app.query import ChatbotService
+from shared.metrics import metrics
+from shared.settings import Settings
+
+
+def _recall(context: List[Dict], relevant: List[str]) -> float:
+    if not relevant:
+        return 1.0
+    contents = [chunk.get("content", "").casefold() for chunk in context]
+    return sum(any(item.casefold() in content for content in contents) for item in relevant) / len(relevant)
+
+
+def _run(labels: List[Dict], routing_enabled: bool, repeat: int) -> Dict:
+    settings = Settings()
+    settings.retrieval.routing_enabled = routing_enabled
+    service = ChatbotService(settings=settings)
+    metrics.reset()
+
+    # Warm up the models and the candidate vocabularies
+    for label in labels:
+        service._retrieve(ChatbotInput(query=label["query"], user_name=label["candidate"]))
+    metrics.reset()
+
+    latencies, recalls = [], []
+    for _ in range(repeat):
+        for label in labels:
+            began = time.perf_counter()
+            output = service._retrieve(ChatbotInput(query=label["query"], user_name=label["candidate"]))
+            latencies.append(time.perf_counter() - began)
+            recalls.append(_recall(output.context, label.get("relevant", [])))
+
+    routed = metrics.counter("query_route_sparse")
+    return {
+        'routing_enabled': routing_enabled,
+        'queries': len(latencies),
+        'sparse_share': round(routed / len(latencies), 3) if routing_enabled else 0.0,
+        'mean_ms': round(float(np.mean(latencies)) * 1000, 2),
+        'p50_ms': round(float(np.percentile(latencies, 50)) * 1000, 2),
+        'p95_ms': round(float(np.percentile(latencies, 95)) * 1000, 2),
+        'recall': round(float(np.mean(recalls)), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--labels', required=True, help='JSONL file with query, candidate and relevant')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with open(args.labels, encoding='utf-8') as f:
+        labels = [json.loads(line) for line in f if line.strip()]
+
+    hybrid = _run(labels, routing_enabled=False, repeat=args.repeat)
+    routed = _run(labels, routing_enabled=True, repeat=args.repeat)
+    print(json.dumps({
+        'hybrid': hybrid,
+        'routed': routed,
+        'latency_saved_ms': round(hybrid['mean_ms'] - routed['mean_ms'], 2),
+        'recall_delta': round(routed['recall'] - hybrid['recall'], 4),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+"""Compare the reduced-dimension dense prefetch with the full-vector baseline.
+
+Indexes the same synthetic CV chunks into two collections: the baseline,
+whose HNSW graph is built on the full dense vectors, and one whose graph is
+built on a PCA projection fitted on the corpus, with the full vectors
+rescoring the prefetched points only. Vectors are drawn around a low-rank
+structure, as sentence embeddings are, so that the projection keeps most of
+their variance. Reports the estimated RAM of the vectors and graphs, the
+latency of candidate searches through `Qdrant.query` and of unfiltered
+dense searches, and their recall@k: candidate searches against those of
+the baseline, dense searches against an exact full-vector search.
+Uses the Qdrant configured in `.env`, or an in-memory one with `--memory`,
+which keeps everything in RAM. Run from the `chatbot` directory:
+
+    python -m benchmarks.bench_reduced_prefetch --candidates 200 --chunks 30 --reduced-dim 128
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from benchmarks.utils import make_settings
+from infrastructure.qdrant import CANDIDATE_KEY
+from infrastructure.qdrant import Qdrant
+from infrastructure.qdrant import QdrantInput
+from shared.projection import DenseProjection
+from shared.settings import Settings
+from shared.sparse_embedding import SparseEmbeddingData
+
+
+def _vectors(points: int, dim: int, rank: int, rng: np.random.Generator) -> np.ndarray:
+    basis = rng.standard_normal((rank, dim)).astype(np.float32)
+    centers = rng.standard_normal((max(points // 50, 1), rank)).astype(np.float32)
+    latent = centers[rng.integers(0, len(centers), points)] + 0.5 * rng.standard_normal((points, rank)).astype(np.float32)
+    return latent @ basis + 0.3 * rng.standard_normal((points, dim)).astype(np.float32)
+
+
+def _sparse(rng: random.Random) -> SparseEmbeddingData:
+    indices = sorted(rng.sample(range(30000), 40))
+    return SparseEmbeddingData(indices=indices, values=[rng.random() for _ in indices])
+
+
+def _collection(settings: Settings, client: QdrantClient, payloads: List[Dict], dense: np.ndarray, sparse: List) -> Qdrant:
+    qdrant = Qdrant(settings=settings)
+    if client is not None:
+        qdrant.__dict__['client'] = client
+    if qdrant.client.collection_exists(settings.qdrant.name):
+        qdrant.client.delete_collection(settings.qdrant.name)
+    for start in range(0, len(payloads), 256):
+        qdrant.insert(QdrantInput(
+            dense_embeddings=dense[start:start + 256].tolist(),
+            sparse_embeddings=sparse[start:start + 256],
+            payload=payloads[start:start + 256],
+        ))
+    began = time.perf_counter()
+    while time.perf_counter() - began < 600:
+        if qdrant.client.get_collection(settings.qdrant.name).status == models.CollectionStatus.GREEN:
+            break
+        time.sleep(0.5)
+    return qdrant
+
+
+def _estimated_ram_bytes(settings: Settings, points: int, dim: int, reduced_dim: int) -> int:
+    m = settings.qdrant.tuning.m
+    # float32 vectors, and 2m links of 4 bytes on layer 0 which dominates the graph
+    graph = points * 2 * m * 4
+    if not reduced_dim:
+        return (0 if settings.qdrant.tuning.vectors_on_disk else points * dim * 4) + graph
+    full = 0 if settings.qdrant.full_vectors_on_disk or settings.qdrant.tuning.vectors_on_disk else points * dim * 4
+    return (0 if settings.qdrant.tuning.vectors_on_disk else points * reduced_dim * 4) + graph + full
+
+
+def _timed(search, queries) -> Dict:
+    latencies, results = [], []
+    for query in queries:
+        began = time.perf_counter()
+        results.append(search(query))
+        latencies.append(time.perf_counter() - began)
+    return {
+        'results': results,
+        'mean_ms': round(float(np.mean(latencies)) * 1000, 2),
+        'p95_ms': round(float(np.percentile(latencies, 95)) * 1000, 2),
+    }
+
+
+def _recall(found: List, truth: List) -> float:
+    return round(float(np.mean([len(f & t) / max(len(t), 1) for f, t in zip(found, truth)])), 4)
+
+
+def _ids(points) -> set:
+    return {str(point.id) for point in points}
+
+
+def _benchmark(qdrant: Qdrant, queries: List, candidates: int, k: int) -> Dict:
+    name = qdrant.settings.qdrant.name
+    candidate = _timed(
+        lambda i: _ids(qdrant.query(queries[i][0], [queries[i][1]], f'Ứng viên {i % candidates}', k).points),
+        range(len(queries)),
+    )
+    # The dense prefetch of the hybrid queries, rescored on the full vectors as the outer query does
+    dense = _timed(
+        lambda query: _ids(qdrant.client.query_points(
+            name, prefetch=[qdrant._dense_prefetch(query[0], 2 * k)], query=query[0], using='dense', limit=k,
+        ).points),
+        queries,
+    )
+    return {'candidate': candidate, 'dense': dense}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--candidates', type=int, default=200)
+    parser.add_argument('--chunks', type=int, default=30, help='chunks per candidate')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--reduced-dim', type=int, default=128)
+    parser.add_argument('--rank', type=int, default=96, help='dimensions of the structure the vectors are drawn around')
+    parser.add_argument('--oversampling', type=int, default=4, help='QDRANT__REDUCED_OVERSAMPLING')
+    parser.add_argument('--memory', action='store_true', help='use an in-memory Qdrant instead of the configured one')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    payloads = [
+        {CANDIDATE_KEY: f'Ứng viên {c}', 'Header_1': f'Ứng viên {c}', 'content': f'chunk {i} of candidate {c}'}
+        for c in range(args.candidates)
+        for i in range(args.chunks)
+    ]
+    base = make_settings() if args.memory else Settings()
+    base.embedding.reduced_path = None
+    base.qdrant.reduced_oversampling = args.oversampling
+    dim = base.qdrant.vector_size
+    vectors = _vectors(len(payloads) + args.queries, dim, args.rank, np.random.default_rng(0))
+    dense, query_vectors = vectors[:len(payloads)], vectors[len(payloads):]
+    sparse = [_sparse(rng) for _ in payloads]
+    queries = [(vector.tolist(), _sparse(rng)) for vector in query_vectors]
+
+    with tempfile.TemporaryDirectory() as directory:
+        projection = DenseProjection.fit(dense, args.reduced_dim)
+        projection_path = os.path.join(directory, f'pca_{args.reduced_dim}.npz')
+        projection.save(projection_path)
+
+        results, truth = {}, None
+        for mode, reduced_path in (('full', None), ('reduced', projection_path)):
+            settings = base.model_copy(deep=True)
+            settings.qdrant.name = f'bench_reduced_prefetch_{mode}'
+            settings.embedding.reduced_path = reduced_path
+            qdrant = _collection(settings, QdrantClient(':memory:') if args.memory else None, payloads, dense, sparse)
+            if truth is None:
+                truth = {'dense': [
+                    _ids(qdrant.client.query_points(
+                        settings.qdrant.name, query=query[0], using='dense', limit=args.top_k,
+                        search_params=models.SearchParams(exact=True),
+                    ).points)
+                    for query in queries
+                ]}
+            measured = _benchmark(qdrant, queries, args.candidates, args.top_k)
+            # Hybrid results also depend on the sparse vectors, the baseline is the full-vector collection
+            truth.setdefault('candidate', measured['candidate']['results'])
+            results[mode] = {
+                'estimated_ram_bytes': _estimated_ram_bytes(settings, len(payloads), dim, args.reduced_dim if reduced_path else 0),
+                'candidate_search_mean_ms': measured['candidate']['mean_ms'],
+                'candidate_search_p95_ms': measured['candidate']['p95_ms'],
+                f'candidate_recall_at_{args.top_k}': _recall(measured['candidate']['results'], truth['candidate']),
+                'dense_search_mean_ms': measured['dense']['mean_ms'],
+                'dense_search_p95_ms': measured['dense']['p95_ms'],
+                f'dense_recall_at_{args.top_k}': _recall(measured['dense']['results'], truth['dense']),
+            }
+            if not args.memory:
+                qdrant.client.delete_collection(settings.qdrant.name)
+
+    full, reduced = results['full'], results['reduced']
+    print(json.dumps({
+        'points': len(payloads),
+        'dim': dim,
+        'reduced_dim': args.reduced_dim,
+        'explained_variance': round(projection.explained_variance(dense), 4),
+        **results,
+        'ram_reduction': round(1 - reduced['estimated_ram_bytes'] / full['estimated_ram_bytes'], 3),
+        'dense_latency_ratio': round(reduced['dense_search_mean_ms'] / full['dense_search_mean_ms'], 3),
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
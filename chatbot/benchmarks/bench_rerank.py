@@ -0,0 +1,123 @@
+"""Compare answering from the top-k chunks with reranking down to a few chunks.
+
+Runs every question of a labelled set through retrieval and generation
+twice, with `RETRIEVAL__RERANK_ENABLED` off (the `top_k` chunks go into the
+prompt) and on (the `rerank_candidates` chunks are rescored and the best
+`rerank_top_n` go into the prompt), against the Qdrant collection, models
+and LLM configured in `.env`. The labelled set is a JSONL file, one question
+per line:
+
+    {"query": "Ứng viên học trường nào?", "candidate": "Nguyễn Văn A",
+     "relevant": ["Bách khoa"], "expected": ["Bách khoa"]}
+
+`relevant` lists substrings of the chunks that answer the question and
+`expected` substrings of a correct answer; both are optional. Prompt tokens
+are counted with tiktoken, which approximates non-OpenAI tokenizers.
+Answer agreement is the share of questions whose two answers reach
+`--agreement` token F1. Run from the `chatbot` directory:
+
+    python -m benchmarks.bench_rerank --labels labels.jsonl
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from collections import Counter
+from typing import Dict, List
+
+import numpy as np
+
+from app.query import ChatbotInput
+from app.query import ChatbotService
+from domain.generation import GenerationInput
+from shared.settings import Settings
+
+
+def _recall(context: List[Dict], relevant: List[str]) -> float:
+    if not relevant:
+        return 1.0
+    contents = [chunk.get("content", "").casefold() for chunk in context]
+    return sum(any(item.casefold() in content for content in contents) for item in relevant) / len(relevant)
+
+
+def _f1(first: str, second: str) -> float:
+    first_tokens, second_tokens = first.casefold().split(), second.casefold().split()
+    common = sum((Counter(first_tokens) & Counter(second_tokens)).values())
+    if not common:
+        return 0.0
+    precision, recall = common / len(first_tokens), common / len(second_tokens)
+    return 2 * precision * recall / (precision + recall)
+
+
+def _prompt_tokens(service: ChatbotService, inputs: GenerationInput) -> int:
+    generation = service._get_generation
+    messages = generation._get_prompt.format_messages(**generation._get_chain_inputs(inputs))
+    return generation._get_llm.get_num_tokens_from_messages(messages)
+
+
+def _run(labels: List[Dict], rerank_enabled: bool) -> Dict:
+    settings = Settings()
+    settings.retrieval.rerank_enabled = rerank_enabled
+    settings.profile.enabled = False
+    service = ChatbotService(settings=settings)
+
+    # Warm up the models and the connections
+    service._retrieve(ChatbotInput(query=labels[0]["query"], user_name=labels[0]["candidate"]))
+
+    latencies, retrieval_latencies, tokens, recalls, hits, answers = [], [], [], [], [], []
+    for label in labels:
+        began = time.perf_counter()
+        retrieval_output = service._retrieve(ChatbotInput(query=label["query"], user_name=label["candidate"]))
+        retrieved = time.perf_counter()
+        generation_input = GenerationInput(query=label["query"], chat_history=[], retrieved_info=retrieval_output.context)
+        answer = service._get_generation.process(generation_input).response
+        latencies.append(time.perf_counter() - began)
+        retrieval_latencies.append(retrieved - began)
+        tokens.append(_prompt_tokens(service, generation_input))
+        recalls.append(_recall(retrieval_output.context, label.get("relevant", [])))
+        expected = label.get("expected", [])
+        hits.append(all(item.casefold() in answer.casefold() for item in expected) if expected else True)
+        answers.append(answer)
+
+    return {
+        'rerank_enabled': rerank_enabled,
+        'chunks': settings.retrieval.rerank_top_n if rerank_enabled else settings.retrieval.top_k,
+        'questions': len(labels),
+        'mean_ms': round(float(np.mean(latencies)) * 1000, 1),
+        'p50_ms': round(float(np.percentile(latencies, 50)) * 1000, 1),
+        'p95_ms': round(float(np.percentile(latencies, 95)) * 1000, 1),
+        'retrieval_mean_ms': round(float(np.mean(retrieval_latencies)) * 1000, 1),
+        'prompt_tokens_mean': round(float(np.mean(tokens)), 1),
+        'recall': round(float(np.mean(recalls)), 4),
+        'expected_hit_rate': round(float(np.mean(hits)), 4),
+        'answers': answers,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--labels', required=True, help='JSONL file with query, candidate, relevant and expected')
+    parser.add_argument('--agreement', type=float, default=0.5, help='token F1 at which two answers agree')
+    args = parser.parse_args()
+
+    with open(args.labels, encoding='utf-8') as f:
+        labels = [json.loads(line) for line in f if line.strip()]
+
+    baseline = _run(labels, rerank_enabled=False)
+    reranked = _run(labels, rerank_enabled=True)
+    agreement = [
+        _f1(first, second) >= args.agreement
+        for first, second in zip(baseline.pop('answers'), reranked.pop('answers'))
+    ]
+    print(json.dumps({
+        'top_k': baseline,
+        'rerank': reranked,
+        'prompt_token_savings': round(1 - reranked['prompt_tokens_mean'] / baseline['prompt_tokens_mean'], 3),
+        'latency_change_ms': round(reranked['mean_ms'] - baseline['mean_ms'], 1),
+        'answer_agreement': round(float(np.mean(agreement)), 4),
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""Measure sparse index size and query latency against recall under pruning.
+
+Chunks the Markdown CVs of `INDEXING__CONVERT_PATH` (or `--corpus`), embeds
+them once with the configured sparse model, then indexes them into one
+sparse-only collection per pruning setting. Queries are word spans drawn
+from the chunks, embedded with the query pruning of the same setting.
+Reports the stored weights, an estimate of the inverted index size (an
+index and a weight per entry), sparse search latency, and recall@k against
+the unpruned collection with the same IDF modifier. Uses the Qdrant
+configured in `.env`, or an in-memory one with `--memory`. Run from the
+`chatbot` directory:
+
+    python -m benchmarks.bench_sparse_pruning --top-k 64 32 16 --min-weight 0.01 0.05
+"""
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import os
+import random
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from domain.indexing import Chunker
+from domain.indexing import ChunkInput
+from domain.indexing import EmbeddingService
+from shared.settings import Settings
+from shared.sparse_embedding import SparseEmbeddingData
+from shared.sparse_embedding import prune_sparse
+
+
+def _texts(corpus: str, settings: Settings, limit: int) -> List[str]:
+    chunker = Chunker(settings=settings)
+    texts = []
+    for path in sorted(glob.glob(os.path.join(corpus, '*.md'))):
+        texts.extend(chunk['content'] for chunk in chunker.process(inputs=ChunkInput(convert_path=path)).chunks)
+        if len(texts) >= limit:
+            break
+    if not texts:
+        raise SystemExit(f"No Markdown CVs in {corpus}")
+    return texts[:limit]
+
+
+def _queries(texts: List[str], count: int, rng: random.Random) -> List[str]:
+    queries = []
+    for _ in range(count):
+        words = rng.choice(texts).split()
+        length = rng.randint(2, 8)
+        start = rng.randint(0, max(0, len(words) - length))
+        queries.append(' '.join(words[start:start + length]))
+    return queries
+
+
+def _prune(vectors: List[SparseEmbeddingData], top_k: Optional[int], min_weight: float) -> List[SparseEmbeddingData]:
+    if top_k is None and min_weight <= 0:
+        return vectors
+    return [prune_sparse(vector, top_k, min_weight) for vector in vectors]
+
+
+def _collection(client: QdrantClient, name: str, vectors: List[SparseEmbeddingData], idf: bool, on_disk: bool) -> None:
+    if client.collection_exists(name):
+        client.delete_collection(name)
+    client.create_collection(
+        collection_name=name,
+        vectors_config={},
+        sparse_vectors_config={'sparse': models.SparseVectorParams(
+            index=models.SparseIndexParams(on_disk=on_disk),
+            modifier=models.Modifier.IDF if idf else models.Modifier.NONE,
+        )},
+    )
+    for start in range(0, len(vectors), 256):
+        client.upsert(name, points=[
+            models.PointStruct(
+                id=str(uuid.uuid4()),
+                vector={'sparse': models.SparseVector(indices=vector.indices, values=vector.values)},
+                payload={'row': start + i},
+            )
+            for i, vector in enumerate(vectors[start:start + 256])
+        ], wait=True)
+
+
+def _search(client: QdrantClient, name: str, queries: List[SparseEmbeddingData], k: int) -> Tuple[List[set], Dict]:
+    results, latencies = [], []
+    for query in queries:
+        began = time.perf_counter()
+        points = client.query_points(
+            name, query=models.SparseVector(indices=query.indices, values=query.values), using='sparse', limit=k,
+            with_payload=True,
+        ).points
+        latencies.append(time.perf_counter() - began)
+        results.append({point.payload['row'] for point in points})
+    return results, {
+        'search_mean_ms': round(float(np.mean(latencies)) * 1000, 3),
+        'search_p95_ms': round(float(np.percentile(latencies, 95)) * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', help='directory of Markdown CVs, defaults to INDEXING__CONVERT_PATH')
+    parser.add_argument('--chunks', type=int, default=20000, help='the maximum number of chunks indexed')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--top-k', type=int, nargs='*', default=[64, 32, 16], help='weights kept per chunk')
+    parser.add_argument('--min-weight', type=float, nargs='*', default=[0.01, 0.05], help='weights dropped below')
+    parser.add_argument('--query-top-k', type=int, help='weights kept per query, for every setting')
+    parser.add_argument('--idf', action='store_true', help='use the IDF modifier')
+    parser.add_argument('--on-disk', action='store_true', help='keep the sparse index on disk')
+    parser.add_argument('--memory', action='store_true', help='use an in-memory Qdrant instead of the configured one')
+    args = parser.parse_args()
+
+    settings = Settings()
+    texts = _texts(args.corpus or settings.indexing.convert_path, settings, args.chunks)
+    queries = _queries(texts, args.queries, random.Random(0))
+    embedding = EmbeddingService(settings=settings)
+    documents = embedding._get_sparse_embedding(texts)
+    query_vectors = embedding._get_sparse_embedding(queries)
+    client = QdrantClient(':memory:') if args.memory else QdrantClient(url=settings.qdrant.url, port=settings.qdrant.port)
+
+    configurations = [('none', None, 0.0)]
+    configurations += [(f'top_{top_k}', top_k, 0.0) for top_k in args.top_k]
+    configurations += [(f'min_{min_weight}', None, min_weight) for min_weight in args.min_weight]
+    results, baseline = {}, None
+    for label, top_k, min_weight in configurations:
+        name = f'bench_sparse_{label}'.replace('.', '_')
+        pruned = _prune(documents, top_k, min_weight)
+        began = time.perf_counter()
+        _collection(client, name, pruned, args.idf, args.on_disk)
+        indexed = time.perf_counter() - began
+        found, latency = _search(client, name, _prune(query_vectors, args.query_top_k or top_k, min_weight), args.k)
+        if baseline is None:
+            baseline = found
+        entries = sum(len(vector.indices) for vector in pruned)
+        results[label] = {
+            'weights_per_chunk': round(entries / len(pruned), 1),
+            'estimated_index_bytes': entries * 8,
+            'index_s': round(indexed, 2),
+            **latency,
+            f'recall_at_{args.k}': round(float(np.mean([
+                len(f & b) / max(len(b), 1) for f, b in zip(found, baseline)
+            ])), 4),
+        }
+        if not args.memory:
+            client.delete_collection(name)
+
+    print(json.dumps({
+        'chunks': len(texts),
+        'queries': len(queries),
+        'idf': args.idf,
+        'on_disk': args.on_disk,
+        **results,
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
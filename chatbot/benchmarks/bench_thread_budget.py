@@ -0,0 +1,100 @@
+"""Sweep worker counts and thread budgets for the embedding models.
+
+Each configuration `WORKERSxTHREADS` starts that many worker processes, each
+encoding queries from `--concurrency` threads with torch and ONNX Runtime
+limited to THREADS threads. Uses the real models configured in `.env`. Run
+from the `chatbot` directory:
+
+    python -m benchmarks.bench_thread_budget --configs 1x16,2x8,4x4,4x2,8x2
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from shared.settings import Settings
+
+QUERIES = [
+    'Ứng viên có kinh nghiệm gì với Python?',
+    'Email của ứng viên là gì?',
+    'Ứng viên học trường nào?',
+    'Ứng viên đã làm việc ở những công ty nào?',
+    'Kỹ năng machine learning của ứng viên?',
+]
+
+
+def _worker(queries, concurrency, ready, start, results):
+    from domain.indexing import EmbeddingInput
+    from domain.indexing import EmbeddingService
+    from shared.thread_budget import apply_thread_budget
+
+    settings = Settings()
+    apply_thread_budget(settings)
+    service = EmbeddingService(settings=settings)
+    service.process(EmbeddingInput(query=QUERIES[0]))
+    ready.put(os.getpid())
+    start.wait()
+
+    def encode(i):
+        began = time.perf_counter()
+        service.process(EmbeddingInput(query=QUERIES[i % len(QUERIES)]))
+        return time.perf_counter() - began
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results.put(list(executor.map(encode, range(queries))))
+
+
+def _run(workers: int, threads: int, queries: int, concurrency: int) -> dict:
+    os.environ.update({
+        'THREADS__WORKERS': str(workers),
+        'THREADS__TORCH_THREADS': str(threads),
+        'THREADS__ONNX_THREADS': str(threads),
+    })
+    context = multiprocessing.get_context('spawn')
+    ready, results, start = context.Queue(), context.Queue(), context.Event()
+    processes = [context.Process(target=_worker, args=(queries, concurrency, ready, start, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    for _ in processes:
+        ready.get()
+    began = time.perf_counter()
+    start.set()
+    latencies = np.array([latency for _ in processes for latency in results.get()])
+    elapsed = time.perf_counter() - began
+    for process in processes:
+        process.join()
+
+    return {
+        'workers': workers,
+        'threads_per_runtime': threads,
+        'concurrency_per_worker': concurrency,
+        'throughput_qps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(float(np.percentile(latencies, 50)) * 1000, 1),
+        'p99_ms': round(float(np.percentile(latencies, 99)) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--configs', default='1x16,2x8,4x4,4x2,8x2', help='Comma separated WORKERSxTHREADS')
+    parser.add_argument('--queries', type=int, default=200, help='Queries per worker')
+    parser.add_argument('--concurrency', type=int, default=2, help='Concurrent requests per worker')
+    args = parser.parse_args()
+
+    reports = []
+    for config in args.configs.split(','):
+        workers, threads = (int(value) for value in config.lower().split('x'))
+        reports.append(_run(workers, threads, args.queries, args.concurrency))
+        print(json.dumps(reports[-1]))
+    best = max(reports, key=lambda report: report['throughput_qps'])
+    print(json.dumps({'best': best}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
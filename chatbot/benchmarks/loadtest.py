@@ -0,0 +1,377 @@
+"""End-to-end HTTP load test of the chatbot API.
+
+By default the API is started in this process with an in-memory Qdrant,
+seeded with synthetic CVs, and a stub OpenAI-compatible LLM whose latency
+and token rate are set on the command line. Everything else comes from
+`.env`; `--stub-embeddings` also replaces the embedding models with hashed
+bag-of-words vectors. `--url` targets a running deployment instead.
+
+Load is either closed-loop (`--concurrency` clients sending back to back)
+or open-loop (`--rps` requests per second, latency counted from the
+scheduled send time so queueing is not hidden). `--replay` sends recorded
+requests from a JSONL trace instead of synthetic questions, one per line:
+
+    {"offset": 0.25, "method": "POST", "path": "/v1/chatbot",
+     "json": {"query": "Ứng viên học trường nào?", "user_name": "Ứng viên 3"}}
+    {"offset": 1.5, "path": "/v1/indexing", "file": "cvs/a.pdf", "form": {"candidate": "A"}}
+
+With `--replay-speed`, requests are sent at their recorded offsets scaled
+by the speed. The report is printed, and written to `--output`, as JSON.
+Run from the `chatbot` directory:
+
+    python -m benchmarks.loadtest --stub-embeddings --concurrency 16 --duration 30
+    python -m benchmarks.loadtest --stub-embeddings --rps 50 --requests 1000 --endpoint stream
+    python -m benchmarks.loadtest --url http://localhost:5000 --replay trace.jsonl --replay-speed 2
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional
+
+import httpx
+import numpy as np
+
+from benchmarks.stub_llm import StubLLMServer
+
+QUERIES = [
+    'Ứng viên học trường nào?',
+    'Ứng viên có bao nhiêu năm kinh nghiệm với Python?',
+    'Tóm tắt các dự án gần đây của ứng viên.',
+    'Ứng viên đã làm việc với Kubernetes chưa?',
+    'Ứng viên có phù hợp với vị trí backend không?',
+    'Kỹ năng nổi bật của ứng viên là gì?',
+]
+
+WORDS = (
+    'kinh nghiệm phát triển hệ thống backend python java docker kubernetes dự án khách hàng '
+    'đại học bách khoa công ty phần mềm quản lý nhóm thiết kế cơ sở dữ liệu microservice api'
+).split()
+
+SECTIONS = ['Kinh nghiệm làm việc', 'Học vấn', 'Kỹ năng', 'Dự án']
+
+ENDPOINTS = {
+    'chatbot': '/v1/chatbot',
+    'stream': '/v1/chatbot/stream',
+    'batch': '/v1/chatbot/batch',
+    'search': '/v1/candidates/search',
+}
+
+def candidate_name(index: int) -> str:
+    return f'Ứng viên {index}'
+
+def synthetic_requests(endpoint: str, candidates: int, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """Endless questions about random seeded candidates.
+
+    Args:
+        endpoint (str): One of `ENDPOINTS`.
+        candidates (int): Number of seeded candidates.
+        seed (int): Random seed.
+
+    Yields:
+        Dict[str, Any]: Requests in the trace format.
+    """
+    rng = random.Random(seed)
+    while True:
+        user_name = candidate_name(rng.randrange(candidates))
+        if endpoint == 'batch':
+            body = {'queries': rng.sample(QUERIES, 3), 'user_name': user_name}
+        elif endpoint == 'search':
+            body = {'query': rng.choice(QUERIES), 'limit': 10}
+        else:
+            body = {'query': rng.choice(QUERIES), 'user_name': user_name}
+        yield {'method': 'POST', 'path': ENDPOINTS[endpoint], 'json': body}
+
+def read_trace(path: str) -> List[Dict[str, Any]]:
+    """Read recorded requests, ordered by offset.
+
+    Args:
+        path (str): JSONL trace.
+
+    Returns:
+        List[Dict[str, Any]]: Requests with `path` and optional `method`, `offset`, `json`, `file` and `form`.
+    """
+    with open(path, encoding='utf-8') as f:
+        requests = [json.loads(line) for line in f if line.strip()]
+    for request in requests:
+        if 'path' not in request:
+            raise ValueError(f'Trace request without a path: {request}')
+    return sorted(requests, key=lambda request: request.get('offset', 0.0))
+
+async def send(client: httpx.AsyncClient, request: Dict[str, Any], scheduled: Optional[float] = None) -> Dict[str, Any]:
+    """Send one request and time it.
+
+    Time to first token is taken at the first body chunk of a streamed
+    response and equals the latency otherwise.
+
+    Args:
+        client (httpx.AsyncClient): Client bound to the API.
+        request (Dict[str, Any]): Request in the trace format.
+        scheduled (Optional[float]): `perf_counter` time the request was due, defaults to now.
+
+    Returns:
+        Dict[str, Any]: Path, status, latency, time to first token, response bytes and error.
+    """
+    started = time.perf_counter() if scheduled is None else scheduled
+    kwargs: Dict[str, Any] = {}
+    if 'json' in request:
+        kwargs['json'] = request['json']
+    if 'form' in request:
+        kwargs['data'] = request['form']
+    result = {'path': request['path'], 'status': None, 'latency': None, 'ttft': None, 'bytes': 0, 'error': None}
+    try:
+        if 'file' in request:
+            with open(request['file'], 'rb') as f:
+                kwargs['files'] = {'inputs': (os.path.basename(request['file']), f.read())}
+        async with client.stream(request.get('method', 'POST'), request['path'], **kwargs) as response:
+            async for chunk in response.aiter_bytes():
+                if chunk and result['ttft'] is None:
+                    result['ttft'] = time.perf_counter() - started
+                result['bytes'] += len(chunk)
+        result['status'] = response.status_code
+        if response.status_code >= 400:
+            result['error'] = f'HTTP {response.status_code}'
+    except Exception as e:
+        result['error'] = type(e).__name__
+    result['latency'] = time.perf_counter() - started
+    if result['ttft'] is None:
+        result['ttft'] = result['latency']
+    return result
+
+async def run_closed_loop(
+    client: httpx.AsyncClient,
+    requests: Iterator[Dict[str, Any]],
+    concurrency: int,
+    duration: Optional[float],
+    total: Optional[int],
+) -> List[Dict[str, Any]]:
+    """Keep `concurrency` requests in flight until the duration or request count is reached."""
+    deadline = time.perf_counter() + duration if duration else None
+    requests = iter(requests) if total is None else itertools.islice(requests, total)
+    results = []
+
+    async def worker():
+        while deadline is None or time.perf_counter() < deadline:
+            request = next(requests, None)
+            if request is None:
+                return
+            results.append(await send(client, request))
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results
+
+async def run_open_loop(
+    client: httpx.AsyncClient,
+    requests: Iterator[Dict[str, Any]],
+    rps: Optional[float],
+    duration: Optional[float],
+    total: Optional[int],
+    replay_speed: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """Send requests on a fixed schedule, whether or not earlier ones have finished.
+
+    Requests are due every `1 / rps` seconds, or at their trace offset
+    divided by `replay_speed`.
+    """
+    began = time.perf_counter()
+    requests = iter(requests) if total is None else itertools.islice(requests, total)
+    tasks = []
+    for i, request in enumerate(requests):
+        offset = request.get('offset', 0.0) / replay_speed if replay_speed else i / rps
+        if duration and offset >= duration:
+            break
+        scheduled = began + offset
+        await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+        tasks.append(asyncio.create_task(send(client, request, scheduled)))
+    return list(await asyncio.gather(*tasks))
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    values_ms = np.asarray(values) * 1000
+    return {
+        'mean': round(float(values_ms.mean()), 2),
+        **{f'p{q}': round(float(np.percentile(values_ms, q)), 2) for q in (50, 90, 95, 99)},
+        'max': round(float(values_ms.max()), 2),
+    }
+
+def summarize(results: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    """Aggregate request results into throughput, error rate and latency percentiles.
+
+    Args:
+        results (List[Dict[str, Any]]): Results of `send`.
+        elapsed (float): Wall time of the run, in seconds.
+
+    Returns:
+        Dict[str, Any]: Report overall and per path; latencies are in milliseconds.
+    """
+    def stats(items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        ok = [item for item in items if item['error'] is None]
+        return {
+            'requests': len(items),
+            'throughput_rps': round(len(ok) / elapsed, 2) if elapsed else 0.0,
+            'error_rate': round(1 - len(ok) / len(items), 4) if items else 0.0,
+            'latency_ms': _percentiles([item['latency'] for item in ok]),
+            'ttft_ms': _percentiles([item['ttft'] for item in ok]),
+            'response_bytes_mean': round(float(np.mean([item['bytes'] for item in ok])), 1) if ok else 0.0,
+        }
+
+    paths = sorted({item['path'] for item in results})
+    return {
+        'duration_s': round(elapsed, 2),
+        **stats(results),
+        'status_counts': {str(status): count for status, count in sorted(Counter(item['status'] for item in results).items(), key=str)},
+        'errors': dict(Counter(item['error'] for item in results if item['error'] is not None)),
+        'by_path': {path: stats([item for item in results if item['path'] == path]) for path in paths} if len(paths) > 1 else {},
+    }
+
+def start_app(args: argparse.Namespace, llm: StubLLMServer) -> str:
+    """Start the API in a background thread against an in-memory Qdrant and the stub LLM.
+
+    Returns:
+        str: Base URL of the API.
+    """
+    import uvicorn
+
+    from benchmarks.stub_embedding import STUB_DIM
+    from benchmarks.utils import settings_env
+    from infrastructure.qdrant import MEMORY_URL
+    # Importing the settings loads `.env` into the environment, so the overrides below take precedence
+    from shared.settings import Settings
+
+    overrides = {
+        'QDRANT__URL': MEMORY_URL,
+        'QDRANT__NAME': 'loadtest',
+        'GENERATION__BASE_URL': llm.base_url,
+        'GENERATION__API_KEY': 'stub',
+        'GENERATION__MODEL': 'stub',
+        'GENERATION__HEDGE_ENABLED': 'false',
+    }
+    if args.stub_embeddings:
+        overrides['QDRANT__VECTOR_SIZE'] = str(STUB_DIM)
+        os.environ.pop('EMBEDDING__SERVER_SOCKET', None)
+    # Offline defaults fill what `.env` leaves out, `.env` wins over them, the overrides win over both
+    os.environ.update({**settings_env(), **os.environ, **overrides})
+
+    from app import embedding
+    from benchmarks.stub_embedding import StubEmbeddingService
+    from infrastructure.qdrant import Qdrant
+    from infrastructure.qdrant import QdrantInput
+
+    settings = Settings()
+    if args.stub_embeddings:
+        embedding._embedding = StubEmbeddingService(settings=settings)
+    embedder = embedding.get_embedding_service(settings)
+
+    rng = random.Random(0)
+    qdrant = Qdrant(settings=settings)
+    for candidate in range(args.candidates):
+        name = candidate_name(candidate)
+        texts = [' '.join(rng.choice(WORDS) for _ in range(rng.randint(60, 180))) for _ in range(args.chunks)]
+        dense, sparse = embedder._encode(texts)
+        qdrant.insert(QdrantInput(
+            dense_embeddings=dense,
+            sparse_embeddings=sparse,
+            payload=[
+                {'candidate': name, 'Header_1': name, 'Header_2': rng.choice(SECTIONS), 'content': text}
+                for text in texts
+            ],
+        ))
+
+    module = __import__(args.app)
+    logging.getLogger().setLevel(logging.WARNING)
+    server = uvicorn.Server(uvicorn.Config(module.app, host='127.0.0.1', port=0, log_level='warning'))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    return f'http://127.0.0.1:{port}'
+
+async def _run(args: argparse.Namespace, base_url: str) -> Dict[str, Any]:
+    if args.replay:
+        requests: Iterator[Dict[str, Any]] = iter(read_trace(args.replay))
+    else:
+        requests = synthetic_requests(args.endpoint, args.candidates, args.seed)
+
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        if args.warmup:
+            await run_closed_loop(client, synthetic_requests(args.endpoint, args.candidates, args.seed + 1), 1, None, args.warmup)
+        began = time.perf_counter()
+        if args.rps or args.replay_speed:
+            results = await run_open_loop(client, requests, args.rps, args.duration, args.requests, args.replay_speed)
+        else:
+            results = await run_closed_loop(client, requests, args.concurrency, args.duration, args.requests)
+        elapsed = time.perf_counter() - began
+    return summarize(results, elapsed)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default=None, help='API to load instead of starting one in process')
+    parser.add_argument('--app', default='main_query', choices=['main_query', 'main'], help='entry point to start')
+    parser.add_argument('--endpoint', default='chatbot', choices=sorted(ENDPOINTS))
+    parser.add_argument('--replay', default=None, help='JSONL trace of recorded requests')
+    parser.add_argument('--replay-speed', type=float, default=None, help='send trace requests at their offsets, sped up by this factor')
+    parser.add_argument('--concurrency', type=int, default=8, help='closed-loop clients')
+    parser.add_argument('--rps', type=float, default=None, help='open-loop request rate, overrides --concurrency')
+    parser.add_argument('--duration', type=float, default=None, help='seconds to send requests for')
+    parser.add_argument('--requests', type=int, default=None, help='number of requests to send')
+    parser.add_argument('--warmup', type=int, default=5, help='requests sent before measuring')
+    parser.add_argument('--timeout', type=float, default=60.0)
+    parser.add_argument('--max-connections', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--candidates', type=int, default=50, help='synthetic candidates seeded in process')
+    parser.add_argument('--chunks', type=int, default=20, help='chunks per synthetic candidate')
+    parser.add_argument('--stub-embeddings', action='store_true', help='replace the embedding models with hashed vectors')
+    parser.add_argument('--llm-first-token-ms', type=float, default=300.0)
+    parser.add_argument('--llm-tokens-per-second', type=float, default=50.0)
+    parser.add_argument('--llm-response-tokens', type=int, default=100)
+    parser.add_argument('--output', default=None, help='also write the report to this file')
+    args = parser.parse_args()
+    if args.duration is None and args.requests is None and not args.replay:
+        args.duration = 30.0
+    if args.replay_speed and not args.replay:
+        parser.error('--replay-speed needs --replay')
+
+    llm = None
+    if args.url:
+        base_url = args.url
+    else:
+        llm = StubLLMServer(
+            response=' '.join(itertools.islice(itertools.cycle(WORDS), args.llm_response_tokens)),
+            first_token_delay=args.llm_first_token_ms / 1000,
+            token_delay=1 / args.llm_tokens_per_second if args.llm_tokens_per_second else 0.0,
+        ).start()
+        base_url = start_app(args, llm)
+
+    try:
+        report = asyncio.run(_run(args, base_url))
+    finally:
+        if llm is not None:
+            llm.stop()
+
+    report = {
+        'config': {
+            key: value for key, value in vars(args).items()
+            if key not in ('output',) and (not args.url or not key.startswith(('llm_', 'candidates', 'chunks', 'stub_')))
+        },
+        **report,
+    }
+    if llm is not None:
+        report['llm_requests'] = llm.requests
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    print(output)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+
+if __name__ == '__main__':
+    main()
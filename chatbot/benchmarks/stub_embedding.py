@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import re
+import zlib
+from functools import cached_property
+from typing import List
+
+from domain.indexing import EmbeddingService
+from shared.sparse_embedding import SparseEmbeddingData
+
+STUB_DIM = 16
+
+def _token_ids(text: str, buckets: int) -> List[int]:
+    return [zlib.crc32(token.encode()) % buckets for token in re.findall(r"\w+", text.lower())]
+
+class StubEmbeddingService(EmbeddingService):
+    """Hashed bag-of-words embeddings, recording the batch sizes it sees.
+
+    Stands in for the dense and sparse models in offline tests and load
+    tests, so that runs measure the rest of the pipeline. Vectors have
+    `STUB_DIM` dimensions, set `QDRANT__VECTOR_SIZE` accordingly.
+    """
+
+    @cached_property
+    def load_dense_model(self):
+        return None
+
+    @cached_property
+    def load_sparse_model(self):
+        return None
+
+    def _get_embeddings_batch(self, texts):
+        self.__dict__.setdefault("batches", []).append(len(texts))
+        embeddings = []
+        for text in texts:
+            vector = [0.0] * (STUB_DIM - 1) + [0.5]
+            for index in _token_ids(text, STUB_DIM - 1):
+                vector[index] += 1.0
+            embeddings.append(vector)
+        return embeddings
+
+    def _get_sparse_embedding(self, texts):
+        embeddings = []
+        for text in texts:
+            indices = sorted(set(_token_ids(text, 100_000)))
+            embeddings.append(SparseEmbeddingData(indices=indices, values=[1.0] * len(indices)))
+        return embeddings
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from typing import Callable
+from typing import Optional
+from typing import Union
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server: _StubHTTPServer
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f'{len(data):x}\r\n'.encode() + data + b'\r\n')
+        self.wfile.flush()
+
+    def _completion_chunk(self, model: str, delta: dict, finish_reason: Optional[str] = None) -> bytes:
+        body = {
+            'id': f'chatcmpl-{uuid.uuid4().hex}',
+            'object': 'chat.completion.chunk',
+            'created': int(time.time()),
+            'model': model,
+            'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}],
+        }
+        return f'data: {json.dumps(body)}\n\n'.encode()
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+        with self.server.lock:
+            self.server.requests += 1
+            attempt = self.server.requests
+
+        if not self.path.endswith('/chat/completions'):
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        if attempt <= self.server.fail_first:
+            body = json.dumps({'error': {'message': 'stub failure', 'type': 'server_error'}}).encode()
+            self.send_response(500)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        model = request.get('model', 'stub')
+        tokens = self.server.response.split(' ')
+        first_token_delay = self.server.first_token_delay
+        time.sleep(first_token_delay() if callable(first_token_delay) else first_token_delay)
+
+        if not request.get('stream'):
+            time.sleep(self.server.token_delay * len(tokens))
+            body = json.dumps({
+                'id': f'chatcmpl-{uuid.uuid4().hex}',
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': model,
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': self.server.response},
+                    'finish_reason': 'stop',
+                }],
+                'usage': {'prompt_tokens': 0, 'completion_tokens': len(tokens), 'total_tokens': len(tokens)},
+            }).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            self._write_chunk(self._completion_chunk(model, {'role': 'assistant', 'content': ''}))
+            for i, token in enumerate(tokens):
+                if i:
+                    time.sleep(self.server.token_delay)
+                content = token if i == 0 else ' ' + token
+                self._write_chunk(self._completion_chunk(model, {'content': content}))
+            self._write_chunk(self._completion_chunk(model, {}, finish_reason='stop'))
+            self._write_chunk(b'data: [DONE]\n\n')
+            self._write_chunk(b'')
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up on this stream, e.g. a cancelled hedge.
+            self.close_connection = True
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+        self.response = ''
+        self.first_token_delay: Union[float, Callable[[], float]] = 0.0
+        self.token_delay = 0.0
+        self.fail_first = 0
+
+    def handle_error(self, request, client_address):
+        # Clients dropping keep-alive connections is expected, e.g. after a cancelled hedge.
+        pass
+
+
+class StubLLMServer:
+    """Minimal OpenAI-compatible `/v1/chat/completions` server for offline tests and benchmarks.
+
+    Args:
+        response (str): Text returned by every completion.
+        first_token_delay (Union[float, Callable[[], float]]): Seconds to wait before the first token
+            is sent, or a callable drawing a delay per request.
+        token_delay (float): Seconds between two streamed tokens.
+        fail_first (int): Number of initial requests answered with HTTP 500.
+        port (int): Port to bind, 0 picks a free one.
+    """
+
+    def __init__(
+        self,
+        response: str = 'Xin chào từ máy chủ thử nghiệm.',
+        first_token_delay: Union[float, Callable[[], float]] = 0.0,
+        token_delay: float = 0.0,
+        fail_first: int = 0,
+        port: int = 0,
+    ):
+        self._server = _StubHTTPServer(('127.0.0.1', port), _StubHandler)
+        self._server.response = response
+        self._server.first_token_delay = first_token_delay
+        self._server.token_delay = token_delay
+        self._server.fail_first = fail_first
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/v1'
+
+    @property
+    def connections(self) -> int:
+        return self._server.connections
+
+    @property
+    def requests(self) -> int:
+        return self._server.requests
+
+    def start(self) -> StubLLMServer:
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> StubLLMServer:
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
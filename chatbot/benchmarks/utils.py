@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from typing import Any
+from typing import Dict
+
+from shared.settings import Settings
+
+DEFAULT_SECTIONS: Dict[str, Dict[str, Any]] = {
+    'chunking': {'chunk_size': 256, 'chunk_overlap': 0},
+    'embedding': {
+        'dense_model_path': 'shared/weights/vietnamese-bi-encoder',
+        'sparse_model_path': 'Qdrant/bm42-all-minilm-l6-v2-attentions',
+        'max_token_limit': 128,
+    },
+    'qdrant': {'url': 'localhost', 'port': 6333, 'name': 'benchmark', 'vector_size': 768},
+    'generation': {'model': 'stub', 'temperature': 0.0, 'max_tokens': 256, 'api_key': 'stub'},
+    # No Qdrant to load the candidate directory from
+    'retrieval': {'top_k': 10, 'name_resolution_enabled': False},
+    'indexing': {'raw_path': '/tmp/chatbot/raw', 'convert_path': '/tmp/chatbot/convert', 'report_enabled': False},
+    'profile': {'backend': 'memory'},
+}
+
+
+def make_settings(**overrides: Dict[str, Any]) -> Settings:
+    """Build settings for offline runs without relying on a `.env` file.
+
+    Args:
+        **overrides: Per-section field overrides, e.g. `generation={'base_url': url}`.
+
+    Returns:
+        Settings: Settings with every required field filled in.
+    """
+    sections = {
+        name: {**values, **overrides.get(name, {})}
+        for name, values in DEFAULT_SECTIONS.items()
+    }
+    for name, values in overrides.items():
+        sections.setdefault(name, values)
+    return Settings(**sections)
+
+
+def settings_env(**overrides: Dict[str, Any]) -> Dict[str, str]:
+    """Express the offline settings as environment variables, for subprocesses.
+
+    Args:
+        **overrides: Per-section field overrides, as for `make_settings`.
+
+    Returns:
+        Dict[str, str]: Variables such as `QDRANT__PORT`, ready to merge into `os.environ`.
+    """
+    sections = {
+        name: {**values, **overrides.get(name, {})}
+        for name, values in DEFAULT_SECTIONS.items()
+    }
+    for name, values in overrides.items():
+        sections.setdefault(name, values)
+    return {
+        f"{name.upper()}__{field.upper()}": str(value)
+        for name, values in sections.items()
+        for field, value in values.items()
+    }
@@ -1,4 +1,5 @@
 from .generation import GenerationService
 from .generation import GenerationInput
+from .generation import GenerationTimeoutError
 
-__all__ = ["GenerationService", "GenerationInput"]
\ No newline at end of file
+__all__ = ["GenerationService", "GenerationInput", "GenerationTimeoutError"]
@@ -1,14 +1,22 @@
+import asyncio
 import logging
+import httpx
+from functools import cached_property
 from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.messages import BaseMessage
-from typing import List, Dict, Any
+from langchain_core.runnables import Runnable
+from typing import AsyncIterator, List, Dict, Any, Optional
 from shared.base import BaseModel
 from shared.base import BaseService
 from shared.clean_text import TextCleaner
+from shared.metrics import metrics
 from shared.settings import Settings
 
 logger = logging.getLogger(__name__)
+
+_END = object()
+
 class GenerationInput(BaseModel):
     query: str
     chat_history: List[BaseMessage]
@@ -17,54 +25,331 @@ class GenerationInput(BaseModel):
 class GenerationOutput(BaseModel):
     response: str
 
+class GenerationTimeoutError(TimeoutError):
+    """Raised when no model answers before the per-request deadline."""
+
 class GenerationService(BaseService):
     settings: Settings
 
-    def process(self, inputs: GenerationInput) -> GenerationOutput:
-        """Generate a response based on the input query and chat history.
+    @cached_property
+    def _get_timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(
+            self.settings.generation.timeout,
+            connect=self.settings.generation.connect_timeout,
+        )
+
+    @cached_property
+    def _get_limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.settings.generation.pool_size,
+            max_keepalive_connections=self.settings.generation.pool_size,
+            keepalive_expiry=self.settings.generation.keepalive_expiry,
+        )
+
+    def _build_llm(self, model: str, api_key: str, base_url: Optional[str]) -> ChatOpenAI:
+        """Build an LLM client with its own long-lived HTTP connection pool.
+
+        Retries are delegated to the OpenAI SDK, which backs off exponentially
+        with jitter between attempts.
 
         Args:
-            inputs (GenerationInput): Input data containing the query and chat history.
+            model (str): Model name.
+            api_key (str): API key of the endpoint.
+            base_url (Optional[str]): OpenAI-compatible endpoint, OpenAI when None.
 
         Returns:
-            GenerationOutput: Output data containing the generated response.
+            ChatOpenAI: Configured chat model.
         """
         try:
-            llm = ChatOpenAI(
-                model=self.settings.generation.model,
+            return ChatOpenAI(
+                model=model,
                 temperature=self.settings.generation.temperature,
                 max_tokens=self.settings.generation.max_tokens,
                 streaming=True,
-                api_key=self.settings.generation.api_key,
+                api_key=api_key,
+                base_url=base_url,
+                timeout=self._get_timeout,
+                max_retries=self.settings.generation.max_retries,
+                http_client=httpx.Client(
+                    timeout=self._get_timeout,
+                    limits=self._get_limits,
+                ),
+                http_async_client=httpx.AsyncClient(
+                    timeout=self._get_timeout,
+                    limits=self._get_limits,
+                ),
             )
         except Exception as e:
             logger.error(f"Failed to initialize LLM: {str(e)}")
             raise e
-        
+
+    @cached_property
+    def _get_llm(self) -> ChatOpenAI:
+        return self._build_llm(
+            model=self.settings.generation.model,
+            api_key=self.settings.generation.api_key,
+            base_url=self.settings.generation.base_url,
+        )
+
+    @cached_property
+    def _get_fallback_llm(self) -> Optional[ChatOpenAI]:
+        generation = self.settings.generation
+        if not generation.fallback_model and not generation.fallback_base_url:
+            return None
+        return self._build_llm(
+            model=generation.fallback_model or generation.model,
+            api_key=generation.fallback_api_key or generation.api_key,
+            base_url=generation.fallback_base_url or generation.base_url,
+        )
+
+    @cached_property
+    def _get_prompt(self) -> ChatPromptTemplate:
+        return ChatPromptTemplate.from_messages([
+            ("system",
+            "Bạn là ChatbotAI, trợ lý thân thiện chuyên trả lời câu hỏi về CV. "
+            "Dựa trên thông tin CV, trả lời bằng tiếng Việt, tự nhiên, dễ hiểu, chỉ dùng thông tin từ CV, bỏ ký hiệu thừa. "
+            "Dùng liên từ để câu văn mượt mà, ưu tiên thông tin liên quan. "
+            "Nếu không có thông tin, trả lời: 'Tôi không tìm thấy thông tin trong CV.' "
+            ),
+            MessagesPlaceholder(variable_name="chat_history"),
+            ("human", "{retrieved_info}\nCâu hỏi: {input}")
+        ])
+
+    @cached_property
+    def _get_chain(self) -> Runnable:
+        return self._get_prompt | self._get_llm
+
+    @cached_property
+    def _get_fallback_chain(self) -> Optional[Runnable]:
+        if self._get_fallback_llm is None:
+            return None
+        return self._get_prompt | self._get_fallback_llm
+
+    def _get_chain_inputs(self, inputs: GenerationInput) -> Dict[str, Any]:
         retrieved_info_str = " ".join(
             [
                 f"Content: {doc.get('content', 'N/A')}"
                 for doc in inputs.retrieved_info
             ]
         )
+        return {
+            "input": inputs.query,
+            "chat_history": inputs.chat_history,
+            "retrieved_info": retrieved_info_str
+        }
+
+    async def _collect(self, chain: Runnable, chain_inputs: Dict[str, Any], first_token: asyncio.Event) -> str:
+        """Stream a chain to completion, signalling when the first token arrives.
+
+        Args:
+            chain (Runnable): Prompt and model chain to run.
+            chain_inputs (Dict[str, Any]): Prompt variables.
+            first_token (asyncio.Event): Set on the first non-empty chunk.
+
+        Returns:
+            str: Full response text.
+        """
+        parts = []
+        async for chunk in chain.astream(chain_inputs):
+            if chunk.content:
+                first_token.set()
+                parts.append(chunk.content)
+        first_token.set()
+        return "".join(parts)
+
+    async def _hedged_collect(self, chain_inputs: Dict[str, Any]) -> str:
+        """Run the primary model and, if it is slow to start, race a hedged request to the fallback model.
+
+        The hedge starts when the primary has produced no token after
+        `GENERATION__HEDGE_AFTER` seconds, or as soon as the primary fails.
+        The first request to finish successfully wins and the other one is
+        cancelled, closing its connection.
+
+        Args:
+            chain_inputs (Dict[str, Any]): Prompt variables.
+
+        Returns:
+            str: Response of the winning model.
+        """
+        generation = self.settings.generation
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + generation.deadline
+        fallback_chain = self._get_fallback_chain if generation.hedge_enabled else None
+
+        primary_first_token = asyncio.Event()
+        primary = asyncio.create_task(self._collect(self._get_chain, chain_inputs, primary_first_token))
+        names = {primary: "primary"}
+        pending = {primary}
+
+        def start_hedge():
+            hedge = asyncio.create_task(self._collect(fallback_chain, chain_inputs, asyncio.Event()))
+            names[hedge] = "hedge"
+            pending.add(hedge)
+            metrics.inc("generation_hedges_started")
+
         try:
-            prompt = ChatPromptTemplate.from_messages([
-                ("system",
-                "Bạn là ChatbotAI, trợ lý thân thiện chuyên trả lời câu hỏi về CV. "
-                "Dựa trên thông tin CV, trả lời bằng tiếng Việt, tự nhiên, dễ hiểu, chỉ dùng thông tin từ CV, bỏ ký hiệu thừa. "
-                "Dùng liên từ để câu văn mượt mà, ưu tiên thông tin liên quan. "
-                "Nếu không có thông tin, trả lời: 'Tôi không tìm thấy thông tin trong CV.' "
-                ),
-                MessagesPlaceholder(variable_name="chat_history"),
-                ("human", "{retrieved_info}\nCâu hỏi: {input}")
-            ])
-
-            chain = prompt | llm
-            response = chain.invoke({
-                "input": inputs.query,
-                "chat_history": inputs.chat_history,
-                "retrieved_info": retrieved_info_str
-            })
+            if fallback_chain is not None:
+                first_token_wait = asyncio.create_task(primary_first_token.wait())
+                await asyncio.wait(
+                    {primary, first_token_wait},
+                    timeout=min(generation.hedge_after, generation.deadline),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                first_token_wait.cancel()
+                if not primary_first_token.is_set():
+                    logger.info(f"No first token after {generation.hedge_after}s, hedging to fallback model")
+                    start_hedge()
+
+            errors = []
+            while pending:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                done, _ = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    pending.discard(task)
+                    if task.exception() is None:
+                        metrics.inc(f"generation_{names[task]}_wins")
+                        return task.result()
+                    logger.error(f"{names[task].capitalize()} generation failed: {task.exception()}")
+                    errors.append(task.exception())
+                    if task is primary and fallback_chain is not None and "hedge" not in names.values():
+                        start_hedge()
+
+            if errors and not pending:
+                raise errors[-1]
+            metrics.inc("generation_deadline_exceeded")
+            raise GenerationTimeoutError(f"No response within {generation.deadline}s")
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _pump(self, chain: Runnable, chain_inputs: Dict[str, Any], queue: asyncio.Queue) -> None:
+        """Forward the tokens of a chain into a queue, ending with `_END` or the raised exception."""
+        try:
+            async for chunk in chain.astream(chain_inputs):
+                if chunk.content:
+                    await queue.put(chunk.content)
+            await queue.put(_END)
+        except Exception as e:
+            await queue.put(e)
+
+    async def astream(self, inputs: GenerationInput) -> AsyncIterator[str]:
+        """Stream a response under the per-request deadline, hedging to the fallback model when enabled.
+
+        The hedge starts when the primary has produced no token after
+        `GENERATION__HEDGE_AFTER` seconds, or as soon as the primary fails.
+        The first stream to produce a token is kept and the other one is
+        cancelled.
+
+        Args:
+            inputs (GenerationInput): Input data containing the query and chat history.
+
+        Yields:
+            str: Response tokens of the winning model.
+        """
+        generation = self.settings.generation
+        chain_inputs = self._get_chain_inputs(inputs)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + generation.deadline
+        fallback_chain = self._get_fallback_chain if generation.hedge_enabled else None
+        hedge_at = loop.time() + generation.hedge_after if fallback_chain is not None else None
+
+        streams: Dict[str, asyncio.Queue] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+        getters: Dict[str, asyncio.Task] = {}
+
+        def start(name: str, chain: Runnable):
+            streams[name] = asyncio.Queue()
+            tasks[name] = asyncio.create_task(self._pump(chain, chain_inputs, streams[name]))
+            if name == "hedge":
+                metrics.inc("generation_hedges_started")
+
+        try:
+            start("primary", self._get_chain)
+            winner, first, error = None, None, None
+            while winner is None:
+                for name, queue in streams.items():
+                    if name not in getters:
+                        getters[name] = asyncio.create_task(queue.get())
+                if not getters:
+                    raise error
+                timeout = deadline - loop.time()
+                if hedge_at is not None and "hedge" not in tasks:
+                    timeout = min(timeout, hedge_at - loop.time())
+                done, _ = await asyncio.wait(set(getters.values()), timeout=max(timeout, 0), return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if loop.time() >= deadline:
+                        metrics.inc("generation_deadline_exceeded")
+                        raise GenerationTimeoutError(f"No response within {generation.deadline}s")
+                    logger.info(f"No first token after {generation.hedge_after}s, hedging to fallback model")
+                    start("hedge", fallback_chain)
+                    continue
+                for name in [name for name, getter in getters.items() if getter in done]:
+                    item = getters.pop(name).result()
+                    if isinstance(item, Exception):
+                        logger.error(f"{name.capitalize()} generation failed: {item}")
+                        error = item
+                        del streams[name]
+                        if name == "primary" and fallback_chain is not None and "hedge" not in tasks:
+                            start("hedge", fallback_chain)
+                    elif winner is None:
+                        winner, first = name, item
+
+            metrics.inc(f"generation_{winner}_wins")
+            for name, task in tasks.items():
+                if name != winner:
+                    task.cancel()
+
+            item = first
+            queue = streams[winner]
+            while item is not _END:
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    metrics.inc("generation_deadline_exceeded")
+                    raise GenerationTimeoutError(f"No complete response within {generation.deadline}s")
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    metrics.inc("generation_deadline_exceeded")
+                    raise GenerationTimeoutError(f"No complete response within {generation.deadline}s")
+        finally:
+            for getter in getters.values():
+                getter.cancel()
+            for task in tasks.values():
+                task.cancel()
+
+    async def aprocess(self, inputs: GenerationInput) -> GenerationOutput:
+        """Generate a response under the per-request deadline, hedging to the fallback model when enabled.
+
+        Args:
+            inputs (GenerationInput): Input data containing the query and chat history.
+
+        Returns:
+            GenerationOutput: Output data containing the generated response.
+        """
+        try:
+            response = await self._hedged_collect(self._get_chain_inputs(inputs))
+        except Exception as e:
+            logger.error(f"Failed to generate response: {str(e)}")
+            raise e
+
+        return GenerationOutput(response=response)
+
+    def process(self, inputs: GenerationInput) -> GenerationOutput:
+        """Generate a response based on the input query and chat history.
+
+        Args:
+            inputs (GenerationInput): Input data containing the query and chat history.
+
+        Returns:
+            GenerationOutput: Output data containing the generated response.
+        """
+        try:
+            response = self._get_chain.invoke(self._get_chain_inputs(inputs))
             cleaned_response = TextCleaner().clean_text(response.content)
         except Exception as e:
             logger.error(f"Failed to generate response: {str(e)}")
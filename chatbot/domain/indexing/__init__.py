@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from .embedding import EmbeddingInput
+from .embedding import EmbeddingOutput
 from .embedding import EmbeddingService
 
 from .chunking import Chunker
@@ -8,4 +9,4 @@ from .chunking import ChunkInput
 
 from .convert import DocumentProcessor
 
-__all__ = ['EmbeddingInput', 'EmbeddingService', 'Chunker', 'ChunkInput', 'DocumentProcessor']
\ No newline at end of file
+__all__ = ['EmbeddingInput', 'EmbeddingOutput', 'EmbeddingService', 'Chunker', 'ChunkInput', 'DocumentProcessor']
\ No newline at end of file
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import logging
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+def token_budget_batches(lengths: Sequence[int], max_tokens: int, max_items: int) -> List[List[int]]:
+    """Group texts of similar token length into batches sized by their padded token count.
+
+    Texts are sorted by length, so a batch only pads to the longest of
+    texts that are about as long, and it grows until its padded size,
+    items times the longest length, would exceed the budget.
+
+    Args:
+        lengths (Sequence[int]): Token count of each text.
+        max_tokens (int): Padded tokens allowed per batch. A longer text gets a batch of its own.
+        max_items (int): The maximum number of texts per batch.
+
+    Returns:
+        List[List[int]]: Indices of the texts of each batch, shortest texts first.
+    """
+    batches: List[List[int]] = []
+    batch: List[int] = []
+    for index in sorted(range(len(lengths)), key=lambda i: lengths[i]):
+        # The new text is the longest of the batch, so it sets the padded length
+        if batch and ((len(batch) + 1) * lengths[index] > max_tokens or len(batch) >= max_items):
+            batches.append(batch)
+            batch = []
+        batch.append(index)
+    if batch:
+        batches.append(batch)
+    return batches
+
+def encode_isolating_failures(
+    texts: Sequence[str],
+    batches: List[List[int]],
+    encode: Callable[[List[str]], np.ndarray],
+) -> List[Optional[List[float]]]:
+    """Encode batches of texts, bisecting a failed batch until the failing texts are isolated.
+
+    A batch that raises, or returns vectors that are not finite, is split in
+    two halves encoded separately, so one bad text only costs a few extra
+    passes and the rest of its batch is still embedded.
+
+    Args:
+        texts (Sequence[str]): Texts to encode.
+        batches (List[List[int]]): Indices of the texts of each batch.
+        encode (Callable[[List[str]], np.ndarray]): Encodes a list of texts into a matrix.
+
+    Returns:
+        List[Optional[List[float]]]: Vector of each text in input order, None for the texts that failed alone.
+    """
+    vectors: List[Optional[List[float]]] = [None] * len(texts)
+
+    def run(indices: List[int]) -> None:
+        try:
+            encoded = np.asarray(encode([texts[i] for i in indices]), dtype=np.float32)
+            if encoded.shape[0] != len(indices) or not np.isfinite(encoded).all():
+                raise ValueError(f"Model returned {encoded.shape[0]} vectors for {len(indices)} texts, or non-finite values")
+        except Exception as e:
+            if len(indices) == 1:
+                logger.error(f"Could not embed text {indices[0]} ({len(texts[indices[0]])} characters): {e}")
+                return
+            logger.warning(f"Batch of {len(indices)} texts failed, bisecting: {e}")
+            middle = len(indices) // 2
+            run(indices[:middle])
+            run(indices[middle:])
+            return
+        for index, vector in zip(indices, encoded.tolist()):
+            vectors[index] = vector
+
+    for batch in batches:
+        run(batch)
+    return vectors
@@ -1,17 +1,28 @@
+from __future__ import annotations
+
 import os
 import logging
-from typing import Optional
-from docling.document_converter import DocumentConverter, PdfFormatOption, CsvFormatOption
-from docling.datamodel.base_models import InputFormat
-from docling.datamodel.pipeline_options import PdfPipelineOptions, TableFormerMode
+from typing import TYPE_CHECKING, Optional, Tuple
 
 from shared.settings import Settings
+
+# docling pulls in torch and the OCR stack, so it is imported on first conversion only
+if TYPE_CHECKING:
+    from docling.document_converter import DocumentConverter
+    from docling.datamodel.base_models import InputFormat
+
 logger = logging.getLogger(__name__)
 
 class DocumentProcessor:
 
+    def __init__(self, num_threads: Optional[int] = None):
+        # Threads for the OCR and layout models, docling reads OMP_NUM_THREADS when None
+        self.num_threads = num_threads
+
     def get_input_format(self, file_path: str) -> Optional[InputFormat]:
         """Determine the InputFormat based on the file extension."""
+        from docling.datamodel.base_models import InputFormat
+
         ext: str = os.path.splitext(file_path)[1].lower()
         if ext == '.pdf':
             return InputFormat.PDF
@@ -24,7 +35,13 @@ class DocumentProcessor:
 
     def get_converter(self) -> DocumentConverter:
         """Create a DocumentConverter with format options for all supported formats."""
+        from docling.document_converter import DocumentConverter, PdfFormatOption, CsvFormatOption
+        from docling.datamodel.base_models import InputFormat
+        from docling.datamodel.pipeline_options import AcceleratorOptions, PdfPipelineOptions
+
         pipeline_options = PdfPipelineOptions()
+        if self.num_threads is not None:
+            pipeline_options.accelerator_options = AcceleratorOptions(num_threads=self.num_threads)
         pipeline_options.do_ocr = True
         pipeline_options.do_table_structure = False
         pipeline_options.table_structure_options.do_cell_matching = False
@@ -37,14 +54,21 @@ class DocumentProcessor:
         
         return DocumentConverter(format_options=format_options)
 
-    def process_file(self, file_path: str) -> bool:
-        """Process a single file and save the result as Markdown (.md)."""
+    def convert(self, file_path: str) -> Tuple[bool, str, int]:
+        """Convert a single file to Markdown.
+
+        Args:
+            file_path (str): File to convert.
+
+        Returns:
+            Tuple[bool, str, int]: Success, the Markdown and the page count of the document.
+        """
         filename: str = os.path.basename(file_path)
         input_format: Optional[InputFormat] = self.get_input_format(file_path)
         
         if input_format is None:
             logger.warning(f"Unsupported file format: {filename}")
-            return False
+            return False, "", 0
         
         converter = self.get_converter()
         
@@ -54,8 +78,13 @@ class DocumentProcessor:
             
             output_filename: str = os.path.splitext(filename)[0] + '.md'
             logger.info(f"Converted {filename} to {output_filename}")
-            return True, output
+            return True, output, len(res.document.pages)
         
         except Exception as e:
             logger.error(f"Error converting {filename}: {str(e)}")
-            return False
\ No newline at end of file
+            return False, "", 0
+
+    def process_file(self, file_path: str) -> Tuple[bool, str]:
+        """Process a single file and return the result as Markdown (.md)."""
+        success, output, _ = self.convert(file_path)
+        return success, output
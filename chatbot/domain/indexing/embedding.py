@@ -1,24 +1,39 @@
+from __future__ import annotations
+
 import logging
 from functools import cached_property
-from sentence_transformers import SentenceTransformer
-from fastembed import SparseTextEmbedding
-from typing import List, Dict, Any
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Tuple
 
+from domain.indexing.batching import encode_isolating_failures
+from domain.indexing.batching import token_budget_batches
 from shared.base import BaseModel
 from shared.base import BaseService
+from shared.projection import get_projection
 from shared.settings import Settings
 from shared.sparse_embedding import SparseEmbeddingData
+from shared.sparse_embedding import prune_sparse
+from shared.thread_budget import get_thread_budget
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+    from fastembed import SparseTextEmbedding
 
 logger = logging.getLogger(__name__)
 
 class EmbeddingInput(BaseModel):
     chunks: List[Dict[str, Any]] = []
     query: str = None
+    queries: List[str] = []
+    dense: bool = True
+    sparse: bool = True
 
 class EmbeddingOutput(BaseModel):
     dense_embeddings: List[List[float]]
     sparse_embeddings: List[SparseEmbeddingData]
     metadata: List[Dict[str, Any]]
+    reduced_embeddings: List[List[float]] = []
+    # Input chunks the embeddings belong to, chunks that are empty or failed to embed are left out
+    kept: List[int] = []
 
 class EmbeddingService(BaseService):
     settings: Settings
@@ -30,6 +45,11 @@ class EmbeddingService(BaseService):
         Returns:
             SentenceTransformer: SentenceTransformer model.
         """
+        # Imported here so that torch is only loaded by processes that encode locally
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        torch.set_num_threads(get_thread_budget(self.settings).torch_threads)
         logger.info(f"Loading SentenceTransformer model from {self.settings.embedding.dense_model_path}")
         return SentenceTransformer(self.settings.embedding.dense_model_path)
     
@@ -40,18 +60,46 @@ class EmbeddingService(BaseService):
         Returns:
             SparseTextEmbedding: SparseTextEmbedding model.
         """
+        from fastembed import SparseTextEmbedding
+
         logger.info(f"Loading SparseTextEmbedding model from {self.settings.embedding.sparse_model_path}")
-        return SparseTextEmbedding(self.settings.embedding.sparse_model_path)
+        return SparseTextEmbedding(
+            self.settings.embedding.sparse_model_path,
+            threads=get_thread_budget(self.settings).onnx_threads,
+        )
+
+    def _token_lengths(self, texts: List[str]) -> List[int]:
+        """Count the tokens the dense model sees for each text, truncation included.
 
-    def _get_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+        Args:
+            texts: List of texts to measure
+
+        Returns:
+            Token count of each text
+        """
+        model = self.load_dense_model
+        encoded = model.tokenizer(
+            texts,
+            truncation=True,
+            max_length=model.max_seq_length,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+        )
+        return [len(ids) for ids in encoded["input_ids"]]
+
+    def _get_embeddings_batch(self, texts: List[str]) -> List[Optional[List[float]]]:
         """
         Generate dense embeddings for a batch of texts.
+
+        Texts are grouped by token length into batches of at most
+        `EMBEDDING__BATCH_TOKENS` padded tokens and `EMBEDDING__MAX_TOKEN_LIMIT`
+        texts. A failed batch is bisected until the failing texts are isolated.
         
         Args:
             texts: List of texts to generate embeddings for
             
         Returns:
-            List of dense embedding vectors
+            List of dense embedding vectors in input order, None for texts that could not be embedded
         """
         if not texts:
             return []
@@ -60,18 +108,19 @@ class EmbeddingService(BaseService):
         if not valid_texts:
             logger.warning("No valid texts to encode")
             return []
-        
-        embeddings = []
-        for i in range(0, len(valid_texts), self.settings.embedding.max_token_limit):
-            batch = valid_texts[i:i + self.settings.embedding.max_token_limit]
-            try:
-                batch_embeddings = self.load_dense_model.encode(batch).tolist()
-                embeddings.extend(batch_embeddings)
-            except Exception as e:
-                logger.error(f"Error in batch {i//self.settings.embedding.max_token_limit}: {str(e)}")
-                embeddings.extend([[0.0] * self.load_dense_model.get_sentence_embedding_dimension()] * len(batch))
-        
-        return embeddings
+
+        model = self.load_dense_model
+        batches = token_budget_batches(
+            self._token_lengths(valid_texts),
+            max_tokens=self.settings.embedding.batch_tokens,
+            max_items=self.settings.embedding.max_token_limit,
+        )
+        # One forward pass per batch, sentence-transformers would split it again into batches of 32
+        return encode_isolating_failures(
+            valid_texts,
+            batches,
+            lambda batch: model.encode(batch, batch_size=len(batch), convert_to_numpy=True, show_progress_bar=False),
+        )
     
     def _get_sparse_embedding(self, texts: List[str]) -> List[SparseEmbeddingData]:
         """Generate sparse embeddings for a list of texts.
@@ -103,6 +152,34 @@ class EmbeddingService(BaseService):
             logger.error(f"Error generating sparse embeddings: {str(e)}")
             return [SparseEmbeddingData(indices=[], values=[]) for _ in valid_texts]
 
+    def _prune(self, sparse_embeddings: List[SparseEmbeddingData], query: bool) -> List[SparseEmbeddingData]:
+        """Keep the configured share of sparse weights, for chunks or for queries.
+
+        Args:
+            sparse_embeddings: Sparse embeddings as the model returned them
+            query: Whether they embed queries rather than chunks
+
+        Returns:
+            Pruned sparse embeddings, in input order
+        """
+        embedding = self.settings.embedding
+        top_k = embedding.sparse_query_top_k if query else embedding.sparse_top_k
+        min_weight = embedding.sparse_query_min_weight if query else embedding.sparse_min_weight
+        if top_k is None and min_weight <= 0:
+            return sparse_embeddings
+        return [prune_sparse(vector, top_k, min_weight) for vector in sparse_embeddings]
+
+    def _encode(self, texts: List[str]) -> Tuple[List[Optional[List[float]]], List[SparseEmbeddingData]]:
+        """Generate dense and sparse embeddings for the same texts.
+
+        Args:
+            texts: List of texts to encode
+
+        Returns:
+            Dense embedding vectors and sparse embedding data, in input order
+        """
+        return self._get_embeddings_batch(texts), self._get_sparse_embedding(texts)
+
     def process(self, inputs: EmbeddingInput) -> EmbeddingOutput:
         """Process the input chunks and return both dense and sparse embeddings.
 
@@ -112,41 +189,58 @@ class EmbeddingService(BaseService):
         Returns:
             EmbeddingOutput: EmbeddingOutput object with dense and sparse embeddings
         """
-        if not inputs.chunks and not inputs.query:
+        if not inputs.chunks and not inputs.query and not inputs.queries:
             return EmbeddingOutput(dense_embeddings=[], sparse_embeddings=[], metadata=[])
 
-        if inputs.query:
-            dense_embedding = self._get_embeddings_batch([inputs.query])
-            sparse_embedding = self._get_sparse_embedding([inputs.query])
+        if inputs.queries or inputs.query:
+            # One forward pass per model for the whole list of questions
+            texts = inputs.queries or [inputs.query]
+            if inputs.dense and inputs.sparse:
+                dense_vectors, sparse_embeddings = self._encode(texts)
+            else:
+                dense_vectors = self._get_embeddings_batch(texts) if inputs.dense else []
+                sparse_embeddings = self._get_sparse_embedding(texts) if inputs.sparse else []
+            dense_embeddings = [vector for vector in dense_vectors if vector is not None]
+            if len(dense_embeddings) < len(dense_vectors):
+                raise RuntimeError("Could not embed the query")
             return EmbeddingOutput(
-                dense_embeddings=dense_embedding,
-                sparse_embeddings=sparse_embedding,
+                dense_embeddings=dense_embeddings,
+                sparse_embeddings=self._prune(sparse_embeddings, query=True),
                 metadata=[]
             )
         
-        if inputs.chunks:
-            # Extract texts from chunks
-            valid_chunks = [chunk for chunk in inputs.chunks if "content" in chunk and isinstance(chunk["content"], str)]
-            if not valid_chunks:
-                logger.warning("No valid chunks to encode")
-                return EmbeddingOutput(dense_embeddings=[], sparse_embeddings=[], metadata=[])
-            
-            texts = [chunk["content"] for chunk in valid_chunks]
-            
-            # Generate embeddings
-            dense_embeddings = self._get_embeddings_batch(texts)
-            sparse_embeddings = self._get_sparse_embedding(texts)
+        # Extract texts from chunks
+        rows = [i for i, chunk in enumerate(inputs.chunks) if isinstance(chunk.get("content"), str) and chunk["content"]]
+        if not rows:
+            logger.warning("No valid chunks to encode")
+            return EmbeddingOutput(dense_embeddings=[], sparse_embeddings=[], metadata=[])
+
+        # Generate embeddings
+        vectors, sparse_vectors = self._encode([inputs.chunks[row]["content"] for row in rows])
+        kept: List[int] = []
+        chunk_dense: List[List[float]] = []
+        chunk_sparse: List[SparseEmbeddingData] = []
+        for row, vector, sparse_vector in zip(rows, vectors, sparse_vectors):
+            # Indexing a placeholder vector would make the chunk match arbitrary queries
+            if vector is None:
+                continue
+            kept.append(row)
+            chunk_dense.append(vector)
+            chunk_sparse.append(sparse_vector)
+        if len(kept) < len(rows):
+            logger.error(f"Skipping {len(rows) - len(kept)} of {len(rows)} chunks that could not be embedded")
+        projection = get_projection(self.settings)
 
-            metadata = [
+        return EmbeddingOutput(
+            dense_embeddings=chunk_dense,
+            sparse_embeddings=self._prune(chunk_sparse, query=False),
+            metadata=[
                 {
-                    **chunk.get("metadata", {}),
-                    "content": chunk["content"]
+                    **inputs.chunks[row].get("metadata", {}),
+                    "content": inputs.chunks[row]["content"]
                 }
-                for chunk in valid_chunks
-            ]
-    
-        return EmbeddingOutput(
-            dense_embeddings=dense_embeddings,
-            sparse_embeddings=sparse_embeddings,
-            metadata=metadata
-        )
\ No newline at end of file
+                for row in kept
+            ],
+            reduced_embeddings=projection.project(chunk_dense) if projection is not None else [],
+            kept=kept,
+        )
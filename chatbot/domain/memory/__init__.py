@@ -0,0 +1,4 @@
+from .memory import MemoryService
+from .memory import MemoryInput
+
+__all__ = ["MemoryService", "MemoryInput"]
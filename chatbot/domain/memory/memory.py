@@ -0,0 +1,136 @@
+import logging
+import re
+from functools import cached_property
+from typing import List
+from typing import Optional
+from langchain_core.messages import AIMessage
+from langchain_core.messages import BaseMessage
+from langchain_core.messages import HumanMessage
+from langchain_core.messages import SystemMessage
+
+from shared.base import BaseModel
+from shared.base import BaseService
+from shared.clean_text import TextCleaner
+from shared.settings import Settings
+from shared.token_counter import count_tokens
+from infrastructure.session_store import SessionState
+from infrastructure.session_store import SessionStore
+from infrastructure.session_store import Turn
+from infrastructure.session_store import get_session_store
+
+logger = logging.getLogger(__name__)
+
+class MemoryInput(BaseModel):
+    session_id: Optional[str] = None
+
+class MemoryOutput(BaseModel):
+    chat_history: List[BaseMessage]
+
+class MemoryService(BaseService):
+    settings: Settings
+
+    @cached_property
+    def _get_store(self) -> SessionStore:
+        return get_session_store(self.settings)
+
+    def _truncate(self, text: str, max_tokens: int) -> str:
+        """Keep the first sentence of a text, cut to a token budget.
+
+        Args:
+            text (str): Text to shorten.
+            max_tokens (int): Maximum number of tokens to keep.
+
+        Returns:
+            str: Shortened text.
+        """
+        text = TextCleaner().clean_text(text)
+        sentence = re.split(r"(?<=[.!?])\s", text, maxsplit=1)[0]
+        words = sentence.split()
+        while words and count_tokens(" ".join(words)) > max_tokens:
+            words = words[:-max(1, len(words) // 4)]
+        shortened = " ".join(words)
+        return shortened if shortened == text else f"{shortened}..."
+
+    def _fold_into_summary(self, summary: str, turn: Turn) -> str:
+        """Append a compact line for a turn leaving the window, dropping the oldest lines over budget.
+
+        Args:
+            summary (str): Current summary.
+            turn (Turn): Turn evicted from the sliding window.
+
+        Returns:
+            str: Updated summary.
+        """
+        line = (
+            f"Hỏi: {self._truncate(turn.query, self.settings.memory.summary_answer_tokens)} "
+            f"- Đáp: {self._truncate(turn.response, self.settings.memory.summary_answer_tokens)}"
+        )
+        lines = [*summary.splitlines(), line] if summary else [line]
+        while len(lines) > 1 and count_tokens("\n".join(lines)) > self.settings.memory.summary_tokens:
+            lines.pop(0)
+        return "\n".join(lines)
+
+    def _trim(self, state: SessionState) -> SessionState:
+        """Move the oldest turns into the summary until the window fits its turn and token budgets.
+
+        Args:
+            state (SessionState): Session state with the newest turn appended.
+
+        Returns:
+            SessionState: Bounded session state.
+        """
+        turns = list(state.turns)
+        summary = state.summary
+        tokens = sum(count_tokens(turn.query) + count_tokens(turn.response) for turn in turns)
+        while turns and (len(turns) > self.settings.memory.max_turns or tokens > self.settings.memory.history_tokens):
+            evicted = turns.pop(0)
+            tokens -= count_tokens(evicted.query) + count_tokens(evicted.response)
+            summary = self._fold_into_summary(summary, evicted)
+        return SessionState(summary=summary, turns=turns)
+
+    def update(self, session_id: Optional[str], query: str, response: str) -> None:
+        """Record a finished turn for a session.
+
+        Args:
+            session_id (Optional[str]): Session identifier, nothing is stored when missing.
+            query (str): User question.
+            response (str): Generated answer.
+        """
+        if not session_id:
+            return
+
+        def append(state: Optional[SessionState]) -> SessionState:
+            state = state or SessionState()
+            return self._trim(
+                SessionState(
+                    summary=state.summary,
+                    turns=[*state.turns, Turn(query=query, response=response)]
+                )
+            )
+
+        # Read and written in one step, so that concurrent turns of a session are all kept
+        self._get_store.update(session_id, append)
+
+    def process(self, inputs: MemoryInput) -> MemoryOutput:
+        """Load the bounded chat history of a session.
+
+        Args:
+            inputs (MemoryInput): Input containing the session identifier.
+
+        Returns:
+            MemoryOutput: Summary of older turns followed by the recent turns.
+        """
+        if not inputs.session_id:
+            return MemoryOutput(chat_history=[])
+
+        state = self._get_store.get(inputs.session_id)
+        if state is None:
+            return MemoryOutput(chat_history=[])
+
+        chat_history: List[BaseMessage] = []
+        if state.summary:
+            chat_history.append(SystemMessage(content=f"Tóm tắt hội thoại trước:\n{state.summary}"))
+        for turn in state.turns:
+            chat_history.append(HumanMessage(content=turn.query))
+            chat_history.append(AIMessage(content=turn.response))
+        return MemoryOutput(chat_history=chat_history)
@@ -0,0 +1,7 @@
+from .extractor import extract_profile
+from .profile import ProfileQueryInput
+from .profile import ProfileQueryOutput
+from .profile import ProfileService
+from .profile import match_intent
+
+__all__ = ["extract_profile", "ProfileQueryInput", "ProfileQueryOutput", "ProfileService", "match_intent"]
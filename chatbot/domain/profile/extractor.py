@@ -0,0 +1,140 @@
+import re
+from datetime import date
+from typing import Iterable, List, Optional, Tuple
+
+from shared.clean_text import TextCleaner
+from infrastructure.profile_store import CandidateProfile
+
+EDUCATION_SECTIONS = ("học vấn", "education", "trình độ", "bằng cấp", "đào tạo")
+EXPERIENCE_SECTIONS = ("kinh nghiệm", "experience", "employment", "work history", "quá trình công tác")
+SKILL_SECTIONS = ("kỹ năng", "kĩ năng", "skill", "công nghệ", "technolog")
+
+SCHOOL_MARKERS = ("đại học", "trường", "học viện", "cao đẳng", "university", "college", "institute", "academy")
+COMPANY_MARKERS = (
+    "công ty", "tập đoàn", "ngân hàng", "company", "corporation", "corp", "jsc", "ltd", "inc",
+    "software", "technology", "technologies", "solutions", "group", "bank",
+)
+
+_HEADER = re.compile(r"^\s*#{1,6}\s+(.*)$")
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_PHONE = re.compile(r"(?<!\d)(?:\+84|0)(?:[\s.-]?\d){8,10}(?!\d)")
+_LINK = re.compile(r"(?:https?://|www\.)\S+|(?:linkedin\.com|github\.com)/\S+", re.IGNORECASE)
+_DATE_RANGE = re.compile(
+    r"(?:(\d{1,2})\s*[/.-]\s*)?((?:19|20)\d{2})\s*(?:-|–|—|~|đến|to)\s*"
+    r"(?:(?:(\d{1,2})\s*[/.-]\s*)?((?:19|20)\d{2})|(nay|hiện tại|hiện nay|present|now|current))",
+    re.IGNORECASE,
+)
+_LIST_SEPARATORS = re.compile(r"[,;|•·]|\s-\s")
+_EMPTY_BRACKETS = re.compile(r"\(\s*\)|\[\s*\]")
+
+def _sections(markdown: str) -> List[Tuple[str, List[str]]]:
+    """Split Markdown into (header, lines) pairs, text before the first header has an empty header."""
+    sections: List[Tuple[str, List[str]]] = [("", [])]
+    for line in markdown.splitlines():
+        header = _HEADER.match(line)
+        if header:
+            sections.append((header.group(1).strip().casefold(), []))
+        elif line.strip():
+            sections[-1][1].append(line)
+    return sections
+
+def _lines_of(sections: List[Tuple[str, List[str]]], names: Iterable[str]) -> List[str]:
+    return [line for header, lines in sections if any(name in header for name in names) for line in lines]
+
+def _unique(items: Iterable[str], limit: int) -> List[str]:
+    seen, result = set(), []
+    for item in items:
+        key = item.casefold()
+        if item and key not in seen:
+            seen.add(key)
+            result.append(item)
+    return result[:limit]
+
+def _clean(line: str) -> str:
+    return TextCleaner().clean_text(line).strip(" :|-")
+
+def _experience_years(lines: List[str], today: date) -> Optional[float]:
+    """Sum the date ranges of the experience section, counting overlapping jobs once."""
+    periods = []
+    for line in lines:
+        for start_month, start_year, end_month, end_year, ongoing in _DATE_RANGE.findall(line):
+            start = int(start_year) * 12 + (int(start_month) if start_month else 1) - 1
+            if ongoing:
+                end = today.year * 12 + today.month - 1
+            else:
+                end = int(end_year) * 12 + (int(end_month) if end_month else 12) - 1
+            if end >= start:
+                periods.append((start, end + 1))
+    if not periods:
+        return None
+
+    months, current_start, current_end = 0, None, None
+    for start, end in sorted(periods):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                months += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    months += current_end - current_start
+    return round(months / 12, 1)
+
+def _companies(lines: List[str]) -> List[str]:
+    companies = []
+    for line in lines:
+        text = _clean(_EMPTY_BRACKETS.sub("", _DATE_RANGE.sub("", line)))
+        folded = text.casefold()
+        if any(re.search(rf"\b{re.escape(marker)}\b", folded) for marker in COMPANY_MARKERS):
+            # Keep the part of "Role - Company" or "Company | Role" that names the company
+            parts = [part.strip() for part in re.split(r"\s[-–|]\s|\s*\|\s*", text) if part.strip()]
+            named = [part for part in parts if any(marker in part.casefold() for marker in COMPANY_MARKERS)]
+            companies.append((named or parts)[0])
+    return companies
+
+def _skills(lines: List[str]) -> List[str]:
+    skills = []
+    for line in lines:
+        text = _clean(line)
+        # "Ngôn ngữ: Python, Java" lists the skills after the label
+        if ":" in text:
+            text = text.split(":", 1)[1]
+        skills.extend(item.strip(" .") for item in _LIST_SEPARATORS.split(text))
+    return [skill for skill in skills if 0 < len(skill) <= 40]
+
+def extract_profile(markdown: str, candidate: str, today: Optional[date] = None) -> CandidateProfile:
+    """Pull a structured profile out of a converted CV with deterministic parsers.
+
+    Contact details come from the whole document; education, companies,
+    experience years and skills come from the sections whose headers name
+    them, in Vietnamese or English.
+
+    Args:
+        markdown (str): CV converted to Markdown.
+        candidate (str): Candidate name.
+        today (Optional[date]): Date used for ongoing jobs, defaults to today.
+
+    Returns:
+        CandidateProfile: Extracted profile, fields stay empty when nothing was found.
+    """
+    sections = _sections(markdown)
+    education_lines = _lines_of(sections, EDUCATION_SECTIONS)
+    experience_lines = _lines_of(sections, EXPERIENCE_SECTIONS)
+    skill_lines = _lines_of(sections, SKILL_SECTIONS)
+    all_lines = [line for _, lines in sections for line in lines]
+
+    schools = [
+        _clean(line) for line in education_lines or all_lines
+        if any(marker in line.casefold() for marker in SCHOOL_MARKERS)
+    ]
+    phones = [re.sub(r"[\s.-]", "", phone) for phone in _PHONE.findall(markdown)]
+
+    return CandidateProfile(
+        candidate=candidate,
+        emails=_unique(_EMAIL.findall(markdown), 3),
+        phones=_unique(phones, 3),
+        links=_unique((link.rstrip(").,") for link in _LINK.findall(markdown)), 5),
+        education=_unique(schools, 5),
+        companies=_unique(_companies(experience_lines), 10),
+        experience_years=_experience_years(experience_lines, today or date.today()),
+        skills=_unique(_skills(skill_lines), 50),
+    )
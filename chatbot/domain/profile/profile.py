@@ -0,0 +1,140 @@
+import logging
+import re
+import unicodedata
+from functools import cached_property
+from typing import Optional
+
+from shared.base import BaseModel
+from shared.base import BaseService
+from shared.settings import Settings
+from infrastructure.profile_store import CandidateProfile
+from infrastructure.profile_store import ProfileStore
+from infrastructure.profile_store import get_profile_store
+
+from .extractor import extract_profile
+
+logger = logging.getLogger(__name__)
+
+# Who a question is about, and polite openings, both optional in the patterns below
+_SUBJECT = r"(?:ứng viên|ứng cử viên|anh ấy|chị ấy|bạn ấy|người này)"
+_ASK = r"(?:cho (?:tôi|mình) (?:biết |xin )?|xin |hãy cho biết )?"
+_OF = rf"(?: của {_SUBJECT})?"
+
+# Whole questions answered from the profile, matched on the case-folded query without its
+# final punctuation. Anything more, e.g. a year, a narrower topic or a second clause, goes to RAG.
+INTENTS = {
+    "email": (
+        rf"{_ASK}(?:địa chỉ )?(?:email|e-mail|gmail|thư điện tử){_OF}(?: là gì)?",
+        rf"{_SUBJECT} có (?:địa chỉ )?(?:email|e-mail|gmail)(?: là gì| không)?",
+        r"(?:what is |what's )?(?:the )?candidate'?s? email(?: address)?",
+    ),
+    "phone": (
+        rf"{_ASK}(?:số điện thoại|số đt|sđt|sdt)(?: liên hệ)?{_OF}(?: là gì| là bao nhiêu)?",
+        rf"{_SUBJECT} có (?:số điện thoại|sđt|sdt)(?: là gì| là bao nhiêu| không)?",
+        r"(?:what is |what's )?(?:the )?candidate'?s? phone(?: number)?",
+    ),
+    "experience_years": (
+        rf"{_SUBJECT} có (?:bao nhiêu|mấy) năm kinh nghiệm(?: làm việc)?(?: rồi)?",
+        rf"{_SUBJECT} có kinh nghiệm(?: làm việc)? (?:bao lâu|bao nhiêu năm|mấy năm)(?: rồi)?",
+        rf"{_ASK}(?:tổng )?số năm kinh nghiệm{_OF}(?: là bao nhiêu)?",
+        r"how many years of experience does the candidate have",
+    ),
+    "education": (
+        rf"{_SUBJECT} (?:đã )?(?:học|tốt nghiệp)(?: đại học)? (?:ở |tại )?trường nào",
+        rf"{_SUBJECT} (?:đã )?(?:học|tốt nghiệp) (?:ở|tại) đâu",
+        rf"{_ASK}(?:trình độ )?học vấn{_OF}(?: là gì| như thế nào| thế nào)?",
+        r"(?:what is the candidate'?s? education|which university did the candidate attend)",
+    ),
+    "companies": (
+        rf"{_SUBJECT} (?:đã |từng )?(?:làm việc|làm) (?:ở|tại|cho) (?:những |các )?công ty nào(?: rồi)?",
+        rf"{_SUBJECT} (?:đã |từng )?(?:làm việc|làm) (?:ở|tại) (?:những )?đâu(?: rồi)?",
+        rf"(?:những|các) công ty {_SUBJECT} (?:đã |từng )?làm(?: việc)?",
+        r"which companies has the candidate worked (?:at|for)",
+    ),
+    "skills": (
+        rf"{_SUBJECT} có (?:những |các )?(?:kỹ năng|kĩ năng) (?:gì|nào)",
+        rf"{_ASK}(?:những |các )?(?:kỹ năng|kĩ năng){_OF}(?: là gì| gồm những gì)?",
+        r"(?:what are the candidate'?s? skills|what skills does the candidate have)",
+    ),
+}
+
+_PATTERNS = {
+    intent: re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
+    for intent, patterns in INTENTS.items()
+}
+
+class ProfileQueryInput(BaseModel):
+    query: str
+    candidate: str
+
+class ProfileQueryOutput(BaseModel):
+    intent: Optional[str] = None
+    response: Optional[str] = None
+
+def match_intent(query: str) -> Optional[str]:
+    """Find the single factual intent of a query.
+
+    Args:
+        query (str): User question.
+
+    Returns:
+        Optional[str]: Intent name, None when the query is not one of the `INTENTS` questions.
+    """
+    text = " ".join(unicodedata.normalize("NFC", query).casefold().split()).rstrip(" ?.!")
+    matches = [intent for intent, pattern in _PATTERNS.items() if pattern.fullmatch(text)]
+    return matches[0] if len(matches) == 1 else None
+
+def _answer(intent: str, profile: CandidateProfile) -> Optional[str]:
+    name = profile.candidate
+    if intent == "email" and profile.emails:
+        return f"Email của ứng viên {name}: {', '.join(profile.emails)}."
+    if intent == "phone" and profile.phones:
+        return f"Số điện thoại của ứng viên {name}: {', '.join(profile.phones)}."
+    if intent == "experience_years" and profile.experience_years is not None:
+        return f"Ứng viên {name} có khoảng {profile.experience_years:g} năm kinh nghiệm làm việc."
+    if intent == "education" and profile.education:
+        return f"Ứng viên {name} học tại: {'; '.join(profile.education)}."
+    if intent == "companies" and profile.companies:
+        return f"Ứng viên {name} đã làm việc tại: {'; '.join(profile.companies)}."
+    if intent == "skills" and profile.skills:
+        return f"Kỹ năng của ứng viên {name}: {', '.join(profile.skills)}."
+    return None
+
+class ProfileService(BaseService):
+    settings: Settings
+
+    @cached_property
+    def _get_store(self) -> ProfileStore:
+        return get_profile_store(self.settings)
+
+    def save(self, markdown: str, candidate: str) -> CandidateProfile:
+        """Extract the profile of a converted CV and store it.
+
+        Args:
+            markdown (str): CV converted to Markdown.
+            candidate (str): Candidate name.
+
+        Returns:
+            CandidateProfile: Stored profile.
+        """
+        profile = extract_profile(markdown, candidate)
+        self._get_store.put(profile)
+        logger.info(f"Profile of {candidate} stored: {profile.model_dump(exclude={'candidate'})}")
+        return profile
+
+    def process(self, inputs: ProfileQueryInput) -> ProfileQueryOutput:
+        """Answer a factual question from the candidate's stored profile.
+
+        Args:
+            inputs (ProfileQueryInput): Question and candidate.
+
+        Returns:
+            ProfileQueryOutput: Matched intent and answer; no answer means RAG should handle the question.
+        """
+        intent = match_intent(inputs.query)
+        if intent is None:
+            return ProfileQueryOutput()
+        profile = self._get_store.get(inputs.candidate)
+        if profile is None:
+            return ProfileQueryOutput(intent=intent)
+        return ProfileQueryOutput(intent=intent, response=_answer(intent, profile))
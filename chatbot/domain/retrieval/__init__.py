@@ -1,4 +1,27 @@
+from .retrieval import RetrievalBatchInput
 from .retrieval import RetrievalInput
+from .retrieval import RetrievalOutput
 from .retrieval import RetrievalService
+from .candidate_cache import CandidateCache
+from .candidate_cache import CandidateVectors
+from .candidate_cache import get_candidate_cache
+from .candidate_directory import CandidateDirectory
+from .candidate_directory import fold_name
+from .candidate_directory import get_candidate_directory
+from .reranker import RerankerService
+from .reranker import RerankInput
+from .reranker import RerankOutput
+from .reranker import get_reranker
+from .router import QueryRouter
+from .router import RouteInput
+from .router import RouteOutput
+from .router import ROUTE_HYBRID
+from .router import ROUTE_SPARSE
 
-__all__ = ["RetrievalInput", "RetrievalService"]
\ No newline at end of file
+__all__ = [
+    "RetrievalBatchInput", "RetrievalInput", "RetrievalOutput", "RetrievalService",
+    "CandidateCache", "CandidateVectors", "get_candidate_cache",
+    "CandidateDirectory", "fold_name", "get_candidate_directory",
+    "RerankerService", "RerankInput", "RerankOutput", "get_reranker",
+    "QueryRouter", "RouteInput", "RouteOutput", "ROUTE_HYBRID", "ROUTE_SPARSE",
+]
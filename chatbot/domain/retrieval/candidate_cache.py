@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from infrastructure.qdrant import hybrid_limits
+from shared.metrics import metrics
+from shared.settings import Settings
+from shared.sparse_embedding import SparseEmbeddingData
+
+logger = logging.getLogger(__name__)
+
+# Same constant as Qdrant's reciprocal rank fusion
+RRF_K = 2
+
+class CandidateVectors:
+    """All chunks of one candidate, laid out for vectorized scoring.
+
+    Dense vectors are stored normalized, so cosine similarity is a matrix
+    product. Sparse vectors are flattened into parallel (row, index, value)
+    arrays, so a sparse dot product is a sorted lookup plus a scatter-add.
+
+    Args:
+        payloads (List[Dict[str, Any]]): Payload of each chunk.
+        dense (List[List[float]]): Dense vector of each chunk.
+        sparse (List[SparseEmbeddingData]): Sparse vector of each chunk.
+    """
+
+    def __init__(self, payloads: List[Dict[str, Any]], dense: List[List[float]], sparse: List[SparseEmbeddingData]):
+        self.payloads = payloads
+        self.dense = _normalize(np.asarray(dense, dtype=np.float32).reshape(len(payloads), -1))
+        self.sparse_rows = np.concatenate(
+            [np.full(len(vector.indices), row, dtype=np.int32) for row, vector in enumerate(sparse)] or [np.zeros(0, np.int32)]
+        )
+        self.sparse_indices = np.concatenate(
+            [np.asarray(vector.indices, dtype=np.int64) for vector in sparse] or [np.zeros(0, np.int64)]
+        )
+        self.sparse_values = np.concatenate(
+            [np.asarray(vector.values, dtype=np.float32) for vector in sparse] or [np.zeros(0, np.float32)]
+        )
+        self.nbytes = (
+            self.dense.nbytes + self.sparse_rows.nbytes + self.sparse_indices.nbytes + self.sparse_values.nbytes
+            + sum(len(json.dumps(payload, ensure_ascii=False)) for payload in payloads)
+        )
+
+    def __len__(self) -> int:
+        return len(self.payloads)
+
+    def dense_scores(self, dense_query: List[float]) -> np.ndarray:
+        query = _normalize(np.asarray(dense_query, dtype=np.float32).reshape(1, -1))[0]
+        return self.dense @ query
+
+    def sparse_scores(self, sparse_query: SparseEmbeddingData) -> Tuple[np.ndarray, np.ndarray]:
+        """Sparse dot product of every chunk with the query.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Scores, and whether each chunk shares a token with the query.
+        """
+        scores = np.zeros(len(self), dtype=np.float32)
+        matched = np.zeros(len(self), dtype=bool)
+        if not sparse_query.indices or not len(self.sparse_indices):
+            return scores, matched
+        order = np.argsort(sparse_query.indices)
+        query_indices = np.asarray(sparse_query.indices, dtype=np.int64)[order]
+        query_values = np.asarray(sparse_query.values, dtype=np.float32)[order]
+        positions = np.clip(np.searchsorted(query_indices, self.sparse_indices), 0, len(query_indices) - 1)
+        hits = query_indices[positions] == self.sparse_indices
+        np.add.at(scores, self.sparse_rows[hits], self.sparse_values[hits] * query_values[positions[hits]])
+        matched[self.sparse_rows[hits]] = True
+        return scores, matched
+
+    def query(self, dense_query: List[float], sparse_query: SparseEmbeddingData, k: int) -> List[Dict[str, Any]]:
+        """Hybrid search mirroring `Qdrant.query`.
+
+        The best chunks by dense and by sparse score are fused with RRF, the
+        best fused chunks are rescored by the dense score and the top `k` are
+        returned, with the prefetch sizes of `hybrid_limits`.
+
+        Returns:
+            List[Dict[str, Any]]: Payloads of the best chunks.
+        """
+        limit, candidates = hybrid_limits(k)
+        dense = self.dense_scores(dense_query)
+        sparse, matched = self.sparse_scores(sparse_query)
+        fused = np.zeros(len(self), dtype=np.float64)
+        dense_ranked = _top(dense, candidates)
+        sparse_ranked = _top(sparse, candidates, np.flatnonzero(matched))
+        for rows in (dense_ranked, sparse_ranked):
+            fused[rows] += 1.0 / (RRF_K + np.arange(len(rows)))
+        # Equal fused scores keep the order in which the chunks were first ranked, as in Qdrant
+        ranked = np.concatenate([dense_ranked, sparse_ranked])
+        _, first = np.unique(ranked, return_index=True)
+        fused_rows = _top(fused, limit, ranked[np.sort(first)])
+        best = fused_rows[np.argsort(-dense[fused_rows], kind="stable")][:k]
+        return [self.payloads[row] for row in best]
+
+    def query_sparse(self, sparse_query: SparseEmbeddingData, k: int) -> List[Dict[str, Any]]:
+        """Sparse-only search mirroring `Qdrant.query_sparse`.
+
+        Returns:
+            List[Dict[str, Any]]: Payloads of the best chunks sharing a token with the query.
+        """
+        sparse, matched = self.sparse_scores(sparse_query)
+        return [self.payloads[row] for row in _top(sparse, k, np.flatnonzero(matched))]
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+def _top(scores: np.ndarray, k: int, rows: Optional[np.ndarray] = None) -> np.ndarray:
+    """Rows with the `k` highest scores, best first, restricted to `rows` when given."""
+    if rows is None:
+        rows = np.arange(len(scores))
+    return rows[np.argsort(-scores[rows], kind="stable")][:k]
+
+class CandidateCache:
+    """Process-local LRU of `CandidateVectors`, bounded by memory size.
+
+    Entries expire after `ttl` seconds so that re-indexing done by another
+    worker shows up; re-indexing in this process invalidates right away.
+
+    Args:
+        max_bytes (int): Approximate memory budget of all entries.
+        ttl (float): Seconds an entry is served before it is reloaded.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: OrderedDict[str, Tuple[float, CandidateVectors]] = OrderedDict()
+        self._bytes = 0
+        # Bumped on invalidation, so a load that raced with re-indexing is not cached
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _pop(self, candidate: str) -> None:
+        _, vectors = self._entries.pop(candidate)
+        self._bytes -= vectors.nbytes
+
+    def get(self, candidate: str, load: Callable[[], CandidateVectors]) -> CandidateVectors:
+        """Return the cached chunks of a candidate, loading them on a miss.
+
+        Args:
+            candidate (str): Candidate name, as used in the retrieval filter.
+            load (Callable[[], CandidateVectors]): Fetches the candidate's chunks.
+
+        Returns:
+            CandidateVectors: Chunks of the candidate.
+        """
+        with self._lock:
+            entry = self._entries.get(candidate)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self._entries.move_to_end(candidate)
+                metrics.inc("candidate_cache_hits")
+                return entry[1]
+            generation = self._generations.get(candidate, 0)
+        metrics.inc("candidate_cache_misses")
+        vectors = load()
+        self.put(candidate, vectors, generation)
+        return vectors
+
+    def put(self, candidate: str, vectors: CandidateVectors, generation: Optional[int] = None) -> None:
+        with self._lock:
+            if generation is not None and generation != self._generations.get(candidate, 0):
+                return
+            if candidate in self._entries:
+                self._pop(candidate)
+            if vectors.nbytes > self.max_bytes:
+                logger.warning(f"Chunks of {candidate} take {vectors.nbytes} bytes, more than the cache size")
+                return
+            self._entries[candidate] = (time.monotonic(), vectors)
+            self._bytes += vectors.nbytes
+            while self._bytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+                metrics.inc("candidate_cache_evictions")
+            metrics.set_gauge("candidate_cache_bytes", self._bytes)
+
+    def invalidate(self, candidates: Iterable[str]) -> None:
+        with self._lock:
+            for candidate in candidates:
+                self._generations[candidate] = self._generations.get(candidate, 0) + 1
+                if candidate in self._entries:
+                    self._pop(candidate)
+            metrics.set_gauge("candidate_cache_bytes", self._bytes)
+
+_cache: Optional[CandidateCache] = None
+_cache_lock = threading.Lock()
+
+def get_candidate_cache(settings: Settings) -> CandidateCache:
+    """Return the process-wide candidate cache, shared by the retrieval and indexing services.
+
+    Args:
+        settings (Settings): Application settings.
+
+    Returns:
+        CandidateCache: Cache sized by `RETRIEVAL__CACHE_MAX_MB` and `RETRIEVAL__CACHE_TTL`.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = CandidateCache(
+                max_bytes=settings.retrieval.cache_max_mb * 1024 * 1024,
+                ttl=settings.retrieval.cache_ttl,
+            )
+        return _cache
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import bisect
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from infrastructure.qdrant import Qdrant
+from shared.metrics import metrics
+from shared.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+# Seconds between the reloads triggered by names the directory does not know
+MIN_RELOAD_INTERVAL = 5.0
+
+def fold_name(name: str) -> str:
+    """Fold a name the way users may type it: without diacritics, case, punctuation or extra spaces.
+
+    Args:
+        name (str): Candidate name, e.g. "ĐÀO  Duy Chiến".
+
+    Returns:
+        str: Folded name, e.g. "dao duy chien".
+    """
+    text = unicodedata.normalize("NFD", name.replace("đ", "d").replace("Đ", "D"))
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(_PUNCTUATION.sub(" ", text.casefold()).split())
+
+def _reordered(folded: str) -> str:
+    return " ".join(sorted(folded.split()))
+
+def _trigrams(folded: str) -> FrozenSet[str]:
+    padded = f"  {folded} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+class _NameIndex:
+    """Immutable lookup tables over a set of canonical names, rebuilt on every change."""
+
+    def __init__(self, names: Set[str]):
+        self.names = frozenset(names)
+        self.folded_names = {name: fold_name(name) for name in names}
+        self.folded: Dict[str, List[str]] = {}
+        self.reordered: Dict[str, List[str]] = {}
+        self.trigrams: Dict[str, List[str]] = {}
+        self.grams: Dict[str, FrozenSet[str]] = {}
+        tokens: List[Tuple[str, str]] = []
+        for name in sorted(names):
+            folded = self.folded_names[name]
+            self.folded.setdefault(folded, []).append(name)
+            self.reordered.setdefault(_reordered(folded), []).append(name)
+            self.grams[name] = _trigrams(folded)
+            for gram in self.grams[name]:
+                self.trigrams.setdefault(gram, []).append(name)
+            tokens.extend((token, name) for token in set(folded.split()))
+        tokens.sort()
+        # Sorted (token, name) pairs: a bisect finds every name with a token starting with a prefix
+        self.tokens = tokens
+        self.token_keys = [token for token, _ in tokens]
+
+    def with_prefix(self, prefix: str) -> Set[str]:
+        start = bisect.bisect_left(self.token_keys, prefix)
+        end = bisect.bisect_left(self.token_keys, prefix + "\uffff")
+        return {name for _, name in self.tokens[start:end]}
+
+    def similar(self, folded: str) -> List[Tuple[float, str]]:
+        """Names sharing trigrams with a folded name, scored by Dice coefficient, best first."""
+        grams = _trigrams(folded)
+        shared = Counter(name for gram in grams for name in self.trigrams.get(gram, ()))
+        scored = [(2 * count / (len(grams) + len(self.grams[name])), name) for name, count in shared.items()]
+        return sorted(scored, key=lambda item: (-item[0], item[1]))
+
+class CandidateDirectory:
+    """In-memory directory resolving typed candidate names to the names stored in Qdrant.
+
+    Names are looked up exactly, then diacritic- and case-folded, then with
+    their words in any order, then by trigram similarity for typos. The
+    directory is loaded from Qdrant on first use, reloaded every
+    `refresh_interval` seconds to see candidates indexed by other workers,
+    and updated right away by indexing in this process.
+
+    Args:
+        load (Callable[[], Iterable[str]]): Reads every canonical candidate name.
+        refresh_interval (float): Seconds between reloads.
+        min_similarity (float): Trigram similarity a typo must reach to be resolved.
+    """
+
+    def __init__(self, load: Callable[[], Iterable[str]], refresh_interval: float, min_similarity: float):
+        self._load = load
+        self.refresh_interval = refresh_interval
+        self.min_similarity = min_similarity
+        self._index = _NameIndex(set())
+        self._added: Set[str] = set()
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+
+    @property
+    def stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh_interval
+
+    def refresh(self) -> None:
+        """Reload every name, keeping the current ones if the load fails."""
+        try:
+            names = set(self._load())
+        except Exception as e:
+            logger.error(f"Error loading the candidate directory: {e}")
+            names = None
+        with self._lock:
+            if names is not None:
+                # Names indexed in this process are kept until a load sees them
+                self._added -= names
+                self._index = _NameIndex(names | self._added)
+                logger.info(f"Candidate directory loaded with {len(self._index.names)} names")
+            self._loaded_at = time.monotonic()
+
+    def _reload(self, loaded_at: Optional[float]) -> None:
+        # Callers that saw the same load wait for a single reload instead of each scrolling Qdrant
+        with self._reload_lock:
+            if self._loaded_at == loaded_at:
+                self.refresh()
+
+    def _current(self) -> _NameIndex:
+        loaded_at = self._loaded_at
+        if self.stale:
+            self._reload(loaded_at)
+        return self._index
+
+    def add(self, name: str) -> None:
+        with self._lock:
+            self._added.add(name)
+            if name not in self._index.names:
+                self._index = _NameIndex(set(self._index.names) | {name})
+
+    def __len__(self) -> int:
+        return len(self._current().names)
+
+    def resolve(self, name: str) -> Optional[str]:
+        """Find the canonical name a typed name refers to.
+
+        Args:
+            name (str): Name as typed in the frontend.
+
+        Returns:
+            Optional[str]: Canonical name, None when unknown or ambiguous.
+        """
+        kind, resolved = self._lookup(self._current(), name)
+        loaded_at = self._loaded_at
+        if kind in ("fuzzy", "miss") and loaded_at is not None and time.monotonic() - loaded_at >= MIN_RELOAD_INTERVAL:
+            # The name may belong to a candidate another worker indexed since the last load
+            self._reload(loaded_at)
+            kind, resolved = self._lookup(self._index, name)
+        metrics.inc(f"name_resolution_{kind}")
+        return resolved
+
+    def _lookup(self, index: _NameIndex, name: str) -> Tuple[str, Optional[str]]:
+        if name in index.names:
+            return "exact", name
+        folded = fold_name(name)
+        for kind, matches in (
+            ("folded", index.folded.get(folded, [])),
+            ("reordered", index.reordered.get(_reordered(folded), [])),
+        ):
+            if len(matches) == 1:
+                return kind, matches[0]
+            if matches:
+                return "ambiguous", None
+
+        similar = index.similar(folded)
+        if similar and similar[0][0] >= self.min_similarity and (len(similar) == 1 or similar[1][0] < similar[0][0]):
+            return "fuzzy", similar[0][1]
+        return "miss", None
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[str]:
+        """Autocomplete a partly typed name.
+
+        Names starting with the typed text come first, then names whose words
+        start with each typed word, then names with similar spelling.
+
+        Args:
+            prefix (str): Typed text.
+            limit (int): Maximum number of names.
+
+        Returns:
+            List[str]: Canonical names, best first.
+        """
+        folded = fold_name(prefix)
+        if not folded:
+            return []
+        index = self._current()
+        words = folded.split()
+
+        def words_match(name: str) -> bool:
+            tokens = index.folded_names[name].split()
+            return all(any(token.startswith(word) for token in tokens) for word in words)
+
+        matches = sorted(name for name in index.with_prefix(max(words, key=len)) if words_match(name))
+        starts = [name for name in matches if index.folded_names[name].startswith(folded)]
+        suggestions = starts + [name for name in matches if name not in starts]
+        if len(suggestions) < limit:
+            chosen = set(suggestions)
+            suggestions += [
+                name for score, name in index.similar(folded)
+                if score >= self.min_similarity / 2 and name not in chosen
+            ]
+        return suggestions[:limit]
+
+_directories: Dict[Tuple[str, int, str], CandidateDirectory] = {}
+_directories_lock = threading.Lock()
+
+def get_candidate_directory(settings: Settings) -> CandidateDirectory:
+    """Return the process-wide directory of the configured collection.
+
+    Args:
+        settings (Settings): Application settings.
+
+    Returns:
+        CandidateDirectory: Directory loaded from the collection's candidate key.
+    """
+    key = (settings.qdrant.url, settings.qdrant.port, settings.qdrant.name)
+    with _directories_lock:
+        if key not in _directories:
+            qdrant = Qdrant(settings=settings)
+            _directories[key] = CandidateDirectory(
+                load=qdrant.candidate_names,
+                refresh_interval=settings.retrieval.name_refresh_interval,
+                min_similarity=settings.retrieval.name_min_similarity,
+            )
+        return _directories[key]
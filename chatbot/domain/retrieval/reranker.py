@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from functools import cached_property
+from typing import Any, Dict, List, Optional
+
+from shared.base import BaseModel
+from shared.base import BaseService
+from shared.metrics import metrics
+from shared.settings import Settings
+from shared.thread_budget import get_thread_budget
+
+logger = logging.getLogger(__name__)
+
+RERANK_BACKENDS = ("fastembed", "sentence_transformers")
+
+class RerankInput(BaseModel):
+    query: str
+    context: List[Dict[str, Any]]
+    top_n: int
+
+class RerankOutput(BaseModel):
+    context: List[Dict[str, Any]]
+    scores: List[float]
+
+class RerankerService(BaseService):
+    """Rescores retrieved chunks against the query with a cross-encoder.
+
+    The fastembed backend runs the model with ONNX Runtime, the
+    sentence_transformers backend with torch; both are imported on first use.
+    """
+    settings: Settings
+
+    @cached_property
+    def load_model(self):
+        """Load the cross-encoder configured by `RETRIEVAL__RERANK_MODEL`.
+
+        Returns:
+            TextCrossEncoder | CrossEncoder: Cross-encoder of the configured backend.
+        """
+        retrieval = self.settings.retrieval
+        budget = get_thread_budget(self.settings)
+        logger.info(f"Loading {retrieval.rerank_backend} reranker from {retrieval.rerank_model}")
+        if retrieval.rerank_backend == "fastembed":
+            from fastembed.rerank.cross_encoder import TextCrossEncoder
+
+            return TextCrossEncoder(retrieval.rerank_model, threads=budget.onnx_threads)
+        if retrieval.rerank_backend == "sentence_transformers":
+            import torch
+            from sentence_transformers import CrossEncoder
+
+            torch.set_num_threads(budget.torch_threads)
+            return CrossEncoder(retrieval.rerank_model, trust_remote_code=True)
+        raise ValueError(f"Unsupported rerank backend: {retrieval.rerank_backend}")
+
+    def _score(self, query: str, documents: List[str]) -> List[float]:
+        batch_size = self.settings.retrieval.rerank_batch_size
+        if self.settings.retrieval.rerank_backend == "fastembed":
+            return [float(score) for score in self.load_model.rerank(query, documents, batch_size=batch_size)]
+        pairs = [(query, document) for document in documents]
+        return [float(score) for score in self.load_model.predict(pairs, batch_size=batch_size)]
+
+    def process(self, inputs: RerankInput) -> RerankOutput:
+        """Keep the `top_n` chunks that the cross-encoder scores highest.
+
+        Args:
+            inputs (RerankInput): Query, retrieved chunks and number of chunks to keep.
+
+        Returns:
+            RerankOutput: Kept chunks, best first, with their scores.
+        """
+        if not inputs.context:
+            return RerankOutput(context=[], scores=[])
+        started = time.perf_counter()
+        try:
+            scores = self._score(inputs.query, [chunk.get("content", "") for chunk in inputs.context])
+        except Exception as e:
+            logger.error(f"Error reranking {len(inputs.context)} chunks: {e}")
+            raise e
+        metrics.observe("rerank", time.perf_counter() - started)
+
+        order = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:inputs.top_n]
+        return RerankOutput(
+            context=[inputs.context[i] for i in order],
+            scores=[scores[i] for i in order],
+        )
+
+_reranker: Optional[RerankerService] = None
+_reranker_lock = threading.Lock()
+
+def get_reranker(settings: Settings) -> RerankerService:
+    """Return the process-wide reranker, so the cross-encoder is loaded once per worker.
+
+    Args:
+        settings (Settings): Application settings.
+
+    Returns:
+        RerankerService: Shared reranker.
+    """
+    global _reranker
+    with _reranker_lock:
+        if _reranker is None:
+            if settings.retrieval.rerank_backend not in RERANK_BACKENDS:
+                raise ValueError(f"Unsupported rerank backend: {settings.retrieval.rerank_backend}")
+            _reranker = RerankerService(settings=settings)
+        return _reranker
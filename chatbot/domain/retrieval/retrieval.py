@@ -1,4 +1,5 @@
-from typing import List, Dict, Any
+from functools import cached_property
+from typing import List, Dict, Any, Optional
 
 from shared.base import BaseModel
 from shared.base import BaseService
@@ -6,11 +7,25 @@ from shared.settings import Settings
 from shared.sparse_embedding import SparseEmbeddingData
 from infrastructure.qdrant import Qdrant
 
+from .candidate_cache import CandidateCache
+from .candidate_cache import CandidateVectors
+from .candidate_cache import get_candidate_cache
+from .reranker import RerankerService
+from .reranker import RerankInput
+from .reranker import get_reranker
+
 
 class RetrievalInput(BaseModel):
-    dense_query: List[float]
+    dense_query: Optional[List[float]] = None
     sparse_query: List[SparseEmbeddingData]
     user_name: str
+    query: Optional[str] = None
+
+class RetrievalBatchInput(BaseModel):
+    dense_queries: List[List[float]]
+    sparse_queries: List[SparseEmbeddingData]
+    user_name: str
+    queries: List[str] = []
 
 class RetrievalOutput(BaseModel):
     context: List[Dict[str, Any]]
@@ -18,25 +33,128 @@ class RetrievalOutput(BaseModel):
 class RetrievalService(BaseService):
     settings: Settings
 
-    @property
+    @cached_property
     def _get_qdrant(self) -> Qdrant:
         return Qdrant(settings=self.settings)
 
+    @cached_property
+    def _get_reranker(self) -> RerankerService:
+        return get_reranker(self.settings)
+
+    @cached_property
+    def _get_cache(self) -> CandidateCache:
+        return get_candidate_cache(self.settings)
+
+    def _load_candidate(self, user_name: str) -> CandidateVectors:
+        records = self._get_qdrant.candidate_points(user_name)
+        empty = SparseEmbeddingData(indices=[], values=[])
+        sparse = [record.vector.get("sparse") for record in records]
+        return CandidateVectors(
+            payloads=self._get_qdrant.payloads(records),
+            dense=[record.vector["dense"] for record in records],
+            sparse=[
+                SparseEmbeddingData(indices=vector.indices, values=vector.values) if vector is not None else empty
+                for vector in sparse
+            ],
+        )
+
+    def _candidate(self, user_name: str) -> CandidateVectors:
+        return self._get_cache.get(user_name, lambda: self._load_candidate(user_name))
+
+    def warm(self, user_name: str) -> int:
+        """Load a candidate's chunks into the in-process cache ahead of the first question.
+
+        Args:
+            user_name (str): Candidate name.
+
+        Returns:
+            int: Number of cached chunks, 0 when the cache is disabled.
+        """
+        if not self.settings.retrieval.cache_enabled:
+            return 0
+        return len(self._candidate(user_name))
+
+    def _limit(self, query: Optional[str]) -> int:
+        """Number of chunks to fetch, wider when the results are reranked afterwards."""
+        retrieval = self.settings.retrieval
+        if retrieval.rerank_enabled and query:
+            return max(retrieval.rerank_candidates, retrieval.rerank_top_n)
+        return retrieval.top_k
+
+    def _rerank(self, query: Optional[str], context: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not (self.settings.retrieval.rerank_enabled and query):
+            return context
+        return self._get_reranker.process(
+            RerankInput(query=query, context=context, top_n=self.settings.retrieval.rerank_top_n)
+        ).context
+
     def process(self, inputs: RetrievalInput) -> RetrievalOutput:
         """Retrieve documents from the database based on the query.
 
+        With `RETRIEVAL__RERANK_ENABLED` and the query text given, a wider set
+        of `rerank_candidates` chunks is fetched and only the `rerank_top_n`
+        best scored by the cross-encoder are returned.
+
+        With `RETRIEVAL__CACHE_ENABLED`, the candidate's chunks are scored in
+        process from the candidate cache instead of querying Qdrant.
+
         Args:
             input (RetrievalInput): Input data containing the query and optional parameters.
 
         Returns:
             RetrievalOutput: Output data containing the retrieved documents and metadata.
         """
-        qdrant_outputs = self._get_qdrant.query(
-            dense_query=inputs.dense_query,
-            sparse_query=inputs.sparse_query,
+        if self.settings.retrieval.cache_enabled:
+            vectors = self._candidate(inputs.user_name)
+            if inputs.dense_query is None:
+                context = vectors.query_sparse(inputs.sparse_query[0], k=self._limit(inputs.query))
+            else:
+                context = vectors.query(inputs.dense_query, inputs.sparse_query[0], k=self._limit(inputs.query))
+            return RetrievalOutput(context=self._rerank(inputs.query, context))
+
+        if inputs.dense_query is None:
+            # Sparse-only fast path chosen by the query router
+            qdrant_outputs = self._get_qdrant.query_sparse(
+                sparse_query=inputs.sparse_query[0],
+                user_name=inputs.user_name,
+                k=self._limit(inputs.query),
+            )
+        else:
+            qdrant_outputs = self._get_qdrant.query(
+                dense_query=inputs.dense_query,
+                sparse_query=inputs.sparse_query,
+                user_name=inputs.user_name,
+                k=self._limit(inputs.query),
+            )
+        
+        context = self._get_qdrant.payloads(qdrant_outputs.points)
+        return RetrievalOutput(context=self._rerank(inputs.query, context))
+
+    def process_batch(self, inputs: RetrievalBatchInput) -> List[RetrievalOutput]:
+        """Retrieve documents for several queries about the same candidate in one Qdrant request.
+
+        Args:
+            inputs (RetrievalBatchInput): One dense and one sparse vector per query,
+                and the query texts when the results should be reranked.
+
+        Returns:
+            List[RetrievalOutput]: Retrieved documents for each query, in input order.
+        """
+        queries = inputs.queries or [None] * len(inputs.dense_queries)
+        if self.settings.retrieval.cache_enabled:
+            vectors = self._candidate(inputs.user_name)
+            return [
+                RetrievalOutput(context=self._rerank(query, vectors.query(dense_query, sparse_query, k=self._limit(query))))
+                for query, dense_query, sparse_query in zip(queries, inputs.dense_queries, inputs.sparse_queries)
+            ]
+
+        qdrant_outputs = self._get_qdrant.query_batch(
+            dense_queries=inputs.dense_queries,
+            sparse_queries=inputs.sparse_queries,
             user_name=inputs.user_name,
-            k=self.settings.retrieval.top_k,
+            k=self._limit(inputs.queries[0] if inputs.queries else None),
         )
-        
-        context = list(qdrant_output.payload for qdrant_output in qdrant_outputs.points)
-        return RetrievalOutput(context=context)
\ No newline at end of file
+        return [
+            RetrievalOutput(context=self._rerank(query, self._get_qdrant.payloads(qdrant_output.points)))
+            for query, qdrant_output in zip(queries, qdrant_outputs)
+        ]
@@ -0,0 +1,110 @@
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import cached_property
+from typing import Dict, Set, Tuple
+
+from shared.base import BaseModel
+from shared.base import BaseService
+from shared.settings import Settings
+from shared.sparse_embedding import SparseEmbeddingData
+from infrastructure.qdrant import Qdrant
+
+logger = logging.getLogger(__name__)
+
+ROUTE_SPARSE = "sparse"
+ROUTE_HYBRID = "hybrid"
+
+# Words that turn a lookup into a question the dense model understands better
+QUESTION_WORDS = {
+    "gì", "nào", "sao", "không", "bao", "mấy", "ai", "đâu", "thế", "như", "hãy", "có",
+    "what", "which", "who", "how", "why", "when", "where", "does", "do", "is", "are",
+}
+_WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+class RouteInput(BaseModel):
+    query: str
+    sparse_query: SparseEmbeddingData
+    user_name: str
+
+class RouteOutput(BaseModel):
+    route: str
+    terms: int
+    overlap: float
+
+class QueryRouter(BaseService):
+    """Sends short keyword lookups to sparse-only search and everything else to hybrid search.
+
+    A query takes the sparse path when it has at most `routing_max_terms`
+    words, none of them a question word, and at least `routing_min_overlap`
+    of its sparse terms occur in the candidate's CV. The candidate
+    vocabularies are read from Qdrant and cached for `routing_vocabulary_ttl`
+    seconds.
+    """
+    settings: Settings
+
+    @cached_property
+    def _get_qdrant(self) -> Qdrant:
+        return Qdrant(settings=self.settings)
+
+    @cached_property
+    def _get_vocabularies(self) -> "OrderedDict[str, Tuple[float, Set[int]]]":
+        return OrderedDict()
+
+    @cached_property
+    def _get_lock(self) -> threading.Lock:
+        return threading.Lock()
+
+    def _vocabulary(self, user_name: str) -> Set[int]:
+        now = time.monotonic()
+        with self._get_lock:
+            cached = self._get_vocabularies.get(user_name)
+            if cached is not None and now - cached[0] < self.settings.retrieval.routing_vocabulary_ttl:
+                self._get_vocabularies.move_to_end(user_name)
+                return cached[1]
+
+        vocabulary = self._get_qdrant.sparse_vocabulary(user_name)
+        with self._get_lock:
+            self._get_vocabularies[user_name] = (now, vocabulary)
+            self._get_vocabularies.move_to_end(user_name)
+            while len(self._get_vocabularies) > self.settings.retrieval.routing_vocabulary_size:
+                self._get_vocabularies.popitem(last=False)
+        return vocabulary
+
+    def features(self, inputs: RouteInput) -> Dict[str, float]:
+        """Compute the cheap features the routing decision is based on.
+
+        Args:
+            inputs (RouteInput): Query, its sparse vector and the candidate.
+
+        Returns:
+            Dict[str, float]: Word count, question word flag and vocabulary overlap.
+        """
+        words = _WORD_PATTERN.findall(inputs.query.casefold())
+        question = "?" in inputs.query or any(word in QUESTION_WORDS for word in words)
+        features = {"terms": len(words), "question": float(question), "overlap": 0.0}
+        terms = set(inputs.sparse_query.indices)
+        if terms and not question and len(words) <= self.settings.retrieval.routing_max_terms:
+            features["overlap"] = len(terms & self._vocabulary(inputs.user_name)) / len(terms)
+        return features
+
+    def process(self, inputs: RouteInput) -> RouteOutput:
+        """Choose the retrieval route of a query.
+
+        Args:
+            inputs (RouteInput): Query, its sparse vector and the candidate.
+
+        Returns:
+            RouteOutput: Chosen route and the features behind it.
+        """
+        features = self.features(inputs)
+        keyword_lookup = (
+            0 < features["terms"] <= self.settings.retrieval.routing_max_terms
+            and not features["question"]
+            and features["overlap"] >= self.settings.retrieval.routing_min_overlap
+        )
+        route = ROUTE_SPARSE if keyword_lookup else ROUTE_HYBRID
+        logger.info(f"Query routed to {route} search: {features}")
+        return RouteOutput(route=route, terms=int(features["terms"]), overlap=features["overlap"])
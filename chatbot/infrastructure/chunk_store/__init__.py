@@ -0,0 +1,8 @@
+from __future__ import annotations
+
+from .chunk_store import ChunkStore
+from .chunk_store import InMemoryChunkStore
+from .chunk_store import SQLiteChunkStore
+from .chunk_store import get_chunk_store
+
+__all__ = ['ChunkStore', 'InMemoryChunkStore', 'SQLiteChunkStore', 'get_chunk_store']
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from abc import ABC
+from abc import abstractmethod
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+from shared.settings import Settings
+
+# SQLite's default limit on the number of host parameters of a statement
+_MAX_VARIABLES = 999
+
+class ChunkStore(ABC):
+    """Full chunk payloads keyed by Qdrant point ID."""
+
+    @abstractmethod
+    def get_many(self, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Look up several chunks at once.
+
+        Args:
+            ids (List[str]): Point IDs.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Payload of each ID found, missing IDs are left out.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def put_many(self, payloads: Dict[str, Dict[str, Any]]) -> None:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def delete_many(self, ids: List[str]) -> None:
+        raise NotImplementedError()
+
+class InMemoryChunkStore(ChunkStore):
+    """Process-local store, for single-worker setups and tests."""
+
+    def __init__(self):
+        self._chunks: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {id: self._chunks[id] for id in ids if id in self._chunks}
+
+    def put_many(self, payloads: Dict[str, Dict[str, Any]]) -> None:
+        with self._lock:
+            self._chunks.update(payloads)
+
+    def delete_many(self, ids: List[str]) -> None:
+        with self._lock:
+            for id in ids:
+                self._chunks.pop(id, None)
+
+class SQLiteChunkStore(ChunkStore):
+    """SQLite store of zlib-compressed JSON payloads, shared by the workers of a node.
+
+    Args:
+        path (str): Database file.
+        compression_level (int): zlib compression level.
+    """
+
+    def __init__(self, path: str, compression_level: int = 6):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.compression_level = compression_level
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS chunks (id TEXT PRIMARY KEY, data BLOB NOT NULL)')
+
+    def get_many(self, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        rows = []
+        with self._lock:
+            for start in range(0, len(ids), _MAX_VARIABLES):
+                batch = ids[start:start + _MAX_VARIABLES]
+                rows.extend(self._conn.execute(
+                    f"SELECT id, data FROM chunks WHERE id IN ({', '.join('?' * len(batch))})", batch,
+                ).fetchall())
+        return {id: json.loads(zlib.decompress(data)) for id, data in rows}
+
+    def put_many(self, payloads: Dict[str, Dict[str, Any]]) -> None:
+        rows = [
+            (id, zlib.compress(json.dumps(payload, ensure_ascii=False).encode(), self.compression_level))
+            for id, payload in payloads.items()
+        ]
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                self._conn.executemany('INSERT OR REPLACE INTO chunks (id, data) VALUES (?, ?)', rows)
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def delete_many(self, ids: List[str]) -> None:
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                self._conn.executemany('DELETE FROM chunks WHERE id = ?', [(id,) for id in ids])
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+_stores: Dict[Tuple[str, str], ChunkStore] = {}
+_stores_lock = threading.Lock()
+
+def get_chunk_store(settings: Settings) -> ChunkStore:
+    """Return the process-wide chunk store selected by `CHUNK_STORE__BACKEND`.
+
+    Args:
+        settings (Settings): Application settings.
+
+    Returns:
+        ChunkStore: In-memory or SQLite chunk store.
+    """
+    backend = settings.chunk_store.backend
+    if backend not in ('sqlite', 'memory'):
+        raise ValueError(f"Unsupported chunk store backend: {backend}")
+    key = (backend, settings.chunk_store.sqlite_path if backend == 'sqlite' else '')
+    with _stores_lock:
+        if key not in _stores:
+            if backend == 'sqlite':
+                _stores[key] = SQLiteChunkStore(settings.chunk_store.sqlite_path, settings.chunk_store.compression_level)
+            else:
+                _stores[key] = InMemoryChunkStore()
+        return _stores[key]
@@ -0,0 +1,6 @@
+from __future__ import annotations
+
+from .client import RemoteEmbeddingService
+from .server import EmbeddingServer
+
+__all__ = ['RemoteEmbeddingService', 'EmbeddingServer']
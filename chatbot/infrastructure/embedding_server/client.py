@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import logging
+import socket
+import threading
+from functools import cached_property
+from typing import List, Optional, Tuple
+
+from domain.indexing import EmbeddingService
+from shared.sparse_embedding import SparseEmbeddingData
+
+from .protocol import encode_frame
+from .protocol import recv_frame
+from .protocol import unpack_embeddings
+
+logger = logging.getLogger(__name__)
+
+class RemoteEmbeddingService(EmbeddingService):
+    """EmbeddingService that delegates encoding to the node's embedding server.
+
+    Each thread keeps its own connection to `EMBEDDING__SERVER_SOCKET`, and
+    the models are never loaded in this process.
+    """
+
+    @cached_property
+    def _get_local(self) -> threading.local:
+        return threading.local()
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.settings.embedding.server_timeout)
+        sock.connect(self.settings.embedding.server_socket)
+        return sock
+
+    def _request(self, texts: List[str], dense: bool, sparse: bool) -> Tuple[List[Optional[List[float]]], List[SparseEmbeddingData]]:
+        """Send texts to the embedding server, reconnecting once if the connection went stale.
+
+        Args:
+            texts (List[str]): Texts to encode.
+            dense (bool): Whether dense vectors are needed.
+            sparse (bool): Whether sparse vectors are needed.
+
+        Returns:
+            Tuple[List[Optional[List[float]]], List[SparseEmbeddingData]]: Dense and sparse embeddings,
+                None for texts the dense model failed on.
+        """
+        frame = encode_frame({'texts': texts, 'dense': dense, 'sparse': sparse})
+        local = self._get_local
+        for attempt in range(2):
+            try:
+                if getattr(local, 'sock', None) is None:
+                    local.sock = self._connect()
+                local.sock.sendall(frame)
+                header, payload = recv_frame(local.sock)
+                break
+            except (ConnectionError, OSError) as e:
+                if getattr(local, 'sock', None) is not None:
+                    local.sock.close()
+                    local.sock = None
+                if attempt:
+                    logger.error(f"Embedding server unavailable: {e}")
+                    raise e
+        if 'error' in header:
+            raise RuntimeError(f"Embedding server error: {header['error']}")
+        dense_embeddings, sparse_embeddings = unpack_embeddings(header, payload)
+        if not dense:
+            return [], sparse_embeddings
+        vectors = dense_embeddings.tolist()
+        for index in header.get('failed', []):
+            vectors[index] = None
+        return vectors, sparse_embeddings
+
+    def _get_embeddings_batch(self, texts: List[str]) -> List[Optional[List[float]]]:
+        valid_texts = [text for text in texts if text and isinstance(text, str)]
+        if not valid_texts:
+            return []
+        return self._request(valid_texts, dense=True, sparse=False)[0]
+
+    def _get_sparse_embedding(self, texts: List[str]) -> List[SparseEmbeddingData]:
+        valid_texts = [text for text in texts if text and isinstance(text, str)]
+        if not valid_texts:
+            return []
+        return self._request(valid_texts, dense=False, sparse=True)[1]
+
+    def _encode(self, texts: List[str]) -> Tuple[List[Optional[List[float]]], List[SparseEmbeddingData]]:
+        valid_texts = [text for text in texts if text and isinstance(text, str)]
+        if not valid_texts:
+            return [], []
+        return self._request(valid_texts, dense=True, sparse=True)
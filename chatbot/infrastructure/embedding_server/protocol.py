@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import json
+import socket
+import struct
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from shared.sparse_embedding import SparseEmbeddingData
+
+# Frame: header length and payload length (network order), JSON header, raw payload
+_PREFIX = struct.Struct('!II')
+PREFIX_SIZE = _PREFIX.size
+
+def encode_frame(header: Dict[str, Any], payload: bytes = b'') -> bytes:
+    raw_header = json.dumps(header).encode()
+    return _PREFIX.pack(len(raw_header), len(payload)) + raw_header + payload
+
+def decode_prefix(prefix: bytes) -> Tuple[int, int]:
+    return _PREFIX.unpack(prefix)
+
+def recv_frame(sock: socket.socket) -> Tuple[Dict[str, Any], bytes]:
+    """Read one frame from a blocking socket.
+
+    Args:
+        sock (socket.socket): Connected socket.
+
+    Returns:
+        Tuple[Dict[str, Any], bytes]: Decoded header and raw payload.
+    """
+    header_length, payload_length = decode_prefix(_recv_exactly(sock, _PREFIX.size))
+    header = json.loads(_recv_exactly(sock, header_length))
+    return header, _recv_exactly(sock, payload_length)
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:], size - received)
+        if not count:
+            raise ConnectionError('Embedding server closed the connection')
+        received += count
+    return bytes(buffer)
+
+def pack_embeddings(dense: np.ndarray, sparse: List[SparseEmbeddingData]) -> Tuple[Dict[str, Any], bytes]:
+    """Serialize embeddings as raw little-endian buffers.
+
+    Args:
+        dense (np.ndarray): Dense vectors, shape (count, dim).
+        sparse (List[SparseEmbeddingData]): Sparse vectors, possibly empty.
+
+    Returns:
+        Tuple[Dict[str, Any], bytes]: Header describing the layout and the payload.
+    """
+    dense = np.ascontiguousarray(dense, dtype='<f4')
+    lengths = [len(item.indices) for item in sparse]
+    indices = np.fromiter((i for item in sparse for i in item.indices), dtype='<i4', count=sum(lengths))
+    values = np.fromiter((v for item in sparse for v in item.values), dtype='<f4', count=sum(lengths))
+    header = {'shape': list(dense.shape), 'sparse_lengths': lengths}
+    return header, dense.tobytes() + indices.tobytes() + values.tobytes()
+
+def unpack_embeddings(header: Dict[str, Any], payload: bytes) -> Tuple[np.ndarray, List[SparseEmbeddingData]]:
+    """Read back embeddings written by `pack_embeddings` without copying the dense buffer.
+
+    Args:
+        header (Dict[str, Any]): Layout header.
+        payload (bytes): Raw buffers.
+
+    Returns:
+        Tuple[np.ndarray, List[SparseEmbeddingData]]: Dense matrix and sparse vectors.
+    """
+    shape = tuple(header['shape'])
+    dense_size = int(np.prod(shape)) * 4
+    dense = np.frombuffer(payload, dtype='<f4', count=int(np.prod(shape))).reshape(shape)
+    lengths = header['sparse_lengths']
+    total = sum(lengths)
+    indices = np.frombuffer(payload, dtype='<i4', count=total, offset=dense_size)
+    values = np.frombuffer(payload, dtype='<f4', count=total, offset=dense_size + 4 * total)
+    sparse = []
+    start = 0
+    for length in lengths:
+        sparse.append(
+            SparseEmbeddingData(
+                indices=indices[start:start + length].tolist(),
+                values=values[start:start + length].tolist(),
+            ),
+        )
+        start += length
+    return dense, sparse
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from domain.indexing import EmbeddingService
+from shared.settings import Settings
+from shared.sparse_embedding import SparseEmbeddingData
+from shared.thread_budget import apply_thread_budget
+
+from .protocol import PREFIX_SIZE
+from .protocol import decode_prefix
+from .protocol import encode_frame
+from .protocol import pack_embeddings
+
+logger = logging.getLogger(__name__)
+
+_Request = Tuple[Dict[str, Any], asyncio.Future]
+
+class EmbeddingServer:
+    """Owns the embedding models for every API worker on a node.
+
+    Workers connect over a Unix socket and send lists of texts. Requests that
+    arrive within `EMBEDDING__SERVER_BATCH_WAIT_MS` of each other are encoded
+    together, up to `EMBEDDING__SERVER_MAX_BATCH` texts, and the results come
+    back as raw float32 buffers.
+
+    Args:
+        settings (Settings): Application settings.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.embedding = EmbeddingService(settings=settings)
+        # A single thread keeps the models from being used concurrently
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='embedding')
+        self._queue: asyncio.Queue[_Request] = asyncio.Queue()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                header_length, payload_length = decode_prefix(await reader.readexactly(PREFIX_SIZE))
+                header = json.loads(await reader.readexactly(header_length))
+                await reader.readexactly(payload_length)
+                future = loop.create_future()
+                await self._queue.put((header, future))
+                response_header, payload = await future
+                writer.write(encode_frame(response_header, payload))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def _encode_batch(self, headers: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], bytes]]:
+        """Encode the texts of several requests in one pass per model.
+
+        Args:
+            headers (List[Dict[str, Any]]): Request headers with `texts`, `dense` and `sparse` keys.
+
+        Returns:
+            List[Tuple[Dict[str, Any], bytes]]: Response frame for each request.
+        """
+        dense_texts = [text for header in headers if header.get('dense', True) for text in header['texts']]
+        sparse_texts = [text for header in headers if header.get('sparse', True) for text in header['texts']]
+        vectors = self.embedding._get_embeddings_batch(dense_texts) if dense_texts else []
+        # Texts the model failed on travel as zero rows listed in the response header
+        failed = [i for i, vector in enumerate(vectors) if vector is None]
+        dim = next((len(vector) for vector in vectors if vector is not None), 0)
+        dense = np.asarray([vector if vector is not None else [0.0] * dim for vector in vectors], dtype=np.float32).reshape(len(vectors), dim)
+        sparse = self.embedding._get_sparse_embedding(sparse_texts) if sparse_texts else []
+
+        responses = []
+        dense_start = sparse_start = 0
+        for header in headers:
+            count = len(header['texts'])
+            request_dense = np.zeros((0, 0), dtype=np.float32)
+            request_sparse: List[SparseEmbeddingData] = []
+            request_failed: List[int] = []
+            if header.get('dense', True):
+                request_dense = dense[dense_start:dense_start + count]
+                request_failed = [i - dense_start for i in failed if dense_start <= i < dense_start + count]
+                dense_start += count
+            if header.get('sparse', True):
+                request_sparse = sparse[sparse_start:sparse_start + count]
+                sparse_start += count
+            response_header, payload = pack_embeddings(request_dense, request_sparse)
+            if request_failed:
+                response_header['failed'] = request_failed
+            responses.append((response_header, payload))
+        return responses
+
+    async def _batch_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        max_batch = self.settings.embedding.server_max_batch
+        wait = self.settings.embedding.server_batch_wait_ms / 1000
+        while True:
+            batch = [await self._queue.get()]
+            size = len(batch[0][0]['texts'])
+            deadline = loop.time() + wait
+            while size < max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    request = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(request)
+                size += len(request[0]['texts'])
+
+            try:
+                responses = await loop.run_in_executor(self._executor, self._encode_batch, [header for header, _ in batch])
+            except Exception as e:
+                logger.error(f"Error encoding batch of {size} texts: {e}")
+                responses = [({'error': str(e)}, b'')] * len(batch)
+            for (_, future), response in zip(batch, responses):
+                if not future.done():
+                    future.set_result(response)
+
+    async def serve(self, socket_path: str) -> None:
+        """Load the models and serve requests on a Unix socket until cancelled.
+
+        Args:
+            socket_path (str): Path of the Unix socket to listen on.
+        """
+        logger.info('Loading embedding models')
+        self.embedding.load_dense_model
+        self.embedding.load_sparse_model
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = await asyncio.start_unix_server(self._handle, path=socket_path)
+        batcher = asyncio.create_task(self._batch_loop())
+        logger.info(f"Embedding server listening on {socket_path}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve embeddings to the API workers of this node.')
+    parser.add_argument('--socket', default=None, help='Unix socket path, defaults to EMBEDDING__SERVER_SOCKET')
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    )
+    settings = Settings()
+    apply_thread_budget(settings)
+    socket_path = args.socket or settings.embedding.server_socket
+    if not socket_path:
+        raise SystemExit('Set EMBEDDING__SERVER_SOCKET or pass --socket')
+    asyncio.run(EmbeddingServer(settings).serve(socket_path))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,8 @@
+from __future__ import annotations
+
+from .artifact import ArtifactManifest
+from .artifact import export_index
+from .artifact import import_index
+from .artifact import read_manifest
+
+__all__ = ['ArtifactManifest', 'export_index', 'import_index', 'read_manifest']
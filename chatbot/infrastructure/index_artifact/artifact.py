@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import time
+from datetime import datetime
+from datetime import timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from infrastructure.profile_store import CandidateProfile
+from infrastructure.profile_store import get_profile_store
+from infrastructure.qdrant import Qdrant
+from infrastructure.qdrant import QdrantInput
+from shared.base import BaseModel
+from shared.settings import Settings
+from shared.sparse_embedding import SparseEmbeddingData
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever the layout of the artifact directory changes
+FORMAT_VERSION = 1
+
+MANIFEST = 'manifest.json'
+PAYLOADS = 'payloads.jsonl'
+DENSE = 'dense.npy'
+SPARSE_OFFSETS = 'sparse_offsets.npy'
+SPARSE_INDICES = 'sparse_indices.npy'
+SPARSE_VALUES = 'sparse_values.npy'
+PROFILES = 'profiles.jsonl'
+
+class ArtifactManifest(BaseModel):
+    format_version: int
+    created_at: str
+    collection: str
+    points: int
+    vector_size: int
+    dense_model: str
+    sparse_model: str
+    profiles: int
+    # Byte size of every file, to catch artifacts truncated by a copy
+    files: Dict[str, int]
+
+def _models(settings: Settings) -> Tuple[str, str]:
+    return settings.embedding.dense_model_path, settings.embedding.sparse_model_path
+
+def export_index(qdrant: Qdrant, path: str, batch_size: int = 1024) -> ArtifactManifest:
+    """Write every indexed chunk, with its vectors, to an artifact directory.
+
+    Dense vectors go to a float32 `.npy` matrix written through a memory
+    map, sparse vectors to flattened CSR arrays, payloads (including the
+    text kept in the chunk store) and profiles to JSONL. The manifest is
+    written last, so a directory without one is an unfinished export.
+
+    Args:
+        qdrant (Qdrant): Collection to export.
+        path (str): Directory to create; it must not exist.
+        batch_size (int): Points per scroll request.
+
+    Returns:
+        ArtifactManifest: Manifest of the written artifact.
+    """
+    settings = qdrant.settings
+    if qdrant.alias_target() is None and not qdrant.client.collection_exists(settings.qdrant.name):
+        raise ValueError(f"{settings.qdrant.name} does not exist, nothing to export")
+    os.makedirs(path)
+    total = qdrant.count()
+    dim = settings.qdrant.vector_size
+    logger.info(f"Exporting {total} points of {settings.qdrant.name} to {path}")
+
+    dense = np.lib.format.open_memmap(os.path.join(path, DENSE), mode='w+', dtype=np.float32, shape=(total, dim))
+    offsets, indices, values = [0], [], []
+    written = 0
+    with open(os.path.join(path, PAYLOADS), 'w', encoding='utf-8') as payloads:
+        for points, batch_payloads in qdrant.scroll_all(batch_size):
+            if written + len(points) > total:
+                raise ValueError(f"{settings.qdrant.name} changed during the export, retry once indexing stops")
+            for point, payload in zip(points, batch_payloads):
+                vector = point.vector or {}
+                dense[written] = vector['dense']
+                sparse = vector.get('sparse')
+                indices.append(np.asarray(sparse.indices if sparse else [], dtype=np.uint32))
+                values.append(np.asarray(sparse.values if sparse else [], dtype=np.float32))
+                offsets.append(offsets[-1] + len(indices[-1]))
+                payloads.write(json.dumps({'id': str(point.id), 'payload': payload}, ensure_ascii=False) + '\n')
+                written += 1
+            logger.info(f"Exported {written}/{total} points")
+    if written != total:
+        raise ValueError(f"{settings.qdrant.name} changed during the export, retry once indexing stops")
+    dense.flush()
+    del dense
+
+    np.save(os.path.join(path, SPARSE_OFFSETS), np.asarray(offsets, dtype=np.int64))
+    np.save(os.path.join(path, SPARSE_INDICES), np.concatenate(indices or [np.zeros(0, np.uint32)]))
+    np.save(os.path.join(path, SPARSE_VALUES), np.concatenate(values or [np.zeros(0, np.float32)]))
+
+    profiles = get_profile_store(settings).all() if settings.profile.enabled else []
+    with open(os.path.join(path, PROFILES), 'w', encoding='utf-8') as f:
+        for profile in profiles:
+            f.write(profile.model_dump_json() + '\n')
+
+    dense_model, sparse_model = _models(settings)
+    manifest = ArtifactManifest(
+        format_version=FORMAT_VERSION,
+        created_at=datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        collection=settings.qdrant.name,
+        points=total,
+        vector_size=dim,
+        dense_model=dense_model,
+        sparse_model=sparse_model,
+        profiles=len(profiles),
+        files={
+            name: os.path.getsize(os.path.join(path, name))
+            for name in (PAYLOADS, DENSE, SPARSE_OFFSETS, SPARSE_INDICES, SPARSE_VALUES, PROFILES)
+        },
+    )
+    with open(os.path.join(path, MANIFEST), 'w', encoding='utf-8') as f:
+        f.write(manifest.model_dump_json(indent=2))
+    return manifest
+
+def read_manifest(path: str) -> ArtifactManifest:
+    """Read and check the manifest of an artifact directory.
+
+    Args:
+        path (str): Artifact directory.
+
+    Returns:
+        ArtifactManifest: The manifest.
+    """
+    manifest_path = os.path.join(path, MANIFEST)
+    if not os.path.exists(manifest_path):
+        raise ValueError(f"{path} has no {MANIFEST}, the export did not finish")
+    with open(manifest_path, encoding='utf-8') as f:
+        manifest = ArtifactManifest.model_validate_json(f.read())
+    if manifest.format_version != FORMAT_VERSION:
+        raise ValueError(f"Artifact format {manifest.format_version} is not supported, expected {FORMAT_VERSION}")
+    for name, size in manifest.files.items():
+        file_path = os.path.join(path, name)
+        if not os.path.exists(file_path) or os.path.getsize(file_path) != size:
+            raise ValueError(f"{file_path} is missing or truncated")
+    return manifest
+
+def _batches(path: str, manifest: ArtifactManifest, batch_size: int) -> Iterator[Tuple[List[str], QdrantInput]]:
+    dense = np.load(os.path.join(path, DENSE), mmap_mode='r')
+    offsets = np.load(os.path.join(path, SPARSE_OFFSETS))
+    indices = np.load(os.path.join(path, SPARSE_INDICES), mmap_mode='r')
+    values = np.load(os.path.join(path, SPARSE_VALUES), mmap_mode='r')
+    if dense.shape != (manifest.points, manifest.vector_size) or len(offsets) != manifest.points + 1:
+        raise ValueError(f"Vectors of {path} do not match its manifest")
+
+    with open(os.path.join(path, PAYLOADS), encoding='utf-8') as payloads:
+        for start in range(0, manifest.points, batch_size):
+            end = min(start + batch_size, manifest.points)
+            rows = [json.loads(next(payloads)) for _ in range(start, end)]
+            yield [row['id'] for row in rows], QdrantInput(
+                dense_embeddings=dense[start:end].tolist(),
+                sparse_embeddings=[
+                    SparseEmbeddingData(
+                        indices=indices[offsets[i]:offsets[i + 1]].tolist(),
+                        values=values[offsets[i]:offsets[i + 1]].tolist(),
+                    )
+                    for i in range(start, end)
+                ],
+                payload=[row['payload'] for row in rows],
+            )
+            logger.info(f"Imported {end}/{manifest.points} points")
+
+def _delete(qdrant: Qdrant, target: Optional[str]) -> None:
+    # Chunk store entries of points other collections still hold are kept
+    collection_name = target or qdrant.settings.qdrant.name
+    others = [collection.name for collection in qdrant.client.get_collections().collections if collection.name != collection_name]
+    if target is None:
+        qdrant.delete_collection(shared_with=others)
+        return
+    # The served version is emptied behind the alias, which is deleted with it
+    settings = qdrant.settings.model_copy(deep=True)
+    settings.qdrant.name = target
+    version = Qdrant(settings=settings)
+    version.delete_collection(shared_with=others)
+    version.collection
+    qdrant.point_alias(target)
+
+def import_index(
+    qdrant: Qdrant,
+    path: str,
+    batch_size: int = 512,
+    parallel: int = 4,
+    replace: bool = False,
+    allow_model_mismatch: bool = False,
+) -> ArtifactManifest:
+    """Bulk-load an exported artifact into the configured collection.
+
+    Indexing of the dense vectors is paused during the upload and the HNSW
+    graph is built once at the end, which is much faster than building it
+    incrementally.
+
+    Args:
+        qdrant (Qdrant): Collection to load into.
+        path (str): Artifact directory.
+        batch_size (int): Points per upload request.
+        parallel (int): Upload processes.
+        replace (bool): Delete the collection, or the version its alias serves, first if it already holds points.
+        allow_model_mismatch (bool): Load vectors made by other models than the configured ones.
+
+    Returns:
+        ArtifactManifest: Manifest of the loaded artifact.
+    """
+    settings = qdrant.settings
+    manifest = read_manifest(path)
+    if manifest.vector_size != settings.qdrant.vector_size:
+        raise ValueError(
+            f"Artifact vectors have {manifest.vector_size} dimensions, QDRANT__VECTOR_SIZE is {settings.qdrant.vector_size}"
+        )
+    if (manifest.dense_model, manifest.sparse_model) != _models(settings):
+        message = f"Artifact was embedded with {manifest.dense_model} and {manifest.sparse_model}, not the configured models"
+        if not allow_model_mismatch:
+            raise ValueError(message)
+        logger.warning(message)
+
+    name = settings.qdrant.name
+    target = qdrant.alias_target()
+    if (target is not None or qdrant.client.collection_exists(name)) and qdrant.count():
+        if not replace:
+            raise ValueError(f"{name} already holds points, pass replace to overwrite it")
+        _delete(qdrant, target)
+
+    started = time.perf_counter()
+    with qdrant.paused_indexing():
+        uploaded = qdrant.upload(_batches(path, manifest, batch_size), batch_size=batch_size, parallel=parallel)
+    logger.info(f"Uploaded {uploaded} points to {name} in {time.perf_counter() - started:.1f}s")
+
+    if settings.profile.enabled:
+        store = get_profile_store(settings)
+        with open(os.path.join(path, PROFILES), encoding='utf-8') as f:
+            for line in f:
+                store.put(CandidateProfile.model_validate_json(line))
+    return manifest
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Export the indexed CVs to a portable artifact, or bulk-load one into a fresh collection.',
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+    export_parser = commands.add_parser('export', help='write the configured collection to an artifact directory')
+    export_parser.add_argument('path')
+    export_parser.add_argument('--batch-size', type=int, default=1024)
+    import_parser = commands.add_parser('import', help='load an artifact directory into the configured collection')
+    import_parser.add_argument('path')
+    import_parser.add_argument('--collection', default=None, help='target collection, defaults to QDRANT__NAME')
+    import_parser.add_argument('--batch-size', type=int, default=512)
+    import_parser.add_argument('--parallel', type=int, default=4)
+    import_parser.add_argument('--replace', action='store_true', help='overwrite a collection that already holds points')
+    import_parser.add_argument('--allow-model-mismatch', action='store_true')
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    )
+    settings = Settings()
+    if args.command == 'export':
+        if os.path.exists(args.path):
+            raise SystemExit(f'{args.path} already exists')
+        try:
+            manifest = export_index(Qdrant(settings=settings), args.path, batch_size=args.batch_size)
+        except Exception:
+            # Leave no half-written artifact behind
+            shutil.rmtree(args.path, ignore_errors=True)
+            raise
+    else:
+        if args.collection:
+            settings.qdrant.name = args.collection
+        manifest = import_index(
+            Qdrant(settings=settings),
+            args.path,
+            batch_size=args.batch_size,
+            parallel=args.parallel,
+            replace=args.replace,
+            allow_model_mismatch=args.allow_model_mismatch,
+        )
+    print(manifest.model_dump_json(indent=2))
+
+if __name__ == '__main__':
+    main()
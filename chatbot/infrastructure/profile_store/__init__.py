@@ -0,0 +1,10 @@
+from __future__ import annotations
+
+from .profile_store import CandidateProfile
+from .profile_store import ProfileStore
+from .profile_store import InMemoryProfileStore
+from .profile_store import SQLiteProfileStore
+from .profile_store import candidate_key
+from .profile_store import get_profile_store
+
+__all__ = ['CandidateProfile', 'ProfileStore', 'InMemoryProfileStore', 'SQLiteProfileStore', 'candidate_key', 'get_profile_store']
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from abc import ABC
+from abc import abstractmethod
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from shared.base import BaseModel
+from shared.settings import Settings
+
+class CandidateProfile(BaseModel):
+    candidate: str
+    emails: List[str] = []
+    phones: List[str] = []
+    links: List[str] = []
+    education: List[str] = []
+    companies: List[str] = []
+    experience_years: Optional[float] = None
+    skills: List[str] = []
+
+def candidate_key(candidate: str) -> str:
+    """Normalize a candidate name the way users may type it: case, spacing and Unicode form."""
+    return " ".join(unicodedata.normalize("NFC", candidate).casefold().split())
+
+class ProfileStore(ABC):
+    """Storage for candidate profiles keyed by normalized candidate name."""
+
+    @abstractmethod
+    def get(self, candidate: str) -> Optional[CandidateProfile]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def put(self, profile: CandidateProfile) -> None:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def all(self) -> List[CandidateProfile]:
+        """Every stored profile, for exporting the index."""
+        raise NotImplementedError()
+
+class InMemoryProfileStore(ProfileStore):
+    """Process-local store, for single-worker setups and tests."""
+
+    def __init__(self):
+        self._profiles: Dict[str, CandidateProfile] = {}
+        self._lock = threading.Lock()
+
+    def get(self, candidate: str) -> Optional[CandidateProfile]:
+        with self._lock:
+            return self._profiles.get(candidate_key(candidate))
+
+    def put(self, profile: CandidateProfile) -> None:
+        with self._lock:
+            self._profiles[candidate_key(profile.candidate)] = profile
+
+    def all(self) -> List[CandidateProfile]:
+        with self._lock:
+            return list(self._profiles.values())
+
+class SQLiteProfileStore(ProfileStore):
+    """SQLite store shared by the indexing and query workers of a node."""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS profiles ('
+            'candidate_key TEXT PRIMARY KEY, profile TEXT NOT NULL, updated_at REAL NOT NULL)',
+        )
+
+    def get(self, candidate: str) -> Optional[CandidateProfile]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT profile FROM profiles WHERE candidate_key = ?', (candidate_key(candidate),),
+            ).fetchone()
+        return CandidateProfile.model_validate_json(row[0]) if row is not None else None
+
+    def put(self, profile: CandidateProfile) -> None:
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO profiles (candidate_key, profile, updated_at) VALUES (?, ?, ?) '
+                'ON CONFLICT(candidate_key) DO UPDATE SET profile = excluded.profile, updated_at = excluded.updated_at',
+                (candidate_key(profile.candidate), profile.model_dump_json(), time.time()),
+            )
+
+    def all(self) -> List[CandidateProfile]:
+        with self._lock:
+            rows = self._conn.execute('SELECT profile FROM profiles ORDER BY candidate_key').fetchall()
+        return [CandidateProfile.model_validate_json(row[0]) for row in rows]
+
+_stores: Dict[Tuple[str, str], ProfileStore] = {}
+_stores_lock = threading.Lock()
+
+def get_profile_store(settings: Settings) -> ProfileStore:
+    """Return the process-wide profile store selected by `PROFILE__BACKEND`.
+
+    The indexing and query services share it, so profiles written while
+    indexing are visible to the chatbot even with the in-memory backend.
+
+    Args:
+        settings (Settings): Application settings.
+
+    Returns:
+        ProfileStore: In-memory or SQLite profile store.
+    """
+    backend = settings.profile.backend
+    if backend not in ('sqlite', 'memory'):
+        raise ValueError(f"Unsupported profile backend: {backend}")
+    key = (backend, settings.profile.sqlite_path if backend == 'sqlite' else '')
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = SQLiteProfileStore(settings.profile.sqlite_path) if backend == 'sqlite' else InMemoryProfileStore()
+        return _stores[key]
@@ -2,5 +2,10 @@ from __future__ import annotations
 
 from .qdrant import QdrantInput
 from .qdrant import Qdrant
+from .qdrant import CANDIDATE_KEY
+from .qdrant import FILTER_KEYS
+from .qdrant import MEMORY_URL
+from .qdrant import REDUCED_VECTOR
+from .qdrant import hybrid_limits
 
-__all__=['QdrantInput', 'Qdrant']
\ No newline at end of file
+__all__=['QdrantInput', 'Qdrant', 'CANDIDATE_KEY', 'FILTER_KEYS', 'MEMORY_URL', 'REDUCED_VECTOR', 'hybrid_limits']
\ No newline at end of file
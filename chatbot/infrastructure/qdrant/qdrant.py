@@ -1,25 +1,81 @@
 from __future__ import annotations
+import logging
+import threading
+import time
 import uuid
-from typing import List, Dict, Any
+from contextlib import contextmanager
+from functools import cached_property
+from typing import List, Dict, Any, Iterator, Optional, Sequence, Set, Tuple
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
 from qdrant_client.models import Distance
 from qdrant_client.models import Filter, FieldCondition, MatchValue
+from infrastructure.chunk_store import ChunkStore
+from infrastructure.chunk_store import get_chunk_store
 from shared.base import BaseModel
 from shared.base import BaseService
+from shared.projection import DenseProjection
+from shared.projection import get_projection
+from shared.settings import CollectionProfile
 from shared.settings import Settings
 from shared.sparse_embedding import SparseEmbeddingData
 
+logger = logging.getLogger(__name__)
+
+# Named vector holding the PCA projection of `dense`, searched by the dense prefetch when configured
+REDUCED_VECTOR = "dense_reduced"
+
+# Seconds a search reuses the alias target it read, a switch by another process is seen after that
+ALIAS_TTL_S = 5.0
+
+# Payload key holding the candidate a chunk belongs to, indexed for filtering and grouping
+CANDIDATE_KEY = "candidate"
+
+# Chunks indexed before the candidate key existed, named only by their headers
+LEGACY_FILTER = Filter(
+    must=[models.IsEmptyCondition(is_empty=models.PayloadField(key=CANDIDATE_KEY))],
+    must_not=[models.IsEmptyCondition(is_empty=models.PayloadField(key="Header_1"))],
+)
+
+# Payload keys kept in Qdrant when the chunk store holds the rest
+FILTER_KEYS = (CANDIDATE_KEY, "Header_1", "Header_2", "Header_3", "Header_4")
+
+def hybrid_limits(k: int) -> Tuple[int, int]:
+    """Sizes of the fused and per-vector prefetches of a hybrid search returning `k` points.
+
+    Returns:
+        Tuple[int, int]: Fused limit and per-vector candidates, at least Qdrant's 10 and 20.
+    """
+    return max(k, 10), max(2 * k, 20)
+
+# Address of the process-wide in-memory collection store, for local runs and load tests
+MEMORY_URL = ":memory:"
+
+_memory_client: Optional[QdrantClient] = None
+_memory_client_lock = threading.Lock()
+
+def _get_memory_client() -> QdrantClient:
+    # Every service must see the same points, so the in-memory client is shared
+    global _memory_client
+    with _memory_client_lock:
+        if _memory_client is None:
+            _memory_client = QdrantClient(location=MEMORY_URL)
+        return _memory_client
+
 class QdrantInput(BaseModel):
     dense_embeddings: List[List[float]]
     sparse_embeddings: List[SparseEmbeddingData]
     payload: List[Dict[str, Any]]
+    # Projected from the dense embeddings when empty
+    reduced_embeddings: List[List[float]] = []
 
 class Qdrant(BaseService):
     settings: Settings
 
-    @property
+    @cached_property
     def client(self) -> QdrantClient:
+        if self.settings.qdrant.url == MEMORY_URL:
+            return _get_memory_client()
         return QdrantClient(
             url=self.settings.qdrant.url,
             port=self.settings.qdrant.port
@@ -28,20 +84,233 @@ class Qdrant(BaseService):
     @property
     def collection(self):
         collection_name = self.settings.qdrant.name
-        if not self.client.collection_exists(collection_name):
+        if not self.client.collection_exists(collection_name) and self.alias_target() is None:
+            tuning = self.settings.qdrant.tuning
+            projection = get_projection(self.settings)
             self.client.create_collection(
                 collection_name=collection_name,
-                vectors_config={
-                    "dense": models.VectorParams(
-                    size=self.settings.qdrant.vector_size,
-                    distance=Distance.COSINE
-                    )
-                },
+                vectors_config=self._vectors_config(tuning, projection),
                 sparse_vectors_config={
-                    "sparse":models.SparseVectorParams()
-                }
+                    "sparse": self._sparse_vector_params(tuning)
+                },
+                hnsw_config=self._hnsw_config(tuning),
+                optimizers_config=models.OptimizersConfigDiff(indexing_threshold=tuning.indexing_threshold),
+                on_disk_payload=tuning.payload_on_disk,
+            )
+        info = self.client.get_collection(collection_name)
+        if CANDIDATE_KEY not in (info.payload_schema or {}):
+            self.client.create_payload_index(
+                collection_name=collection_name,
+                field_name=CANDIDATE_KEY,
+                field_schema=models.PayloadSchemaType.KEYWORD,
+            )
+        return info
+
+    def apply_profile(self) -> Dict[str, Any]:
+        """Update an existing collection to the configured profile.
+
+        Qdrant rebuilds the HNSW graph and moves vectors, payload and the
+        sparse index to or from disk in the background, searches keep being
+        served meanwhile. The sparse IDF modifier is updated as well.
+
+        Returns:
+            Dict[str, Any]: The collection updated and the profile applied.
+        """
+        collection = self.collection
+        # Collection parameters cannot be updated through an alias
+        name = self.alias_target() or self.settings.qdrant.name
+        tuning = self.settings.qdrant.tuning
+        if REDUCED_VECTOR in collection.config.params.vectors:
+            # The graph is built on the reduced vectors, full ones are only read for rescoring
+            vectors_config = {
+                REDUCED_VECTOR: models.VectorParamsDiff(hnsw_config=self._hnsw_config(tuning), on_disk=tuning.vectors_on_disk),
+                "dense": models.VectorParamsDiff(
+                    hnsw_config=models.HnswConfigDiff(m=0),
+                    on_disk=self.settings.qdrant.full_vectors_on_disk or tuning.vectors_on_disk,
+                ),
+            }
+        else:
+            vectors_config = {
+                "dense": models.VectorParamsDiff(hnsw_config=self._hnsw_config(tuning), on_disk=tuning.vectors_on_disk),
+            }
+        self.client.update_collection(
+            collection_name=name,
+            vectors_config=vectors_config,
+            hnsw_config=self._hnsw_config(tuning),
+            sparse_vectors_config={"sparse": self._sparse_vector_params(tuning)},
+            optimizers_config=models.OptimizersConfigDiff(indexing_threshold=tuning.indexing_threshold),
+            collection_params=models.CollectionParamsDiff(on_disk_payload=tuning.payload_on_disk),
+        )
+        return {
+            "collection": name,
+            "profile": self.settings.qdrant.profile,
+            **tuning.model_dump(),
+            "sparse_idf": self.settings.qdrant.sparse_idf,
+        }
+
+    def _vectors_config(self, tuning: CollectionProfile, projection: Optional[DenseProjection]) -> Dict[str, models.VectorParams]:
+        if projection is None:
+            return {
+                "dense": models.VectorParams(
+                    size=self.settings.qdrant.vector_size,
+                    distance=Distance.COSINE,
+                    on_disk=tuning.vectors_on_disk,
+                ),
+            }
+        return {
+            REDUCED_VECTOR: models.VectorParams(
+                size=projection.reduced_dim,
+                distance=Distance.COSINE,
+                on_disk=tuning.vectors_on_disk,
+                hnsw_config=self._hnsw_config(tuning),
+            ),
+            # No graph, the full vectors only rescore what the reduced ones prefetched
+            "dense": models.VectorParams(
+                size=self.settings.qdrant.vector_size,
+                distance=Distance.COSINE,
+                on_disk=self.settings.qdrant.full_vectors_on_disk or tuning.vectors_on_disk,
+                hnsw_config=models.HnswConfigDiff(m=0),
+            ),
+        }
+
+    def _sparse_vector_params(self, tuning: CollectionProfile) -> models.SparseVectorParams:
+        return models.SparseVectorParams(
+            index=models.SparseIndexParams(on_disk=tuning.sparse_on_disk),
+            modifier=models.Modifier.IDF if self.settings.qdrant.sparse_idf else models.Modifier.NONE,
+        )
+
+    @cached_property
+    def _reduced_collections(self) -> Dict[str, bool]:
+        # Whether each collection version holds the reduced vector, the alias moves between versions
+        return {}
+
+    @cached_property
+    def _legacy_collections(self) -> Dict[str, bool]:
+        # Whether each collection version holds chunks indexed before the candidate key existed
+        return {}
+
+    @cached_property
+    def _served(self) -> Dict[str, Any]:
+        # Collection searched through the configured name and when it was read
+        return {}
+
+    def _served_collection(self) -> str:
+        served = self._served
+        now = time.monotonic()
+        if not served or now - served["read_at"] > ALIAS_TTL_S:
+            served.update(name=self.alias_target() or self.settings.qdrant.name, read_at=now)
+        return served["name"]
+
+    @property
+    def _projection(self) -> Optional[DenseProjection]:
+        projection = get_projection(self.settings)
+        if projection is None:
+            return None
+        collection_name = self._served_collection()
+        if collection_name not in self._reduced_collections:
+            # Created on first use
+            self.collection
+            vectors = self.client.get_collection(collection_name).config.params.vectors
+            has_reduced = isinstance(vectors, dict) and REDUCED_VECTOR in vectors
+            if not has_reduced:
+                # Collections created before the projection was configured, until the reindex job rebuilds them
+                logger.warning(f"Collection {collection_name} has no {REDUCED_VECTOR} vector, prefetching on full vectors")
+            self._reduced_collections[collection_name] = has_reduced
+        return projection if self._reduced_collections[collection_name] else None
+
+    @staticmethod
+    def _hnsw_config(tuning: CollectionProfile) -> models.HnswConfigDiff:
+        # Graph links follow the vectors to disk
+        return models.HnswConfigDiff(m=tuning.m, ef_construct=tuning.ef_construct, on_disk=tuning.vectors_on_disk)
+
+    @property
+    def _search_params(self) -> models.SearchParams:
+        tuning = self.settings.qdrant.tuning
+        return models.SearchParams(hnsw_ef=tuning.hnsw_ef, exact=tuning.exact)
+
+    def alias_target(self) -> Optional[str]:
+        """Collection the configured name is an alias of.
+
+        Returns:
+            Optional[str]: Target collection, None when the name is not an alias.
+        """
+        for alias in self.client.get_aliases().aliases:
+            if alias.alias_name == self.settings.qdrant.name:
+                return alias.collection_name
+        return None
+
+    def point_alias(self, collection_name: str) -> Optional[str]:
+        """Atomically make the configured name an alias of another collection.
+
+        Searches through the alias move from one collection to the other in
+        a single Qdrant operation, so none of them fails or sees a mix.
+
+        Args:
+            collection_name (str): New target collection.
+
+        Returns:
+            Optional[str]: Previous target, None when the name was not an alias.
+        """
+        alias_name = self.settings.qdrant.name
+        previous = self.alias_target()
+        operations = []
+        if previous is not None:
+            operations.append(models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=alias_name)))
+        operations.append(models.CreateAliasOperation(
+            create_alias=models.CreateAlias(collection_name=collection_name, alias_name=alias_name),
+        ))
+        self.client.update_collection_aliases(change_aliases_operations=operations)
+        self._served.clear()
+        return previous
+
+    @contextmanager
+    def paused_indexing(self) -> Iterator[None]:
+        """Pause HNSW indexing for a bulk load, the graph is built once when it ends."""
+        name = self.settings.qdrant.name
+        info = self.collection
+        indexing_threshold = info.config.optimizer_config.indexing_threshold
+        self.client.update_collection(name, optimizers_config=models.OptimizersConfigDiff(indexing_threshold=0))
+        try:
+            yield
+        finally:
+            self.client.update_collection(
+                name, optimizers_config=models.OptimizersConfigDiff(indexing_threshold=indexing_threshold),
+            )
+
+    @cached_property
+    def _get_chunk_store(self) -> Optional[ChunkStore]:
+        return get_chunk_store(self.settings) if self.settings.chunk_store.enabled else None
+
+    @property
+    def _with_payload(self) -> bool:
+        # With the chunk store, searches return IDs only and `payloads` resolves them
+        return self._get_chunk_store is None
+
+    def payloads(self, points: Sequence[Any]) -> List[Dict[str, Any]]:
+        """Full payloads of points returned by a search or scroll, in order.
+
+        Args:
+            points (Sequence[Any]): Scored points or records.
+
+        Returns:
+            List[Dict[str, Any]]: Payload of each point, read in bulk from the chunk store when enabled.
+        """
+        store = self._get_chunk_store
+        if store is None:
+            return [point.payload for point in points]
+        ids = [str(point.id) for point in points]
+        stored = store.get_many(ids)
+        missing = [id for id in ids if id not in stored]
+        if missing:
+            # Points indexed before the chunk store was enabled still carry their full payload
+            records = self.client.retrieve(
+                collection_name=self.settings.qdrant.name,
+                ids=missing,
+                with_payload=True,
+                with_vectors=False,
             )
-        return self.client.get_collection(collection_name)
+            stored.update({str(record.id): record.payload for record in records})
+        return [stored.get(id, {}) for id in ids]
 
     def insert(self, inputs: QdrantInput):
         """ Add an embedding to Qdrant
@@ -51,27 +320,128 @@ class Qdrant(BaseService):
         """
         collection=self.collection
         collection_name = self.settings.qdrant.name
+        ids = [str(uuid.uuid4()) for _ in inputs.dense_embeddings]
+
+        self.client.upsert(
+            collection_name=collection_name,
+            points=self._points(ids, inputs),
+            wait=True
+        )
+
+    def _points(self, ids: List[str], inputs: QdrantInput) -> List[models.PointStruct]:
+        payload = inputs.payload
+        store = self._get_chunk_store
+        if store is not None:
+            # Written first, so that a search never finds a point whose text is missing
+            store.put_many(dict(zip(ids, inputs.payload)))
+            payload = [{key: value for key, value in item.items() if key in FILTER_KEYS} for item in inputs.payload]
+
+        vectors = [
+            {
+                "dense": inputs.dense_embeddings[i],
+                "sparse": models.SparseVector(
+                    indices=inputs.sparse_embeddings[i].indices,
+                    values=inputs.sparse_embeddings[i].values
+                )
+            }
+            for i in range(len(inputs.dense_embeddings))
+        ]
+        projection = self._projection
+        if projection is not None:
+            # Restored artifacts and other callers without an EmbeddingService only carry the full vectors
+            reduced = inputs.reduced_embeddings or projection.project(inputs.dense_embeddings)
+            for vector, reduced_vector in zip(vectors, reduced):
+                vector[REDUCED_VECTOR] = reduced_vector
 
-        points = [
+        return [
             models.PointStruct(
-                id=str(uuid.uuid4()),
-                vector={
-                    "dense": inputs.dense_embeddings[i],
-                    "sparse": models.SparseVector(
-                        indices=inputs.sparse_embeddings[i].indices,
-                        values=inputs.sparse_embeddings[i].values
-                    )
-                },
-                payload=inputs.payload[i],
+                id=ids[i],
+                vector=vectors[i],
+                payload=payload[i],
             )
             for i in range(len(inputs.dense_embeddings))
         ]
 
-        self.client.upsert(
-            collection_name=collection_name,
-            points=points,
-            wait=True
+    def upload(self, batches: Iterator[Tuple[List[str], QdrantInput]], batch_size: int = 256, parallel: int = 1) -> int:
+        """Bulk-load points with known IDs, for restoring an exported index.
+
+        Args:
+            batches (Iterator[Tuple[List[str], QdrantInput]]): Point IDs with their vectors and full payloads.
+            batch_size (int): Points per upload request.
+            parallel (int): Upload processes, only used with a Qdrant server.
+
+        Returns:
+            int: Number of points uploaded.
+        """
+        collection = self.collection
+        uploaded = 0
+
+        def points():
+            nonlocal uploaded
+            for ids, inputs in batches:
+                uploaded += len(ids)
+                yield from self._points(ids, inputs)
+
+        self.client.upload_points(
+            collection_name=self.settings.qdrant.name,
+            points=points(),
+            batch_size=batch_size,
+            parallel=parallel,
+            wait=True,
         )
+        return uploaded
+
+    def delete_collection(self, shared_with: Sequence[str] = ()) -> None:
+        """Delete the collection and the chunk store entries of its points.
+
+        Args:
+            shared_with (Sequence[str]): Other collections whose points keep their chunk store entries.
+        """
+        name = self.settings.qdrant.name
+        store = self._get_chunk_store
+        offset = None
+        while store is not None:
+            points, offset = self.client.scroll(
+                collection_name=name, with_payload=False, with_vectors=False, limit=1024, offset=offset,
+            )
+            ids = {str(point.id) for point in points}
+            for other in shared_with:
+                if ids:
+                    ids -= {
+                        str(record.id)
+                        for record in self.client.retrieve(other, ids=list(ids), with_payload=False, with_vectors=False)
+                    }
+            store.delete_many(list(ids))
+            if offset is None:
+                break
+        self.client.delete_collection(name)
+
+    def count(self) -> int:
+        return self.client.count(collection_name=self.settings.qdrant.name, exact=True).count
+
+    def scroll_all(self, batch_size: int = 1024, with_vectors: bool = True) -> Iterator[Tuple[List[models.Record], List[Dict[str, Any]]]]:
+        """Read every point of the collection with both vectors.
+
+        Args:
+            batch_size (int): Points per scroll request.
+            with_vectors (bool): Also read the vectors.
+
+        Yields:
+            Tuple[List[Record], List[Dict[str, Any]]]: Points and their full payloads.
+        """
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.settings.qdrant.name,
+                with_payload=self._with_payload,
+                with_vectors=["dense", "sparse"] if with_vectors else False,
+                limit=batch_size,
+                offset=offset,
+            )
+            if points:
+                yield points, self.payloads(points)
+            if offset is None:
+                return
 
     def query(self, dense_query: List[float], sparse_query: List[SparseEmbeddingData], user_name: str, k: int):
         """Search for points in the Qdrant collection based on a query vector and metadata filter.
@@ -87,51 +457,261 @@ class Qdrant(BaseService):
                 payload, and vector (if with_vectors=True). The list length is at most `k`, depending
                 on the number of matching points in the collection.
         """
-        collection_name = self.settings.qdrant.name
-        header_keys = [f"Header_{i}" for i in range(1, 5)]
-        filter_conditions = [
-            FieldCondition(key=key, match=MatchValue(value=user_name))
-            for key in header_keys
+        limit, candidates = hybrid_limits(k)
+        return self.client.query_points(
+            collection_name=self.settings.qdrant.name,
+            query=dense_query,
+            prefetch=[self._hybrid_prefetch(dense_query, sparse_query[0], limit=limit, candidates=candidates)],
+            using="dense",
+            with_payload=self._with_payload,
+            limit=k,
+            query_filter=self._candidate_filter(user_name),
+        )
+
+    def query_sparse(self, sparse_query: SparseEmbeddingData, user_name: str, k: int):
+        """Search a candidate's chunks with the sparse vector only.
+
+        Args:
+            sparse_query (SparseEmbeddingData): The sparse query vector.
+            user_name (str): Candidate whose chunks are searched.
+            k (int): The maximum number of points to return.
+
+        Returns:
+            QueryResponse: The best matching points.
+        """
+        return self.client.query_points(
+            collection_name=self.settings.qdrant.name,
+            query=models.SparseVector(
+                indices=sparse_query.indices,
+                values=sparse_query.values
+            ),
+            using="sparse",
+            with_payload=self._with_payload,
+            limit=k,
+            query_filter=self._candidate_filter(user_name),
+        )
+
+    def sparse_vocabulary(self, user_name: str) -> Set[int]:
+        """Collect the sparse token ids used anywhere in a candidate's chunks.
+
+        Args:
+            user_name (str): Candidate whose chunks are read.
+
+        Returns:
+            Set[int]: Sparse vector indices of all the candidate's chunks.
+        """
+        vocabulary = set()
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.settings.qdrant.name,
+                scroll_filter=self._candidate_filter(user_name),
+                with_payload=False,
+                with_vectors=["sparse"],
+                limit=256,
+                offset=offset,
+            )
+            for point in points:
+                sparse = (point.vector or {}).get("sparse")
+                if sparse is not None:
+                    vocabulary.update(sparse.indices)
+            if offset is None:
+                return vocabulary
+
+    def candidate_names(self, limit: int = 100_000) -> List[str]:
+        """List every distinct candidate name stored under the candidate key.
+
+        Args:
+            limit (int): The maximum number of names to return.
+
+        Returns:
+            List[str]: Candidate names.
+        """
+        collection = self.collection
+        hits = self.client.facet(
+            collection_name=self.settings.qdrant.name,
+            key=CANDIDATE_KEY,
+            limit=limit,
+        ).hits
+        return [str(hit.value) for hit in hits]
+
+    def candidate_points(self, user_name: str) -> List[models.Record]:
+        """Read every chunk of a candidate with its payload and both vectors.
+
+        Args:
+            user_name (str): Candidate whose chunks are read.
+
+        Returns:
+            List[Record]: The candidate's points.
+        """
+        records = []
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.settings.qdrant.name,
+                scroll_filter=self._candidate_filter(user_name),
+                with_payload=self._with_payload,
+                with_vectors=["dense", "sparse"],
+                limit=256,
+                offset=offset,
+            )
+            records.extend(points)
+            if offset is None:
+                return records
+
+    def query_batch(self, dense_queries: List[List[float]], sparse_queries: List[SparseEmbeddingData], user_name: str, k: int):
+        """Run several hybrid searches for the same candidate in a single request.
+
+        Args:
+            dense_queries (List[List[float]]): One dense query vector per question.
+            sparse_queries (List[SparseEmbeddingData]): One sparse query vector per question.
+            user_name (str): Candidate whose chunks are searched.
+            k (int): The maximum number of points to return per question.
+
+        Returns:
+            List[QueryResponse]: One response per question, in input order.
+        """
+        query_filter = self._candidate_filter(user_name)
+        limit, candidates = hybrid_limits(k)
+        requests = [
+            models.QueryRequest(
+                query=dense_query,
+                prefetch=[self._hybrid_prefetch(dense_query, sparse_query, limit=limit, candidates=candidates)],
+                using="dense",
+                with_payload=self._with_payload,
+                limit=k,
+                filter=query_filter,
+            )
+            for dense_query, sparse_query in zip(dense_queries, sparse_queries)
         ]
-        # query_uint8 = [int(min(max(x * 127.5 + 127.5, 0), 255)) for x in dense_query]
-        sparse_dense_rrf_prefetch = models.Prefetch(
+        return self.client.query_batch_points(
+            collection_name=self.settings.qdrant.name,
+            requests=requests,
+        )
+
+    def query_groups(self, dense_query: List[float], sparse_query: SparseEmbeddingData, limit: int, group_size: int):
+        """Search every candidate at once and group the hits by candidate.
+
+        Args:
+            dense_query (List[float]): The dense query vector.
+            sparse_query (SparseEmbeddingData): The sparse query vector.
+            limit (int): The maximum number of candidates to return.
+            group_size (int): The maximum number of chunks returned per candidate.
+
+        Returns:
+            GroupsResult: Candidates ordered by their best chunk score.
+        """
+        # Enough fused hits for every group to fill up, even when a few candidates dominate
+        fused = max(limit * group_size * 4, 100)
+        prefetch = [self._hybrid_prefetch(dense_query, sparse_query, limit=fused, candidates=fused)]
+        result = self.client.query_points_groups(
+            collection_name=self.settings.qdrant.name,
+            group_by=CANDIDATE_KEY,
+            query=dense_query,
+            prefetch=prefetch,
+            using="dense",
+            with_payload=self._with_payload,
+            limit=limit,
+            group_size=group_size,
+        )
+        if not self._has_legacy_points():
+            return result
+        # Grouped by their first header like the indexing names them, rescored on the same dense vector
+        legacy = self.client.query_points_groups(
+            collection_name=self.settings.qdrant.name,
+            group_by="Header_1",
+            query=dense_query,
+            prefetch=prefetch,
+            using="dense",
+            query_filter=LEGACY_FILTER,
+            with_payload=self._with_payload,
+            limit=limit,
+            group_size=group_size,
+        )
+        hits: Dict[str, List[models.ScoredPoint]] = {}
+        for group in result.groups + legacy.groups:
+            hits.setdefault(str(group.id).strip(), []).extend(group.hits)
+        groups = [
+            models.PointGroup(id=name, hits=sorted(points, key=lambda hit: hit.score, reverse=True)[:group_size])
+            for name, points in hits.items()
+        ]
+        groups.sort(key=lambda group: group.hits[0].score, reverse=True)
+        return models.GroupsResult(groups=groups[:limit])
+
+    def _has_legacy_points(self) -> bool:
+        collection_name = self._served_collection()
+        if collection_name not in self._legacy_collections:
+            # Created on first use
+            self.collection
+            count = self.client.count(collection_name, count_filter=LEGACY_FILTER, exact=False).count
+            if count:
+                # Until the reindex job rebuilds the collection from Markdown
+                logger.warning(f"Collection {collection_name} has chunks without a {CANDIDATE_KEY} key, grouping them by Header_1")
+            self._legacy_collections[collection_name] = count > 0
+        return self._legacy_collections[collection_name]
+
+    @staticmethod
+    def _candidate_filter(user_name: str) -> Filter:
+        # Chunks indexed before the candidate key existed only carry the name in their headers
+        keys = [CANDIDATE_KEY] + [f"Header_{i}" for i in range(1, 5)]
+        return Filter(
+            should=[
+                FieldCondition(key=key, match=MatchValue(value=user_name))
+                for key in keys
+            ],
+        )
+
+    def _dense_prefetch(self, dense_query: List[float], limit: int) -> models.Prefetch:
+        # The only HNSW search, the outer queries rescore the prefetched points
+        projection = self._projection
+        if projection is None:
+            return models.Prefetch(
+                query=dense_query,
+                using="dense",
+                limit=limit,
+                params=self._search_params,
+            )
+        return models.Prefetch(
             prefetch=[
                 models.Prefetch(
-                    # prefetch=[
-                    #     models.Prefetch(
-                    #         query=query_uint8, # integer
-                    #         using="dense-uint8",
-                    #         limit=40,
-                    #     )
-                    # ],
-                    query=dense_query, # float
-                    using="dense",
-                    limit=20,
-                ),
+                    query=projection.project([dense_query])[0],
+                    using=REDUCED_VECTOR,
+                    limit=limit * self.settings.qdrant.reduced_oversampling,
+                    params=self._search_params,
+                )
+            ],
+            # Full vectors rescore the reduced hits only
+            query=dense_query,
+            using="dense",
+            limit=limit,
+        )
+
+    def _hybrid_prefetch(self, dense_query: List[float], sparse_query: SparseEmbeddingData, limit: int = 10, candidates: int = 20) -> models.Prefetch:
+        # query_uint8 = [int(min(max(x * 127.5 + 127.5, 0), 255)) for x in dense_query]
+        return models.Prefetch(
+            prefetch=[
+                # prefetch=[
+                #     models.Prefetch(
+                #         query=query_uint8, # integer
+                #         using="dense-uint8",
+                #         limit=40,
+                #     )
+                # ],
+                self._dense_prefetch(dense_query, candidates),
                 models.Prefetch(
                     query=models.SparseVector(
-                        indices=sparse_query[0].indices,
-                        values=sparse_query[0].values
+                        indices=sparse_query.indices,
+                        values=sparse_query.values
                     ),
                     using="sparse",
-                    limit=20,
+                    limit=candidates,
                 ),
             ],
             query=models.FusionQuery(
                 fusion=models.Fusion.RRF,
             ),
-        )
-
-        return self.client.query_points(
-            collection_name=collection_name,
-            query=dense_query,
-            prefetch=[sparse_dense_rrf_prefetch],
-            using="dense",
-            with_payload=True,
-            limit=k,
-            query_filter=Filter(
-                should=filter_conditions,
-            )
+            # 10 is Qdrant's default, spelled out because the local client has none
+            limit=limit,
         )
 
     def process(self):
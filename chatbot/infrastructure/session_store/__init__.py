@@ -0,0 +1,10 @@
+from __future__ import annotations
+
+from .session_store import SessionState
+from .session_store import SessionStore
+from .session_store import Turn
+from .session_store import InMemorySessionStore
+from .session_store import SQLiteSessionStore
+from .session_store import get_session_store
+
+__all__ = ['SessionState', 'SessionStore', 'Turn', 'InMemorySessionStore', 'SQLiteSessionStore', 'get_session_store']
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC
+from abc import abstractmethod
+from collections import OrderedDict
+from typing import Callable
+from typing import List
+from typing import Optional
+
+from shared.base import BaseModel
+from shared.settings import Settings
+
+class Turn(BaseModel):
+    query: str
+    response: str
+
+class SessionState(BaseModel):
+    summary: str = ''
+    turns: List[Turn] = []
+
+class SessionStore(ABC):
+    """Storage for conversation state keyed by session ID."""
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[SessionState]:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def put(self, session_id: str, state: SessionState) -> None:
+        raise NotImplementedError()
+
+    @abstractmethod
+    def update(self, session_id: str, change: Callable[[Optional[SessionState]], SessionState]) -> SessionState:
+        """Replace the state of a session with a change of it, atomically per session.
+
+        Args:
+            session_id (str): Session identifier.
+            change (Callable[[Optional[SessionState]], SessionState]): Builds the new state from the stored one, None when there is none.
+
+        Returns:
+            SessionState: Stored state.
+        """
+        raise NotImplementedError()
+
+class InMemorySessionStore(SessionStore):
+    """Process-local store evicting the least recently used sessions."""
+
+    def __init__(self, max_sessions: int):
+        self.max_sessions = max_sessions
+        self._sessions: OrderedDict[str, SessionState] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[SessionState]:
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is not None:
+                self._sessions.move_to_end(session_id)
+            return state
+
+    def put(self, session_id: str, state: SessionState) -> None:
+        with self._lock:
+            self._put(session_id, state)
+
+    def update(self, session_id: str, change: Callable[[Optional[SessionState]], SessionState]) -> SessionState:
+        with self._lock:
+            state = change(self._sessions.get(session_id))
+            self._put(session_id, state)
+            return state
+
+    def _put(self, session_id: str, state: SessionState) -> None:
+        self._sessions[session_id] = state
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+class SQLiteSessionStore(SessionStore):
+    """SQLite store shared by every worker on a node, evicting the least recently used sessions."""
+
+    def __init__(self, path: str, max_sessions: int):
+        self.max_sessions = max_sessions
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS sessions ('
+            'session_id TEXT PRIMARY KEY, state TEXT NOT NULL, updated_at REAL NOT NULL)',
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at)')
+
+    def get(self, session_id: str) -> Optional[SessionState]:
+        with self._lock:
+            row = self._conn.execute('SELECT state FROM sessions WHERE session_id = ?', (session_id,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute('UPDATE sessions SET updated_at = ? WHERE session_id = ?', (time.time(), session_id))
+        return SessionState.model_validate_json(row[0])
+
+    def put(self, session_id: str, state: SessionState) -> None:
+        with self._lock:
+            self._put(session_id, state)
+
+    def update(self, session_id: str, change: Callable[[Optional[SessionState]], SessionState]) -> SessionState:
+        with self._lock:
+            # Other workers write the same file, the write lock is taken before reading
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._conn.execute('SELECT state FROM sessions WHERE session_id = ?', (session_id,)).fetchone()
+                state = change(SessionState.model_validate_json(row[0]) if row is not None else None)
+                self._put(session_id, state)
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+            return state
+
+    def _put(self, session_id: str, state: SessionState) -> None:
+        self._conn.execute(
+            'INSERT INTO sessions (session_id, state, updated_at) VALUES (?, ?, ?) '
+            'ON CONFLICT(session_id) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at',
+            (session_id, state.model_dump_json(), time.time()),
+        )
+        self._conn.execute(
+            'DELETE FROM sessions WHERE session_id IN ('
+            'SELECT session_id FROM sessions ORDER BY updated_at DESC LIMIT -1 OFFSET ?)',
+            (self.max_sessions,),
+        )
+
+def get_session_store(settings: Settings) -> SessionStore:
+    """Create the session store selected by `MEMORY__BACKEND`.
+
+    Args:
+        settings (Settings): Application settings.
+
+    Returns:
+        SessionStore: In-memory or SQLite session store.
+    """
+    if settings.memory.backend == 'sqlite':
+        return SQLiteSessionStore(settings.memory.sqlite_path, settings.memory.max_sessions)
+    if settings.memory.backend == 'memory':
+        return InMemorySessionStore(settings.memory.max_sessions)
+    raise ValueError(f"Unsupported memory backend: {settings.memory.backend}")
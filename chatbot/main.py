@@ -2,6 +2,14 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from api.routers.indexing import indexing
 from api.routers.chatbot import chatbot
+from api.routers.candidates import candidates
+from api.routers.metrics import metrics
+from api.helpers.profiling import add_profiling
+from shared.settings import Settings
+from shared.thread_budget import apply_thread_budget
+
+settings = Settings()
+apply_thread_budget(settings)
 
 app = FastAPI(title="Chatbot API", version="1.0.0")
 app.add_middleware(
@@ -13,4 +21,7 @@ app.add_middleware(
 )
 
 app.include_router(indexing)
-app.include_router(chatbot)
\ No newline at end of file
+app.include_router(chatbot)
+app.include_router(candidates)
+app.include_router(metrics)
+add_profiling(app, settings)
\ No newline at end of file
@@ -0,0 +1,30 @@
+"""Query-only entry point: serves the chatbot without the indexing routes.
+
+Run with `uvicorn main_query:app` on workers that only answer questions, so
+docling and the conversion stack are never imported.
+"""
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from api.routers.chatbot import chatbot
+from api.routers.candidates import candidates
+from api.routers.metrics import metrics
+from api.helpers.profiling import add_profiling
+from shared.settings import Settings
+from shared.thread_budget import apply_thread_budget
+
+settings = Settings()
+apply_thread_budget(settings)
+
+app = FastAPI(title="Chatbot Query API", version="1.0.0")
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+app.include_router(chatbot)
+app.include_router(candidates)
+app.include_router(metrics)
+add_profiling(app, settings)
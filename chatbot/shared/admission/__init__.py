@@ -0,0 +1,5 @@
+from .admission import AdmissionRejected
+from .admission import StageLimiter
+from .admission import get_limiter
+
+__all__ = ['AdmissionRejected', 'StageLimiter', 'get_limiter']
@@ -0,0 +1,190 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from contextlib import contextmanager
+from typing import AsyncIterator, Deque, Dict, Iterator, Optional
+
+from shared.metrics import metrics
+from shared.settings import Settings
+
+STAGES = ("embedding", "vector_search", "llm", "conversion")
+
+class AdmissionRejected(Exception):
+    """Raised when a stage is saturated and the request should be retried later."""
+
+    def __init__(self, stage: str, retry_after: int):
+        super().__init__(f"Stage '{stage}' is overloaded, retry after {retry_after}s")
+        self.stage = stage
+        self.retry_after = retry_after
+
+class _Ticket:
+    """A place in the wait queue, woken either from a thread or from an event loop."""
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.granted = False
+        self.loop = loop
+        self.event = threading.Event() if loop is None else None
+        self.future = loop.create_future() if loop is not None else None
+
+    def wake(self) -> None:
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(lambda: self.future.done() or self.future.set_result(None))
+
+class StageLimiter:
+    """Caps concurrent work in one pipeline stage behind a bounded FIFO wait queue.
+
+    Requests are admitted immediately while a slot is free, wait in the queue
+    for at most `queue_timeout` seconds otherwise, and are rejected at once
+    when the queue is full. Freed slots are handed straight to the oldest
+    waiter, whether it waits in a worker thread or on the event loop.
+
+    Args:
+        stage (str): Stage name used in metrics and errors.
+        max_concurrency (int): Number of requests running at the same time.
+        max_queue (int): Number of requests allowed to wait for a slot.
+        queue_timeout (float): Seconds a request may wait before being rejected.
+        retry_after (int): Seconds suggested to rejected clients.
+    """
+
+    def __init__(self, stage: str, max_concurrency: int, max_queue: int, queue_timeout: float, retry_after: int):
+        self.stage = stage
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._active = 0
+        self._waiters: Deque[_Ticket] = deque()
+
+    def _publish(self) -> None:
+        metrics.set_gauge(f"admission_{self.stage}_active", self._active)
+        metrics.set_gauge(f"admission_{self.stage}_queued", len(self._waiters))
+
+    def _reject(self) -> AdmissionRejected:
+        metrics.inc(f"admission_{self.stage}_rejected")
+        return AdmissionRejected(self.stage, self.retry_after)
+
+    def _enter(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> Optional[_Ticket]:
+        """Take a free slot, or a place in the queue.
+
+        Returns:
+            Optional[_Ticket]: None when admitted right away, else the ticket to wait on.
+        """
+        with self._lock:
+            if self._active < self.max_concurrency and not self._waiters:
+                self._active += 1
+                self._publish()
+                return None
+            if len(self._waiters) >= self.max_queue:
+                raise self._reject()
+            ticket = _Ticket(loop)
+            self._waiters.append(ticket)
+            self._publish()
+            return ticket
+
+    def _leave_queue(self, ticket: _Ticket) -> bool:
+        """Give up a place in the queue unless a slot was granted meanwhile.
+
+        Returns:
+            bool: Whether the ticket already holds a slot.
+        """
+        with self._lock:
+            if ticket.granted:
+                return True
+            self._waiters.remove(ticket)
+            self._publish()
+            return False
+
+    def release(self) -> None:
+        with self._lock:
+            if self._waiters:
+                ticket = self._waiters.popleft()
+                ticket.granted = True
+                ticket.wake()
+            else:
+                self._active -= 1
+            self._publish()
+
+    def acquire(self) -> None:
+        """Block the current thread until a slot is free."""
+        start = time.perf_counter()
+        ticket = self._enter()
+        if ticket is not None:
+            ticket.event.wait(self.queue_timeout)
+            if not self._leave_queue(ticket):
+                raise self._reject()
+        metrics.observe(f"admission_{self.stage}_wait", time.perf_counter() - start)
+
+    async def aacquire(self) -> None:
+        """Wait on the event loop until a slot is free."""
+        start = time.perf_counter()
+        ticket = self._enter(asyncio.get_running_loop())
+        if ticket is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(ticket.future), self.queue_timeout)
+            except asyncio.TimeoutError:
+                if not self._leave_queue(ticket):
+                    raise self._reject()
+            except asyncio.CancelledError:
+                if self._leave_queue(ticket):
+                    self.release()
+                raise
+        metrics.observe(f"admission_{self.stage}_wait", time.perf_counter() - start)
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def aslot(self) -> AsyncIterator[None]:
+        await self.aacquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+class _Unlimited:
+    """Stand-in limiter used when admission control is disabled."""
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        yield
+
+    @asynccontextmanager
+    async def aslot(self) -> AsyncIterator[None]:
+        yield
+
+_limiters: Dict[str, StageLimiter] = {}
+_limiters_lock = threading.Lock()
+
+def get_limiter(settings: Settings, stage: str):
+    """Return the process-wide limiter of a stage, shared by every service.
+
+    Args:
+        settings (Settings): Application settings.
+        stage (str): One of `STAGES`.
+
+    Returns:
+        StageLimiter: Limiter of the stage, a no-op one when admission control is disabled.
+    """
+    if not settings.admission.enabled:
+        return _Unlimited()
+    with _limiters_lock:
+        if stage not in _limiters:
+            limits = settings.admission.stage(stage)
+            _limiters[stage] = StageLimiter(
+                stage=stage,
+                max_concurrency=limits.max_concurrency,
+                max_queue=limits.max_queue,
+                queue_timeout=limits.queue_timeout,
+                retry_after=limits.retry_after,
+            )
+        return _limiters[stage]
@@ -0,0 +1,4 @@
+from .metrics import Metrics
+from .metrics import metrics
+
+__all__ = ['Metrics', 'metrics']
@@ -0,0 +1,73 @@
+import threading
+from collections import defaultdict
+from typing import Any, Dict
+
+class Metrics:
+    """Thread-safe, process-local counters, gauges and timing summaries."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._gauges: Dict[str, float] = {}
+        self._timings: Dict[str, Dict[str, float]] = {}
+
+    def inc(self, name: str, value: float = 1) -> None:
+        """Increase a counter.
+
+        Args:
+            name (str): Counter name.
+            value (float): Amount to add.
+        """
+        with self._lock:
+            self._counters[name] += value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """Set a gauge to its current value.
+
+        Args:
+            name (str): Gauge name.
+            value (float): Current value.
+        """
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, value: float) -> None:
+        """Record one observation of a timing.
+
+        Args:
+            name (str): Timing name.
+            value (float): Observed value, in seconds.
+        """
+        with self._lock:
+            timing = self._timings.setdefault(name, {'count': 0, 'sum': 0.0, 'max': 0.0})
+            timing['count'] += 1
+            timing['sum'] += value
+            timing['max'] = max(timing['max'], value)
+
+    def counter(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a copy of every metric.
+
+        Returns:
+            Dict[str, Any]: Counters, gauges and timings with their mean.
+        """
+        with self._lock:
+            return {
+                'counters': dict(self._counters),
+                'gauges': dict(self._gauges),
+                'timings': {
+                    name: {**timing, 'mean': timing['sum'] / timing['count'] if timing['count'] else 0.0}
+                    for name, timing in self._timings.items()
+                },
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._timings.clear()
+
+metrics = Metrics()
@@ -0,0 +1,3 @@
+from .sampler import SamplingProfiler
+
+__all__ = ['SamplingProfiler']
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import Any, Dict, List, Optional, Tuple
+
+_Frame = Tuple[str, str, int]
+
+# Innermost frames of threads that are waiting, not working: an idle event
+# loop, idle executor workers and blocked waits
+_IDLE = {
+    ('selectors.py', 'select'),
+    ('thread.py', '_worker'),
+    ('threading.py', 'wait'),
+    ('queue.py', 'get'),
+}
+
+class SamplingProfiler:
+    """Wall-clock sampling profiler of every thread of the process.
+
+    A background thread reads the stack of every other thread each
+    `interval` seconds with `sys._current_frames`, so work that a request
+    hands to `asyncio.to_thread` is seen as well as the event loop. Nothing
+    is hooked into the profiled code, and nothing runs before `start`.
+    Samples of idle threads are dropped; requests running at the same time
+    in the same worker show up too.
+
+    Args:
+        interval (float): Seconds between two samples.
+    """
+
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self._samples: Dict[int, List[Tuple[Tuple[_Frame, ...], float]]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.started = 0.0
+        self.duration = 0.0
+
+    def _stack(self, frame: Optional[FrameType]) -> Tuple[_Frame, ...]:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append((code.co_name, code.co_filename, frame.f_lineno))
+            frame = frame.f_back
+        return tuple(reversed(stack))
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = self._stack(frame)
+                if not stack or (os.path.basename(stack[-1][1]), stack[-1][0]) in _IDLE:
+                    continue
+                self._samples.setdefault(thread_id, []).append((stack, now - last))
+            last = now
+
+    def start(self) -> SamplingProfiler:
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> SamplingProfiler:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self.started
+        return self
+
+    @property
+    def samples(self) -> int:
+        return sum(len(samples) for samples in self._samples.values())
+
+    def _thread_names(self) -> Dict[int, str]:
+        return {thread.ident: thread.name for thread in threading.enumerate()}
+
+    def speedscope(self, name: str) -> Dict[str, Any]:
+        """Render the samples as a speedscope file, one profile per thread.
+
+        Open the file at https://www.speedscope.app to browse it as a flame graph.
+
+        Args:
+            name (str): Profile name, e.g. the request line.
+
+        Returns:
+            Dict[str, Any]: Speedscope JSON document.
+        """
+        frames: Dict[Tuple[str, str], int] = {}
+        thread_names = self._thread_names()
+        profiles = []
+        for thread_id, samples in self._samples.items():
+            indices, weights = [], []
+            for stack, weight in samples:
+                indices.append([frames.setdefault((function, filename), len(frames)) for function, filename, _ in stack])
+                weights.append(weight)
+            profiles.append({
+                'type': 'sampled',
+                'name': thread_names.get(thread_id, f'thread {thread_id}'),
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': sum(weights),
+                'samples': indices,
+                'weights': weights,
+            })
+        # The busiest thread first, speedscope opens on it
+        profiles.sort(key=lambda profile: -profile['endValue'])
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': name,
+            'exporter': 'chatbot-profiler',
+            'activeProfileIndex': 0,
+            'shared': {'frames': [{'name': function, 'file': filename} for function, filename in frames]},
+            'profiles': profiles,
+        }
+
+    def collapsed(self) -> str:
+        """Render the samples as folded stacks, the input of flamegraph.pl and inferno.
+
+        Returns:
+            str: One `frame;frame;frame count` line per distinct stack, counts in milliseconds.
+        """
+        thread_names = self._thread_names()
+        stacks: Counter = Counter()
+        for thread_id, samples in self._samples.items():
+            thread = thread_names.get(thread_id, f'thread {thread_id}')
+            for stack, weight in samples:
+                key = ';'.join([thread] + [f'{function} ({os.path.basename(filename)}:{line})' for function, filename, line in stack])
+                stacks[key] += weight
+        return ''.join(f'{stack} {max(1, round(weight * 1000))}\n' for stack, weight in stacks.most_common())
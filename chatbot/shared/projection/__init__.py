@@ -0,0 +1,4 @@
+from .projection import DenseProjection
+from .projection import get_projection
+
+__all__ = ['DenseProjection', 'get_projection']
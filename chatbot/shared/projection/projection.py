@@ -0,0 +1,113 @@
+import logging
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from shared.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+class DenseProjection:
+    """PCA projection of dense vectors onto their main directions.
+
+    Projected vectors are normalized, so cosine similarity between them
+    approximates the one between the full vectors, and are only used to
+    preselect candidates that the full vectors then rescore.
+
+    Args:
+        mean (np.ndarray): Mean of the vectors the projection was fitted on, shape (dim,).
+        components (np.ndarray): Principal directions, shape (reduced_dim, dim).
+    """
+
+    def __init__(self, mean: np.ndarray, components: np.ndarray):
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.components = np.asarray(components, dtype=np.float32)
+
+    @property
+    def dim(self) -> int:
+        return self.components.shape[1]
+
+    @property
+    def reduced_dim(self) -> int:
+        return self.components.shape[0]
+
+    @classmethod
+    def fit(cls, vectors: np.ndarray, reduced_dim: int) -> 'DenseProjection':
+        """Fit the projection on a sample of the corpus vectors.
+
+        Args:
+            vectors (np.ndarray): Dense vectors, shape (count, dim).
+            reduced_dim (int): Dimensions kept.
+
+        Returns:
+            DenseProjection: Projection onto the `reduced_dim` directions of largest variance.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        # Cosine similarity is what the collection measures, so directions are fitted on unit vectors
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        if reduced_dim > min(vectors.shape):
+            raise ValueError(f"Cannot keep {reduced_dim} dimensions of {vectors.shape[0]} vectors of {vectors.shape[1]}")
+        mean = vectors.mean(axis=0)
+        _, _, vt = np.linalg.svd(vectors - mean, full_matrices=False)
+        return cls(mean, vt[:reduced_dim])
+
+    def explained_variance(self, vectors: np.ndarray) -> float:
+        """Share of the variance of `vectors` kept by the projection."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        centered = vectors - self.mean
+        total = float((centered ** 2).sum())
+        return float(((centered @ self.components.T) ** 2).sum()) / total if total else 0.0
+
+    def project(self, vectors: Sequence[Sequence[float]]) -> List[List[float]]:
+        """Project dense vectors, in input order.
+
+        Args:
+            vectors (Sequence[Sequence[float]]): Full dense vectors.
+
+        Returns:
+            List[List[float]]: Normalized reduced vectors.
+        """
+        if len(vectors) == 0:
+            return []
+        vectors = np.asarray(vectors, dtype=np.float32)
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        reduced = (vectors - self.mean) @ self.components.T
+        return (reduced / np.maximum(np.linalg.norm(reduced, axis=1, keepdims=True), 1e-12)).tolist()
+
+    def save(self, path: str) -> None:
+        # np.savez appends .npz to other names, keep the path configured
+        with open(path, 'wb') as file:
+            np.savez(file, mean=self.mean, components=self.components)
+
+    @classmethod
+    def load(cls, path: str) -> 'DenseProjection':
+        with np.load(path) as data:
+            return cls(data['mean'], data['components'])
+
+_projections: Dict[str, DenseProjection] = {}
+_projections_lock = threading.Lock()
+
+def get_projection(settings: Settings) -> Optional[DenseProjection]:
+    """Projection configured in `EMBEDDING__REDUCED_PATH`, loaded once per process.
+
+    Args:
+        settings (Settings): Application settings.
+
+    Returns:
+        Optional[DenseProjection]: The projection, None when reduced vectors are disabled.
+    """
+    path = settings.embedding.reduced_path
+    if not path:
+        return None
+    with _projections_lock:
+        if path not in _projections:
+            projection = DenseProjection.load(path)
+            if projection.dim != settings.qdrant.vector_size:
+                raise ValueError(
+                    f"Projection {path} takes {projection.dim} dimensions, QDRANT__VECTOR_SIZE is {settings.qdrant.vector_size}"
+                )
+            logger.info(f"Loaded {projection.dim} to {projection.reduced_dim} dimension projection from {path}")
+            _projections[path] = projection
+        return _projections[path]
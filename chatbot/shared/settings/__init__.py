@@ -1,3 +1,5 @@
 from .settings import Settings
+from .models.qdrant import CollectionProfile
+from .models.qdrant import COLLECTION_PROFILES
 
-__all__ = ['Settings']
\ No newline at end of file
+__all__ = ['Settings', 'CollectionProfile', 'COLLECTION_PROFILES']
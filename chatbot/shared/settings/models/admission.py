@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from shared.base import BaseModel
+
+class StageLimitSettings(BaseModel):
+    max_concurrency: int
+    max_queue: int
+    queue_timeout: float
+    retry_after: int
+
+class AdmissionSettings(BaseModel):
+    """Concurrency limits, bounded wait queues and queue timeouts for each pipeline stage."""
+    enabled: bool = True
+    embedding_concurrency: int = 2
+    embedding_queue: int = 32
+    embedding_queue_timeout: float = 2.0
+    embedding_retry_after: int = 1
+    vector_search_concurrency: int = 16
+    vector_search_queue: int = 64
+    vector_search_queue_timeout: float = 2.0
+    vector_search_retry_after: int = 1
+    llm_concurrency: int = 16
+    llm_queue: int = 64
+    llm_queue_timeout: float = 5.0
+    llm_retry_after: int = 5
+    conversion_concurrency: int = 1
+    conversion_queue: int = 4
+    conversion_queue_timeout: float = 60.0
+    conversion_retry_after: int = 30
+
+    def stage(self, name: str) -> StageLimitSettings:
+        return StageLimitSettings(
+            max_concurrency=getattr(self, f"{name}_concurrency"),
+            max_queue=getattr(self, f"{name}_queue"),
+            queue_timeout=getattr(self, f"{name}_queue_timeout"),
+            retry_after=getattr(self, f"{name}_retry_after"),
+        )
@@ -0,0 +1,10 @@
+from __future__ import annotations
+
+from shared.base import BaseModel
+
+class ChunkStoreSettings(BaseModel):
+    """Settings for the local store holding chunk text outside of Qdrant."""
+    enabled: bool = False
+    backend: str = 'sqlite'
+    sqlite_path: str = '/data/chunks.db'
+    compression_level: int = 6
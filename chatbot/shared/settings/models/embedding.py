@@ -1,8 +1,23 @@
 from __future__ import annotations
 
+from typing import Optional
+
 from shared.base import BaseModel
 
 class EmbeddingSettings(BaseModel):
     dense_model_path: str
     sparse_model_path: str
     max_token_limit: int
+    # Padded tokens per dense batch, texts are grouped by length to fill it
+    batch_tokens: int = 8192
+    server_socket: Optional[str] = None
+    server_max_batch: int = 64
+    server_batch_wait_ms: float = 5.0
+    server_timeout: float = 30.0
+    # PCA fitted with `python -m app.projection fit`, adds a reduced vector used by the dense prefetch
+    reduced_path: Optional[str] = None
+    # Sparse weights kept per chunk and per query: the largest N, and those above a threshold
+    sparse_top_k: Optional[int] = None
+    sparse_min_weight: float = 0.0
+    sparse_query_top_k: Optional[int] = None
+    sparse_query_min_weight: float = 0.0
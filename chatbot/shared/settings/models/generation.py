@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from typing import Optional
+
 from shared.base import BaseModel
 
 class GenerationSettings(BaseModel):
@@ -8,3 +10,16 @@ class GenerationSettings(BaseModel):
     temperature: float
     max_tokens: int
     api_key: str
+    base_url: Optional[str] = None
+    timeout: float = 30.0
+    connect_timeout: float = 5.0
+    max_retries: int = 2
+    pool_size: int = 20
+    keepalive_expiry: float = 60.0
+    deadline: float = 25.0
+    hedge_enabled: bool = False
+    hedge_after: float = 2.0
+    fallback_model: Optional[str] = None
+    fallback_base_url: Optional[str] = None
+    fallback_api_key: Optional[str] = None
+    batch_concurrency: int = 4
@@ -4,4 +4,7 @@ from shared.base import BaseModel
 
 class IndexingSettings(BaseModel):
     raw_path: str
-    convert_path: str
\ No newline at end of file
+    convert_path: str
+    report_enabled: bool = True
+    report_path: str = '/data/ingestion_reports.jsonl'
+    report_tracemalloc: bool = False
@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from shared.base import BaseModel
+
+class MemorySettings(BaseModel):
+    """Settings for per-session conversation memory."""
+    backend: str = 'memory'
+    sqlite_path: str = '/data/sessions.db'
+    max_sessions: int = 1000
+    max_turns: int = 10
+    history_tokens: int = 1024
+    summary_tokens: int = 256
+    summary_answer_tokens: int = 40
@@ -0,0 +1,10 @@
+from __future__ import annotations
+
+from shared.base import BaseModel
+
+class ProfileSettings(BaseModel):
+    """Settings for the structured candidate profiles extracted at index time."""
+    # Opt-in, matched questions are answered without retrieval
+    enabled: bool = False
+    backend: str = 'sqlite'
+    sqlite_path: str = '/data/profiles.db'
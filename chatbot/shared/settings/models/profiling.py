@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from shared.base import BaseModel
+
+class ProfilingSettings(BaseModel):
+    """Settings for sampling profiles of single requests."""
+    admin_token: Optional[str] = None
+    sample_every: int = 0
+    directory: str = '/data/profiles'
+    max_files: int = 50
+    interval_ms: float = 1.0
@@ -1,9 +1,65 @@
 from __future__ import annotations
 
+from typing import Dict, Optional
+
+from pydantic import field_validator
+
 from shared.base import BaseModel
 
+class CollectionProfile(BaseModel):
+    """HNSW, storage and search-time parameters of the collection."""
+    m: int
+    ef_construct: int
+    vectors_on_disk: bool
+    payload_on_disk: bool
+    # Segment size in KB above which a segment gets an HNSW index, smaller ones are scanned
+    indexing_threshold: int
+    # Inverted index of the sparse vectors
+    sparse_on_disk: bool = False
+    # None searches with ef_construct
+    hnsw_ef: Optional[int] = None
+    exact: bool = False
+
+COLLECTION_PROFILES: Dict[str, CollectionProfile] = {
+    # Vectors, graph links and payload read from disk through the page cache
+    "low_memory": CollectionProfile(
+        m=8, ef_construct=64, vectors_on_disk=True, payload_on_disk=True, indexing_threshold=20000, hnsw_ef=64,
+        sparse_on_disk=True,
+    ),
+    # Qdrant's defaults, what collections were created with before profiles
+    "balanced": CollectionProfile(
+        m=16, ef_construct=100, vectors_on_disk=False, payload_on_disk=True, indexing_threshold=10000,
+    ),
+    # Denser graph so a small ef keeps recall, everything in RAM
+    "low_latency": CollectionProfile(
+        m=32, ef_construct=200, vectors_on_disk=False, payload_on_disk=False, indexing_threshold=10000, hnsw_ef=48,
+    ),
+    # Brute force over the filtered points, exact results, fast while each candidate has few chunks
+    "exact": CollectionProfile(
+        m=16, ef_construct=100, vectors_on_disk=False, payload_on_disk=False, indexing_threshold=10000, exact=True,
+    ),
+}
+
 class QdantSettings(BaseModel):
     url:str
     port:int
     name:str
     vector_size:int
+    profile: str = "balanced"
+    # Reduced vector hits prefetched per full-vector candidate, when EMBEDDING__REDUCED_PATH is set
+    reduced_oversampling: int = 4
+    # Full vectors are then only read to rescore the prefetched points
+    full_vectors_on_disk: bool = True
+    # Weight sparse matches by the inverse document frequency of their tokens, as BM42 is meant to be
+    sparse_idf: bool = False
+
+    @field_validator("profile")
+    @classmethod
+    def _known_profile(cls, profile: str) -> str:
+        if profile not in COLLECTION_PROFILES:
+            raise ValueError(f"Unknown collection profile {profile!r}, expected one of {sorted(COLLECTION_PROFILES)}")
+        return profile
+
+    @property
+    def tuning(self) -> CollectionProfile:
+        return COLLECTION_PROFILES[self.profile]
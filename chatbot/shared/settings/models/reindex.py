@@ -0,0 +1,9 @@
+from __future__ import annotations
+
+from shared.base import BaseModel
+
+class ReindexSettings(BaseModel):
+    """Settings for rebuilding the index into a new collection version behind the alias."""
+    max_chunks_per_second: float = 50.0
+    batch_size: int = 32
+    keep_versions: int = 1
@@ -3,4 +3,21 @@ from __future__ import annotations
 from shared.base import BaseModel
 
 class RetrevalSettings(BaseModel):
-    top_k: int
\ No newline at end of file
+    top_k: int
+    routing_enabled: bool = False
+    routing_max_terms: int = 3
+    routing_min_overlap: float = 0.6
+    routing_vocabulary_size: int = 256
+    routing_vocabulary_ttl: float = 300.0
+    rerank_enabled: bool = False
+    rerank_backend: str = "fastembed"
+    rerank_model: str = "jinaai/jina-reranker-v2-base-multilingual"
+    rerank_candidates: int = 30
+    rerank_top_n: int = 3
+    rerank_batch_size: int = 16
+    cache_enabled: bool = False
+    cache_max_mb: int = 64
+    cache_ttl: float = 300.0
+    name_resolution_enabled: bool = True
+    name_min_similarity: float = 0.8
+    name_refresh_interval: float = 300.0
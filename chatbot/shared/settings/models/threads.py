@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from shared.base import BaseModel
+
+class ThreadSettings(BaseModel):
+    """CPU thread budget for the inference runtimes of each API worker.
+
+    Unset thread counts are derived from the cores left to each worker.
+    """
+    cores: Optional[int] = None
+    workers: int = 1
+    torch_threads: Optional[int] = None
+    onnx_threads: Optional[int] = None
+    ocr_threads: Optional[int] = None
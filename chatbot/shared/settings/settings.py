@@ -10,8 +10,14 @@ from .models.chunking import ChunkSettings
 from .models.qdrant import QdantSettings
 from .models.generation import GenerationSettings
 from .models.retrieval import RetrevalSettings
-from .models.pg import PostgresSettings
 from .models.indexing import IndexingSettings
+from .models.memory import MemorySettings
+from .models.admission import AdmissionSettings
+from .models.threads import ThreadSettings
+from .models.profile import ProfileSettings
+from .models.chunk_store import ChunkStoreSettings
+from .models.profiling import ProfilingSettings
+from .models.reindex import ReindexSettings
 
 load_dotenv(find_dotenv('.env'), override=True)
 
@@ -23,6 +29,14 @@ class Settings(BaseSettings):
     retrieval: RetrevalSettings
     # postgres: PostgresSettings
     indexing: IndexingSettings
+    memory: MemorySettings = MemorySettings()
+    admission: AdmissionSettings = AdmissionSettings()
+    threads: ThreadSettings = ThreadSettings()
+    profile: ProfileSettings = ProfileSettings()
+    chunk_store: ChunkStoreSettings = ChunkStoreSettings()
+    profiling: ProfilingSettings = ProfilingSettings()
+    reindex: ReindexSettings = ReindexSettings()
 
     class Config:
         env_nested_delimiter = '__'
+        env_ignore_empty = True
@@ -0,0 +1,92 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+class _Broadcast:
+    """Replays the items of one async iterator to any number of late subscribers."""
+
+    def __init__(self, source: AsyncIterator[Any]):
+        self._items: List[Any] = []
+        self._done = False
+        self._error: Optional[BaseException] = None
+        self._changed = asyncio.Condition()
+        self.task = asyncio.ensure_future(self._pump(source))
+
+    async def _pump(self, source: AsyncIterator[Any]) -> None:
+        try:
+            async for item in source:
+                async with self._changed:
+                    self._items.append(item)
+                    self._changed.notify_all()
+        except BaseException as e:
+            self._error = e
+        finally:
+            async with self._changed:
+                self._done = True
+                self._changed.notify_all()
+
+    async def subscribe(self) -> AsyncIterator[Any]:
+        index = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: index < len(self._items) or self._done)
+                items = self._items[index:]
+                done = self._done
+            for item in items:
+                yield item
+            index += len(items)
+            if done and index >= len(self._items):
+                if self._error is not None:
+                    raise self._error
+                return
+
+class SingleFlight:
+    """Coalesces concurrent calls sharing a key so that only the first one does the work.
+
+    The work runs in its own task, so a caller going away does not cancel
+    it for the callers still waiting on the same key.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self._streams: Dict[Hashable, _Broadcast] = {}
+
+    def _forget(self, registry: Dict[Hashable, Any], key: Hashable, value: Any) -> None:
+        if registry.get(key) is value:
+            del registry[key]
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Run `fn` unless a call with the same key is already in flight, then await its result.
+
+        Args:
+            key (Hashable): Coalescing key.
+            fn (Callable[[], Awaitable[Any]]): Work to run for the first caller.
+
+        Returns:
+            Tuple[Any, bool]: Result and whether it was shared from another caller.
+        """
+        task = self._calls.get(key)
+        shared = task is not None
+        if not shared:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(self._calls, key, done))
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        return await asyncio.shield(task), shared
+
+    def stream(self, key: Hashable, fn: Callable[[], AsyncIterator[Any]]) -> Tuple[AsyncIterator[Any], bool]:
+        """Iterate `fn` unless a stream with the same key is in flight, then replay that stream.
+
+        Args:
+            key (Hashable): Coalescing key.
+            fn (Callable[[], AsyncIterator[Any]]): Stream to start for the first caller.
+
+        Returns:
+            Tuple[AsyncIterator[Any], bool]: Items of the stream and whether it is shared.
+        """
+        broadcast = self._streams.get(key)
+        shared = broadcast is not None
+        if not shared:
+            broadcast = _Broadcast(fn())
+            self._streams[key] = broadcast
+            broadcast.task.add_done_callback(lambda _: self._forget(self._streams, key, broadcast))
+        return broadcast.subscribe(), shared
@@ -1,3 +1,4 @@
 from .sparse_embed import SparseEmbeddingData
+from .sparse_embed import prune_sparse
 
-__all__ = ['SparseEmbeddingData']
\ No newline at end of file
+__all__ = ['SparseEmbeddingData', 'prune_sparse']
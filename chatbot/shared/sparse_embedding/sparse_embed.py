@@ -1,6 +1,23 @@
-from typing import List
+from typing import List, Optional
 from shared.base import BaseModel
 
 class SparseEmbeddingData(BaseModel):
     indices: List[int]
-    values: List[float]
\ No newline at end of file
+    values: List[float]
+
+def prune_sparse(vector: SparseEmbeddingData, top_k: Optional[int] = None, min_weight: float = 0.0) -> SparseEmbeddingData:
+    """Drop the low weights of a sparse vector.
+
+    Args:
+        vector (SparseEmbeddingData): Vector to prune.
+        top_k (Optional[int]): The maximum number of weights kept, the largest ones. None keeps all.
+        min_weight (float): Weights below it are dropped.
+
+    Returns:
+        SparseEmbeddingData: Kept weights, in the order of their indices.
+    """
+    pairs = [(index, value) for index, value in zip(vector.indices, vector.values) if value >= min_weight]
+    if top_k is not None and len(pairs) > top_k:
+        pairs = sorted(pairs, key=lambda pair: pair[1], reverse=True)[:top_k]
+    pairs.sort()
+    return SparseEmbeddingData(indices=[index for index, _ in pairs], values=[value for _, value in pairs])
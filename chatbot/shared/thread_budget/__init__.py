@@ -0,0 +1,6 @@
+from .thread_budget import ThreadBudget
+from .thread_budget import apply_thread_budget
+from .thread_budget import compute_thread_budget
+from .thread_budget import get_thread_budget
+
+__all__ = ['ThreadBudget', 'apply_thread_budget', 'compute_thread_budget', 'get_thread_budget']
@@ -0,0 +1,104 @@
+import logging
+import os
+import sys
+import threading
+from typing import Optional
+
+from shared.base import BaseModel
+from shared.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+# Native thread pools read these when they start, so they must be set before torch or OCR run
+_THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS')
+
+class ThreadBudget(BaseModel):
+    cores: int
+    workers: int
+    torch_threads: int
+    onnx_threads: int
+    ocr_threads: int
+
+def _available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def compute_thread_budget(settings: Settings) -> ThreadBudget:
+    """Divide the node's cores among the workers and the runtimes inside each worker.
+
+    Each worker gets `cores // workers` threads. The dense and sparse models run
+    one after the other inside an embedding slot, so both get the worker share
+    divided by the embedding concurrency; OCR gets it divided by the conversion
+    concurrency. Thread counts set explicitly in the settings win.
+
+    Args:
+        settings (Settings): Application settings.
+
+    Returns:
+        ThreadBudget: Threads allowed for each runtime in this process.
+    """
+    threads = settings.threads
+    cores = threads.cores or _available_cores()
+    workers = max(1, threads.workers)
+    per_worker = max(1, cores // workers)
+
+    embedding_slots = conversion_slots = 1
+    if settings.admission.enabled:
+        embedding_slots = max(1, settings.admission.embedding_concurrency)
+        conversion_slots = max(1, settings.admission.conversion_concurrency)
+    embedding_share = max(1, per_worker // embedding_slots)
+
+    return ThreadBudget(
+        cores=cores,
+        workers=workers,
+        torch_threads=threads.torch_threads or embedding_share,
+        onnx_threads=threads.onnx_threads or embedding_share,
+        ocr_threads=threads.ocr_threads or max(1, per_worker // conversion_slots),
+    )
+
+_budget: Optional[ThreadBudget] = None
+_budget_lock = threading.Lock()
+
+def apply_thread_budget(settings: Settings) -> ThreadBudget:
+    """Compute the thread budget of this process, export it and log it.
+
+    Called once at startup. The OpenMP/BLAS variables are set for the libraries
+    that read them on import, and torch is configured right away when it is
+    already loaded; otherwise the model loaders pick the budget up through
+    `get_thread_budget`.
+
+    Args:
+        settings (Settings): Application settings.
+
+    Returns:
+        ThreadBudget: The applied budget.
+    """
+    global _budget
+    budget = compute_thread_budget(settings)
+    with _budget_lock:
+        _budget = budget
+    for name in _THREAD_ENV_VARS:
+        os.environ[name] = str(budget.torch_threads)
+    if 'torch' in sys.modules:
+        sys.modules['torch'].set_num_threads(budget.torch_threads)
+    logger.info(
+        f"Thread budget: {budget.cores} cores / {budget.workers} workers -> "
+        f"torch={budget.torch_threads}, onnx={budget.onnx_threads}, ocr={budget.ocr_threads}"
+    )
+    return budget
+
+def get_thread_budget(settings: Settings) -> ThreadBudget:
+    """Return the budget applied at startup, or compute it from the settings.
+
+    Args:
+        settings (Settings): Application settings.
+
+    Returns:
+        ThreadBudget: Threads allowed for each runtime in this process.
+    """
+    with _budget_lock:
+        if _budget is not None:
+            return _budget
+    return compute_thread_budget(settings)
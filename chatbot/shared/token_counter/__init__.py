@@ -0,0 +1,3 @@
+from .token_counter import count_tokens
+
+__all__ = ['count_tokens']
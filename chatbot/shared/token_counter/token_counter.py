@@ -0,0 +1,19 @@
+import re
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+def count_tokens(text: str) -> int:
+    """Estimate the number of LLM tokens in a text.
+
+    Counts words and punctuation marks, which is cheap, needs no tokenizer
+    download and slightly over-estimates BPE token counts for Vietnamese.
+
+    Args:
+        text (str): Text to measure.
+
+    Returns:
+        int: Estimated token count.
+    """
+    if not text:
+        return 0
+    return len(_TOKEN_PATTERN.findall(text))
@@ -0,0 +1,34 @@
+"""Deterministic stand-ins shared by the offline tests."""
+from typing import Any, Dict, List
+
+from qdrant_client import QdrantClient
+
+from benchmarks.stub_embedding import STUB_DIM
+from benchmarks.stub_embedding import StubEmbeddingService
+from infrastructure.qdrant import Qdrant
+from infrastructure.qdrant import QdrantInput
+from shared.settings import Settings
+
+FAKE_DIM = STUB_DIM
+
+FakeEmbeddingService = StubEmbeddingService
+
+def memory_qdrant(settings: Settings, chunks: List[Dict[str, Any]]) -> Qdrant:
+    """Build a Qdrant service backed by an in-memory client holding the given chunks.
+
+    Args:
+        settings (Settings): Settings with `qdrant.vector_size` equal to `FAKE_DIM`.
+        chunks (List[Dict[str, Any]]): Chunks with `content` and `metadata`, as produced by the Chunker.
+
+    Returns:
+        Qdrant: Service whose client is the in-memory one.
+    """
+    qdrant = Qdrant(settings=settings)
+    qdrant.__dict__["client"] = QdrantClient(":memory:")
+    dense, sparse = FakeEmbeddingService(settings=settings)._encode([chunk["content"] for chunk in chunks])
+    qdrant.insert(QdrantInput(
+        dense_embeddings=dense,
+        sparse_embeddings=sparse,
+        payload=[{**chunk["metadata"], "content": chunk["content"]} for chunk in chunks],
+    ))
+    return qdrant
@@ -0,0 +1,83 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from shared.admission import AdmissionRejected
+from shared.admission import StageLimiter
+from shared.metrics import metrics
+
+class TestStageLimiter(unittest.TestCase):
+
+    def setUp(self):
+        metrics.reset()
+
+    def _limiter(self, **kwargs) -> StageLimiter:
+        return StageLimiter(**{"stage": "test", "max_concurrency": 1, "max_queue": 1, "queue_timeout": 1.0, "retry_after": 3, **kwargs})
+
+    def test_rejects_when_queue_is_full(self):
+        limiter = self._limiter(max_queue=0)
+        with limiter.slot():
+            with self.assertRaises(AdmissionRejected) as context:
+                limiter.acquire()
+        self.assertEqual(context.exception.retry_after, 3)
+        self.assertEqual(metrics.counter("admission_test_rejected"), 1)
+
+    def test_rejects_after_queue_timeout(self):
+        limiter = self._limiter(queue_timeout=0.05)
+        with limiter.slot():
+            with self.assertRaises(AdmissionRejected):
+                limiter.acquire()
+        self.assertEqual(metrics.snapshot()["gauges"]["admission_test_queued"], 0)
+        limiter.acquire()
+
+    def test_hands_slot_to_thread_waiter(self):
+        limiter = self._limiter()
+        limiter.acquire()
+        acquired = threading.Event()
+
+        def waiter():
+            with limiter.slot():
+                acquired.set()
+
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        time.sleep(0.05)
+        self.assertFalse(acquired.is_set())
+        limiter.release()
+        thread.join(1)
+        self.assertTrue(acquired.is_set())
+        self.assertEqual(metrics.snapshot()["gauges"]["admission_test_active"], 0)
+
+    def test_async_waiters_run_in_order(self):
+        limiter = self._limiter(max_concurrency=2, max_queue=10)
+        order = []
+
+        async def work(i):
+            async with limiter.aslot():
+                order.append(i)
+                await asyncio.sleep(0.02)
+
+        async def run():
+            await asyncio.gather(*(work(i) for i in range(6)))
+
+        asyncio.run(run())
+        self.assertEqual(order, list(range(6)))
+        self.assertEqual(metrics.snapshot()["timings"]["admission_test_wait"]["count"], 6)
+
+    def test_cancelled_async_waiter_leaves_queue(self):
+        limiter = self._limiter()
+
+        async def run():
+            await limiter.aacquire()
+            waiter = asyncio.create_task(limiter.aacquire())
+            await asyncio.sleep(0.01)
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+            limiter.release()
+            await asyncio.wait_for(limiter.aacquire(), 0.1)
+
+        asyncio.run(run())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import random
+import unittest
+from typing import List
+
+from qdrant_client import QdrantClient
+
+from benchmarks.utils import make_settings
+from domain.retrieval import CandidateCache
+from domain.retrieval import CandidateVectors
+from domain.retrieval import RetrievalBatchInput
+from domain.retrieval import RetrievalInput
+from domain.retrieval import RetrievalService
+from infrastructure.qdrant import CANDIDATE_KEY
+from infrastructure.qdrant import Qdrant
+from infrastructure.qdrant import QdrantInput
+from shared.metrics import metrics
+from shared.sparse_embedding import SparseEmbeddingData
+
+DIM = 16
+CANDIDATE = "Nguyen Van A"
+
+class TestCandidateCache(unittest.TestCase):
+    """Scoring from the cache must return what the Qdrant hybrid and sparse searches return."""
+
+    def setUp(self):
+        metrics.reset()
+        self.rng = random.Random(0)
+        self.settings = make_settings(
+            qdrant={"vector_size": DIM, "name": "cache"},
+            retrieval={"top_k": 3, "cache_enabled": True},
+        )
+        self.qdrant = Qdrant(settings=self.settings)
+        self.qdrant.__dict__["client"] = QdrantClient(":memory:")
+        # A single candidate: the in-memory client filters after prefetching, unlike the server
+        self._insert(CANDIDATE, 40)
+        self.service = RetrievalService(settings=self.settings)
+        self.service.__dict__["_get_qdrant"] = self.qdrant
+        self.service.__dict__["_get_cache"] = CandidateCache(max_bytes=1 << 20, ttl=300)
+
+    def _insert(self, candidate: str, count: int) -> None:
+        self.qdrant.insert(QdrantInput(
+            dense_embeddings=[self._dense() for _ in range(count)],
+            sparse_embeddings=[self._sparse() for _ in range(count)],
+            payload=[{CANDIDATE_KEY: candidate, "content": f"{candidate} {i}"} for i in range(count)],
+        ))
+
+    def _dense(self) -> List[float]:
+        return [self.rng.gauss(0, 1) for _ in range(DIM)]
+
+    def _sparse(self) -> SparseEmbeddingData:
+        indices = sorted(self.rng.sample(range(50), self.rng.randint(1, 8)))
+        return SparseEmbeddingData(indices=indices, values=[self.rng.random() for _ in indices])
+
+    def _contents(self, context) -> List[str]:
+        return [chunk["content"] for chunk in context]
+
+    def test_matches_qdrant_search(self):
+        for _ in range(50):
+            dense, sparse = self._dense(), self._sparse()
+            for k in (3, 12):
+                expected = self.qdrant.query(dense, [sparse], CANDIDATE, k).points
+                self.settings.retrieval.top_k = k
+                output = self.service.process(RetrievalInput(dense_query=dense, sparse_query=[sparse], user_name=CANDIDATE))
+                self.assertEqual(self._contents(output.context), [point.payload["content"] for point in expected])
+
+            expected = self.qdrant.query_sparse(sparse, CANDIDATE, 5).points
+            self.settings.retrieval.top_k = 5
+            output = self.service.process(RetrievalInput(dense_query=None, sparse_query=[sparse], user_name=CANDIDATE))
+            self.assertEqual(self._contents(output.context), [point.payload["content"] for point in expected])
+
+    def test_loads_candidate_once(self):
+        self._insert("Nguyen Van B", 10)
+        self.assertEqual(self.service.warm(CANDIDATE), 40)
+        dense, sparse = [self._dense(), self._dense()], [self._sparse(), self._sparse()]
+        outputs = self.service.process_batch(RetrievalBatchInput(dense_queries=dense, sparse_queries=sparse, user_name=CANDIDATE))
+        self.assertEqual([len(output.context) for output in outputs], [3, 3])
+        self.assertTrue(all(chunk[CANDIDATE_KEY] == CANDIDATE for output in outputs for chunk in output.context))
+        self.assertEqual(metrics.counter("candidate_cache_misses"), 1)
+        self.assertEqual(metrics.counter("candidate_cache_hits"), 1)
+
+    def test_evicts_least_recently_used_by_size(self):
+        one = self.service._load_candidate(CANDIDATE)
+        cache = CandidateCache(max_bytes=2 * one.nbytes + 1, ttl=300)
+        for name in ("a", "b"):
+            cache.put(name, one)
+        cache.get("a", lambda: self.fail("a is cached"))
+        cache.put("c", one)
+        reloaded = []
+        cache.get("b", lambda: reloaded.append("b") or one)
+        self.assertEqual(reloaded, ["b"])
+        self.assertEqual(metrics.counter("candidate_cache_evictions"), 2)
+
+    def test_invalidation_drops_entry_and_racing_load(self):
+        cache = CandidateCache(max_bytes=1 << 20, ttl=300)
+        vectors = CandidateVectors(payloads=[{"content": "x"}], dense=[[1.0, 0.0]], sparse=[SparseEmbeddingData(indices=[1], values=[1.0])])
+        cache.put(CANDIDATE, vectors)
+        cache.invalidate([CANDIDATE])
+
+        def load_while_reindexing():
+            cache.invalidate([CANDIDATE])
+            return vectors
+
+        cache.get(CANDIDATE, load_while_reindexing)
+        loads = []
+        cache.get(CANDIDATE, lambda: loads.append(1) or vectors)
+        self.assertEqual(loads, [1])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from app.candidates import CandidateSearchService
+from app.candidates import CandidateSuggestInput
+from app.query import ChatbotInput
+from app.query import ChatbotService
+from benchmarks.stub_llm import StubLLMServer
+from benchmarks.utils import make_settings
+from domain.retrieval import CandidateDirectory
+from domain.retrieval import fold_name
+from domain.retrieval.candidate_directory import MIN_RELOAD_INTERVAL
+from infrastructure.qdrant import CANDIDATE_KEY
+from tests.fakes import FAKE_DIM
+from tests.fakes import FakeEmbeddingService
+from tests.fakes import memory_qdrant
+
+NAMES = ["Đào Duy Chiến", "Nguyễn Văn A", "Nguyễn Văn B", "Trần Thị Hoa", "Hoàng Minh Tuấn"]
+
+def _directory(names=NAMES) -> CandidateDirectory:
+    return CandidateDirectory(load=lambda: list(names), refresh_interval=300, min_similarity=0.8)
+
+class TestCandidateDirectory(unittest.TestCase):
+
+    def test_fold_name(self):
+        self.assertEqual(fold_name("  ĐÀO  Duy-Chiến "), "dao duy chien")
+        self.assertEqual(fold_name("Nguyễn Văn A"), "nguyen van a")
+
+    def test_resolves_exact_folded_and_reordered_names(self):
+        directory = _directory()
+        self.assertEqual(directory.resolve("Đào Duy Chiến"), "Đào Duy Chiến")
+        self.assertEqual(directory.resolve("ĐÀO DUY CHIẾN"), "Đào Duy Chiến")
+        self.assertEqual(directory.resolve("dao duy chien"), "Đào Duy Chiến")
+        self.assertEqual(directory.resolve("Chiến Đào Duy"), "Đào Duy Chiến")
+
+    def test_resolves_typos(self):
+        directory = _directory()
+        self.assertEqual(directory.resolve("Hoang Minh Tuan"), "Hoàng Minh Tuấn")
+        self.assertEqual(directory.resolve("Hoang Minh Tuann"), "Hoàng Minh Tuấn")
+        self.assertEqual(directory.resolve("Tramn Thi Hoa"), "Trần Thị Hoa")
+        # Too far from any name to be corrected, but still suggested
+        self.assertIsNone(directory.resolve("Dao Duy Chein"))
+        self.assertEqual(directory.suggest("Dao Duy Chein", 1), ["Đào Duy Chiến"])
+
+    def test_unknown_and_ambiguous_names_are_not_resolved(self):
+        directory = _directory(NAMES + ["Nguyen Van A"])
+        self.assertIsNone(directory.resolve("Someone Else"))
+        # Two stored names fold to the same text
+        self.assertIsNone(directory.resolve("nguyen van a"))
+        # Equally close to A and B
+        self.assertIsNone(directory.resolve("Nguyen Van C"))
+
+    def test_reloads_names_added_elsewhere(self):
+        names = list(NAMES)
+        directory = _directory(names)
+        self.assertIsNone(directory.resolve("Lê Văn Mới"))
+        names.append("Lê Văn Mới")
+        directory._loaded_at -= 300
+        self.assertEqual(directory.resolve("le van moi"), "Lê Văn Mới")
+
+    def test_concurrent_misses_share_one_reload(self):
+        loads = []
+
+        def load():
+            loads.append(1)
+            time.sleep(0.1)
+            return NAMES
+
+        directory = CandidateDirectory(load=load, refresh_interval=300, min_similarity=0.8)
+        self.assertEqual(len(directory), len(NAMES))
+        directory._loaded_at -= MIN_RELOAD_INTERVAL
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            resolved = list(pool.map(directory.resolve, [f"Unknown {i}" for i in range(8)]))
+        self.assertEqual(resolved, [None] * 8)
+        self.assertEqual(len(loads), 2)
+
+    def test_added_names_survive_a_reload(self):
+        directory = _directory()
+        directory.add("Lê Văn Mới")
+        self.assertEqual(directory.resolve("Le Van Moi"), "Lê Văn Mới")
+        directory.refresh()
+        self.assertEqual(directory.resolve("Le Van Moi"), "Lê Văn Mới")
+
+    def test_failed_load_keeps_names(self):
+        names = list(NAMES)
+        directory = CandidateDirectory(
+            load=lambda: names if names else (_ for _ in ()).throw(ConnectionError("down")),
+            refresh_interval=300,
+            min_similarity=0.8,
+        )
+        self.assertEqual(len(directory), len(NAMES))
+        names.clear()
+        directory.refresh()
+        self.assertEqual(len(directory), len(NAMES))
+
+    def test_suggest(self):
+        directory = _directory(NAMES + ["Nguyễn Thị Vân"])
+        self.assertEqual(directory.suggest("nguy", 10), ["Nguyễn Thị Vân", "Nguyễn Văn A", "Nguyễn Văn B"])
+        # Names starting with the typed text come before names with a matching later word
+        self.assertEqual(directory.suggest("van", 10)[0], "Nguyễn Thị Vân")
+        self.assertEqual(directory.suggest("ng van", 10), ["Nguyễn Thị Vân", "Nguyễn Văn A", "Nguyễn Văn B"])
+        self.assertEqual(directory.suggest("nguyen van", 2), ["Nguyễn Văn A", "Nguyễn Văn B"])
+        self.assertEqual(directory.suggest("Hoang Minh Tuna", 10), ["Hoàng Minh Tuấn"])
+        self.assertEqual(directory.suggest("  ", 10), [])
+
+    def test_search_service_suggests(self):
+        service = CandidateSearchService(settings=make_settings())
+        service.__dict__["_get_directory"] = _directory()
+        output = service.suggest(CandidateSuggestInput(query="dao", limit=5))
+        self.assertEqual(output.candidates, ["Đào Duy Chiến"])
+
+class TestChatbotNameResolution(unittest.TestCase):
+
+    def _service(self, llm: StubLLMServer, enabled: bool) -> ChatbotService:
+        settings = make_settings(
+            qdrant={"vector_size": FAKE_DIM, "name": "directory"},
+            generation={"base_url": llm.base_url, "max_retries": 0},
+            retrieval={"top_k": 10, "name_resolution_enabled": enabled},
+            profile={"enabled": False},
+        )
+        qdrant = memory_qdrant(settings, [
+            {"content": f"{name} có kinh nghiệm Python", "metadata": {"Header_1": name, CANDIDATE_KEY: name}}
+            for name in NAMES
+        ])
+        service = ChatbotService(settings=settings)
+        service.__dict__["_get_embedding"] = FakeEmbeddingService(settings=settings)
+        service.__dict__["_get_directory"] = _directory()
+        service._get_retrieval.__dict__["_get_qdrant"] = qdrant
+        return service
+
+    def test_typed_name_is_resolved_before_retrieval(self):
+        with StubLLMServer(response="llm") as llm:
+            service = self._service(llm, enabled=True)
+            context = service._retrieve(service._resolve(ChatbotInput(query="Python", user_name="dao duy chien"))).context
+        self.assertEqual([chunk["content"] for chunk in context], ["Đào Duy Chiến có kinh nghiệm Python"])
+
+    def test_directory_loads_names_from_qdrant(self):
+        with StubLLMServer(response="llm") as llm:
+            service = self._service(llm, enabled=True)
+        names = service._get_retrieval._get_qdrant.candidate_names()
+        self.assertEqual(sorted(names), sorted(NAMES))
+
+    def test_disabled_resolution_keeps_the_typed_name(self):
+        with StubLLMServer(response="llm") as llm:
+            service = self._service(llm, enabled=False)
+            inputs = service._resolve(ChatbotInput(query="Python", user_name="dao duy chien"))
+            self.assertEqual(inputs.user_name, "dao duy chien")
+            self.assertEqual(service._retrieve(inputs).context, [])
+
+if __name__ == "__main__":
+    unittest.main()
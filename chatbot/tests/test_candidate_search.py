@@ -0,0 +1,80 @@
+import asyncio
+import unittest
+
+from app.candidates import CandidateSearchInput
+from app.candidates import MAX_OFFSET
+from app.candidates import CandidateSearchService
+from app.indexing import IndexingService
+from benchmarks.stub_llm import StubLLMServer
+from benchmarks.utils import make_settings
+from infrastructure.qdrant import CANDIDATE_KEY
+from tests.fakes import FAKE_DIM
+from tests.fakes import FakeEmbeddingService
+from tests.fakes import memory_qdrant
+
+SKILLS = {
+    "Nguyen Van A": ["Kubernetes Docker Helm", "Python FastAPI", "Đại học Bách khoa"],
+    "Tran Thi B": ["Kubernetes Terraform AWS", "Java Spring"],
+    "Le Van C": ["Photoshop Illustrator", "Figma"],
+}
+
+class TestCandidateSearch(unittest.TestCase):
+
+    def _service(self, legacy=(), **generation) -> CandidateSearchService:
+        settings = make_settings(qdrant={"vector_size": FAKE_DIM, "name": "candidates"}, generation=generation)
+        # Candidates in `legacy` were indexed before the candidate key existed
+        chunks = [
+            {"content": content, "metadata": {"Header_1": candidate} if candidate in legacy else {"Header_1": candidate, CANDIDATE_KEY: candidate}}
+            for candidate, contents in SKILLS.items()
+            for content in contents
+        ]
+        service = CandidateSearchService(settings=settings)
+        service.__dict__["_get_embedding"] = FakeEmbeddingService(settings=settings)
+        service.__dict__["_get_qdrant"] = memory_qdrant(settings, chunks)
+        return service
+
+    def test_candidates_are_grouped_and_ranked(self):
+        output = self._service().process(CandidateSearchInput(query="Kubernetes", limit=2, chunks_per_candidate=2))
+        self.assertEqual({match.candidate for match in output.candidates}, {"Nguyen Van A", "Tran Thi B"})
+        self.assertTrue(all(len(match.chunks) <= 2 for match in output.candidates))
+        self.assertIn("Kubernetes", output.candidates[0].chunks[0].content)
+        self.assertIsNone(output.response)
+
+    def test_pagination_does_not_repeat_candidates(self):
+        service = self._service()
+        first = service.process(CandidateSearchInput(query="Kubernetes Figma", limit=2))
+        second = service.process(CandidateSearchInput(query="Kubernetes Figma", limit=2, offset=2))
+        names = [match.candidate for match in first.candidates + second.candidates]
+        self.assertEqual(len(names), len(set(names)))
+        self.assertEqual(len(second.candidates), 1)
+
+    def test_legacy_chunks_are_grouped_by_header(self):
+        service = self._service(legacy=("Tran Thi B",))
+        output = service.process(CandidateSearchInput(query="Kubernetes", limit=3, chunks_per_candidate=2))
+        names = [match.candidate for match in output.candidates]
+        self.assertEqual(sorted(names), sorted(SKILLS))
+        self.assertEqual([match.score for match in output.candidates], sorted((match.score for match in output.candidates), reverse=True))
+        legacy = next(match for match in output.candidates if match.candidate == "Tran Thi B")
+        self.assertEqual(len(legacy.chunks), 2)
+
+    def test_offset_is_capped(self):
+        service = self._service()
+        with self.assertRaises(ValueError):
+            service.process(CandidateSearchInput(query="Kubernetes", offset=MAX_OFFSET + 1))
+
+    def test_generate_makes_a_single_llm_call(self):
+        with StubLLMServer(response="A và B biết Kubernetes") as llm:
+            service = self._service(base_url=llm.base_url, max_retries=0)
+            output = asyncio.run(service.aprocess(CandidateSearchInput(query="Kubernetes", generate=True)))
+            self.assertEqual(llm.requests, 1)
+        self.assertEqual(output.response, "A và B biết Kubernetes")
+
+    def test_candidate_taken_from_first_header(self):
+        chunks = [
+            {"content": "intro", "metadata": {}},
+            {"content": "skills", "metadata": {"Header_2": " Nguyen Van A ", "Header_3": "Skills"}},
+        ]
+        self.assertEqual(IndexingService._get_candidate(chunks), "Nguyen Van A")
+
+if __name__ == "__main__":
+    unittest.main()
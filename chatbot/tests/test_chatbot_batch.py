@@ -0,0 +1,62 @@
+import asyncio
+import unittest
+
+from app.query import NO_CONTEXT_RESPONSE
+from app.query import ChatbotBatchInput
+from app.query import ChatbotService
+from benchmarks.stub_llm import StubLLMServer
+from benchmarks.utils import make_settings
+from tests.fakes import FAKE_DIM
+from tests.fakes import FakeEmbeddingService
+from tests.fakes import memory_qdrant
+
+CANDIDATE = "Nguyen Van A"
+QUERIES = ["Ứng viên học trường nào?", "Email của ứng viên là gì?", "Ứng viên biết Python không?"]
+
+class TestChatbotBatch(unittest.TestCase):
+
+    def _service(self, llm: StubLLMServer) -> ChatbotService:
+        settings = make_settings(
+            qdrant={"vector_size": FAKE_DIM, "name": "batch"},
+            generation={"base_url": llm.base_url, "max_retries": 0, "batch_concurrency": 2},
+        )
+        embedding = FakeEmbeddingService(settings=settings)
+        chunks = [{"content": f"{CANDIDATE} chunk {i}", "metadata": {"Header_1": CANDIDATE}} for i in range(3)]
+        qdrant = memory_qdrant(settings, chunks)
+
+        service = ChatbotService(settings=settings)
+        service.__dict__["_get_embedding"] = embedding
+        service._get_retrieval.__dict__["_get_qdrant"] = qdrant
+        return service
+
+    def test_answers_in_order_with_one_embedding_pass(self):
+        with StubLLMServer(response="answer") as llm:
+            service = self._service(llm)
+            output = asyncio.run(service.abatch(ChatbotBatchInput(queries=QUERIES, user_name=CANDIDATE)))
+            self.assertEqual(llm.requests, len(QUERIES))
+
+        self.assertEqual([answer.query for answer in output.answers], QUERIES)
+        self.assertTrue(all(answer.response == "answer" for answer in output.answers))
+        self.assertEqual(service._get_embedding.batches, [len(QUERIES)])
+        self.assertEqual(set(output.timings), {"profile_ms", "embedding_ms", "retrieval_ms", "total_ms"})
+        self.assertEqual(set(output.answers[0].timings), {"generation_ms", "total_ms"})
+
+    def test_failed_generation_is_reported_per_question(self):
+        with StubLLMServer(response="answer", fail_first=1) as llm:
+            service = self._service(llm)
+            output = asyncio.run(service.abatch(ChatbotBatchInput(queries=QUERIES, user_name=CANDIDATE)))
+
+        self.assertEqual([answer.query for answer in output.answers], QUERIES)
+        failed = [answer for answer in output.answers if answer.error is not None]
+        self.assertEqual([(answer.error, answer.response) for answer in failed], [("error", "")])
+        self.assertEqual(sum(answer.response == "answer" for answer in output.answers), len(QUERIES) - 1)
+
+    def test_unknown_candidate_skips_generation(self):
+        with StubLLMServer(response="answer") as llm:
+            service = self._service(llm)
+            output = asyncio.run(service.abatch(ChatbotBatchInput(queries=QUERIES[:2], user_name="Unknown")))
+            self.assertEqual(llm.requests, 0)
+        self.assertTrue(all(answer.response == NO_CONTEXT_RESPONSE for answer in output.answers))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import json
+import os
+import tempfile
+import unittest
+
+from app.candidates import CandidateSearchInput
+from app.candidates import CandidateSearchService
+from benchmarks.utils import make_settings
+from domain.indexing import EmbeddingInput
+from domain.retrieval import RetrievalInput
+from domain.retrieval import RetrievalService
+from infrastructure.chunk_store import SQLiteChunkStore
+from infrastructure.qdrant import CANDIDATE_KEY
+from infrastructure.qdrant import FILTER_KEYS
+from infrastructure.qdrant import Qdrant
+from infrastructure.qdrant import QdrantInput
+from tests.fakes import FAKE_DIM
+from tests.fakes import FakeEmbeddingService
+from tests.fakes import memory_qdrant
+
+CANDIDATE = "Nguyen Van A"
+CHUNKS = [
+    {"content": content, "metadata": {"Header_1": CANDIDATE, "Header_2": "Kinh nghiệm", CANDIDATE_KEY: CANDIDATE, "source": "cv.pdf"}}
+    for content in ("Kubernetes Docker Helm", "Python FastAPI", "Đại học Bách khoa")
+]
+
+class TestChunkStore(unittest.TestCase):
+
+    def _settings(self, enabled: bool = True):
+        return make_settings(
+            qdrant={"vector_size": FAKE_DIM, "name": "chunk_store"},
+            retrieval={"top_k": 3},
+            chunk_store={"enabled": enabled, "backend": "memory"},
+        )
+
+    def _retrieve(self, settings, qdrant: Qdrant, query: str):
+        embedding = FakeEmbeddingService(settings=settings).process(EmbeddingInput(query=query))
+        service = RetrievalService(settings=settings)
+        service.__dict__["_get_qdrant"] = qdrant
+        return service.process(RetrievalInput(
+            dense_query=embedding.dense_embeddings[0],
+            sparse_query=embedding.sparse_embeddings,
+            user_name=CANDIDATE,
+        ))
+
+    def test_qdrant_keeps_only_filter_keys(self):
+        settings = self._settings()
+        qdrant = memory_qdrant(settings, CHUNKS)
+        points, _ = qdrant.client.scroll(settings.qdrant.name, with_payload=True, limit=10)
+        self.assertTrue(all(set(point.payload) <= set(FILTER_KEYS) for point in points))
+
+        output = self._retrieve(settings, qdrant, "Kubernetes")
+        self.assertIn("Kubernetes", output.context[0]["content"])
+        self.assertEqual(output.context[0]["source"], "cv.pdf")
+
+    def test_candidate_search_resolves_text(self):
+        settings = self._settings()
+        service = CandidateSearchService(settings=settings)
+        service.__dict__["_get_embedding"] = FakeEmbeddingService(settings=settings)
+        service.__dict__["_get_qdrant"] = memory_qdrant(settings, CHUNKS)
+        output = service.process(CandidateSearchInput(query="Python", limit=1, chunks_per_candidate=3))
+        self.assertEqual(sorted(chunk.content for chunk in output.candidates[0].chunks), sorted(chunk["content"] for chunk in CHUNKS))
+
+    def test_points_indexed_before_the_store_keep_working(self):
+        qdrant = memory_qdrant(self._settings(enabled=False), CHUNKS)
+        settings = self._settings()
+        migrated = Qdrant(settings=settings)
+        migrated.__dict__["client"] = qdrant.client
+        dense, sparse = FakeEmbeddingService(settings=settings)._encode(["Figma Photoshop"])
+        migrated.insert(QdrantInput(
+            dense_embeddings=dense,
+            sparse_embeddings=sparse,
+            payload=[{CANDIDATE_KEY: CANDIDATE, "content": "Figma Photoshop"}],
+        ))
+        contents = {chunk["content"] for chunk in self._retrieve(settings, migrated, "Figma Kubernetes").context}
+        self.assertIn("Figma Photoshop", contents)
+        self.assertIn("Kubernetes Docker Helm", contents)
+
+    def test_sqlite_round_trip_in_bulk(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = SQLiteChunkStore(os.path.join(directory, "chunks.db"))
+            payloads = {f"id-{i}": {"content": f"Nội dung {i} " * 20, "Header_1": CANDIDATE} for i in range(2500)}
+            store.put_many(payloads)
+            found = store.get_many(list(payloads) + ["unknown"])
+            self.assertEqual(found, payloads)
+            stored_bytes = store._conn.execute("SELECT SUM(LENGTH(data)) FROM chunks").fetchone()[0]
+            self.assertLess(stored_bytes, sum(len(json.dumps(payload)) for payload in payloads.values()) / 4)
+
+            store.delete_many(list(payloads)[:2000])
+            self.assertEqual(store.get_many(list(payloads)), dict(list(payloads.items())[2000:]))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+from unittest import mock
+
+from pydantic import ValidationError
+from qdrant_client.http import models
+
+from benchmarks.utils import make_settings
+from infrastructure.qdrant import CANDIDATE_KEY
+from infrastructure.qdrant import Qdrant
+from shared.settings import COLLECTION_PROFILES
+from tests.fakes import FAKE_DIM
+from tests.fakes import FakeEmbeddingService
+from tests.fakes import memory_qdrant
+
+CANDIDATE = "Nguyen Van A"
+CHUNKS = [
+    {"content": content, "metadata": {"Header_1": CANDIDATE, CANDIDATE_KEY: CANDIDATE}}
+    for content in ("Kubernetes Docker Helm", "Python FastAPI", "Đại học Bách khoa")
+]
+
+class TestCollectionProfiles(unittest.TestCase):
+
+    def _settings(self, profile: str):
+        return make_settings(qdrant={"vector_size": FAKE_DIM, "name": f"profile_{profile}", "profile": profile})
+
+    def test_unknown_profile_is_rejected(self):
+        with self.assertRaises(ValidationError):
+            self._settings("fastest")
+
+    def test_collection_is_created_with_the_profile(self):
+        settings = self._settings("low_memory")
+        qdrant = Qdrant(settings=settings)
+        client = mock.MagicMock()
+        client.collection_exists.return_value = False
+        client.get_aliases.return_value.aliases = []
+        qdrant.__dict__["client"] = client
+        qdrant.collection
+
+        kwargs = client.create_collection.call_args.kwargs
+        tuning = COLLECTION_PROFILES["low_memory"]
+        self.assertTrue(kwargs["vectors_config"]["dense"].on_disk)
+        self.assertTrue(kwargs["on_disk_payload"])
+        self.assertEqual(kwargs["hnsw_config"].m, tuning.m)
+        self.assertEqual(kwargs["hnsw_config"].ef_construct, tuning.ef_construct)
+        self.assertEqual(kwargs["optimizers_config"].indexing_threshold, tuning.indexing_threshold)
+
+    def test_searches_use_the_profile_search_params(self):
+        settings = self._settings("exact")
+        qdrant = memory_qdrant(settings, CHUNKS)
+        dense, sparse = FakeEmbeddingService(settings=settings)._encode(["Python"])
+        with mock.patch.object(qdrant.client, "query_points", wraps=qdrant.client.query_points) as query_points:
+            points = qdrant.query(dense[0], sparse, CANDIDATE, k=2).points
+        self.assertEqual(len(points), 2)
+
+        dense_prefetch = query_points.call_args.kwargs["prefetch"][0].prefetch[0]
+        self.assertEqual(dense_prefetch.using, "dense")
+        self.assertTrue(dense_prefetch.params.exact)
+
+    def test_apply_profile_updates_the_alias_target(self):
+        settings = self._settings("low_latency")
+        version = settings.model_copy(deep=True)
+        version.qdrant.name = "profile_low_latency_v1"
+        client = memory_qdrant(version, CHUNKS).client
+        client.update_collection_aliases(change_aliases_operations=[models.CreateAliasOperation(
+            create_alias=models.CreateAlias(collection_name="profile_low_latency_v1", alias_name="profile_low_latency"),
+        )])
+        qdrant = Qdrant(settings=settings)
+        qdrant.__dict__["client"] = client
+        with mock.patch.object(client, "update_collection") as update_collection:
+            applied = qdrant.apply_profile()
+
+        self.assertEqual(applied["collection"], "profile_low_latency_v1")
+        kwargs = update_collection.call_args.kwargs
+        tuning = COLLECTION_PROFILES["low_latency"]
+        self.assertEqual(kwargs["collection_name"], "profile_low_latency_v1")
+        self.assertFalse(kwargs["vectors_config"]["dense"].on_disk)
+        self.assertEqual(kwargs["vectors_config"]["dense"].hnsw_config.m, tuning.m)
+        self.assertFalse(kwargs["collection_params"].on_disk_payload)
+
+if __name__ == "__main__":
+    unittest.main()
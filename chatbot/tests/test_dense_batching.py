@@ -0,0 +1,85 @@
+import unittest
+
+import numpy as np
+
+from benchmarks.utils import make_settings
+from domain.indexing import EmbeddingInput
+from domain.indexing import EmbeddingService
+from domain.indexing.batching import token_budget_batches
+from shared.sparse_embedding import SparseEmbeddingData
+
+class FakeDenseModel:
+    """Word-count tokenizer and an encoder that fails on texts containing POISON."""
+
+    max_seq_length = 256
+
+    def __init__(self):
+        self.calls = []
+
+    def tokenizer(self, texts, truncation=True, max_length=None, **kwargs):
+        return {"input_ids": [list(range(min(len(text.split()), max_length))) for text in texts]}
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        self.calls.append(list(texts))
+        if any("POISON" in text for text in texts):
+            raise RuntimeError("CUDA error: device-side assert triggered")
+        return np.asarray([[len(text.split()), sum(map(ord, text)) % 97] for text in texts], dtype=np.float32)
+
+class DenseOnlyService(EmbeddingService):
+    """Real dense batching, one placeholder sparse vector per text."""
+
+    def _get_sparse_embedding(self, texts):
+        return [SparseEmbeddingData(indices=[i], values=[1.0]) for i in range(len(texts))]
+
+class TestDenseBatching(unittest.TestCase):
+
+    def setUp(self):
+        self.settings = make_settings(embedding={"max_token_limit": 8, "batch_tokens": 12})
+        self.service = DenseOnlyService(settings=self.settings)
+        self.model = FakeDenseModel()
+        self.service.__dict__["load_dense_model"] = self.model
+
+    def test_batches_group_similar_lengths_within_the_budget(self):
+        lengths = [10, 1, 3, 1, 2, 12, 3, 2]
+        batches = token_budget_batches(lengths, max_tokens=12, max_items=3)
+
+        self.assertEqual(sorted(i for batch in batches for i in batch), list(range(len(lengths))))
+        for batch in batches:
+            self.assertLessEqual(len(batch), 3)
+            if len(batch) > 1:
+                self.assertLessEqual(len(batch) * max(lengths[i] for i in batch), 12)
+        self.assertEqual([lengths[i] for i in batches[0]], [1, 1, 2])
+        # Longer than the budget, in a batch of its own
+        self.assertIn([5], batches)
+
+    def test_vectors_come_back_in_input_order(self):
+        texts = [" ".join(["word"] * n) + f" {i}" for i, n in enumerate([9, 1, 4, 1, 6, 2, 2, 7])]
+        vectors = self.service._get_embeddings_batch(texts)
+
+        self.assertEqual([vector[0] for vector in vectors], [len(text.split()) for text in texts])
+        self.assertGreater(len(self.model.calls), 1)
+        for call in self.model.calls:
+            self.assertLessEqual(len(call) * max(len(text.split()) for text in call), 12)
+
+    def test_failure_is_isolated_to_the_bad_text(self):
+        texts = ["a b", "c d", "POISON e", "f g", "h i"]
+        vectors = self.service._get_embeddings_batch(texts)
+
+        self.assertIsNone(vectors[2])
+        self.assertTrue(all(vector is not None for i, vector in enumerate(vectors) if i != 2))
+        self.assertNotIn([0.0, 0.0], vectors)
+
+    def test_chunks_that_fail_are_not_indexed(self):
+        chunks = [{"content": text, "metadata": {"i": i}} for i, text in enumerate(["a b", "POISON c", "d e"])]
+        output = self.service.process(EmbeddingInput(chunks=chunks))
+
+        self.assertEqual([item["i"] for item in output.metadata], [0, 2])
+        self.assertEqual(len(output.dense_embeddings), 2)
+        self.assertEqual([vector.indices for vector in output.sparse_embeddings], [[0], [2]])
+
+    def test_query_that_fails_raises(self):
+        with self.assertRaises(RuntimeError):
+            self.service.process(EmbeddingInput(query="POISON", sparse=False))
+
+if __name__ == "__main__":
+    unittest.main()
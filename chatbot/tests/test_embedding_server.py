@@ -0,0 +1,79 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from benchmarks.utils import make_settings
+from domain.indexing import EmbeddingInput
+from infrastructure.embedding_server import EmbeddingServer
+from infrastructure.embedding_server import RemoteEmbeddingService
+from infrastructure.embedding_server.protocol import pack_embeddings
+from infrastructure.embedding_server.protocol import unpack_embeddings
+from shared.sparse_embedding import SparseEmbeddingData
+from tests.fakes import FakeEmbeddingService
+
+class TestEmbeddingServer(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        socket_path = os.path.join(self.directory.name, "embedding.sock")
+        self.settings = make_settings(embedding={"server_socket": socket_path, "server_batch_wait_ms": 50})
+        self.server = EmbeddingServer(self.settings)
+        self.server.embedding = FakeEmbeddingService(settings=self.settings)
+        self.loop = asyncio.new_event_loop()
+        self.task = self.loop.create_task(self.server.serve(socket_path))
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+        for _ in range(500):
+            if os.path.exists(socket_path):
+                break
+            time.sleep(0.01)
+
+    def tearDown(self):
+        self.loop.call_soon_threadsafe(self.task.cancel)
+        self.directory.cleanup()
+
+    def test_pack_round_trip(self):
+        dense = np.arange(6, dtype=np.float32).reshape(2, 3)
+        sparse = [SparseEmbeddingData(indices=[1, 5], values=[0.1, 0.2]), SparseEmbeddingData(indices=[], values=[])]
+        unpacked_dense, unpacked_sparse = unpack_embeddings(*pack_embeddings(dense, sparse))
+        np.testing.assert_array_equal(unpacked_dense, dense)
+        self.assertEqual(unpacked_sparse[0].indices, [1, 5])
+        self.assertEqual(unpacked_sparse[1].indices, [])
+
+    def test_query_matches_local_service(self):
+        remote = RemoteEmbeddingService(settings=self.settings)
+        output = remote.process(EmbeddingInput(query="xin chào"))
+        expected = FakeEmbeddingService(settings=self.settings).process(EmbeddingInput(query="xin chào"))
+        self.assertEqual(output.dense_embeddings, expected.dense_embeddings)
+        self.assertEqual(output.sparse_embeddings, expected.sparse_embeddings)
+
+    def test_concurrent_requests_are_batched(self):
+        remote = RemoteEmbeddingService(settings=self.settings)
+        queries = [f"câu hỏi {'x' * i}" for i in range(8)]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            outputs = list(pool.map(lambda query: remote.process(EmbeddingInput(query=query)), queries))
+        expected = FakeEmbeddingService(settings=self.settings)._get_embeddings_batch(queries)
+        self.assertEqual([output.dense_embeddings[0] for output in outputs], expected)
+        self.assertLess(len(self.server.embedding.batches), len(queries))
+
+    def test_failed_texts_come_back_as_none(self):
+        class PartlyFailing(FakeEmbeddingService):
+            def _get_embeddings_batch(self, texts):
+                vectors = super()._get_embeddings_batch(texts)
+                return [None if 'POISON' in text else vector for text, vector in zip(texts, vectors)]
+
+        self.server.embedding = PartlyFailing(settings=self.settings)
+        remote = RemoteEmbeddingService(settings=self.settings)
+        dense, sparse = remote._encode(["xin chào", "POISON", "tạm biệt"])
+        self.assertIsNone(dense[1])
+        self.assertIsNotNone(dense[0])
+        self.assertIsNotNone(dense[2])
+        self.assertEqual(len(sparse), 3)
+
+if __name__ == '__main__':
+    unittest.main()
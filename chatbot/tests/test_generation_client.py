@@ -0,0 +1,41 @@
+import unittest
+
+from benchmarks.stub_llm import StubLLMServer
+from benchmarks.utils import make_settings
+from domain.generation import GenerationInput
+from domain.generation import GenerationService
+
+class TestGenerationClient(unittest.TestCase):
+
+    def setUp(self):
+        self.inputs = GenerationInput(
+            query="Ứng viên học trường nào?",
+            chat_history=[],
+            retrieved_info=[{"content": "Đại học Bách khoa Hà Nội"}]
+        )
+
+    def test_reuses_connection(self):
+        with StubLLMServer(response="Đại học Bách khoa Hà Nội") as server:
+            service = GenerationService(settings=make_settings(generation={"base_url": server.base_url}))
+            for _ in range(3):
+                output = service.process(self.inputs)
+            self.assertEqual(output.response, "Đại học Bách khoa Hà Nội")
+            self.assertEqual(server.requests, 3)
+            self.assertEqual(server.connections, 1)
+            self.assertIs(service._get_chain, service._get_chain)
+
+    def test_retries_failed_request(self):
+        with StubLLMServer(fail_first=1) as server:
+            service = GenerationService(settings=make_settings(generation={"base_url": server.base_url, "max_retries": 1}))
+            service.process(self.inputs)
+            self.assertEqual(server.requests, 2)
+
+    def test_gives_up_after_max_retries(self):
+        with StubLLMServer(fail_first=5) as server:
+            service = GenerationService(settings=make_settings(generation={"base_url": server.base_url, "max_retries": 1}))
+            with self.assertRaises(Exception):
+                service.process(self.inputs)
+            self.assertEqual(server.requests, 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import asyncio
+import unittest
+
+from benchmarks.stub_llm import StubLLMServer
+from benchmarks.utils import make_settings
+from domain.generation import GenerationInput
+from domain.generation import GenerationService
+from domain.generation import GenerationTimeoutError
+from shared.metrics import metrics
+
+class TestGenerationHedging(unittest.TestCase):
+
+    def setUp(self):
+        metrics.reset()
+        self.inputs = GenerationInput(query="Ứng viên học trường nào?", chat_history=[], retrieved_info=[])
+
+    def _service(self, primary: StubLLMServer, fallback: StubLLMServer, **generation) -> GenerationService:
+        return GenerationService(settings=make_settings(generation={
+            "base_url": primary.base_url,
+            "fallback_base_url": fallback.base_url,
+            "hedge_enabled": True,
+            "hedge_after": 0.2,
+            "max_retries": 0,
+            **generation,
+        }))
+
+    def test_fast_primary_is_not_hedged(self):
+        with StubLLMServer(response="primary") as primary, StubLLMServer(response="fallback") as fallback:
+            output = asyncio.run(self._service(primary, fallback).aprocess(self.inputs))
+        self.assertEqual(output.response, "primary")
+        self.assertEqual(fallback.requests, 0)
+        self.assertEqual(metrics.counter("generation_primary_wins"), 1)
+
+    def test_slow_primary_is_hedged(self):
+        with StubLLMServer(response="primary", first_token_delay=2.0) as primary, StubLLMServer(response="fallback") as fallback:
+            output = asyncio.run(self._service(primary, fallback).aprocess(self.inputs))
+        self.assertEqual(output.response, "fallback")
+        self.assertEqual(metrics.counter("generation_hedges_started"), 1)
+        self.assertEqual(metrics.counter("generation_hedge_wins"), 1)
+
+    def test_failed_primary_falls_back(self):
+        with StubLLMServer(response="primary", fail_first=1) as primary, StubLLMServer(response="fallback") as fallback:
+            output = asyncio.run(self._service(primary, fallback, hedge_after=5.0).aprocess(self.inputs))
+        self.assertEqual(output.response, "fallback")
+
+    def test_deadline(self):
+        with StubLLMServer(first_token_delay=2.0) as primary, StubLLMServer(first_token_delay=2.0) as fallback:
+            service = self._service(primary, fallback, deadline=0.5)
+            with self.assertRaises(GenerationTimeoutError):
+                asyncio.run(service.aprocess(self.inputs))
+        self.assertEqual(metrics.counter("generation_deadline_exceeded"), 1)
+
+    def test_stream_switches_to_first_token(self):
+        async def collect(service):
+            return "".join([token async for token in service.astream(self.inputs)])
+
+        with StubLLMServer(response="primary", first_token_delay=2.0) as primary, StubLLMServer(response="fallback answer") as fallback:
+            response = asyncio.run(collect(self._service(primary, fallback)))
+        self.assertEqual(response, "fallback answer")
+        self.assertEqual(metrics.counter("generation_hedge_wins"), 1)
+
+if __name__ == '__main__':
+    unittest.main()
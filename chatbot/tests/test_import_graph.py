@@ -0,0 +1,25 @@
+import unittest
+
+from benchmarks.bench_import_time import HEAVY_PACKAGES
+from benchmarks.bench_import_time import measure
+from benchmarks.bench_import_time import parse_importtime
+
+class TestImportGraph(unittest.TestCase):
+    def test_parse_importtime(self):
+        output = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   json.decoder\n"
+            "import time:       300 |        420 | json\n"
+        )
+        self.assertEqual(parse_importtime(output), [('json.decoder', 120, 120), ('json', 300, 420)])
+
+    def test_query_app_skips_heavy_packages(self):
+        report = measure('main_query')
+        self.assertEqual(report['forbidden_imported'], [])
+
+    def test_query_service_skips_heavy_packages(self):
+        report = measure('app.query', forbidden=HEAVY_PACKAGES + ('app.indexing',))
+        self.assertEqual(report['forbidden_imported'], [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+import os
+import tempfile
+import unittest
+import uuid
+
+import numpy as np
+from qdrant_client import QdrantClient
+
+from benchmarks.utils import make_settings
+from infrastructure.index_artifact import export_index
+from infrastructure.index_artifact import import_index
+from infrastructure.index_artifact import read_manifest
+from infrastructure.profile_store import CandidateProfile
+from infrastructure.chunk_store import get_chunk_store
+from infrastructure.profile_store import get_profile_store
+from infrastructure.qdrant import CANDIDATE_KEY
+from infrastructure.qdrant import FILTER_KEYS
+from infrastructure.qdrant import MEMORY_URL
+from infrastructure.qdrant import Qdrant
+from infrastructure.qdrant import QdrantInput
+from tests.fakes import FAKE_DIM
+from tests.fakes import FakeEmbeddingService
+from tests.fakes import memory_qdrant
+
+CHUNKS = [
+    {"content": content, "metadata": {"Header_1": name, "Header_2": "Kỹ năng", CANDIDATE_KEY: name}}
+    for name in ("Nguyễn Văn A", "Trần Thị B")
+    for content in (f"{name} Kubernetes Docker", f"{name} Python FastAPI", f"{name} Đại học Bách khoa")
+]
+
+def _snapshot(qdrant: Qdrant):
+    points = [point for batch, _ in qdrant.scroll_all(batch_size=2) for point in batch]
+    return {
+        str(point.id): (
+            np.round(point.vector["dense"], 5).tolist(),
+            point.vector["sparse"].indices,
+            np.round(point.vector["sparse"].values, 5).tolist(),
+        )
+        for point in points
+    }, {str(point.id): payload for batch, payloads in qdrant.scroll_all() for point, payload in zip(batch, payloads)}
+
+class TestIndexArtifact(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "artifact")
+        self.settings = make_settings(qdrant={"vector_size": FAKE_DIM, "name": "artifact"}, profile={"enabled": True})
+        self.source = memory_qdrant(self.settings, CHUNKS)
+        get_profile_store(self.settings).put(CandidateProfile(candidate="Nguyễn Văn A", emails=["a@example.com"]))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _target(self, vector_size: int = FAKE_DIM, **overrides) -> Qdrant:
+        settings = make_settings(qdrant={"vector_size": vector_size, "name": "restored"}, **overrides)
+        qdrant = Qdrant(settings=settings)
+        qdrant.__dict__["client"] = QdrantClient(":memory:")
+        return qdrant
+
+    def test_round_trip_keeps_ids_vectors_and_payloads(self):
+        manifest = export_index(self.source, self.path, batch_size=4)
+        self.assertEqual(manifest.points, len(CHUNKS))
+        self.assertEqual(manifest.profiles, 1)
+        self.assertEqual(read_manifest(self.path), manifest)
+
+        target = self._target()
+        import_index(target, self.path, batch_size=4, parallel=1)
+        self.assertEqual(_snapshot(target), _snapshot(self.source))
+        self.assertEqual(get_profile_store(target.settings).get("Nguyễn Văn A").emails, ["a@example.com"])
+
+    def test_import_into_chunk_store(self):
+        export_index(self.source, self.path)
+        target = self._target(chunk_store={"enabled": True, "backend": "memory"})
+        import_index(target, self.path, parallel=1)
+        points, _ = target.client.scroll("restored", with_payload=True, limit=100)
+        self.assertTrue(all(set(point.payload) <= set(FILTER_KEYS) for point in points))
+        self.assertEqual(_snapshot(target)[1], _snapshot(self.source)[1])
+
+    def test_rejects_mismatched_artifacts(self):
+        export_index(self.source, self.path)
+        with self.assertRaisesRegex(ValueError, "dimensions"):
+            import_index(self._target(vector_size=FAKE_DIM * 2), self.path)
+
+        other_model = self._target(embedding={"dense_model_path": "other/model"})
+        with self.assertRaisesRegex(ValueError, "configured models"):
+            import_index(other_model, self.path, parallel=1)
+        import_index(other_model, self.path, parallel=1, allow_model_mismatch=True)
+        self.assertEqual(other_model.count(), len(CHUNKS))
+
+    def test_refuses_to_overwrite_without_replace(self):
+        export_index(self.source, self.path)
+        target = self._target()
+        import_index(target, self.path, parallel=1)
+        with self.assertRaisesRegex(ValueError, "already holds points"):
+            import_index(target, self.path, parallel=1)
+        import_index(target, self.path, parallel=1, replace=True)
+        self.assertEqual(target.count(), len(CHUNKS))
+
+    def test_replace_drops_the_chunk_store_entries_of_the_old_points(self):
+        export_index(self.source, self.path)
+        target = self._target(chunk_store={"enabled": True, "backend": "memory"})
+        dense, sparse = FakeEmbeddingService(settings=target.settings)._encode(["Lê Văn C Go"])
+        target.insert(QdrantInput(dense_embeddings=dense, sparse_embeddings=sparse, payload=[{"content": "Lê Văn C Go"}]))
+        stale = [str(point.id) for point in target.client.scroll("restored", limit=10)[0]]
+
+        import_index(target, self.path, parallel=1, replace=True)
+        self.assertEqual(target.count(), len(CHUNKS))
+        self.assertEqual(get_chunk_store(target.settings).get_many(stale), {})
+
+    def test_replace_through_an_alias_keeps_the_alias(self):
+        export_index(self.source, self.path)
+        name = f"restored_{uuid.uuid4().hex[:8]}"
+        version = Qdrant(settings=make_settings(qdrant={"url": MEMORY_URL, "vector_size": FAKE_DIM, "name": f"{name}_v1"}))
+        dense, sparse = FakeEmbeddingService(settings=version.settings)._encode(["Lê Văn C Go"])
+        version.insert(QdrantInput(dense_embeddings=dense, sparse_embeddings=sparse, payload=[{"content": "Lê Văn C Go"}]))
+        target = Qdrant(settings=make_settings(qdrant={"url": MEMORY_URL, "vector_size": FAKE_DIM, "name": name}))
+        target.point_alias(f"{name}_v1")
+
+        import_index(target, self.path, parallel=1, replace=True)
+        self.assertEqual(target.alias_target(), f"{name}_v1")
+        self.assertEqual(target.count(), len(CHUNKS))
+
+    def test_export_of_a_missing_collection_fails(self):
+        missing = self._target()
+        with self.assertRaisesRegex(ValueError, "does not exist"):
+            export_index(missing, self.path)
+        self.assertFalse(missing.client.collection_exists("restored"))
+
+    def test_detects_truncated_files(self):
+        export_index(self.source, self.path)
+        with open(os.path.join(self.path, "payloads.jsonl"), "r+b") as f:
+            f.truncate(10)
+        with self.assertRaisesRegex(ValueError, "truncated"):
+            read_manifest(self.path)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import os
+import tempfile
+import unittest
+
+from app.indexing import IndexingInput
+from app.indexing import IndexingService
+from app.ingestion_report import IngestionRecorder
+from app.ingestion_report import load_reports
+from app.ingestion_report import summarize
+from benchmarks.utils import make_settings
+from infrastructure.qdrant import MEMORY_URL
+from tests.fakes import FAKE_DIM
+from tests.fakes import FakeEmbeddingService
+
+MARKDOWN = """# Nguyen Van A
+
+## Skills
+
+Python, FastAPI, Qdrant and Docker.
+
+## Experience
+
+Backend engineer at a fintech company for three years.
+"""
+
+class FakeConverter:
+
+    def __init__(self, output=MARKDOWN, pages=2):
+        self.output = output
+        self.pages = pages
+
+    def convert(self, file_path):
+        if self.output is None:
+            return False, "", 0
+        # Hold some memory, the report must see it
+        ballast = bytearray(32 * 1024 * 1024)
+        del ballast
+        return True, self.output, self.pages
+
+class TestIngestionReport(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.report_path = os.path.join(self.directory.name, 'reports', 'ingestion.jsonl')
+        self.settings = make_settings(
+            qdrant={'url': MEMORY_URL, 'vector_size': FAKE_DIM, 'name': 'ingestion_report'},
+            indexing={
+                'raw_path': self.directory.name,
+                'convert_path': self.directory.name,
+                'report_enabled': True,
+                'report_path': self.report_path,
+                'report_tracemalloc': True,
+            },
+            profile={'enabled': False},
+        )
+        self.raw_path = os.path.join(self.directory.name, 'cv.pdf')
+        with open(self.raw_path, 'wb') as f:
+            f.write(b'%PDF-1.4 fake')
+
+    def _service(self, converter) -> IndexingService:
+        service = IndexingService(settings=self.settings)
+        service.__dict__["_get_convert"] = converter
+        service.__dict__["_get_embedding"] = FakeEmbeddingService(settings=self.settings)
+        return service
+
+    def _inputs(self) -> IndexingInput:
+        return IndexingInput(raw_path=self.raw_path, convert_path=os.path.join(self.directory.name, 'md', 'cv.md'))
+
+    def test_report_covers_every_stage(self):
+        report = self._service(FakeConverter()).process(self._inputs()).report
+        self.assertEqual(report.status, 'ok')
+        self.assertEqual(report.candidate, 'Nguyen Van A')
+        self.assertEqual(report.pages, 2)
+        self.assertEqual(report.file_bytes, len(b'%PDF-1.4 fake'))
+        self.assertGreater(report.chunks, 0)
+        self.assertGreater(report.document_tokens, 0)
+        self.assertGreaterEqual(report.chunk_tokens_total, report.chunk_tokens_max)
+        self.assertEqual([stage.name for stage in report.stages], ['convert', 'chunk', 'embed', 'store'])
+        convert = report.stages[0]
+        self.assertGreaterEqual(convert.python_peak_mb, 30)
+        self.assertGreaterEqual(convert.rss_peak_mb, convert.rss_start_mb)
+        self.assertGreaterEqual(report.total_ms, sum(stage.wall_ms for stage in report.stages) - 1)
+
+    def test_report_is_stored_for_failed_documents(self):
+        service = self._service(FakeConverter())
+        service.process(self._inputs())
+        with self.assertRaises(ValueError):
+            self._service(FakeConverter(output=None)).process(self._inputs())
+        reports = load_reports(self.report_path)
+        self.assertEqual([report.status for report in reports], ['ok', 'failed'])
+        self.assertIn('conversion failed', reports[1].error)
+        self.assertEqual([stage.name for stage in reports[1].stages], ['convert'])
+
+    def test_summary_ranks_documents_and_stages(self):
+        reports = []
+        for name, wall_ms in (('small.pdf', 10.0), ('large.pdf', 500.0)):
+            with IngestionRecorder(name) as recorder:
+                with recorder.stage('convert'):
+                    pass
+            recorder.report.stages[0].wall_ms = wall_ms
+            recorder.report.total_ms = wall_ms
+            recorder.report.pages = 5
+            reports.append(recorder.report)
+        with self.assertRaises(RuntimeError):
+            with IngestionRecorder('broken.pdf') as recorder:
+                raise RuntimeError('boom')
+        reports.append(recorder.report)
+
+        summary = summarize(reports, top=1)
+        self.assertEqual(summary['documents'], 3)
+        self.assertEqual(summary['failed'], 1)
+        self.assertEqual(summary['pages'], 10)
+        self.assertEqual(summary['ms_per_page'], 51.0)
+        self.assertEqual(summary['stages']['convert']['wall_ms_max'], 500.0)
+        self.assertEqual(summary['slowest'][0]['document'], 'large.pdf')
+        self.assertEqual(summary['slowest'][0]['slowest_stage'], 'convert')
+        self.assertEqual(summary['failures'], [{'document': 'broken.pdf', 'error': 'RuntimeError: boom'}])
+
+if __name__ == '__main__':
+    unittest.main()
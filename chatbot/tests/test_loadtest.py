@@ -0,0 +1,125 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+from benchmarks.loadtest import read_trace
+from benchmarks.loadtest import run_closed_loop
+from benchmarks.loadtest import run_open_loop
+from benchmarks.loadtest import summarize
+from benchmarks.loadtest import synthetic_requests
+from benchmarks.utils import make_settings
+from infrastructure.qdrant import MEMORY_URL
+from infrastructure.qdrant import Qdrant
+from infrastructure.qdrant import QdrantInput
+from tests.fakes import FAKE_DIM
+from tests.fakes import FakeEmbeddingService
+
+app = FastAPI()
+
+@app.post('/v1/chatbot')
+async def chat(body: dict):
+    if body['user_name'] == 'fail':
+        raise HTTPException(status_code=500)
+    await asyncio.sleep(0.01)
+    return {'response': 'ok'}
+
+@app.post('/v1/chatbot/stream')
+async def stream(body: dict):
+    async def tokens():
+        yield 'first'
+        await asyncio.sleep(0.05)
+        yield ' last'
+    return StreamingResponse(tokens(), media_type='text/plain')
+
+def _request(path='/v1/chatbot', user_name='A', **extra):
+    return {'method': 'POST', 'path': path, 'json': {'query': 'q', 'user_name': user_name}, **extra}
+
+class TestLoadTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # A real server, the ASGI transport buffers streamed responses
+        cls.server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=0, log_level='warning'))
+        cls.thread = threading.Thread(target=cls.server.run, daemon=True)
+        cls.thread.start()
+        while not cls.server.started:
+            time.sleep(0.01)
+        cls.port = cls.server.servers[0].sockets[0].getsockname()[1]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.should_exit = True
+        cls.thread.join()
+
+    def _run(self, coroutine_factory):
+        async def run():
+            async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{self.port}') as client:
+                return await coroutine_factory(client)
+        return asyncio.run(run())
+
+    def test_closed_loop_sends_the_requested_count(self):
+        results = self._run(lambda client: run_closed_loop(
+            client, synthetic_requests('chatbot', candidates=5), concurrency=4, duration=None, total=20,
+        ))
+        self.assertEqual(len(results), 20)
+        self.assertTrue(all(result['status'] == 200 for result in results))
+
+    def test_open_loop_follows_the_schedule(self):
+        results = self._run(lambda client: run_open_loop(
+            client, iter([_request()] * 10), rps=100, duration=None, total=None,
+        ))
+        self.assertEqual(len(results), 10)
+        self.assertTrue(all(result['latency'] >= 0.01 for result in results))
+
+    def test_stream_reports_time_to_first_token(self):
+        results = self._run(lambda client: run_closed_loop(
+            client, iter([_request('/v1/chatbot/stream')] * 3), concurrency=1, duration=None, total=None,
+        ))
+        for result in results:
+            self.assertLess(result['ttft'], result['latency'] - 0.04)
+            self.assertEqual(result['bytes'], len('first last'))
+
+    def test_summary_counts_errors_per_path(self):
+        requests = [_request(), _request(user_name='fail'), _request('/v1/chatbot/stream'), _request()]
+        results = self._run(lambda client: run_closed_loop(client, iter(requests), 2, None, None))
+        report = summarize(results, elapsed=1.0)
+        json.dumps(report)
+        self.assertEqual(report['requests'], 4)
+        self.assertEqual(report['error_rate'], 0.25)
+        self.assertEqual(report['throughput_rps'], 3.0)
+        self.assertEqual(report['status_counts'], {'200': 3, '500': 1})
+        self.assertEqual(report['errors'], {'HTTP 500': 1})
+        self.assertEqual(report['by_path']['/v1/chatbot']['requests'], 3)
+        self.assertIn('p99', report['latency_ms'])
+
+    def test_trace_is_replayed_in_offset_order(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'trace.jsonl')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(_request(user_name='B', offset=0.05)) + '\n\n')
+                f.write(json.dumps(_request(user_name='A', offset=0.0)) + '\n')
+            trace = read_trace(path)
+        self.assertEqual([request['json']['user_name'] for request in trace], ['A', 'B'])
+        results = self._run(lambda client: run_open_loop(client, iter(trace), None, None, None, replay_speed=1.0))
+        self.assertEqual(len(results), 2)
+
+    def test_memory_url_shares_one_collection(self):
+        settings = make_settings(qdrant={'url': MEMORY_URL, 'vector_size': FAKE_DIM, 'name': 'loadtest_shared'})
+        dense, sparse = FakeEmbeddingService(settings=settings)._encode(['Python'])
+        Qdrant(settings=settings).insert(QdrantInput(
+            dense_embeddings=dense, sparse_embeddings=sparse, payload=[{'content': 'Python'}],
+        ))
+        self.assertEqual(Qdrant(settings=settings).count(), 1)
+
+if __name__ == '__main__':
+    unittest.main()
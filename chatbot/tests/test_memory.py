@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.messages import SystemMessage
+
+from benchmarks.utils import make_settings
+from domain.memory import MemoryInput
+from domain.memory import MemoryService
+from infrastructure.session_store import InMemorySessionStore
+from infrastructure.session_store import SessionState
+from infrastructure.session_store import SQLiteSessionStore
+from shared.token_counter import count_tokens
+
+class TestMemory(unittest.TestCase):
+
+    def setUp(self):
+        self.settings = make_settings(memory={"max_turns": 3, "history_tokens": 60, "summary_tokens": 40})
+        self.memory = MemoryService(settings=self.settings)
+
+    def test_empty_session(self):
+        self.assertEqual(self.memory.process(MemoryInput(session_id="unknown")).chat_history, [])
+        self.assertEqual(self.memory.process(MemoryInput()).chat_history, [])
+
+    def test_history_stays_bounded(self):
+        for i in range(50):
+            self.memory.update("s1", f"Câu hỏi số {i} về kinh nghiệm?", f"Ứng viên có {i} năm kinh nghiệm. Chi tiết thêm ở đây.")
+        history = self.memory.process(MemoryInput(session_id="s1")).chat_history
+
+        self.assertIsInstance(history[0], SystemMessage)
+        self.assertLessEqual(len(history) - 1, 2 * self.settings.memory.max_turns)
+        self.assertIn("Câu hỏi số 49", history[-2].content)
+        total = sum(count_tokens(message.content) for message in history[1:])
+        self.assertLessEqual(total, self.settings.memory.history_tokens)
+        self.assertLessEqual(count_tokens(history[0].content), self.settings.memory.summary_tokens + 10)
+
+    def test_in_memory_store_evicts_lru(self):
+        store = InMemorySessionStore(max_sessions=2)
+        store.put("a", SessionState())
+        store.put("b", SessionState())
+        store.get("a")
+        store.put("c", SessionState())
+        self.assertIsNotNone(store.get("a"))
+        self.assertIsNone(store.get("b"))
+
+    def test_sqlite_store_evicts_lru(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = SQLiteSessionStore(os.path.join(directory, "sessions.db"), max_sessions=2)
+            store.put("a", SessionState(summary="a"))
+            store.put("b", SessionState(summary="b"))
+            store.get("a")
+            store.put("c", SessionState(summary="c"))
+            self.assertEqual(store.get("a").summary, "a")
+            self.assertIsNone(store.get("b"))
+
+    def _update_concurrently(self, memory: MemoryService) -> None:
+        def turn(i):
+            memory.update("s1", f"Câu hỏi {i}", f"Trả lời {i}")
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(turn, range(40)))
+
+    def test_concurrent_turns_are_all_kept(self):
+        settings = make_settings(memory={"max_turns": 100, "history_tokens": 10_000})
+        memory = MemoryService(settings=settings)
+        self._update_concurrently(memory)
+        self.assertEqual(len(memory.process(MemoryInput(session_id="s1")).chat_history), 80)
+
+    def test_concurrent_turns_across_sqlite_workers_are_all_kept(self):
+        with tempfile.TemporaryDirectory() as directory:
+            settings = make_settings(memory={
+                "backend": "sqlite", "sqlite_path": os.path.join(directory, "sessions.db"),
+                "max_turns": 100, "history_tokens": 10_000,
+            })
+            # One store per worker process, sharing the file
+            workers = [MemoryService(settings=settings) for _ in range(2)]
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                list(pool.map(self._update_concurrently, workers))
+            self.assertEqual(len(workers[0].process(MemoryInput(session_id="s1")).chat_history), 160)
+
+if __name__ == '__main__':
+    unittest.main()
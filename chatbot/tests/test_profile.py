@@ -0,0 +1,168 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from datetime import date
+
+from app.query import ChatbotBatchInput
+from app.query import ChatbotInput
+from app.query import ChatbotService
+from benchmarks.stub_llm import StubLLMServer
+from benchmarks.utils import make_settings
+from domain.profile import ProfileQueryInput
+from domain.profile import ProfileService
+from domain.profile import extract_profile
+from domain.profile import match_intent
+from infrastructure.profile_store import CandidateProfile
+from infrastructure.profile_store import SQLiteProfileStore
+from infrastructure.qdrant import CANDIDATE_KEY
+from shared.metrics import metrics
+from tests.fakes import FAKE_DIM
+from tests.fakes import FakeEmbeddingService
+from tests.fakes import memory_qdrant
+
+CANDIDATE = "Trần Thị Profile"
+CV = f"""# {CANDIDATE}
+Email: tran.profile@example.com | SĐT: 0912 345 678
+LinkedIn: https://linkedin.com/in/tran-profile
+
+## Học vấn
+Đại học Bách khoa Hà Nội - Kỹ sư Công nghệ thông tin (2012 - 2017)
+
+## Kinh nghiệm làm việc
+Backend Developer - FPT Software (06/2017 - 12/2019)
+Senior Engineer - Công ty Cổ phần VNG (01/2019 - nay)
+
+## Kỹ năng
+Ngôn ngữ: Python, Java, SQL
+Công cụ: Docker, Kubernetes
+"""
+
+class TestProfileExtraction(unittest.TestCase):
+
+    def test_extracts_fields_from_sections(self):
+        profile = extract_profile(CV, CANDIDATE, today=date(2024, 12, 15))
+        self.assertEqual(profile.emails, ["tran.profile@example.com"])
+        self.assertEqual(profile.phones, ["0912345678"])
+        self.assertEqual(profile.links, ["https://linkedin.com/in/tran-profile"])
+        self.assertEqual(len(profile.education), 1)
+        self.assertIn("Đại học Bách khoa Hà Nội", profile.education[0])
+        self.assertEqual(profile.companies, ["FPT Software", "Công ty Cổ phần VNG"])
+        # 06/2017 to 12/2024 with the overlapping months of 2019 counted once
+        self.assertEqual(profile.experience_years, 7.6)
+        self.assertEqual(profile.skills, ["Python", "Java", "SQL", "Docker", "Kubernetes"])
+
+    def test_missing_sections_leave_fields_empty(self):
+        profile = extract_profile("# Someone\nNo contact details here.", "Someone")
+        self.assertEqual(profile.emails, [])
+        self.assertIsNone(profile.experience_years)
+
+    def test_match_intent(self):
+        self.assertEqual(match_intent("Email của ứng viên là gì?"), "email")
+        self.assertEqual(match_intent("Ứng viên có bao nhiêu năm kinh nghiệm?"), "experience_years")
+        self.assertEqual(match_intent("Ứng viên từng làm ở những công ty nào?"), "companies")
+        self.assertIsNone(match_intent("Ứng viên có phù hợp vị trí team lead không?"))
+        self.assertIsNone(match_intent("Cho tôi email và số điện thoại của ứng viên"))
+
+    def test_questions_with_more_than_the_fact_go_to_rag(self):
+        for query in (
+            "Ứng viên có làm ứng dụng iPhone không?",
+            "Ứng viên đã gửi email tự động chưa?",
+            "Ứng viên tốt nghiệp năm nào?",
+            "Ứng viên có lập trình ứng dụng điện thoại không?",
+            "Ứng viên có những kỹ năng lãnh đạo nào?",
+            "Ứng viên làm ở đâu gần đây nhất và vai trò là gì?",
+            "Ứng viên có bao nhiêu năm kinh nghiệm với Python?",
+        ):
+            self.assertIsNone(match_intent(query), query)
+
+    def test_sqlite_store_matches_names_loosely(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = SQLiteProfileStore(os.path.join(directory, "profiles.db"))
+            store.put(CandidateProfile(candidate=CANDIDATE, emails=["a@example.com"]))
+            self.assertEqual(store.get("  trần  THỊ profile ").emails, ["a@example.com"])
+            self.assertIsNone(store.get("Someone else"))
+
+class TestProfileAnswers(unittest.TestCase):
+
+    def _service(self, llm: StubLLMServer) -> ChatbotService:
+        settings = make_settings(
+            qdrant={"vector_size": FAKE_DIM, "name": "profile"},
+            generation={"base_url": llm.base_url, "max_retries": 0},
+            profile={"enabled": True},
+        )
+        ProfileService(settings=settings).save(CV, CANDIDATE)
+        qdrant = memory_qdrant(settings, [
+            {"content": line, "metadata": {"Header_1": name, CANDIDATE_KEY: name}}
+            for name in (CANDIDATE, "Nguyen Van B")
+            for line in CV.splitlines() if line
+        ])
+        service = ChatbotService(settings=settings)
+        service.__dict__["_get_embedding"] = FakeEmbeddingService(settings=settings)
+        service._get_retrieval.__dict__["_get_qdrant"] = qdrant
+        return service
+
+    def test_factual_question_skips_llm(self):
+        with StubLLMServer(response="llm") as llm:
+            service = self._service(llm)
+            output = service.process(ChatbotInput(query="Email của ứng viên là gì?", user_name=CANDIDATE))
+            self.assertEqual(llm.requests, 0)
+        self.assertIn("tran.profile@example.com", output.response)
+        self.assertNotIn("batches", service._get_embedding.__dict__)
+
+    def test_shared_profile_answers_do_not_count_as_saved_llm_calls(self):
+        async def ask(service, query, user_name):
+            inputs = [ChatbotInput(query=query, user_name=user_name) for _ in range(2)]
+            await asyncio.gather(*(service.aprocess(item) for item in inputs))
+
+            async def drain(item):
+                return [token async for token in service.astream(item)]
+            await asyncio.gather(*(drain(item) for item in inputs))
+
+        with StubLLMServer(response="llm", first_token_delay=0.2) as llm:
+            service = self._service(llm)
+            metrics.reset()
+            asyncio.run(ask(service, "Email của ứng viên là gì?", CANDIDATE))
+            self.assertEqual(metrics.counter("chatbot_coalesced_requests"), 2)
+            self.assertEqual(metrics.counter("chatbot_llm_calls_saved"), 0)
+
+            asyncio.run(ask(service, "Ứng viên có phù hợp vị trí backend không?", CANDIDATE))
+            self.assertEqual(llm.requests, 2)
+        self.assertEqual(metrics.counter("chatbot_llm_calls_saved"), 2)
+
+    def test_unknown_profile_falls_back_to_rag(self):
+        with StubLLMServer(response="llm") as llm:
+            service = self._service(llm)
+            output = service.process(ChatbotInput(query="Email của ứng viên là gì?", user_name="Nguyen Van B"))
+            self.assertEqual(llm.requests, 1)
+        self.assertEqual(output.response, "llm")
+
+    def test_disabled_by_default(self):
+        settings = make_settings(
+            qdrant={"vector_size": FAKE_DIM, "name": "profile_disabled"},
+        )
+        self.assertFalse(settings.profile.enabled)
+        self.assertIsNone(ChatbotService(settings=settings)._answer_from_profile(
+            ChatbotInput(query="Email của ứng viên là gì?", user_name=CANDIDATE),
+        ))
+
+    def test_batch_mixes_profile_and_rag_answers(self):
+        queries = ["Ứng viên học trường nào?", "Ứng viên có phù hợp vị trí backend không?", "Số điện thoại của ứng viên?"]
+        with StubLLMServer(response="llm") as llm:
+            service = self._service(llm)
+            output = asyncio.run(service.abatch(ChatbotBatchInput(queries=queries, user_name=CANDIDATE)))
+            self.assertEqual(llm.requests, 1)
+        self.assertEqual([answer.query for answer in output.answers], queries)
+        self.assertIn("Bách khoa", output.answers[0].response)
+        self.assertEqual(output.answers[1].response, "llm")
+        self.assertIn("0912345678", output.answers[2].response)
+        self.assertEqual(service._get_embedding.batches, [1])
+
+    def test_service_reports_intent_without_profile(self):
+        service = ProfileService(settings=make_settings(profile={"enabled": True}))
+        output = service.process(ProfileQueryInput(query="Email của ứng viên là gì?", candidate="Nobody"))
+        self.assertEqual(output.intent, "email")
+        self.assertIsNone(output.response)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+import unittest
+
+import httpx
+from fastapi import FastAPI
+
+from api.helpers.profiling import add_profiling
+from benchmarks.utils import make_settings
+
+def busy_retrieval(seconds: float) -> int:
+    total, deadline = 0, time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        total += sum(range(100))
+    return total
+
+def _app(**profiling) -> FastAPI:
+    app = FastAPI()
+
+    @app.get('/v1/slow')
+    async def slow():
+        # Work handed to a thread, as the chatbot does, must show up in the profile
+        await asyncio.to_thread(busy_retrieval, 0.1)
+        return {'response': 'ok'}
+
+    app.state.installed = add_profiling(app, make_settings(profiling=profiling))
+    return app
+
+def _get(app: FastAPI, path: str = '/v1/slow', headers=None) -> httpx.Response:
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://profiling') as client:
+            return await client.get(path, headers=headers or {})
+    return asyncio.run(run())
+
+class TestProfiling(unittest.TestCase):
+
+    def test_not_installed_by_default(self):
+        app = _app()
+        self.assertFalse(app.state.installed)
+        response = _get(app, headers={'X-Profile': 'speedscope', 'X-Profile-Token': ''})
+        self.assertEqual(response.json(), {'response': 'ok'})
+
+    def test_token_request_returns_speedscope_profile(self):
+        app = _app(admin_token='secret')
+        response = _get(app, headers={'X-Profile': 'speedscope', 'X-Profile-Token': 'secret'})
+        self.assertEqual(response.headers['x-profile-status'], '200')
+        profile = response.json()
+        self.assertEqual(profile['name'], 'GET /v1/slow')
+        names = {frame['name'] for frame in profile['shared']['frames']}
+        self.assertIn('busy_retrieval', names)
+        busy = [index for index, frame in enumerate(profile['shared']['frames']) if frame['name'] == 'busy_retrieval'][0]
+        busy_seconds = sum(
+            weight
+            for thread in profile['profiles']
+            for stack, weight in zip(thread['samples'], thread['weights'])
+            if busy in stack
+        )
+        self.assertGreater(busy_seconds, 0.05)
+
+    def test_collapsed_format_from_query(self):
+        app = _app(admin_token='secret')
+        response = _get(app, '/v1/slow?profile=collapsed', headers={'X-Profile-Token': 'secret'})
+        self.assertTrue(response.headers['content-type'].startswith('text/plain'))
+        self.assertIn('busy_retrieval', response.text)
+
+    def test_wrong_token_is_ignored(self):
+        app = _app(admin_token='secret')
+        response = _get(app, headers={'X-Profile': 'speedscope', 'X-Profile-Token': 'guess'})
+        self.assertEqual(response.json(), {'response': 'ok'})
+        self.assertNotIn('x-profile-status', response.headers)
+
+    def test_sampled_requests_are_stored_and_rotated(self):
+        with tempfile.TemporaryDirectory() as directory:
+            app = _app(sample_every=2, directory=directory, max_files=2)
+            for _ in range(6):
+                self.assertEqual(_get(app).json(), {'response': 'ok'})
+                time.sleep(0.01)
+            files = os.listdir(directory)
+            self.assertEqual(len(files), 2)
+            with open(os.path.join(directory, files[0]), encoding='utf-8') as f:
+                self.assertEqual(json.load(f)['name'], 'GET /v1/slow')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+
+from app.query import ChatbotInput
+from app.query import ChatbotService
+from benchmarks.utils import make_settings
+from domain.retrieval import QueryRouter
+from domain.retrieval import RouteInput
+from domain.retrieval import ROUTE_HYBRID
+from domain.retrieval import ROUTE_SPARSE
+from infrastructure.qdrant import CANDIDATE_KEY
+from shared.metrics import metrics
+from tests.fakes import FAKE_DIM
+from tests.fakes import FakeEmbeddingService
+from tests.fakes import memory_qdrant
+
+CANDIDATE = "Nguyen Van A"
+CHUNKS = ["Kỹ năng: Kubernetes Docker Helm", "Học vấn: Đại học Bách khoa Hà Nội", "Kinh nghiệm: FPT Software"]
+
+class TestQueryRouting(unittest.TestCase):
+
+    def setUp(self):
+        metrics.reset()
+
+    def _service(self, routing_enabled: bool = True) -> ChatbotService:
+        settings = make_settings(
+            qdrant={"vector_size": FAKE_DIM, "name": "routing"},
+            retrieval={"top_k": 3, "routing_enabled": routing_enabled},
+        )
+        qdrant = memory_qdrant(settings, [
+            {"content": content, "metadata": {"Header_1": CANDIDATE, CANDIDATE_KEY: CANDIDATE}}
+            for content in CHUNKS
+        ])
+        service = ChatbotService(settings=settings)
+        service.__dict__["_get_embedding"] = FakeEmbeddingService(settings=settings)
+        service._get_retrieval.__dict__["_get_qdrant"] = qdrant
+        service._get_router.__dict__["_get_qdrant"] = qdrant
+        return service
+
+    def _dense_calls(self, service: ChatbotService) -> int:
+        return len(service._get_embedding.__dict__.get("batches", []))
+
+    def test_keyword_lookup_skips_dense_model(self):
+        service = self._service()
+        output = service._retrieve(ChatbotInput(query="Kubernetes", user_name=CANDIDATE))
+        self.assertIn("Kubernetes", output.context[0]["content"])
+        self.assertEqual(self._dense_calls(service), 0)
+        self.assertEqual(metrics.counter("query_route_sparse"), 1)
+
+    def test_question_uses_hybrid_search(self):
+        service = self._service()
+        output = service._retrieve(ChatbotInput(query="Ứng viên có biết Kubernetes không?", user_name=CANDIDATE))
+        self.assertTrue(output.context)
+        self.assertEqual(self._dense_calls(service), 1)
+        self.assertEqual(metrics.counter("query_route_hybrid"), 1)
+
+    def test_routing_disabled_always_uses_dense_model(self):
+        service = self._service(routing_enabled=False)
+        service._retrieve(ChatbotInput(query="Kubernetes", user_name=CANDIDATE))
+        self.assertEqual(self._dense_calls(service), 1)
+
+    def test_terms_missing_from_cv_use_hybrid_search(self):
+        service = self._service()
+        router: QueryRouter = service._get_router
+        sparse = FakeEmbeddingService(settings=service.settings)._get_sparse_embedding(["Haskell Erlang"])[0]
+        route = router.process(RouteInput(query="Haskell Erlang", sparse_query=sparse, user_name=CANDIDATE))
+        self.assertEqual(route.route, ROUTE_HYBRID)
+        self.assertEqual(route.overlap, 0.0)
+
+        sparse = FakeEmbeddingService(settings=service.settings)._get_sparse_embedding(["FPT Software"])[0]
+        route = router.process(RouteInput(query="FPT Software", sparse_query=sparse, user_name=CANDIDATE))
+        self.assertEqual(route.route, ROUTE_SPARSE)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from benchmarks.utils import make_settings
+from domain.indexing import EmbeddingInput
+from infrastructure.qdrant import CANDIDATE_KEY
+from infrastructure.qdrant import Qdrant
+from infrastructure.qdrant import QdrantInput
+from infrastructure.qdrant import REDUCED_VECTOR
+from shared.projection import DenseProjection
+from tests.fakes import FAKE_DIM
+from tests.fakes import FakeEmbeddingService
+from tests.fakes import memory_qdrant
+
+CANDIDATE = "Nguyen Van A"
+CHUNKS = [
+    {"content": content, "metadata": {"Header_1": CANDIDATE, CANDIDATE_KEY: CANDIDATE}}
+    for content in (
+        "Kubernetes Docker Helm", "Python FastAPI", "Đại học Bách khoa", "React TypeScript",
+        "PostgreSQL Redis", "Team lead of five engineers", "AWS Lambda S3", "Machine learning with PyTorch",
+    )
+]
+
+class TestDenseProjection(unittest.TestCase):
+
+    def test_fit_keeps_the_main_directions(self):
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((200, 3)) @ rng.standard_normal((3, 12)) + 0.01 * rng.standard_normal((200, 12))
+        projection = DenseProjection.fit(vectors, 3)
+
+        self.assertEqual((projection.dim, projection.reduced_dim), (12, 3))
+        self.assertGreater(projection.explained_variance(vectors), 0.99)
+        reduced = np.asarray(projection.project(vectors[:5]))
+        self.assertEqual(reduced.shape, (5, 3))
+        np.testing.assert_allclose(np.linalg.norm(reduced, axis=1), 1.0, rtol=1e-5)
+
+    def test_save_and_load(self):
+        projection = DenseProjection.fit(np.random.default_rng(0).standard_normal((20, 8)), 4)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "pca.npz")
+            projection.save(path)
+            loaded = DenseProjection.load(path)
+        np.testing.assert_array_equal(loaded.components, projection.components)
+        np.testing.assert_array_equal(loaded.mean, projection.mean)
+
+class TestReducedPrefetch(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "pca.npz")
+        self.settings = make_settings(
+            qdrant={"vector_size": FAKE_DIM, "name": "reduced_prefetch"},
+            retrieval={"top_k": 3},
+        )
+        self.embedding = FakeEmbeddingService(settings=self.settings)
+        dense, _ = self.embedding._encode([chunk["content"] for chunk in CHUNKS])
+        DenseProjection.fit(np.asarray(dense), 4).save(self.path)
+        self.settings.embedding.reduced_path = self.path
+
+    def test_chunks_are_stored_with_reduced_vectors(self):
+        output = self.embedding.process(EmbeddingInput(chunks=CHUNKS))
+        self.assertEqual(len(output.reduced_embeddings), len(CHUNKS))
+        self.assertEqual(len(output.reduced_embeddings[0]), 4)
+
+        qdrant = memory_qdrant(self.settings, CHUNKS)
+        self.assertIn(REDUCED_VECTOR, qdrant.collection.config.params.vectors)
+        points = qdrant.candidate_points(CANDIDATE)
+        self.assertEqual(len(points), len(CHUNKS))
+        # Reads of the vectors for the chunk cache and artifacts skip the reduced ones
+        self.assertNotIn(REDUCED_VECTOR, points[0].vector)
+
+    def test_prefetch_searches_reduced_vectors_and_rescores_full_ones(self):
+        qdrant = memory_qdrant(self.settings, CHUNKS)
+        dense, sparse = self.embedding._encode(["Python FastAPI"])
+        with mock.patch.object(qdrant.client, "query_points", wraps=qdrant.client.query_points) as query_points:
+            points = qdrant.query(dense[0], sparse, CANDIDATE, k=3).points
+        self.assertEqual(len(points), 3)
+        self.assertIn("Python FastAPI", [payload["content"] for payload in qdrant.payloads(points)])
+
+        dense_prefetch = query_points.call_args.kwargs["prefetch"][0].prefetch[0]
+        self.assertEqual(dense_prefetch.using, "dense")
+        self.assertEqual(dense_prefetch.prefetch[0].using, REDUCED_VECTOR)
+        self.assertEqual(dense_prefetch.prefetch[0].limit, dense_prefetch.limit * self.settings.qdrant.reduced_oversampling)
+
+    def test_collections_without_reduced_vectors_prefetch_full_ones(self):
+        settings = self.settings.model_copy(deep=True)
+        settings.embedding.reduced_path = None
+        qdrant = Qdrant(settings=self.settings)
+        qdrant.__dict__["client"] = memory_qdrant(settings, CHUNKS).client
+
+        prefetch = qdrant._dense_prefetch([0.0] * FAKE_DIM, 10)
+        self.assertEqual(prefetch.using, "dense")
+        self.assertIsNone(prefetch.prefetch)
+
+    def test_projection_follows_the_alias_target(self):
+        plain = self.settings.model_copy(deep=True)
+        plain.qdrant.name = "reduced_prefetch_v1"
+        plain.embedding.reduced_path = None
+        client = memory_qdrant(plain, CHUNKS).client
+        reduced = self.settings.model_copy(deep=True)
+        reduced.qdrant.name = "reduced_prefetch_v2"
+        version = Qdrant(settings=reduced)
+        version.__dict__["client"] = client
+        version.collection
+
+        qdrant = Qdrant(settings=self.settings)
+        qdrant.__dict__["client"] = client
+        dense, sparse = self.embedding._encode(["Python FastAPI"])
+        for target, using in (("reduced_prefetch_v2", REDUCED_VECTOR), ("reduced_prefetch_v1", "dense"), ("reduced_prefetch_v2", REDUCED_VECTOR)):
+            qdrant.point_alias(target)
+            prefetch = qdrant._dense_prefetch(dense[0], 10)
+            self.assertEqual((prefetch.prefetch or [prefetch])[0].using, using)
+
+        # Inserts through the alias carry the reduced vectors of the version it serves
+        output = self.embedding.process(EmbeddingInput(chunks=CHUNKS))
+        qdrant.insert(QdrantInput(
+            dense_embeddings=output.dense_embeddings,
+            sparse_embeddings=output.sparse_embeddings,
+            payload=output.metadata,
+        ))
+        points = qdrant.query(dense[0], sparse, CANDIDATE, k=3).points
+        self.assertIn("Python FastAPI", [payload["content"] for payload in qdrant.payloads(points)])
+        records, _ = client.scroll("reduced_prefetch_v2", with_vectors=True, limit=1)
+        self.assertIn(REDUCED_VECTOR, records[0].vector)
+
+    def test_alias_is_read_once_per_batch(self):
+        qdrant = memory_qdrant(self.settings, CHUNKS)
+        dense, sparse = self.embedding._encode(["Python FastAPI"] * 50)
+        # Read again by the first search, as after the TTL
+        qdrant._served.clear()
+        with mock.patch.object(qdrant.client, "get_aliases", wraps=qdrant.client.get_aliases) as get_aliases:
+            responses = qdrant.query_batch(dense, sparse, CANDIDATE, k=3)
+            qdrant.query(dense[0], sparse[:1], CANDIDATE, k=3)
+        self.assertEqual(len(responses), 50)
+        self.assertEqual(get_aliases.call_count, 1)
+
+if __name__ == "__main__":
+    unittest.main()
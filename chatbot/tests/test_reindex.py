@@ -0,0 +1,161 @@
+import os
+import tempfile
+import time
+import unittest
+import uuid
+from unittest import mock
+
+from app.reindex import ReindexService
+from benchmarks.utils import make_settings
+from infrastructure.chunk_store import get_chunk_store
+from infrastructure.qdrant import MEMORY_URL
+from infrastructure.qdrant import Qdrant
+from infrastructure.qdrant import QdrantInput
+from tests.fakes import FAKE_DIM
+from tests.fakes import FakeEmbeddingService
+
+CHUNKS = [
+    {'content': 'Nguyen Van A: Python and FastAPI', 'metadata': {'candidate': 'Nguyen Van A', 'Header_1': 'Nguyen Van A'}},
+    {'content': 'Nguyen Van A: five years of backend work', 'metadata': {'candidate': 'Nguyen Van A', 'Header_1': 'Nguyen Van A'}},
+    {'content': 'Tran Thi B: React and TypeScript', 'metadata': {'candidate': 'Tran Thi B', 'Header_1': 'Tran Thi B'}},
+]
+
+FAILING = 'Nguyen Van A: five years of backend work'
+
+class FailingEmbeddingService(FakeEmbeddingService):
+    """Fails to embed the `FAILING` chunk, as the model does on a bad input."""
+
+    def _get_embeddings_batch(self, texts):
+        vectors = super()._get_embeddings_batch(texts)
+        return [None if text == FAILING else vector for text, vector in zip(texts, vectors)]
+
+class TestReindex(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        # Every test gets its own names in the shared in-memory Qdrant
+        self.name = f'reindex_{uuid.uuid4().hex[:8]}'
+        self.settings = make_settings(
+            qdrant={'url': MEMORY_URL, 'vector_size': FAKE_DIM, 'name': self.name},
+            indexing={'convert_path': self.directory.name},
+            chunk_store={'enabled': True, 'backend': 'memory'},
+            reindex={'max_chunks_per_second': 0, 'batch_size': 2, 'keep_versions': 1},
+        )
+        self.embedding = FakeEmbeddingService(settings=self.settings)
+        self.live = Qdrant(settings=self.settings)
+        dense, sparse = self.embedding._encode([chunk['content'] for chunk in CHUNKS])
+        self.live.insert(QdrantInput(
+            dense_embeddings=dense,
+            sparse_embeddings=sparse,
+            payload=[{**chunk['metadata'], 'content': chunk['content']} for chunk in CHUNKS],
+        ))
+
+    def _service(self, **reindex) -> ReindexService:
+        settings = self.settings.model_copy(deep=True)
+        for key, value in reindex.items():
+            setattr(settings.reindex, key, value)
+        service = ReindexService(settings=settings)
+        service.__dict__['_get_embedding'] = self.embedding
+        return service
+
+    def _search(self, query: str, user_name: str):
+        dense, sparse = self.embedding._encode([query])
+        points = Qdrant(settings=self.settings).query(dense[0], sparse, user_name, k=5).points
+        return [payload['content'] for payload in Qdrant(settings=self.settings).payloads(points)]
+
+    def test_build_migrate_and_serve_through_the_alias(self):
+        service = self._service()
+        output = service.build('chunks')
+        self.assertEqual(output.collection, f'{self.name}_v1')
+        self.assertEqual((output.points, output.candidates, output.live_points), (3, 2, 3))
+        with self.assertRaises(ValueError):
+            service.switch(output.collection, live_points=output.live_points)
+
+        self.assertIsNone(service.switch(output.collection, migrate=True, live_points=output.live_points))
+        self.assertEqual(self.live.alias_target(), output.collection)
+        self.assertEqual(self.live.count(), 3)
+        self.assertIn('Tran Thi B: React and TypeScript', self._search('React', 'Tran Thi B'))
+
+    def test_switch_rollback_and_retention(self):
+        service = self._service()
+        service.process('chunks', migrate=True)
+        v2 = service.build('chunks').collection
+        self.assertEqual(service.switch(v2, force=True), f'{self.name}_v1')
+        self.assertEqual(service.rollback(), f'{self.name}_v1')
+        self.assertEqual(self.live.alias_target(), f'{self.name}_v1')
+        # A search still finds the chunk text shared with the dropped versions
+        self.assertIn('Nguyen Van A: Python and FastAPI', self._search('Python', 'Nguyen Van A'))
+
+        output = service.build('chunks')
+        v3 = output.collection
+        service.switch(v3, live_points=output.live_points)
+        # v2 is kept for rollback, v1 is dropped
+        self.assertEqual([name for _, name in service.versions()], [v2, v3])
+        self.assertEqual(service.status()['serving'], v3)
+        self.assertIn('Nguyen Van A: Python and FastAPI', self._search('Python', 'Nguyen Van A'))
+
+    def test_build_is_throttled(self):
+        started = time.perf_counter()
+        self._service(max_chunks_per_second=20).build('chunks')
+        self.assertGreaterEqual(time.perf_counter() - started, 0.14)
+
+    def test_missing_candidates_fail_the_build(self):
+        with open(os.path.join(self.directory.name, 'a.md'), 'w', encoding='utf-8') as f:
+            f.write('# Nguyen Van A\n\n## Skills\n\nPython, FastAPI and Qdrant.\n')
+        service = self._service()
+        with self.assertRaises(ValueError):
+            service.build('markdown')
+        self.assertEqual(service.versions(), [])
+
+        output = service.build('markdown', allow_missing_candidates=True)
+        self.assertEqual(output.candidates, 1)
+        ids = [str(point.id) for points, _ in self.live.scroll_all() for point in points]
+        service.switch(output.collection, migrate=True, live_points=output.live_points)
+        # The legacy collection's chunk text is gone with it
+        self.assertEqual(get_chunk_store(self.settings).get_many(ids), {})
+
+    def test_build_error_is_raised_when_the_cleanup_fails(self):
+        with open(os.path.join(self.directory.name, 'a.md'), 'w', encoding='utf-8') as f:
+            f.write('# Nguyen Van A\n\n## Skills\n\nPython, FastAPI and Qdrant.\n')
+        service = self._service()
+        with mock.patch.object(ReindexService, '_delete', side_effect=RuntimeError('Qdrant is unreachable')):
+            with self.assertRaisesRegex(ValueError, 'lacks 1 candidates'):
+                service.build('markdown')
+
+    def test_chunks_that_fail_to_embed_are_skipped(self):
+        service = self._service()
+        service.__dict__['_get_embedding'] = FailingEmbeddingService(settings=self.settings)
+        output = service.build('chunks')
+
+        self.assertEqual((output.points, output.skipped), (2, 1))
+        service.switch(output.collection, migrate=True, live_points=output.live_points)
+        self.assertEqual(self.live.count(), 2)
+        self.assertEqual(self._search('backend', 'Nguyen Van A'), ['Nguyen Van A: Python and FastAPI'])
+
+    def test_switch_is_refused_when_the_live_collection_changed(self):
+        service = self._service()
+        output = service.build('chunks')
+        ids = [str(point.id) for points, _ in self.live.scroll_all() for point in points]
+        content = 'Le Van C: Go and gRPC'
+        dense, sparse = self.embedding._encode([content])
+        self.live.insert(QdrantInput(
+            dense_embeddings=dense,
+            sparse_embeddings=sparse,
+            payload=[{'candidate': 'Le Van C', 'Header_1': 'Le Van C', 'content': content}],
+        ))
+
+        with self.assertRaises(ValueError):
+            service.switch(output.collection, migrate=True)
+        with self.assertRaises(ValueError):
+            service.switch(output.collection, migrate=True, live_points=output.live_points)
+        # Nothing was deleted, the CV indexed during the build is still served
+        self.assertIsNone(self.live.alias_target())
+        self.assertEqual(len(get_chunk_store(self.settings).get_many(ids)), len(ids))
+        self.assertIn(content, self._search('Go', 'Le Van C'))
+
+        service.switch(output.collection, migrate=True, force=True)
+        self.assertEqual(self.live.alias_target(), output.collection)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+from typing import List
+
+from app.query import ChatbotInput
+from app.query import ChatbotService
+from benchmarks.utils import make_settings
+from domain.indexing import EmbeddingInput
+from domain.retrieval import RerankerService
+from domain.retrieval import RerankInput
+from domain.retrieval import RetrievalBatchInput
+from infrastructure.qdrant import CANDIDATE_KEY
+from tests.fakes import FAKE_DIM
+from tests.fakes import FakeEmbeddingService
+from tests.fakes import memory_qdrant
+
+CANDIDATE = "Nguyen Van A"
+CHUNKS = [f"Dự án {i}: phát triển hệ thống nội bộ" for i in range(13)] + ["Triển khai Kubernetes và Helm cho hệ thống"]
+
+class FakeCrossEncoder:
+    """Scores a document by the number of query words it contains."""
+
+    def __init__(self):
+        self.calls: List[int] = []
+
+    def _scores(self, query: str, documents: List[str]) -> List[float]:
+        self.calls.append(len(documents))
+        words = set(query.casefold().split())
+        return [float(len(words & set(document.casefold().split()))) for document in documents]
+
+    def rerank(self, query: str, documents: List[str], batch_size: int = 16):
+        return iter(self._scores(query, documents))
+
+    def predict(self, pairs, batch_size: int = 16):
+        return self._scores(pairs[0][0], [document for _, document in pairs])
+
+class TestRerank(unittest.TestCase):
+
+    def _service(self, rerank_enabled: bool = True) -> ChatbotService:
+        settings = make_settings(
+            qdrant={"vector_size": FAKE_DIM, "name": "rerank"},
+            retrieval={"top_k": 3, "rerank_enabled": rerank_enabled, "rerank_candidates": 12, "rerank_top_n": 2},
+        )
+        qdrant = memory_qdrant(settings, [
+            {"content": content, "metadata": {"Header_1": CANDIDATE, CANDIDATE_KEY: CANDIDATE}}
+            for content in CHUNKS
+        ])
+        reranker = RerankerService(settings=settings)
+        reranker.__dict__["load_model"] = FakeCrossEncoder()
+        service = ChatbotService(settings=settings)
+        service.__dict__["_get_embedding"] = FakeEmbeddingService(settings=settings)
+        service._get_retrieval.__dict__["_get_qdrant"] = qdrant
+        service._get_retrieval.__dict__["_get_reranker"] = reranker
+        return service
+
+    def _model(self, service: ChatbotService) -> FakeCrossEncoder:
+        return service._get_retrieval._get_reranker.load_model
+
+    def test_reranks_wider_candidate_set(self):
+        service = self._service()
+        output = service._retrieve(ChatbotInput(query="Ứng viên có dùng Kubernetes và Helm không?", user_name=CANDIDATE))
+        self.assertEqual(len(output.context), 2)
+        self.assertIn("Kubernetes", output.context[0]["content"])
+        self.assertEqual(self._model(service).calls, [12])
+
+    def test_disabled_returns_top_k(self):
+        service = self._service(rerank_enabled=False)
+        output = service._retrieve(ChatbotInput(query="Kubernetes Helm", user_name=CANDIDATE))
+        self.assertEqual(len(output.context), 3)
+        self.assertEqual(self._model(service).calls, [])
+
+    def test_batch_reranks_each_query(self):
+        service = self._service()
+        queries = ["Kubernetes Helm", "Dự án nội bộ"]
+        embedding = service._get_embedding.process(EmbeddingInput(queries=queries))
+        outputs = service._get_retrieval.process_batch(RetrievalBatchInput(
+            dense_queries=embedding.dense_embeddings,
+            sparse_queries=embedding.sparse_embeddings,
+            user_name=CANDIDATE,
+            queries=queries,
+        ))
+        self.assertEqual([len(output.context) for output in outputs], [2, 2])
+        self.assertIn("Kubernetes", outputs[0].context[0]["content"])
+        self.assertEqual(self._model(service).calls, [12, 12])
+
+    def test_sentence_transformers_backend(self):
+        settings = make_settings(retrieval={"top_k": 3, "rerank_backend": "sentence_transformers"})
+        reranker = RerankerService(settings=settings)
+        reranker.__dict__["load_model"] = FakeCrossEncoder()
+        output = reranker.process(RerankInput(
+            query="python",
+            context=[{"content": "java"}, {"content": "python"}, {"content": "go"}],
+            top_n=1,
+        ))
+        self.assertEqual(output.context, [{"content": "python"}])
+        self.assertEqual(output.scores, [1.0])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import asyncio
+import unittest
+
+from shared.single_flight import SingleFlight
+
+class TestSingleFlight(unittest.TestCase):
+
+    def test_do_coalesces_concurrent_calls(self):
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "answer"
+
+        async def run():
+            flights = SingleFlight()
+            return await asyncio.gather(*(flights.do("key", work) for _ in range(5)))
+
+        results = asyncio.run(run())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([result for result, _ in results], ["answer"] * 5)
+        self.assertEqual([shared for _, shared in results], [False, True, True, True, True])
+
+    def test_do_runs_again_after_completion(self):
+        calls = []
+
+        async def work():
+            calls.append(1)
+            return len(calls)
+
+        async def run():
+            flights = SingleFlight()
+            first, _ = await flights.do("key", work)
+            second, _ = await flights.do("key", work)
+            return first, second
+
+        self.assertEqual(asyncio.run(run()), (1, 2))
+
+    def test_do_shares_errors(self):
+        async def work():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        async def run():
+            flights = SingleFlight()
+            return await asyncio.gather(*(flights.do("key", work) for _ in range(3)), return_exceptions=True)
+
+        self.assertTrue(all(isinstance(result, ValueError) for result in asyncio.run(run())))
+
+    def test_stream_replays_to_late_joiners(self):
+        calls = []
+
+        async def tokens():
+            calls.append(1)
+            for token in ["Xin", " chào", " bạn"]:
+                await asyncio.sleep(0.02)
+                yield token
+
+        async def consume(flights, delay):
+            await asyncio.sleep(delay)
+            stream, shared = flights.stream("key", tokens)
+            return "".join([token async for token in stream]), shared
+
+        async def run():
+            flights = SingleFlight()
+            return await asyncio.gather(consume(flights, 0), consume(flights, 0.03))
+
+        results = asyncio.run(run())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [("Xin chào bạn", False), ("Xin chào bạn", True)])
+
+if __name__ == '__main__':
+    unittest.main()
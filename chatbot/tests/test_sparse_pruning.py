@@ -0,0 +1,51 @@
+import unittest
+from unittest import mock
+
+from qdrant_client.http import models
+
+from benchmarks.utils import make_settings
+from domain.indexing import EmbeddingInput
+from infrastructure.qdrant import Qdrant
+from shared.sparse_embedding import SparseEmbeddingData
+from shared.sparse_embedding import prune_sparse
+from tests.fakes import FAKE_DIM
+from tests.fakes import FakeEmbeddingService
+
+class TestSparsePruning(unittest.TestCase):
+
+    def test_prune_keeps_the_largest_weights_in_index_order(self):
+        vector = SparseEmbeddingData(indices=[3, 7, 11, 20], values=[0.2, 0.9, 0.01, 0.5])
+
+        self.assertEqual(prune_sparse(vector, top_k=2), SparseEmbeddingData(indices=[7, 20], values=[0.9, 0.5]))
+        self.assertEqual(prune_sparse(vector, min_weight=0.1).indices, [3, 7, 20])
+        self.assertEqual(prune_sparse(vector, top_k=1, min_weight=0.95).indices, [])
+        self.assertEqual(prune_sparse(vector), vector)
+
+    def test_chunks_and_queries_use_their_own_pruning(self):
+        settings = make_settings(
+            qdrant={"vector_size": FAKE_DIM},
+            embedding={"sparse_top_k": 3, "sparse_query_top_k": 1},
+        )
+        embedding = FakeEmbeddingService(settings=settings)
+        text = "Python FastAPI Docker Kubernetes Helm"
+
+        chunks = embedding.process(EmbeddingInput(chunks=[{"content": text, "metadata": {}}]))
+        query = embedding.process(EmbeddingInput(query=text))
+        self.assertEqual(len(chunks.sparse_embeddings[0].indices), 3)
+        self.assertEqual(len(query.sparse_embeddings[0].indices), 1)
+
+    def test_sparse_index_follows_the_settings(self):
+        settings = make_settings(qdrant={"vector_size": FAKE_DIM, "name": "sparse_index", "profile": "low_memory", "sparse_idf": True})
+        qdrant = Qdrant(settings=settings)
+        client = mock.MagicMock()
+        client.collection_exists.return_value = False
+        client.get_aliases.return_value.aliases = []
+        qdrant.__dict__["client"] = client
+        qdrant.collection
+
+        sparse = client.create_collection.call_args.kwargs["sparse_vectors_config"]["sparse"]
+        self.assertTrue(sparse.index.on_disk)
+        self.assertEqual(sparse.modifier, models.Modifier.IDF)
+
+if __name__ == "__main__":
+    unittest.main()
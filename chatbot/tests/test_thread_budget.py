@@ -0,0 +1,43 @@
+import os
+import unittest
+from unittest import mock
+
+from benchmarks.utils import make_settings
+from shared.thread_budget import thread_budget
+from shared.thread_budget import apply_thread_budget
+from shared.thread_budget import compute_thread_budget
+
+class TestThreadBudget(unittest.TestCase):
+    def test_cores_are_split_across_workers_and_slots(self):
+        settings = make_settings(
+            threads={'cores': 16, 'workers': 4},
+            admission={'embedding_concurrency': 2, 'conversion_concurrency': 1},
+        )
+        budget = compute_thread_budget(settings)
+        self.assertEqual(budget.torch_threads, 2)
+        self.assertEqual(budget.onnx_threads, 2)
+        self.assertEqual(budget.ocr_threads, 4)
+
+    def test_explicit_threads_win(self):
+        settings = make_settings(threads={'cores': 16, 'workers': 4, 'torch_threads': 3, 'ocr_threads': 1})
+        budget = compute_thread_budget(settings)
+        self.assertEqual(budget.torch_threads, 3)
+        self.assertEqual(budget.ocr_threads, 1)
+
+    def test_never_below_one_thread(self):
+        settings = make_settings(threads={'cores': 2, 'workers': 8})
+        budget = compute_thread_budget(settings)
+        self.assertEqual((budget.torch_threads, budget.onnx_threads, budget.ocr_threads), (1, 1, 1))
+
+    def test_disabled_admission_gives_whole_worker_share(self):
+        settings = make_settings(threads={'cores': 8, 'workers': 2}, admission={'enabled': False})
+        self.assertEqual(compute_thread_budget(settings).torch_threads, 4)
+
+    @mock.patch.dict(os.environ)
+    @mock.patch.object(thread_budget, '_budget', None)
+    def test_apply_exports_openmp_threads(self):
+        apply_thread_budget(make_settings(threads={'cores': 8, 'workers': 4}, admission={'enabled': False}))
+        self.assertEqual(os.environ['OMP_NUM_THREADS'], '2')
+
+if __name__ == "__main__":
+    unittest.main()
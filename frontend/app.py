@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import time
+import uuid
 
 import requests  # type: ignore
 import streamlit as st
@@ -13,6 +14,8 @@ def init_session_state():
         st.session_state.candidate_name = ''
     if 'name_confirmed' not in st.session_state:
         st.session_state.name_confirmed = False
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = str(uuid.uuid4())
 
 
 init_session_state()
@@ -28,6 +31,8 @@ name_input = st.sidebar.text_input(
 
 if st.sidebar.button('OK'):
     if name_input.strip():
+        if st.session_state.candidate_name != name_input.strip():
+            st.session_state.session_id = str(uuid.uuid4())
         st.session_state.candidate_name = name_input.strip()
         st.session_state.name_confirmed = True
         st.sidebar.success(
@@ -71,6 +76,7 @@ if st.button('Gửi'):
         payload = {
             'query': user_question,
             'user_name': st.session_state.candidate_name,
+            'session_id': st.session_state.session_id,
         }
 
         try: